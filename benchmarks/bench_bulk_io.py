@@ -0,0 +1,70 @@
+"""Benchmark: streaming import/export throughput for creatives.
+
+Writes a JSONL and a CSV file (plain and gzipped) of generated creatives,
+then times ``bulk_io.import_file`` into a fresh database and
+``bulk_io.export_file`` back out. The import target is 50k rows/s. On a
+single-core box, 200k rows best of 3, imports run at 31-34k rows/s. The
+target is missed: see the bulk_io docstring for where the time goes.
+
+Usage: python benchmarks/bench_bulk_io.py [--rows 500000] [--chunk-size 20000] [--runs 3]
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.bulk_io import DEFAULT_CHUNK_SIZE, export_file, import_file, write_records
+from dreamtraffic.db.migrations import init_db
+
+
+def _records(n: int):
+    for i in range(n):
+        yield {
+            "campaign_id": 1 + i % 20,
+            "name": f"Spring Launch — variant {i}",
+            "prompt": "A cinematic drone shot over a coastline at golden hour",
+            "video_url": f"https://cdn.luma.example/{i}.mp4",
+            "duration_seconds": 15 if i % 2 else 30,
+            "placement_type": "stv" if i % 3 == 0 else "olv",
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--runs", type=int, default=3, help="Best of this many runs")
+    args = parser.parse_args()
+
+    print(f"{args.rows:,} creatives, {args.chunk_size:,} rows per commit, best of {args.runs}\n")
+    print(f"{'file':<22}{'import rows/s':>16}{'export rows/s':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("creatives.jsonl", "creatives.jsonl.gz", "creatives.csv", "creatives.csv.gz"):
+            source = Path(tmp) / name
+            write_records(_records(args.rows), source)
+
+            imported = exported = 0.0
+            for run in range(args.runs):
+                db_path = Path(tmp) / f"{run}-{name}.db"
+                init_db(db_path)
+                engine.configure_pool(db_path)
+                engine.executemany("INSERT INTO campaigns (name) VALUES (?)", [(f"C{i}",) for i in range(20)])
+
+                start = time.perf_counter()
+                result = import_file("creatives", source, chunk_size=args.chunk_size)
+                imported = max(imported, result.rows / (time.perf_counter() - start))
+
+                start = time.perf_counter()
+                count = export_file("creatives", Path(tmp) / f"out-{name}")
+                exported = max(exported, count / (time.perf_counter() - start))
+                engine.close_pools()
+                db_path.unlink()
+            print(f"{name:<22}{imported:>16,.0f}{exported:>16,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: trafficking_records inserts/sec, per-statement commits vs. one transaction.
+
+Usage: python benchmarks/bench_db_writes.py [--rows 10000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.migrations import init_db
+
+INSERT = """INSERT INTO trafficking_records
+   (creative_id, dsp, dsp_creative_id, dsp_asset_id, vast_url,
+    audit_status, placement_type, request_payload, response_payload)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+def _rows(n: int) -> list[tuple]:
+    payload = json.dumps({"advertiserId": "ADV_DEMO", "duration": 30, "vastTagUrl": "https://vast.example/1"})
+    return [
+        (1, "amazon", f"amzn-cr-{i:08d}", f"amzn-asset-{i:08d}", "https://vast.example/1",
+         "pending", "olv", payload, payload)
+        for i in range(n)
+    ]
+
+
+def _setup(db_path: Path) -> None:
+    init_db(db_path)
+    engine.configure_pool(db_path)
+    engine.execute("INSERT INTO campaigns (id, name) VALUES (1, 'Bench')")
+    engine.execute("INSERT INTO creatives (id, campaign_id, name) VALUES (1, 1, 'Bench')")
+
+
+def bench_per_statement(rows: list[tuple]) -> float:
+    start = time.perf_counter()
+    for row in rows:
+        engine.execute(INSERT, row)
+    return time.perf_counter() - start
+
+
+def bench_transaction(rows: list[tuple]) -> float:
+    start = time.perf_counter()
+    with engine.transaction():
+        for row in rows:
+            engine.execute(INSERT, row)
+    return time.perf_counter() - start
+
+
+def bench_executemany(rows: list[tuple]) -> float:
+    start = time.perf_counter()
+    engine.executemany(INSERT, rows)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000)
+    args = parser.parse_args()
+    rows = _rows(args.rows)
+
+    print(f"{'mode':<28}{'seconds':>10}{'inserts/sec':>14}")
+    for label, fn in [
+        ("commit per statement", bench_per_statement),
+        ("transaction()", bench_transaction),
+        ("executemany()", bench_executemany),
+    ]:
+        with tempfile.TemporaryDirectory() as tmp:
+            _setup(Path(tmp) / "bench.db")
+            elapsed = fn(rows)
+            engine.close_pools()
+        print(f"{label:<28}{elapsed:>10.3f}{len(rows) / elapsed:>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: peak memory scanning trafficking_records, fetch_all vs. fetch_iter.
+
+Usage: python benchmarks/bench_fetch_iter.py [--rows 1000000] [--arraysize 500]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Iterable
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.migrations import init_db
+from dreamtraffic.db.models import TraffickingRecord
+
+INSERT = """INSERT INTO trafficking_records
+   (creative_id, dsp, dsp_creative_id, dsp_asset_id, vast_url,
+    audit_status, placement_type, request_payload, response_payload)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+SCAN = "SELECT * FROM trafficking_records ORDER BY id"
+
+
+def _setup(db_path: Path, n: int) -> None:
+    init_db(db_path)
+    engine.configure_pool(db_path)
+    engine.execute("INSERT INTO campaigns (id, name) VALUES (1, 'Bench')")
+    engine.execute("INSERT INTO creatives (id, campaign_id, name) VALUES (1, 1, 'Bench')")
+    payload = json.dumps({"advertiserId": "ADV_DEMO", "duration": 30})
+    engine.executemany(INSERT, (
+        (1, "amazon", f"amzn-cr-{i:08d}", f"amzn-asset-{i:08d}", "https://vast.example/1",
+         "pending", "olv", payload, payload)
+        for i in range(n)
+    ))
+
+
+def _measure(scan: Callable[[], Iterable]) -> tuple[float, int, int]:
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = 0
+    for _ in scan():
+        count += 1
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--arraysize", type=int, default=engine.DEFAULT_ARRAYSIZE)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _setup(Path(tmp) / "bench.db", args.rows)
+        print(f"{'mode':<32}{'seconds':>10}{'peak MiB':>12}{'rows':>12}")
+        for label, scan in [
+            ("fetch_all() dicts", lambda: engine.fetch_all(SCAN)),
+            ("fetch_iter() dicts", lambda: engine.fetch_iter(SCAN, arraysize=args.arraysize)),
+            ("fetch_iter(model=...)", lambda: engine.fetch_iter(
+                SCAN, arraysize=args.arraysize, model=TraffickingRecord)),
+        ]:
+            elapsed, peak, count = _measure(scan)
+            print(f"{label:<32}{elapsed:>10.3f}{peak / 2**20:>12.1f}{count:>12,}")
+        engine.close_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: wall time of a batch of generations through AsyncLumaClient.generate_many.
+
+Runs ``--variants`` placement variants against the local Luma stand-in, each
+taking a random render time in ``[--min-render, --max-render]`` seconds,
+and compares the batch wall time with the slowest single render and with
+the sum a one-at-a-time loop would take.
+
+The stand-in has no rate limit, so the client runs unthrottled here rather
+than paced by the shared ``LumaScheduler`` (see ``bench_luma_scheduler.py``).
+Waits go through the client's ``GenerationPoller``, which first checks at
+``--min-render`` and caps the gap between checks at ``--max-interval``. Stand-in and client share this process, so
+very short poll intervals make the run CPU-bound on small machines; the
+defaults model real render times.
+
+Usage: python benchmarks/bench_luma_batch.py [--variants 200] [--max-concurrency 200]
+       [--min-render 10] [--max-render 30] [--max-interval 5]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from dreamtraffic.luma.async_client import AsyncLumaClient
+from dreamtraffic.luma.cache import GenerationRequest
+from dreamtraffic.luma.scheduler import LumaScheduler
+from dreamtraffic.luma.stand_in import LumaStandIn
+
+PLACEMENTS = [("olv", "16:9"), ("stv", "16:9"), ("vertical", "9:16"), ("square", "1:1")]
+
+
+async def run(server: LumaStandIn, requests: list[GenerationRequest], args: argparse.Namespace) -> float:
+    start = time.perf_counter()
+    unthrottled = LumaScheduler(create_rate=0, get_rate=0)
+    async with AsyncLumaClient(api_key="bench", base_url=server.url, use_cache=False, scheduler=unthrottled,
+                               poller_options={"max_interval": args.max_interval, "write_back": False,
+                                               "render_seconds": {"ray2": args.min_render}}) as client:
+        results = [r async for r in client.generate_many(requests, max_concurrency=args.max_concurrency)]
+    elapsed = time.perf_counter() - start
+    assert all(r.ok for r in results), [r.error for r in results if not r.ok][:3]
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", type=int, default=200)
+    parser.add_argument("--max-concurrency", type=int, default=200)
+    parser.add_argument("--min-render", type=float, default=10.0)
+    parser.add_argument("--max-render", type=float, default=30.0)
+    parser.add_argument("--max-interval", type=float, default=5.0, help="Longest gap between polls (s)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    renders = {}
+    requests = []
+    for i in range(args.variants):
+        placement, aspect = PLACEMENTS[i % len(PLACEMENTS)]
+        request = GenerationRequest.normalized(f"Spring launch, {placement} variant {i}", aspect_ratio=aspect)
+        renders[request.prompt] = rng.uniform(args.min_render, args.max_render)
+        requests.append(request)
+
+    with LumaStandIn(render_seconds=lambda body: renders[body["prompt"]]) as server:
+        elapsed = asyncio.run(run(server, requests, args))
+        print(f"{args.variants} variants, max_concurrency={args.max_concurrency}")
+        print(f"  batch wall time   {elapsed:8.2f}s")
+        print(f"  slowest render    {max(renders.values()):8.2f}s")
+        print(f"  sum of renders    {sum(renders.values()):8.2f}s  (one at a time)")
+        print(f"  HTTP requests     {sum(server.requests.values()):8,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark: polling many pending generations — a sleep loop per generation vs GenerationPoller.
+
+Starts ``--generations`` generations on the local Luma stand-in with render
+times in ``[--min-render, --max-render]`` seconds and waits for all of them
+twice: with the old pattern (one thread per generation calling
+``generations.get`` every ``--interval`` seconds) and with one shared
+``GenerationPoller``. Reports status requests, peak threads, and the time
+from start to the last result. Times are scaled down from real renders.
+
+Usage: python benchmarks/bench_luma_poller.py [--generations 200] [--min-render 4]
+       [--max-render 12] [--interval 1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import threading
+import time
+
+from lumaai import LumaAI
+
+from dreamtraffic.luma.poller import GenerationPoller
+from dreamtraffic.luma.stand_in import LumaStandIn
+
+
+def start_all(sdk: LumaAI, renders: list[float]) -> list[str]:
+    return [sdk.generations.create(prompt=f"Variant {i} {r}", model="ray2").id for i, r in enumerate(renders)]
+
+
+class PeakThreads:
+    def __init__(self) -> None:
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(0.05):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "PeakThreads":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def loop_per_generation(sdk: LumaAI, ids: list[str], interval: float) -> None:
+    def poll(generation_id: str) -> None:
+        while sdk.generations.get(id=generation_id).state not in ("completed", "failed"):
+            time.sleep(interval)
+
+    threads = [threading.Thread(target=poll, args=(g,)) for g in ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def shared_poller(sdk: LumaAI, ids: list[str], started_at: float, args: argparse.Namespace) -> None:
+    with GenerationPoller(
+        lambda generation_id: sdk.generations.get(id=generation_id),
+        min_interval=args.interval / 2, max_interval=args.interval * 3,
+        render_seconds={"ray2": args.min_render}, write_back=False,
+    ) as poller:
+        futures = [poller.watch(g, model="ray2", started_at=started_at) for g in ids]
+        for f in futures:
+            f.result()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--generations", type=int, default=200)
+    parser.add_argument("--min-render", type=float, default=4.0)
+    parser.add_argument("--max-render", type=float, default=12.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="Fixed poll interval of the old loop (s)")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    renders = [round(rng.uniform(args.min_render, args.max_render), 2) for _ in range(args.generations)]
+
+    print(f"{args.generations} generations, renders {args.min_render}-{args.max_render}s "
+          f"(slowest {max(renders):.2f}s)")
+    for label in ("loop per generation", "GenerationPoller"):
+        with LumaStandIn(render_seconds=lambda body: float(body["prompt"].split()[-1])) as server:
+            sdk = LumaAI(auth_token="bench", base_url=server.url)
+            start = time.monotonic()
+            ids = start_all(sdk, renders)
+            server.requests.clear()
+            with PeakThreads() as threads:
+                if label == "GenerationPoller":
+                    shared_poller(sdk, ids, start, args)
+                else:
+                    loop_per_generation(sdk, ids, args.interval)
+            elapsed = time.monotonic() - start
+            print(f"  {label:<20}  {server.requests.get('GET', 0):6,} status requests  "
+                  f"{threads.peak:4} peak threads  {elapsed:6.2f}s to last result")
+            sdk.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark: one 8 KB-chunk stream vs the ranged download engine.
+
+Serves a ``--size-mb`` file from the local media stand-in, throttled to
+``--throttle-mb`` MB/s per connection (a CDN edge shaping each stream), and
+downloads it with the previous ``httpx.stream`` loop (then hashing it) and
+with ``Downloader`` at several segment counts (hashing while streaming).
+
+Usage: python benchmarks/bench_media_download.py [--size-mb 64] [--throttle-mb 16]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import httpx
+
+from dreamtraffic.media.download import Downloader
+from dreamtraffic.media.stand_in import MediaStandIn
+
+
+def single_stream(url: str, dest: Path) -> str:
+    with httpx.stream("GET", url) as resp:
+        resp.raise_for_status()
+        with open(dest, "wb") as f:
+            for chunk in resp.iter_bytes(chunk_size=8192):
+                f.write(chunk)
+    sha = hashlib.sha256()
+    with open(dest, "rb") as f:
+        while block := f.read(1 << 20):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--throttle-mb", type=float, default=16.0, help="Per-connection cap (MB/s); 0 = none")
+    args = parser.parse_args()
+
+    data = os.urandom(args.size_mb << 20)
+    digest = hashlib.sha256(data).hexdigest()
+    with MediaStandIn(throttle=args.throttle_mb * (1 << 20)) as cdn, tempfile.TemporaryDirectory() as tmp:
+        url = cdn.add("spot.mp4", data)
+        shaping = f"{args.throttle_mb} MB/s per connection" if args.throttle_mb else "unthrottled"
+        print(f"{args.size_mb} MB file, {shaping}")
+
+        start = time.perf_counter()
+        assert single_stream(url, Path(tmp) / "single.mp4") == digest
+        baseline = time.perf_counter() - start
+        print(f"  httpx.stream, 8 KB chunks   {baseline:6.2f}s  {args.size_mb / baseline:7.1f} MB/s")
+
+        for segments in (1, 4, 8):
+            with Downloader(segments=segments, connections=threading.BoundedSemaphore(segments + 1)) as d:
+                start = time.perf_counter()
+                result = d.download(url, Path(tmp) / f"ranged{segments}.mp4", expected_sha256=digest)
+                elapsed = time.perf_counter() - start
+            print(f"  Downloader, {result.segments} segment(s)    {elapsed:6.2f}s  "
+                  f"{args.size_mb / elapsed:7.1f} MB/s  ({baseline / elapsed:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
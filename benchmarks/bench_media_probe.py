@@ -0,0 +1,94 @@
+"""Benchmark: probing MP4 metadata by reading the whole file vs the memory-mapped box walk.
+
+Writes a ``--size-mb`` MP4 (an ``mdat`` of zeros plus a real ``moov``) with
+``moov`` at the end, as encoders produce without fast-start, and at the
+front. Times ``probe`` over ``--runs`` calls against a baseline that reads
+the file into memory before walking the same boxes.
+
+Usage: python benchmarks/bench_media_probe.py [--size-mb 500] [--runs 200]
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import struct
+import tempfile
+import time
+from pathlib import Path
+
+from dreamtraffic.media.probe import probe
+
+
+def box(kind: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def moov(seconds: int = 30) -> bytes:
+    mvhd = box(b"mvhd", bytes(12), struct.pack(">II", 1000, seconds * 1000), bytes(80))
+    tkhd = box(b"tkhd", bytes(80), struct.pack(">II", 1920 << 16, 1080 << 16))
+    entry = box(b"avc1", bytes(6), b"\0\1", bytes(16), struct.pack(">HH", 1920, 1080), bytes(50))
+    stsd = box(b"stsd", bytes(4), struct.pack(">I", 1), entry)
+    hdlr = box(b"hdlr", bytes(8), b"vide", bytes(13))
+    return box(b"moov", mvhd, box(b"trak", tkhd, box(b"mdia", hdlr, box(b"minf", box(b"stbl", stsd)))))
+
+
+def write_mp4(path: Path, size: int, moov_first: bool) -> None:
+    block = bytes(8 << 20)
+    with open(path, "wb") as f:
+        f.write(box(b"ftyp", b"isom", bytes(4)))
+        if moov_first:
+            f.write(moov())
+        f.write(struct.pack(">I4sQ", 1, b"mdat", size + 16))
+        for offset in range(0, size, len(block)):
+            f.write(block[: min(len(block), size - offset)])
+        if not moov_first:
+            f.write(moov())
+
+
+def read_whole(path: Path) -> float:
+    """The baseline: load every byte, then find moov/mvhd in memory."""
+    data = path.read_bytes()
+    pos = 0
+    while pos < len(data):
+        size, kind = struct.unpack_from(">I4s", data, pos)
+        if size == 1:
+            (size,) = struct.unpack_from(">Q", data, pos + 8)
+        if kind == b"moov":
+            timescale, duration = struct.unpack_from(">II", data, pos + 8 + 8 + 12)
+            return duration / timescale
+        pos += size
+    raise ValueError("no moov")
+
+
+def timed(fn, path: Path, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(path)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for layout, moov_first in (("moov at end", False), ("fast-start", True)):
+            path = Path(tmp) / "spot.mp4"
+            write_mp4(path, args.size_mb << 20, moov_first)
+            info = probe(path)
+            assert (info.width, info.height, info.duration) == (1920, 1080, 30.0)
+            whole = timed(read_whole, path, max(args.runs // 50, 3))
+            mapped = timed(probe, path, args.runs)
+            print(f"{args.size_mb} MB, {layout:<12}  read whole file {whole:9.2f} ms   "
+                  f"probe {mapped:6.3f} ms   ({whole / mapped:,.0f}x)")
+            path.unlink()
+
+
+if __name__ == "__main__":
+    main()
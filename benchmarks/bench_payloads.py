@@ -0,0 +1,107 @@
+"""Benchmark: database size and scan speed, plain-text vs. compressed payloads.
+
+Fills trafficking_records with adapter payloads stored as plain JSON text (the
+pre-migration-5 format), measures, then compresses them in place with
+``payloads.compress_existing`` and VACUUMs before measuring again.
+
+Usage: python benchmarks/bench_payloads.py [--rows 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from itertools import cycle, islice
+from pathlib import Path
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.migrations import init_db
+from dreamtraffic.db.payloads import compress_existing
+from dreamtraffic.dsp import get_adapter
+
+INSERT = """INSERT INTO trafficking_records
+   (creative_id, dsp, dsp_creative_id, dsp_asset_id, vast_url,
+    audit_status, placement_type, request_payload, response_payload)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+# Full scans that never touch the payload columns
+SCANS = {
+    "count by placement": "SELECT placement_type, COUNT(*) FROM trafficking_records GROUP BY placement_type",
+    "audit status filter": "SELECT id, dsp_creative_id FROM trafficking_records WHERE audit_status = 'approved'",
+}
+
+DSPS = ["amazon", "thetradedesk", "dv360", "stackadapt", "adelphic"]
+
+
+def _sample_rows(n: int) -> list[tuple]:
+    rows = []
+    for i in range(n):
+        result = get_adapter(DSPS[i % len(DSPS)]).upload_creative(
+            video_url=f"https://cdn.luma.example/{i}.mp4",
+            vast_url=f"https://vast.dreamtraffic.demo/inline/{i}",
+            duration_seconds=15, width=1920, height=1080,
+            placement_type="olv", campaign_name=f"Campaign {i % 50}",
+        )
+        rows.append((
+            1, result.dsp, result.creative_id, result.asset_id, result.vast_url,
+            result.audit_status, result.placement_type,
+            json.dumps(result.request_payload), json.dumps(result.response_payload),
+        ))
+    return rows
+
+
+def _measure(db_path: Path) -> dict[str, float]:
+    results = {"size MiB": db_path.stat().st_size / 2**20}
+    with engine.connection() as conn:
+        results["table pages"] = conn.execute(
+            "SELECT COUNT(*) FROM dbstat WHERE name = 'trafficking_records'"
+        ).fetchone()[0]
+        for label, sql in SCANS.items():
+            conn.execute(sql).fetchall()  # warm the page cache
+            timings = []
+            for _ in range(5):
+                start = time.perf_counter()
+                conn.execute(sql).fetchall()
+                timings.append(time.perf_counter() - start)
+            results[label] = min(timings)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        init_db(db_path)
+        engine.configure_pool(db_path)
+        engine.execute("INSERT INTO campaigns (id, name) VALUES (1, 'Bench')")
+        engine.execute("INSERT INTO creatives (id, campaign_id, name) VALUES (1, 1, 'Bench')")
+        # Distinct payloads for a sample, cycled to the requested row count
+        engine.executemany(INSERT, islice(cycle(_sample_rows(min(args.rows, 5000))), args.rows))
+        engine.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        before = _measure(db_path)
+
+        start = time.perf_counter()
+        with engine.transaction() as conn:
+            compress_existing(conn)
+        convert = time.perf_counter() - start
+        engine.execute("VACUUM")
+        engine.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        after = _measure(db_path)
+        engine.close_pools()
+
+    print(f"{args.rows:,} rows; in-place conversion took {convert:.1f}s\n")
+    print(f"{'':<24}{'plain text':>14}{'compressed':>14}")
+    for key in before:
+        if key in SCANS:
+            print(f"{key + ' s':<24}{before[key]:>14.3f}{after[key]:>14.3f}")
+        else:
+            print(f"{key:<24}{before[key]:>14,.1f}{after[key]:>14,.1f}")
+
+
+if __name__ == "__main__":
+    main()
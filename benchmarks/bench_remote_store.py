@@ -0,0 +1,74 @@
+"""Benchmark: tool-layer writes/sec through RemoteStore against the local PostgREST stand-in.
+
+Compares unbatched writes (batch_size=1, one HTTP round trip per row) with
+batched bulk upserts, driving the ``traffic_creative`` MCP tool handler from
+``--workers`` concurrent threads. Batches go out when full or after
+``--flush-interval`` seconds; the timer stops once the last row is stored.
+
+Usage: python benchmarks/bench_remote_store.py [--calls 2000] [--workers 16]
+       [--flush-interval 0.05] [--latency 0.002]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.postgrest_stand_in import PostgRESTStandIn
+from dreamtraffic.db.remote_store import RemoteStore
+from dreamtraffic.tools.trafficking import traffic_creative
+
+# VAST-only DSPs: the benchmark measures store writes, not video downloads
+DSPS = ["thetradedesk", "stackadapt", "adelphic"]
+
+
+async def _drive(calls: int, creative_id: int) -> None:
+    with supabase_client.request_scope():
+        for i in range(calls):
+            await traffic_creative.handler({"creative_id": creative_id, "dsp": DSPS[i % len(DSPS)]})
+
+
+def run(calls: int, workers: int, batch_size: int, flush_interval: float, latency: float) -> tuple[float, int]:
+    with PostgRESTStandIn(latency=latency) as server:
+        store = RemoteStore(
+            server.url, batch_size=batch_size, flush_interval=flush_interval, max_connections=workers,
+        )
+        campaign = store.insert_campaign(name="Bench")
+        creative = store.insert_creative(
+            campaign_id=campaign["id"], name="Bench", approval_status="approved",
+            video_url="https://cdn.luma.example/bench.mp4", vast_url="https://vast.example/1",
+        )
+        previous = supabase_client.set_backend(store)
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(workers) as pool:
+                shares = [calls // workers + (i < calls % workers) for i in range(workers)]
+                list(pool.map(lambda n: asyncio.run(_drive(n, creative["id"])), shares))
+            store.flush()
+            elapsed = time.perf_counter() - start
+        finally:
+            supabase_client.set_backend(previous)
+            store.close()
+        assert len(server.tables["trafficking_records"]) == calls
+        return elapsed, sum(server.requests.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--flush-interval", type=float, default=0.05)
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated server latency (s)")
+    args = parser.parse_args()
+
+    print(f"{'mode':<24}{'seconds':>10}{'writes/sec':>14}{'requests':>10}")
+    for label, batch_size in [("unbatched", 1), ("batched (500)", 500)]:
+        elapsed, requests = run(args.calls, args.workers, batch_size, args.flush_interval, args.latency)
+        print(f"{label:<24}{elapsed:>10.3f}{args.calls / elapsed:>14,.0f}{requests:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark: full-text search latency over generated creative prompts.
+
+Bulk-loads ``--rows`` creatives with prompts drawn from a small vocabulary
+(so common words match a large share of rows), then times
+``search.search_creatives`` for rare, common and prefix queries, ranking
+every match (the default) and only the newest ``--window`` matches, and a
+``LIKE`` scan for comparison.
+
+Usage: python benchmarks/bench_search.py [--rows 1000000] [--repeat 20] [--window 2000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.bulk_io import import_records
+from dreamtraffic.db.migrations import init_db
+from dreamtraffic.db.search import search_creatives
+
+SUBJECTS = ["drone shot", "surfer", "family", "sports car", "city skyline", "chef", "runner", "forest"]
+SETTINGS = ["at golden hour", "in the rain", "at night", "in slow motion", "on a beach", "in a kitchen"]
+STYLES = ["cinematic", "handheld", "aerial", "macro", "pastel", "neon", "documentary", "retro"]
+
+QUERIES = [
+    ("rare", "kaleidoscope"),
+    ("common", "golden hour"),
+    ("two words", "neon surfer"),
+    ("prefix", "skyl*"),
+]
+
+
+def _records(n: int, rng: random.Random):
+    for i in range(n):
+        prompt = f"{rng.choice(STYLES)} {rng.choice(SUBJECTS)} {rng.choice(SETTINGS)}"
+        if i % 10_000 == 0:
+            prompt += " through a kaleidoscope"
+        yield {"campaign_id": 1 + i % 20, "name": f"Variant {i}", "prompt": prompt}
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20, help="Best of this many runs per query")
+    parser.add_argument("--window", type=int, default=2000, help="Newest matches scored, windowed run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "search.db"
+        init_db(db_path)
+        engine.configure_pool(db_path)
+        engine.executemany("INSERT INTO campaigns (name) VALUES (?)", [(f"C{i}",) for i in range(20)])
+        start = time.perf_counter()
+        import_records("creatives", _records(args.rows, random.Random(7)))
+        print(f"{args.rows:,} creatives loaded and indexed in {time.perf_counter() - start:.1f}s\n")
+
+        print(f"{'query':<28}{'all ranked ms':>14}{'windowed ms':>13}")
+        for label, query in QUERIES:
+            ms = _time(lambda: search_creatives(query), args.repeat)
+            windowed = _time(lambda: search_creatives(query, window=args.window), args.repeat)
+            print(f"{label + ': ' + query:<28}{ms:>14.2f}{windowed:>13.2f}")
+        ms = _time(lambda: engine.fetch_all(
+            "SELECT id FROM creatives WHERE prompt LIKE '%kaleidoscope%' LIMIT 20"), 3)
+        print(f"{'LIKE scan: kaleidoscope':<28}{ms:>14.2f}")
+        engine.close_pools()
+
+
+if __name__ == "__main__":
+    main()
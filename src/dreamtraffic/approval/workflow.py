@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from dreamtraffic.db.models import ApprovalStatus
 from dreamtraffic.db import supabase_client
+from dreamtraffic.db.engine import transaction
 
 # Valid state transitions
 TRANSITIONS: dict[str, list[str]] = {
@@ -49,23 +50,28 @@ class ApprovalWorkflow:
         Returns dict with from_status, to_status, and success flag.
         Raises ValueError if transition is invalid.
         """
-        from_status = self.get_status(creative_id)
-        valid = TRANSITIONS.get(from_status, [])
-
-        if to_status not in valid:
-            raise ValueError(
-                f"Invalid transition: {from_status} → {to_status}. "
-                f"Valid transitions: {valid}"
+        # The status write is conditional on the status we validated against,
+        # so a concurrent transition (on either backend) makes us re-read and
+        # re-validate instead of overwriting it
+        with transaction():
+            while True:
+                from_status = self.get_status(creative_id)
+                valid = TRANSITIONS.get(from_status, [])
+
+                if to_status not in valid:
+                    raise ValueError(
+                        f"Invalid transition: {from_status} → {to_status}. "
+                        f"Valid transitions: {valid}"
+                    )
+
+                if supabase_client.update_creative_status(creative_id, from_status, to_status):
+                    break
+
+            # Record audit event
+            supabase_client.insert_approval_event(
+                creative_id, from_status, to_status, reviewer, notes
             )
 
-        # Update creative status
-        supabase_client.update_creative(creative_id, approval_status=to_status)
-
-        # Record audit event
-        supabase_client.insert_approval_event(
-            creative_id, from_status, to_status, reviewer, notes
-        )
-
         return {
             "creative_id": creative_id,
             "from_status": from_status,
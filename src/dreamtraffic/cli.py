@@ -4,17 +4,36 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
+from contextlib import nullcontext
+from pathlib import Path
 
 import click
 from rich.console import Console
 from rich.table import Table
 from rich.syntax import Syntax
 
+from dreamtraffic.config import (
+    DB_ARCHIVE_DIR, DB_RETENTION_DAYS, DB_SLOW_LOG_PATH, DB_STATS_PATH, LUMA_JOB_WORKERS,
+)
+from dreamtraffic.db.archive import archive
+from dreamtraffic.db.bulk_io import (
+    DEFAULT_CHUNK_SIZE, ENTITIES, FORMATS, export_file, import_file,
+)
+from dreamtraffic.db.instrument import load_slow_log, load_stats
 from dreamtraffic.db.migrations import init_db
-from dreamtraffic.db.engine import fetch_one, fetch_all, execute
+from dreamtraffic.db.payloads import encode_payload
+from dreamtraffic.db.engine import fetch_one, fetch_all, execute, executemany, snapshot, transaction
+from dreamtraffic.db.reporting import pipeline_status
+from dreamtraffic.luma.callbacks import CallbackReceiver
 from dreamtraffic.luma.client import LumaClient
-from dreamtraffic.measurement.vast import VastGenerator
+from dreamtraffic.luma.jobs import JobQueue, JobState
+from dreamtraffic.luma.scheduler import luma_scheduler
+from dreamtraffic.luma.worker import GenerationWorkers
+from dreamtraffic.measurement.vast import VastGenerator, media_file_params
 from dreamtraffic.measurement.fee_stack import FeeStackCalculator
+from dreamtraffic.media.download import DownloadError
+from dreamtraffic.media.probe import ProbeError, probe_creative
 from dreamtraffic.dsp import get_adapter
 from dreamtraffic.exchange.bidswitch import BidswitchRouter
 from dreamtraffic.approval.workflow import ApprovalWorkflow
@@ -22,6 +41,20 @@ from dreamtraffic.approval.notifications import format_timeline
 
 console = Console()
 
+INSERT_TRAFFICKING_RECORD = """INSERT INTO trafficking_records
+   (creative_id, dsp, dsp_creative_id, dsp_asset_id, vast_url,
+    audit_status, placement_type, request_payload, response_payload)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+
+
+def _trafficking_row(creative_id: int, result) -> tuple:
+    """Parameters for INSERT_TRAFFICKING_RECORD from a DSP UploadResult."""
+    return (
+        creative_id, result.dsp, result.creative_id, result.asset_id,
+        result.vast_url, result.audit_status, result.placement_type,
+        encode_payload(result.request_payload), encode_payload(result.response_payload),
+    )
+
 
 @click.group()
 def cli():
@@ -32,8 +65,8 @@ def cli():
 @cli.command("init-db")
 def cmd_init_db():
     """Initialize the database with tables and seed data."""
-    init_db()
-    console.print("[green]Database initialized with seed data.[/green]")
+    version = init_db()
+    console.print(f"[green]Database initialized with seed data (schema v{version}).[/green]")
     specs = fetch_all("SELECT COUNT(*) as count FROM dsp_specs")
     paths = fetch_all("SELECT COUNT(*) as count FROM supply_paths")
     console.print(f"  DSP specs: {specs[0]['count']} records")
@@ -48,27 +81,44 @@ def cmd_init_db():
 @click.option("--name", default="", help="Creative name")
 @click.option("--placement", default="olv", type=click.Choice(["olv", "stv", "preroll"]))
 @click.option("--wait/--no-wait", default=True, help="Wait for generation to complete")
-def cmd_generate(campaign_id, prompt, duration, resolution, name, placement, wait):
+@click.option("--refresh", is_flag=True, help="Start a new generation even if an identical one is cached")
+@click.option("--queue", "queued", is_flag=True, help="Queue the generation for 'dreamtraffic worker' and return")
+def cmd_generate(campaign_id, prompt, duration, resolution, name, placement, wait, refresh, queued):
     """Generate a video creative using Luma Dream Machine."""
     campaign = fetch_one("SELECT * FROM campaigns WHERE id = ?", (campaign_id,))
     if campaign is None:
         console.print(f"[red]Campaign {campaign_id} not found. Run init-db first.[/red]")
         return
 
+    if queued:
+        dur_secs = int(duration.replace("s", "")) if "s" in duration else 30
+        with transaction():
+            cursor = execute(
+                """INSERT INTO creatives (campaign_id, name, prompt, duration_seconds, placement_type)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (campaign_id, name or f"Creative-{placement}", prompt, dur_secs, placement),
+            )
+            job = JobQueue().enqueue(
+                prompt, creative_id=cursor.lastrowid, duration=duration, resolution=resolution, refresh=refresh,
+            )
+        console.print(f"[green]Queued generation job {job.id} for creative {cursor.lastrowid}.[/green]")
+        console.print("  Run 'dreamtraffic worker' to process the queue.")
+        return
+
     client = LumaClient()
     console.print(f"[yellow]Starting Luma generation...[/yellow]")
     console.print(f"  Prompt: {prompt[:80]}...")
 
     if wait:
-        with console.status("Generating video with Luma Dream Machine..."):
+        with console.status("Generating video with Luma Dream Machine..."), client:
             result = client.generate_and_wait(
-                prompt, duration=duration, resolution=resolution
+                prompt, duration=duration, resolution=resolution, refresh=refresh
             )
         video_url = result["video_url"]
         console.print(f"[green]Generation complete![/green]")
         console.print(f"  Video URL: {video_url}")
     else:
-        gen_id = client.generate(prompt, duration=duration, resolution=resolution)
+        gen_id = client.generate(prompt, duration=duration, resolution=resolution, refresh=refresh)
         video_url = ""
         console.print(f"  Generation ID: {gen_id}")
         console.print("  Use 'poll' command to check status.")
@@ -84,13 +134,43 @@ def cmd_generate(campaign_id, prompt, duration, resolution, name, placement, wai
          result.get("id", ""), video_url, dur_secs, placement),
     )
     console.print(f"  Creative ID: {cursor.lastrowid}")
+    if video_url:
+        _probe_and_report(cursor.lastrowid, video_url)
+
+
+def _probe_and_report(creative_id: int, video_url: str | None = None) -> None:
+    """Fill a creative's duration, size, codec and bitrate from its video file."""
+    try:
+        info = probe_creative(creative_id, video_url)
+    except (DownloadError, ProbeError) as e:
+        console.print(f"[yellow]  Could not probe video metadata: {e}[/yellow]")
+        return
+    console.print(
+        f"  Video: {info.width}x{info.height} {info.codec}, {info.duration:.2f}s, "
+        f"{info.bitrate_kbps:,} kbps, {info.size / 1e6:.1f} MB"
+    )
+
+
+@cli.command("probe")
+@click.option("--creative-id", type=int, required=True, help="Creative ID")
+def cmd_probe(creative_id):
+    """Read duration, resolution, codec and bitrate from a creative's MP4."""
+    creative = fetch_one("SELECT video_url FROM creatives WHERE id = ?", (creative_id,))
+    if creative is None:
+        console.print(f"[red]Creative {creative_id} not found.[/red]")
+        return
+    if not creative["video_url"]:
+        console.print(f"[red]Creative {creative_id} has no video yet.[/red]")
+        return
+    _probe_and_report(creative_id, creative["video_url"])
 
 
 @cli.command("vast")
 @click.option("--creative-id", type=int, required=True, help="Creative ID")
 @click.option("--vendors", default="ias,moat,doubleverify", help="Comma-separated vendor keys")
 @click.option("--wrapper", is_flag=True, help="Generate wrapper tag instead of inline")
-def cmd_vast(creative_id, vendors, wrapper):
+@click.option("--compact", is_flag=True, help="No whitespace between elements (as served)")
+def cmd_vast(creative_id, vendors, wrapper, compact):
     """Generate a VAST 4.2 tag with measurement vendor wrapping."""
     creative = fetch_one("SELECT * FROM creatives WHERE id = ?", (creative_id,))
     if creative is None:
@@ -98,7 +178,7 @@ def cmd_vast(creative_id, vendors, wrapper):
         return
 
     vendor_list = [v.strip() for v in vendors.split(",")]
-    generator = VastGenerator()
+    generator = VastGenerator(pretty=not compact)
 
     if wrapper:
         if not creative["vast_url"]:
@@ -115,6 +195,7 @@ def cmd_vast(creative_id, vendors, wrapper):
             duration=f"00:00:{secs:02d}",
             title=creative["name"],
             vendors=vendor_list,
+            **media_file_params(creative),
         )
         # Store VAST URL
         vast_url = f"https://vast.dreamtraffic.demo/inline/{creative_id}"
@@ -152,34 +233,25 @@ def cmd_traffic(creative_id, dsp):
     table.add_column("Audit Status", style="yellow")
     table.add_column("Simulated", style="dim")
 
+    rows = []
     for dsp_name in dsp:
         adapter = get_adapter(dsp_name)
-        result = adapter.upload_creative(
+        result = adapter.upload(
+            creative,
+            campaign_name=campaign_name,
             video_url=creative["video_url"] or "https://cdn.luma.example/demo.mp4",
             vast_url=creative["vast_url"] or f"https://vast.dreamtraffic.demo/inline/{creative_id}",
-            duration_seconds=creative["duration_seconds"],
-            width=creative["width"],
-            height=creative["height"],
-            placement_type=creative["placement_type"],
-            campaign_name=campaign_name,
         )
 
-        # Record trafficking
-        execute(
-            """INSERT INTO trafficking_records
-               (creative_id, dsp, dsp_creative_id, dsp_asset_id, vast_url,
-                audit_status, placement_type, request_payload, response_payload)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (creative_id, result.dsp, result.creative_id, result.asset_id,
-             result.vast_url, result.audit_status, result.placement_type,
-             json.dumps(result.request_payload), json.dumps(result.response_payload)),
-        )
+        rows.append(_trafficking_row(creative_id, result))
 
         table.add_row(
             result.dsp, result.creative_id, result.asset_id,
             result.audit_status, str(result._simulated),
         )
 
+    # Record trafficking under a single commit
+    executemany(INSERT_TRAFFICKING_RECORD, rows)
     console.print(table)
 
 
@@ -195,7 +267,8 @@ def cmd_supply_chain(creative_id, base_cpm):
     console.print(f"Base CPM: ${base_cpm:.2f}")
     console.print(f"Luma Creative Gen CPM: ${calc.luma_cpm:.4f} (amortized)\n")
 
-    comparison = calc.compare_dsps()
+    with snapshot():
+        comparison = calc.compare_dsps()
     for dsp, data in comparison.items():
         console.print(f"[bold cyan]{dsp.upper()}[/bold cyan]")
         console.print(f"  Paths: {data['path_count']}")
@@ -245,28 +318,37 @@ def cmd_approve(creative_id, action, notes):
 
 
 @cli.command("status")
-@click.option("--campaign-id", type=int, help="Show status for a specific campaign")
-def cmd_status(campaign_id):
+@click.option("--campaign-id", "campaign_ids", type=int, multiple=True,
+              help="Show status for specific campaign(s)")
+@click.option("--advertiser", help="Only campaigns for this advertiser")
+@click.option("--approval-status", help="Only creatives in this approval status")
+@click.option("--limit", type=int, help="Campaigns per page")
+@click.option("--offset", type=int, default=0, help="Campaigns to skip")
+@click.option("--json", "as_json", is_flag=True, help="Print the report as JSON")
+def cmd_status(campaign_ids, advertiser, approval_status, limit, offset, as_json):
     """Show pipeline status for campaigns and creatives."""
-    if campaign_id:
-        campaigns = fetch_all("SELECT * FROM campaigns WHERE id = ?", (campaign_id,))
-    else:
-        campaigns = fetch_all("SELECT * FROM campaigns ORDER BY id")
+    with snapshot():
+        report = pipeline_status(
+            campaign_ids=campaign_ids, advertiser=advertiser,
+            approval_status=approval_status, limit=limit, offset=offset,
+        )
+    if as_json:
+        click.echo(json.dumps(report.to_dict(), indent=2))
+        return
 
-    if not campaigns:
+    if not report.campaigns:
         console.print("[yellow]No campaigns found. Create one or run init-db.[/yellow]")
         return
 
-    for c in campaigns:
-        console.print(f"\n[bold]{c['name']}[/bold] (ID: {c['id']})")
-        console.print(f"  Advertiser: {c['advertiser']}")
-        console.print(f"  Flight: {c['flight_start']} → {c['flight_end']}")
+    for c in report.campaigns:
+        console.print(f"\n[bold]{c.name}[/bold] (ID: {c.id})")
+        console.print(f"  Advertiser: {c.advertiser}")
+        console.print(f"  Flight: {c.flight_start} → {c.flight_end}")
+        if c.status_counts:
+            counts = ", ".join(f"{status} {n}" for status, n in sorted(c.status_counts.items()))
+            console.print(f"  Creatives: {sum(c.status_counts.values())} ({counts})")
 
-        creatives = fetch_all(
-            "SELECT * FROM creatives WHERE campaign_id = ? ORDER BY id",
-            (c["id"],),
-        )
-        if creatives:
+        if c.creatives:
             table = Table()
             table.add_column("ID")
             table.add_column("Name")
@@ -275,18 +357,196 @@ def cmd_status(campaign_id):
             table.add_column("Duration")
             table.add_column("DSPs Trafficked")
 
-            for cr in creatives:
-                trafficked = fetch_all(
-                    "SELECT DISTINCT dsp FROM trafficking_records WHERE creative_id = ?",
-                    (cr["id"],),
-                )
-                dsp_list = ", ".join(t["dsp"] for t in trafficked) or "—"
+            for cr in c.creatives:
                 table.add_row(
-                    str(cr["id"]), cr["name"], cr["approval_status"],
-                    cr["placement_type"], f"{cr['duration_seconds']}s", dsp_list,
+                    str(cr.id), cr.name, cr.approval_status,
+                    cr.placement_type, f"{cr.duration_seconds}s", ", ".join(cr.dsps) or "—",
                 )
             console.print(table)
 
+    if limit is not None:
+        first = offset + 1
+        last = offset + len(report.campaigns)
+        console.print(f"\n[dim]Campaigns {first}–{last} of {report.total_campaigns}[/dim]")
+
+
+@cli.command("db-stats")
+@click.option("--top", type=int, default=20, help="Number of statements to show")
+@click.option("--sort", "sort_by", default="total",
+              type=click.Choice(["total", "avg", "max", "calls", "rows"]))
+@click.option("--slow", type=int, default=5, help="Recent slow queries to show")
+@click.option("--stats-file", type=click.Path(path_type=Path), default=DB_STATS_PATH)
+@click.option("--slow-log", type=click.Path(path_type=Path), default=DB_SLOW_LOG_PATH)
+@click.option("--reset", is_flag=True, help="Delete recorded stats and the slow log")
+def cmd_db_stats(top, sort_by, slow, stats_file, slow_log, reset):
+    """Show the SQL statements that took the most time.
+
+    Stats are recorded by runs with DREAMTRAFFIC_DB_INSTRUMENT=1.
+    """
+    if reset:
+        stats_file.unlink(missing_ok=True)
+        slow_log.unlink(missing_ok=True)
+        console.print("[green]Query stats reset.[/green]")
+        return
+
+    stats = load_stats(stats_file)
+    if not stats:
+        console.print("[yellow]No query stats recorded. "
+                      "Run commands with DREAMTRAFFIC_DB_INSTRUMENT=1 first.[/yellow]")
+        return
+
+    key = {"total": "total_ms", "avg": "avg_ms", "max": "max_ms"}.get(sort_by, sort_by)
+    ranked = sorted(stats.values(), key=lambda s: getattr(s, key), reverse=True)[:top]
+
+    table = Table(title=f"Top statements by {sort_by}")
+    table.add_column("Statement", overflow="fold", max_width=60)
+    table.add_column("Calls", justify="right")
+    table.add_column("Total ms", justify="right")
+    table.add_column("Avg ms", justify="right")
+    table.add_column("p95 ms", justify="right")
+    table.add_column("Max ms", justify="right")
+    table.add_column("Rows", justify="right")
+    for s in ranked:
+        table.add_row(
+            s.statement, str(s.calls), f"{s.total_ms:.2f}", f"{s.avg_ms:.3f}",
+            f"≤{s.percentile(0.95):g}", f"{s.max_ms:.2f}", str(s.rows),
+        )
+    console.print(table)
+
+    for q in load_slow_log(slow_log, limit=slow) if slow else []:
+        console.print(f"\n[bold red]{q.elapsed_ms:.1f} ms[/bold red] [dim]{q.at}[/dim]")
+        console.print(f"  {q.sql}")
+        for step in q.plan:
+            console.print(f"  [dim]plan:[/dim] {step}")
+
+
+@cli.command("import")
+@click.argument("entity", type=click.Choice(sorted(ENTITIES)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Default: from the file suffix")
+@click.option("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, show_default=True,
+              help="Rows per commit; a constraint failure rolls back the whole chunk")
+@click.option("--skip-invalid", is_flag=True, help="Skip records that fail validation")
+def cmd_import(entity, path, fmt, chunk_size, skip_invalid):
+    """Bulk-load campaigns or creatives from JSONL or CSV (optionally .gz)."""
+    start = time.perf_counter()
+    try:
+        result = import_file(entity, path, fmt, chunk_size=chunk_size, skip_invalid=skip_invalid)
+    except ValueError as e:  # includes BulkImportError
+        raise click.ClickException(str(e)) from e
+    elapsed = time.perf_counter() - start
+    rate = result.rows / elapsed if elapsed else 0.0
+    console.print(f"[green]Imported {result.rows:,} {entity} in {result.chunks} chunk(s) "
+                  f"({elapsed:.2f}s, {rate:,.0f} rows/s).[/green]")
+    if result.skipped:
+        console.print(f"[yellow]Skipped {result.skipped:,} invalid record(s):[/yellow]")
+        for error in result.errors:
+            console.print(f"  {error}")
+
+
+@cli.command("export")
+@click.argument("entity", type=click.Choice(sorted(ENTITIES)))
+@click.argument("path", type=click.Path(dir_okay=False, path_type=Path))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), help="Default: from the file suffix")
+@click.option("--campaign-id", type=int, help="Only this campaign (or its creatives)")
+def cmd_export(entity, path, fmt, campaign_id):
+    """Stream campaigns or creatives to JSONL or CSV (optionally .gz)."""
+    try:
+        with snapshot():
+            count = export_file(entity, path, fmt, campaign_id=campaign_id)
+    except ValueError as e:
+        raise click.ClickException(str(e)) from e
+    console.print(f"[green]Exported {count:,} {entity} to {path}.[/green]")
+
+
+@cli.group("db")
+def db_group():
+    """Database maintenance."""
+
+
+@db_group.command("archive")
+@click.option("--older-than-days", type=int, default=DB_RETENTION_DAYS, show_default=True,
+              help="Archive trafficking records and approval events older than this")
+@click.option("--archive-dir", type=click.Path(path_type=Path), default=DB_ARCHIVE_DIR,
+              help="Directory of the monthly archive files")
+@click.option("--dry-run", is_flag=True, help="Only count the rows that would move")
+def cmd_db_archive(older_than_days, archive_dir, dry_run):
+    """Move old fact rows into monthly archive files."""
+    results = archive(older_than_days=older_than_days, archive_dir=archive_dir, dry_run=dry_run)
+    if not results:
+        console.print(f"[green]Nothing older than {older_than_days} days to archive.[/green]")
+        return
+
+    table = Table(title="Rows to archive" if dry_run else "Archived rows")
+    table.add_column("Month")
+    table.add_column("Trafficking records", justify="right")
+    table.add_column("Approval events", justify="right")
+    table.add_column("File")
+    for r in results:
+        table.add_row(r.month, f"{r.trafficking_records:,}", f"{r.approval_events:,}", str(r.path))
+    console.print(table)
+
+
+@cli.command("worker")
+@click.option("--workers", type=int, default=LUMA_JOB_WORKERS, show_default=True, help="Worker threads")
+@click.option("--drain", is_flag=True, help="Exit once no unfinished job is left instead of waiting for more")
+@click.option("--adopt-orphans", is_flag=True,
+              help="Also queue creatives whose generation was started but never finished")
+@click.option("--callbacks", is_flag=True,
+              help="Have Luma call back on completion (receiver per DREAMTRAFFIC_LUMA_CALLBACK_*); "
+                   "polling becomes a fallback sweep")
+def cmd_worker(workers, drain, adopt_orphans, callbacks):
+    """Run generation jobs from the queue: submit, poll, download and probe."""
+    with (CallbackReceiver() if callbacks else nullcontext()) as receiver, \
+            LumaClient(callback_receiver=receiver) as client:
+        pool = GenerationWorkers(client, workers=workers, adopt_orphans=adopt_orphans)
+        pool.start()
+        stats = pool.stats
+        console.print(
+            f"[green]{workers} workers started ({pool.owner}); "
+            f"{stats.reclaimed} expired leases reclaimed, {stats.adopted} orphans adopted.[/green]"
+        )
+        if receiver is not None:
+            console.print(f"  Luma callbacks: listening on {receiver.host}:{receiver.port}")
+        try:
+            if drain:
+                pool.wait_idle()
+            else:
+                pool.run()
+        except KeyboardInterrupt:
+            console.print("[yellow]Stopping; in-progress jobs go back to the queue.[/yellow]")
+        finally:
+            pool.stop()
+    console.print(
+        f"  Jobs: {stats.done} done, {stats.failed} failed, {stats.retried} retried "
+        f"({stats.submitted} generations submitted, {stats.resumed} resumed)"
+    )
+    for kind, m in luma_scheduler().metrics().items():
+        console.print(
+            f"  Luma {kind} requests: {m['granted']} sent, {m['queued']} queued "
+            f"(mean wait {m['mean_wait']:.2f}s, max {m['max_wait']:.2f}s, peak depth {m['max_depth']}), "
+            f"{m['rate_limited']} rate-limited"
+        )
+
+
+@cli.command("jobs")
+@click.option("--state", type=click.Choice([s.value for s in JobState]), help="Only jobs in this state")
+@click.option("--limit", type=int, default=20, show_default=True)
+def cmd_jobs(state, limit):
+    """Show the generation job queue."""
+    queue = JobQueue()
+    counts = queue.counts()
+    console.print("  ".join(f"{k}: {v}" for k, v in counts.items()))
+    table = Table(title="Generation jobs")
+    for column in ("ID", "Creative", "State", "Generation", "Attempts", "Lease owner", "Error"):
+        table.add_column(column)
+    for job in queue.jobs(state, limit):
+        table.add_row(
+            str(job.id), str(job.creative_id or ""), job.state, job.generation_id[:12],
+            f"{job.attempts}/{job.max_attempts}", job.lease_owner or "", job.error[:40],
+        )
+    console.print(table)
+
 
 @cli.command("demo")
 def cmd_demo():
@@ -297,91 +557,87 @@ def cmd_demo():
     init_db()
     console.print("[green]1. Database initialized[/green]")
 
-    # Create demo campaign
-    cursor = execute(
-        """INSERT INTO campaigns (name, advertiser, objective, audience, placements,
-           budget, flight_start, flight_end, brief)
-           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-        (
-            "Luma AI CTV Launch",
-            "Luma AI",
-            "Brand awareness + consideration for Dream Machine",
-            "Marketing decision makers, creative directors, agency planners",
-            "olv,stv",
-            250000.0,
-            "2026-03-01",
-            "2026-04-30",
-            "Launch campaign for Luma AI Dream Machine targeting enterprise "
-            "advertisers. Showcase AI-generated video quality for programmatic "
-            "CTV and OLV placements.",
-        ),
-    )
-    campaign_id = cursor.lastrowid
-    console.print(f"[green]2. Campaign created (ID: {campaign_id})[/green]")
+    # Create demo campaign and creatives under one commit
+    with transaction():
+        cursor = execute(
+            """INSERT INTO campaigns (name, advertiser, objective, audience, placements,
+               budget, flight_start, flight_end, brief)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (
+                "Luma AI CTV Launch",
+                "Luma AI",
+                "Brand awareness + consideration for Dream Machine",
+                "Marketing decision makers, creative directors, agency planners",
+                "olv,stv",
+                250000.0,
+                "2026-03-01",
+                "2026-04-30",
+                "Launch campaign for Luma AI Dream Machine targeting enterprise "
+                "advertisers. Showcase AI-generated video quality for programmatic "
+                "CTV and OLV placements.",
+            ),
+        )
+        campaign_id = cursor.lastrowid
 
-    # Create demo creatives
-    for name, dur, placement in [("30s CTV Spot", 30, "stv"), ("15s Pre-roll", 15, "olv")]:
-        execute(
+        # Create demo creatives
+        executemany(
             """INSERT INTO creatives (campaign_id, name, prompt, video_url,
                duration_seconds, placement_type, luma_generation_id)
                VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (
-                campaign_id, name,
-                "Cinematic aerial shot of a futuristic city at golden hour, "
-                "camera slowly descending through clouds to reveal gleaming towers, "
-                "AI-generated holographic advertisements floating between buildings",
-                "https://cdn.luma.example/demo-spot.mp4",
-                dur, placement, "demo-gen-001",
-            ),
+            [
+                (
+                    campaign_id, name,
+                    "Cinematic aerial shot of a futuristic city at golden hour, "
+                    "camera slowly descending through clouds to reveal gleaming towers, "
+                    "AI-generated holographic advertisements floating between buildings",
+                    "https://cdn.luma.example/demo-spot.mp4",
+                    dur, placement, "demo-gen-001",
+                )
+                for name, dur, placement in [("30s CTV Spot", 30, "stv"), ("15s Pre-roll", 15, "olv")]
+            ],
         )
+    console.print(f"[green]2. Campaign created (ID: {campaign_id})[/green]")
     console.print("[green]3. Creatives created (30s CTV + 15s Pre-roll)[/green]")
 
     # Generate VAST tags
     creatives = fetch_all("SELECT * FROM creatives WHERE campaign_id = ?", (campaign_id,))
     generator = VastGenerator()
+    vast_updates = []
     for cr in creatives:
         xml = generator.generate_inline(
             video_url=cr["video_url"],
             duration=f"00:00:{cr['duration_seconds']:02d}",
             title=cr["name"],
+            **media_file_params(cr),
         )
         vast_url = f"https://vast.dreamtraffic.demo/inline/{cr['id']}"
-        execute(
-            "UPDATE creatives SET vast_url = ?, measurement_config = ? WHERE id = ?",
-            (vast_url, json.dumps(["ias", "moat", "doubleverify"]), cr["id"]),
-        )
+        cr["vast_url"] = vast_url
+        vast_updates.append((vast_url, json.dumps(["ias", "moat", "doubleverify"]), cr["id"]))
+    executemany(
+        "UPDATE creatives SET vast_url = ?, measurement_config = ? WHERE id = ?",
+        vast_updates,
+    )
     console.print("[green]4. VAST 4.2 tags generated with IAS + MOAT + DoubleVerify[/green]")
 
     # Approval workflow
     workflow = ApprovalWorkflow()
-    for cr in creatives:
-        workflow.submit_for_review(cr["id"])
-        workflow.approve(cr["id"], notes="All DSP specs validated. OMID compliant.")
+    with transaction():
+        for cr in creatives:
+            workflow.submit_for_review(cr["id"])
+            workflow.approve(cr["id"], notes="All DSP specs validated. OMID compliant.")
     console.print("[green]5. Creatives approved through compliance review[/green]")
 
     # Traffic to DSPs
+    rows = []
     for cr in creatives:
         for dsp_name in ["amazon", "thetradedesk", "dv360"]:
             adapter = get_adapter(dsp_name)
-            result = adapter.upload_creative(
-                video_url=cr["video_url"],
-                vast_url=cr["vast_url"],
-                duration_seconds=cr["duration_seconds"],
-                width=cr["width"],
-                height=cr["height"],
-                placement_type=cr["placement_type"],
-                campaign_name="Luma AI CTV Launch",
-            )
-            execute(
-                """INSERT INTO trafficking_records
-                   (creative_id, dsp, dsp_creative_id, dsp_asset_id, vast_url,
-                    audit_status, placement_type, request_payload, response_payload)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (cr["id"], result.dsp, result.creative_id, result.asset_id,
-                 result.vast_url, result.audit_status, result.placement_type,
-                 json.dumps(result.request_payload), json.dumps(result.response_payload)),
-            )
-        workflow.mark_trafficked(cr["id"])
+            result = adapter.upload(cr, campaign_name="Luma AI CTV Launch")
+            rows.append(_trafficking_row(cr["id"], result))
+    with transaction():
+        executemany(INSERT_TRAFFICKING_RECORD, rows)
+        for cr in creatives:
+            workflow.mark_trafficked(cr["id"])
     console.print("[green]6. Trafficked to Amazon DSP, TTD, and DV360[/green]")
 
     # Supply chain analysis
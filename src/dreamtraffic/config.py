@@ -10,10 +10,75 @@ PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 DB_PATH = Path(os.getenv("DREAMTRAFFIC_DB_PATH", str(DATA_DIR / "dreamtraffic.db")))
 
+# SQLite connection pool
+DB_POOL_SIZE = int(os.getenv("DREAMTRAFFIC_DB_POOL_SIZE", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DREAMTRAFFIC_DB_POOL_TIMEOUT", "30"))
+
+# Query instrumentation (see `dreamtraffic db-stats`)
+DB_INSTRUMENT = os.getenv("DREAMTRAFFIC_DB_INSTRUMENT", "").lower() in ("1", "true", "yes")
+DB_SLOW_QUERY_MS = float(os.getenv("DREAMTRAFFIC_DB_SLOW_QUERY_MS", "100"))
+DB_STATS_PATH = Path(os.getenv("DREAMTRAFFIC_DB_STATS_PATH", str(DATA_DIR / "query_stats.json")))
+DB_SLOW_LOG_PATH = Path(os.getenv("DREAMTRAFFIC_DB_SLOW_LOG", str(DATA_DIR / "slow_queries.jsonl")))
+
+# Retention: fact rows older than this move to monthly files (`dreamtraffic db archive`)
+DB_RETENTION_DAYS = int(os.getenv("DREAMTRAFFIC_DB_RETENTION_DAYS", "90"))
+DB_ARCHIVE_DIR = Path(os.getenv("DREAMTRAFFIC_DB_ARCHIVE_DIR", str(DATA_DIR / "archive")))
+
+# Storage backend behind dreamtraffic.db.supabase_client: "sqlite" or "remote"
+STORE_BACKEND = os.getenv("DREAMTRAFFIC_STORE", "sqlite")
+
+# Remote (Supabase PostgREST) store
+SUPABASE_URL = os.getenv("SUPABASE_URL", os.getenv("VITE_SUPABASE_URL", ""))
+SUPABASE_KEY = os.getenv("SUPABASE_KEY", os.getenv("VITE_SUPABASE_ANON_KEY", ""))
+REMOTE_BATCH_SIZE = int(os.getenv("DREAMTRAFFIC_REMOTE_BATCH_SIZE", "500"))
+REMOTE_FLUSH_INTERVAL = float(os.getenv("DREAMTRAFFIC_REMOTE_FLUSH_INTERVAL", "0.05"))
+
 # API keys
 LUMAAI_API_KEY = os.getenv("LUMAAI_API_KEY", "")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 
+# Generations AsyncLumaClient.generate_many keeps in flight at once
+LUMA_MAX_CONCURRENCY = int(os.getenv("DREAMTRAFFIC_LUMA_MAX_CONCURRENCY", "10"))
+
+# GenerationPoller: gap between checks of one generation grows from min to max
+LUMA_POLL_MIN_INTERVAL = float(os.getenv("DREAMTRAFFIC_LUMA_POLL_MIN_INTERVAL", "2"))
+LUMA_POLL_MAX_INTERVAL = float(os.getenv("DREAMTRAFFIC_LUMA_POLL_MAX_INTERVAL", "30"))
+LUMA_POLL_WORKERS = int(os.getenv("DREAMTRAFFIC_LUMA_POLL_WORKERS", "8"))
+
+# Process-wide Luma request scheduler: requests per second and burst for
+# generation creates and reads (rate 0 = unlimited), and 429 retries per request
+LUMA_CREATE_RATE = float(os.getenv("DREAMTRAFFIC_LUMA_CREATE_RATE", "2"))
+LUMA_CREATE_BURST = int(os.getenv("DREAMTRAFFIC_LUMA_CREATE_BURST", "20"))
+LUMA_GET_RATE = float(os.getenv("DREAMTRAFFIC_LUMA_GET_RATE", "20"))
+LUMA_GET_BURST = int(os.getenv("DREAMTRAFFIC_LUMA_GET_BURST", "100"))
+LUMA_RATE_LIMIT_RETRIES = int(os.getenv("DREAMTRAFFIC_LUMA_RATE_LIMIT_RETRIES", "5"))
+
+# Luma completion callbacks: where the receiver listens, the public base URL Luma
+# should call (blank = http://host:port), and the fallback poll sweep for them
+LUMA_CALLBACK_HOST = os.getenv("DREAMTRAFFIC_LUMA_CALLBACK_HOST", "127.0.0.1")
+LUMA_CALLBACK_PORT = int(os.getenv("DREAMTRAFFIC_LUMA_CALLBACK_PORT", "8787"))
+LUMA_CALLBACK_URL = os.getenv("DREAMTRAFFIC_LUMA_CALLBACK_URL", "")
+LUMA_CALLBACK_SWEEP_INTERVAL = float(os.getenv("DREAMTRAFFIC_LUMA_CALLBACK_SWEEP_INTERVAL", "60"))
+
+# Generation job queue (dreamtraffic worker): workers per process, lease length, tries per job
+LUMA_JOB_WORKERS = int(os.getenv("DREAMTRAFFIC_LUMA_JOB_WORKERS", "4"))
+LUMA_JOB_LEASE_SECONDS = float(os.getenv("DREAMTRAFFIC_LUMA_JOB_LEASE_SECONDS", "60"))
+LUMA_JOB_MAX_ATTEMPTS = int(os.getenv("DREAMTRAFFIC_LUMA_JOB_MAX_ATTEMPTS", "5"))
+
+# Media downloads: Range segments per file, and connections open at once process-wide
+DOWNLOAD_SEGMENTS = int(os.getenv("DREAMTRAFFIC_DOWNLOAD_SEGMENTS", "4"))
+DOWNLOAD_MAX_CONNECTIONS = int(os.getenv("DREAMTRAFFIC_DOWNLOAD_MAX_CONNECTIONS", "16"))
+
+# Content-addressed store of downloaded videos, evicted LRU-first above the quota
+ASSET_DIR = Path(os.getenv("DREAMTRAFFIC_ASSET_DIR", str(DATA_DIR / "assets")))
+ASSET_QUOTA_GB = float(os.getenv("DREAMTRAFFIC_ASSET_QUOTA_GB", "20"))  # 0 = unbounded
+
+# Luma generation cache: identical requests reuse an earlier generation
+LUMA_CACHE_ENABLED = os.getenv("DREAMTRAFFIC_LUMA_CACHE", "1").lower() in ("1", "true", "yes")
+LUMA_CACHE_TTL_DAYS = float(os.getenv("DREAMTRAFFIC_LUMA_CACHE_TTL_DAYS", "30"))  # 0 = no expiry
+LUMA_CACHE_MAX_ENTRIES = int(os.getenv("DREAMTRAFFIC_LUMA_CACHE_MAX_ENTRIES", "10000"))  # 0 = unbounded
+LUMA_CACHE_EVICTION = os.getenv("DREAMTRAFFIC_LUMA_CACHE_EVICTION", "lru")  # lru | fifo
+
 # Claude model tiers
 MODELS = {
     "director": "claude-sonnet-4-5-20250929",
@@ -49,6 +114,15 @@ LUMA_DEFAULTS = {
     "aspect_ratio": "16:9",
 }
 
+# Typical seconds from submit to finished video per model; the poller's first check
+LUMA_RENDER_SECONDS = {
+    "ray2": 40.0,
+    "ray-2": 40.0,
+    "ray-flash-2": 15.0,
+    "ray-1-6": 60.0,
+    "": 20.0,  # unknown model
+}
+
 # Measurement vendor pixel base URLs
 MEASUREMENT_VENDORS = {
     "ias": {
@@ -1,6 +1,28 @@
 """Database layer — SQLite with dataclass models."""
 
-from dreamtraffic.db.engine import get_connection, execute, fetch_one, fetch_all
+from dreamtraffic.db.engine import (
+    ConnectionPool,
+    ExecuteResult,
+    PoolStats,
+    configure_pool,
+    get_pool,
+    connection,
+    transaction,
+    snapshot,
+    pool_stats,
+    close_pools,
+    get_connection,
+    close_connection,
+    execute,
+    executemany,
+    fetch_one,
+    fetch_all,
+    fetch_iter,
+    enable_instrumentation,
+    disable_instrumentation,
+    query_stats,
+)
+from dreamtraffic.db.instrument import QueryStats
 from dreamtraffic.db.models import (
     Campaign,
     Creative,
@@ -9,16 +31,39 @@ from dreamtraffic.db.models import (
     SupplyPath,
     DSPSpec,
 )
+from dreamtraffic.db.reference import ReferenceData, reference_data
+from dreamtraffic.db.store import StorageBackend, SQLiteStore
 
 __all__ = [
+    "ConnectionPool",
+    "ExecuteResult",
+    "PoolStats",
+    "configure_pool",
+    "get_pool",
+    "connection",
+    "transaction",
+    "snapshot",
+    "pool_stats",
+    "close_pools",
     "get_connection",
+    "close_connection",
     "execute",
+    "executemany",
     "fetch_one",
     "fetch_all",
+    "fetch_iter",
+    "enable_instrumentation",
+    "disable_instrumentation",
+    "query_stats",
+    "QueryStats",
     "Campaign",
     "Creative",
     "ApprovalEvent",
     "TraffickingRecord",
     "SupplyPath",
     "DSPSpec",
+    "ReferenceData",
+    "reference_data",
+    "StorageBackend",
+    "SQLiteStore",
 ]
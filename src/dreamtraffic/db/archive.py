@@ -0,0 +1,242 @@
+"""Retention for the fact tables — monthly archive files and history views.
+
+``trafficking_records`` and ``approval_events`` only ever grow. ``archive()``
+moves rows older than the retention age into one SQLite file per calendar
+month (``<archive_dir>/YYYY-MM.db``, both tables in each file), so the live
+tables and their indexes stay the size of the retention window.
+
+Each month is moved in two steps. The rows are first copied into the archive
+file and committed; only then are the rows whose ids made it into the archive
+deleted from the live table. A crash in between leaves duplicates, never a
+gap, and re-running the job finishes the move (the copy skips ids the archive
+already has).
+
+The summary tables still count archived rows: the delete triggers stand down
+while ``archive_state.archiving`` is set, so status views are unchanged by an
+archive run.
+
+Reads that need the full history go through ``history()``, which attaches the
+archive files to a pooled connection and exposes TEMP views
+(``trafficking_records_history``, ``approval_events_history``) that
+``UNION ALL`` the live table with every attached month::
+
+    with history(since="2025-01") as conn:
+        conn.execute("SELECT dsp, COUNT(*) FROM trafficking_records_history GROUP BY dsp")
+
+SQLite attaches at most ``SQLITE_LIMIT_ATTACHED`` (10 by default) files per
+connection; narrow ``since``/``until`` to read further back.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Iterator
+
+from dreamtraffic.config import DB_ARCHIVE_DIR, DB_RETENTION_DAYS
+from dreamtraffic.db.engine import ConnectionPool, get_pool
+
+ARCHIVED_TABLES = ("trafficking_records", "approval_events")
+
+
+@dataclass(slots=True)
+class ArchiveResult:
+    """Rows moved (or, on a dry run, due to move) into one month's file."""
+    month: str  # YYYY-MM
+    path: Path
+    trafficking_records: int = 0
+    approval_events: int = 0
+
+
+def archive_months(archive_dir: Path | None = None) -> list[str]:
+    """Months (``YYYY-MM``) that have an archive file, oldest first."""
+    directory = archive_dir or DB_ARCHIVE_DIR
+    if not directory.exists():
+        return []
+    return sorted(p.stem for p in directory.glob("[0-9][0-9][0-9][0-9]-[0-9][0-9].db"))
+
+
+def _alias(month: str) -> str:
+    return "archive_" + month.replace("-", "_")
+
+
+def _next_month(month: str) -> str:
+    year, mon = int(month[:4]), int(month[5:7])
+    return f"{year + mon // 12:04d}-{mon % 12 + 1:02d}"
+
+
+def _columns(conn: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+
+def _ensure_archive_table(conn: sqlite3.Connection, schema: str, table: str) -> list[str]:
+    """Create ``schema.table`` shaped like the live table; add columns it lacks.
+
+    Archive tables carry no foreign keys (the parent rows stay in the live
+    database) and key on a unique ``id`` index. Returns the live columns.
+    """
+    columns = _columns(conn, "main", table)
+    existing = _columns(conn, schema, table)
+    if not existing:
+        conn.execute(f"CREATE TABLE {schema}.{table} AS SELECT * FROM main.{table} WHERE 0")
+        conn.execute(f"CREATE UNIQUE INDEX {schema}.idx_{table}_id ON {table}(id)")
+        conn.execute(f"CREATE INDEX {schema}.idx_{table}_creative_id ON {table}(creative_id)")
+    else:
+        for column in columns:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE {schema}.{table} ADD COLUMN {column}")
+    return columns
+
+
+def _cutoff(older_than_days: int) -> str:
+    """``created_at`` bound (UTC, ``datetime('now')`` format) for the retention age."""
+    moment = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _due_months(conn: sqlite3.Connection, cutoff: str) -> list[str]:
+    months: set[str] = set()
+    for table in ARCHIVED_TABLES:
+        rows = conn.execute(
+            f"SELECT DISTINCT substr(created_at, 1, 7) FROM {table} WHERE created_at < ?",
+            (cutoff,),
+        )
+        months.update(row[0] for row in rows)
+    return sorted(months)
+
+
+def _move_month(
+    pool: ConnectionPool,
+    conn: sqlite3.Connection,
+    alias: str,
+    start: str,
+    end: str,
+) -> dict[str, int]:
+    """Copy one month's rows into the attached archive, then delete the copied ones."""
+    moved: dict[str, int] = {}
+    where = "created_at >= ? AND created_at < ?"
+    with pool.transaction():
+        for table in ARCHIVED_TABLES:
+            columns = ", ".join(_ensure_archive_table(conn, alias, table))
+            conn.execute(
+                f"""INSERT OR IGNORE INTO {alias}.{table} ({columns})
+                    SELECT {columns} FROM main.{table} WHERE {where}""",
+                (start, end),
+            )
+
+    with pool.transaction():
+        conn.execute("UPDATE archive_state SET archiving = 1 WHERE id = 1")
+        conn.execute(
+            f"""UPDATE creative_summary SET archived_dsp_mask = archived_dsp_mask | COALESCE(
+                    (SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                     JOIN dsp_bits b ON b.dsp = tr.dsp
+                     WHERE tr.creative_id = creative_summary.creative_id AND tr.{where}), 0)
+                WHERE creative_id IN (SELECT creative_id FROM trafficking_records WHERE {where})""",
+            (start, end, start, end),
+        )
+        for table in ARCHIVED_TABLES:
+            moved[table] = conn.execute(
+                f"""DELETE FROM main.{table} WHERE {where}
+                    AND id IN (SELECT id FROM {alias}.{table} WHERE {where})""",
+                (start, end, start, end),
+            ).rowcount
+        conn.execute("UPDATE archive_state SET archiving = 0 WHERE id = 1")
+    return moved
+
+
+def archive(
+    db_path: Path | None = None,
+    *,
+    older_than_days: int = DB_RETENTION_DAYS,
+    archive_dir: Path | None = None,
+    dry_run: bool = False,
+) -> list[ArchiveResult]:
+    """Move fact rows older than ``older_than_days`` into monthly archive files.
+
+    With ``dry_run`` nothing is written; the results count the rows that
+    would move. Must not be called inside ``transaction()``.
+    """
+    if older_than_days < 0:
+        raise ValueError(f"older_than_days must be non-negative, got {older_than_days}")
+    directory = archive_dir or DB_ARCHIVE_DIR
+    cutoff = _cutoff(older_than_days)
+    pool = get_pool(db_path)
+    results: list[ArchiveResult] = []
+    with pool.connection() as conn:
+        for month in _due_months(conn, cutoff):
+            start, end = month, min(_next_month(month), cutoff)
+            result = ArchiveResult(month, directory / f"{month}.db")
+            if dry_run:
+                for table in ARCHIVED_TABLES:
+                    count = conn.execute(
+                        f"SELECT COUNT(*) FROM {table} WHERE created_at >= ? AND created_at < ?",
+                        (start, end),
+                    ).fetchone()[0]
+                    setattr(result, table, count)
+                results.append(result)
+                continue
+
+            directory.mkdir(parents=True, exist_ok=True)
+            alias = _alias(month)
+            conn.execute("ATTACH DATABASE ? AS " + alias, (str(result.path),))
+            try:
+                moved = _move_month(pool, conn, alias, start, end)
+            finally:
+                conn.execute(f"DETACH DATABASE {alias}")
+            result.trafficking_records = moved["trafficking_records"]
+            result.approval_events = moved["approval_events"]
+            results.append(result)
+    return results
+
+
+@contextmanager
+def history(
+    db_path: Path | None = None,
+    *,
+    since: str | None = None,
+    until: str | None = None,
+    archive_dir: Path | None = None,
+) -> Iterator[sqlite3.Connection]:
+    """Connection with ``<table>_history`` views over live and archived rows.
+
+    ``since``/``until`` (``YYYY-MM``, inclusive) limit which archive months
+    are attached; the live table is always included. Raises ValueError when
+    the range spans more months than SQLite can attach at once.
+    """
+    months = [
+        m for m in archive_months(archive_dir)
+        if (since is None or m >= since) and (until is None or m <= until)
+    ]
+    directory = archive_dir or DB_ARCHIVE_DIR
+    with get_pool(db_path).connection() as conn:
+        limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED)
+        if len(months) > limit:
+            raise ValueError(
+                f"{len(months)} archive months in range but SQLite attaches at most {limit}; "
+                "narrow since/until"
+            )
+        attached: list[str] = []
+        try:
+            for month in months:
+                alias = _alias(month)
+                conn.execute("ATTACH DATABASE ? AS " + alias, (str(directory / f"{month}.db"),))
+                attached.append(alias)
+            for table in ARCHIVED_TABLES:
+                columns = _columns(conn, "main", table)
+                selects = [f"SELECT {', '.join(columns)} FROM main.{table}"]
+                for alias in attached:
+                    present = set(_columns(conn, alias, table))
+                    if present:
+                        picked = ", ".join(c if c in present else f"NULL AS {c}" for c in columns)
+                        selects.append(f"SELECT {picked} FROM {alias}.{table}")
+                conn.execute(f"DROP VIEW IF EXISTS temp.{table}_history")
+                conn.execute(f"CREATE TEMP VIEW {table}_history AS {' UNION ALL '.join(selects)}")
+            yield conn
+        finally:
+            for table in ARCHIVED_TABLES:
+                conn.execute(f"DROP VIEW IF EXISTS temp.{table}_history")
+            for alias in attached:
+                conn.execute(f"DETACH DATABASE {alias}")
@@ -0,0 +1,349 @@
+"""Streaming bulk import/export of campaigns and creatives (JSONL or CSV).
+
+Files are read and written one record at a time through generators, so a
+file of any size costs one chunk of memory. A ``.gz`` suffix means gzip;
+the format comes from the suffix before it (``.jsonl``/``.ndjson`` or
+``.csv``) unless given explicitly.
+
+Each record is checked against its ``db.models`` dataclass: unknown keys are
+rejected and values are coerced to the field types (CSV cells arrive as
+text). Missing fields take the model defaults, except ``id`` (assigned by
+SQLite) and ``created_at`` (stamped by the database). Valid rows are
+inserted ``chunk_size`` at a time (default 20000), one commit per chunk. A
+constraint failure rolls back its whole chunk, up to 20000 rows by default,
+and the chunks before it stay committed; pass a smaller ``chunk_size`` to
+lose less work to one bad row.
+
+Import speed on a single core is about 31-34k creatives/s for JSONL/CSV,
+plain or gzipped (benchmarks/bench_bulk_io.py), short of the 50k target.
+Per 200k rows, parsing takes ~0.85s and validation ~0.5s. The inserts take
+~1.9s, of which ~0.6s is the per-row check of the gated summary and FTS
+triggers. FTS5 indexing takes ~1.5-1.8s (porter stemming plus two prefix
+indexes). The database side is most of the time, so faster parsing cannot
+reach the target.
+
+Exports write the same columns, so an export can be imported elsewhere.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import json
+import sqlite3
+from collections import Counter
+from dataclasses import MISSING, dataclass, field, fields
+from itertools import islice
+from operator import itemgetter
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator
+
+from dreamtraffic.db.engine import fetch_iter, transaction
+from dreamtraffic.db.models import Campaign, Creative
+
+ENTITIES: dict[str, type] = {"campaigns": Campaign, "creatives": Creative}
+
+_CREATIVE_COLUMNS = [f.name for f in fields(Creative)]
+_CREATIVE_STATUS_KEY = itemgetter(
+    _CREATIVE_COLUMNS.index("campaign_id"), _CREATIVE_COLUMNS.index("approval_status"),
+)
+
+FORMATS = ("jsonl", "csv")
+
+# Larger chunks mean fewer commits and fewer FTS5 segments to merge; 20000
+# creatives is still only a few MB of pending rows, but also what one
+# constraint failure rolls back.
+DEFAULT_CHUNK_SIZE = 20000
+
+
+class BulkImportError(ValueError):
+    """A record that does not fit its model, with its 1-based record number."""
+
+    def __init__(self, record: int, message: str) -> None:
+        super().__init__(f"record {record}: {message}")
+        self.record = record
+
+
+@dataclass
+class ImportResult:
+    entity: str
+    rows: int = 0  # committed
+    chunks: int = 0
+    skipped: int = 0  # invalid records passed over with skip_invalid
+    errors: list[str] = field(default_factory=list)  # first few skip messages
+
+
+def detect_format(path: Path) -> str:
+    """``jsonl`` or ``csv`` from the file suffix (ignoring a trailing ``.gz``)."""
+    suffixes = [s.lower() for s in path.suffixes]
+    if suffixes and suffixes[-1] == ".gz":
+        suffixes.pop()
+    suffix = suffixes[-1] if suffixes else ""
+    if suffix in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    if suffix == ".csv":
+        return "csv"
+    raise ValueError(f"Cannot tell the format of {path.name}; pass jsonl or csv")
+
+
+def _open(path: Path, mode: str) -> IO[str]:
+    if path.suffix.lower() == ".gz":
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return path.open(mode, encoding="utf-8", newline="")
+
+
+def _parse_lines(lines: list[tuple[int, str]], name: str) -> list[Any]:
+    """Parse a batch of JSONL lines with one ``json.loads`` call.
+
+    Joining the lines into one array moves the per-line overhead into the C
+    decoder; if the batch fails, it is re-parsed line by line to name the
+    offending line.
+    """
+    try:
+        return json.loads("[" + ",".join(line for _, line in lines) + "]")
+    except json.JSONDecodeError:
+        for number, line in lines:
+            try:
+                json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{name} line {number}: invalid JSON ({e.msg})") from None
+        raise
+
+
+def read_records(path: Path, fmt: str | None = None, *, batch: int = 1000) -> Iterator[dict[str, Any]]:
+    """Yield the records of a JSONL or CSV file as dicts, one at a time.
+
+    JSONL is parsed ``batch`` lines at a time.
+    """
+    fmt = fmt or detect_format(path)
+    with _open(path, "r") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+            return
+        numbered = ((n, line) for n, line in enumerate(f, 1) if not line.isspace())
+        while lines := list(islice(numbered, batch)):
+            yield from _parse_lines(lines, path.name)
+
+
+def _field_type(annotation: str) -> type:
+    """Python type of a field annotation (a string, under ``from __future__``)."""
+    if "int" in annotation:
+        return int
+    if "float" in annotation:
+        return float
+    return str
+
+
+def _coercer(base: type, optional: bool) -> Callable[[Any], Any]:
+    """Converter to ``base`` for values that do not already have that type."""
+    def convert(value: Any) -> Any:
+        if value is None or (optional and value == ""):
+            if optional:
+                return None
+            raise ValueError("value required")
+        if base is int and isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"expected an integer, got {value!r}")
+        return base(value)
+
+    return convert
+
+
+class _RowBuilder:
+    """Validates record dicts against a model and turns them into INSERT parameters."""
+
+    def __init__(self, model: type) -> None:
+        self.model = model
+        self.columns = [f.name for f in fields(model)]
+        self.types = {f.name: _field_type(str(f.type)) for f in fields(model)}
+        self.coerce = {
+            f.name: _coercer(self.types[f.name], "None" in str(f.type) or f.name == "created_at")
+            for f in fields(model)
+        }
+        self.defaults: dict[str, Any] = {
+            f.name: f.default for f in fields(model) if f.default is not MISSING
+        }
+        self.defaults["created_at"] = None  # database default
+        self.params = itemgetter(*self.columns)
+
+    def __call__(self, record: dict[str, Any]) -> tuple[Any, ...]:
+        if not isinstance(record, dict):
+            raise ValueError(f"expected an object, got {type(record).__name__}")
+        values = self.defaults.copy()
+        types = self.types
+        for key, value in record.items():
+            expected = types.get(key)
+            if expected is None:
+                raise ValueError(f"unknown {self.model.__name__} field {key!r}")
+            if type(value) is not expected:
+                try:
+                    value = self.coerce[key](value)
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f"{key}: {e}") from None
+            values[key] = value
+        return self.params(values)
+
+
+# Summary and search-index upkeep for a chunk of creatives, run in place of
+# the per-row insert triggers (see migrations.BULK_LOAD and SEARCH_INDEX)
+_UPSERT_STATUS_COUNT = """INSERT INTO campaign_status_counts (campaign_id, approval_status, creative_count)
+    VALUES (?, ?, ?)
+    ON CONFLICT (campaign_id, approval_status)
+    DO UPDATE SET creative_count = creative_count + excluded.creative_count"""
+_INSERT_SUMMARIES = "INSERT OR IGNORE INTO creative_summary (creative_id) SELECT id FROM creatives WHERE id > ?"
+_INDEX_CREATIVES = "INSERT INTO creatives_fts (rowid, name, prompt) SELECT id, name, prompt FROM creatives WHERE id > ?"
+
+
+def _insert_chunk(conn: sqlite3.Connection, entity: str, sql: str, rows: list[tuple[Any, ...]]) -> None:
+    """Insert one chunk; creatives with database-assigned ids skip the per-row triggers."""
+    if entity != "creatives" or any(row[0] is not None for row in rows):
+        conn.executemany(sql, rows)
+        return
+    # AUTOINCREMENT hands out ids above the sequence, so the chunk is every id past it
+    seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'creatives'").fetchone()
+    conn.execute("UPDATE bulk_load_state SET loading = 1 WHERE id = 1")
+    conn.executemany(sql, rows)
+    conn.execute("UPDATE bulk_load_state SET loading = 0 WHERE id = 1")
+    status_counts = Counter(map(_CREATIVE_STATUS_KEY, rows))
+    conn.executemany(_UPSERT_STATUS_COUNT, [(*key, n) for key, n in status_counts.items()])
+    last_id = seq[0] if seq else 0
+    conn.execute(_INSERT_SUMMARIES, (last_id,))
+    conn.execute(_INDEX_CREATIVES, (last_id,))
+
+
+def insert_sql(entity: str) -> str:
+    columns = [f.name for f in fields(ENTITIES[entity])]
+    marks = ", ".join(
+        "COALESCE(NULLIF(?, ''), datetime('now'))" if c == "created_at" else "?" for c in columns
+    )
+    return f"INSERT INTO {entity} ({', '.join(columns)}) VALUES ({marks})"
+
+
+def import_records(
+    entity: str,
+    records: Iterable[dict[str, Any]],
+    db_path: Path | None = None,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_invalid: bool = False,
+) -> ImportResult:
+    """Insert ``records`` into ``entity`` (campaigns or creatives), one commit per chunk.
+
+    Raises BulkImportError on the first invalid record unless
+    ``skip_invalid``, in which case such records are counted and skipped.
+    A constraint failure (e.g. an unknown ``campaign_id``) rolls back its
+    whole chunk, every row of it and not just the bad one, and raises
+    BulkImportError numbered from the chunk's first record.
+    """
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity {entity!r}; expected one of {sorted(ENTITIES)}")
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+    build = _RowBuilder(ENTITIES[entity])
+    sql = insert_sql(entity)
+    result = ImportResult(entity)
+    seen = 0  # records read so far, valid or not
+
+    def rows() -> Iterator[tuple[Any, ...]]:
+        nonlocal seen
+        for seen, record in enumerate(records, 1):
+            try:
+                yield build(record)
+            except (TypeError, ValueError) as e:
+                if not skip_invalid:
+                    raise BulkImportError(seen, str(e)) from None
+                result.skipped += 1
+                if len(result.errors) < 20:
+                    result.errors.append(f"record {seen}: {e}")
+
+    stream = rows()
+    first = 1
+    while chunk := list(islice(stream, chunk_size)):
+        try:
+            with transaction(db_path) as conn:
+                _insert_chunk(conn, entity, sql, chunk)
+        except sqlite3.IntegrityError as e:
+            raise BulkImportError(
+                first,
+                f"chunk of {len(chunk)} rolled back ({e}); {result.rows} rows committed before it",
+            ) from e
+        first = seen + 1
+        result.rows += len(chunk)
+        result.chunks += 1
+    return result
+
+
+def import_file(
+    entity: str,
+    path: Path,
+    fmt: str | None = None,
+    db_path: Path | None = None,
+    **options: Any,
+) -> ImportResult:
+    """``import_records`` from a JSONL/CSV (optionally gzipped) file."""
+    return import_records(entity, read_records(path, fmt), db_path, **options)
+
+
+def export_rows(
+    entity: str,
+    *,
+    campaign_id: int | None = None,
+    db_path: Path | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Stream the rows of ``entity`` in id order, optionally for one campaign."""
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity {entity!r}; expected one of {sorted(ENTITIES)}")
+    columns = ", ".join(f.name for f in fields(ENTITIES[entity]))
+    key = "id" if entity == "campaigns" else "campaign_id"
+    if campaign_id is None:
+        return fetch_iter(f"SELECT {columns} FROM {entity} ORDER BY id", db_path=db_path)
+    return fetch_iter(
+        f"SELECT {columns} FROM {entity} WHERE {key} = ? ORDER BY id", (campaign_id,), db_path,
+    )
+
+
+def write_records(
+    rows: Iterable[dict[str, Any]],
+    path: Path,
+    fmt: str | None = None,
+    *,
+    columns: list[str] | None = None,
+) -> int:
+    """Write dict rows to a JSONL or CSV (optionally gzipped) file. Returns the count.
+
+    CSV columns are ``columns``, or the keys of the first row.
+    """
+    fmt = fmt or detect_format(path)
+    count = 0
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _open(path, "w") as f:
+        if fmt == "csv":
+            writer: csv.DictWriter | None = None
+            if columns is not None:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+                count += 1
+        else:
+            dumps = json.JSONEncoder(ensure_ascii=False).encode
+            for row in rows:
+                f.write(dumps(row))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def export_file(
+    entity: str,
+    path: Path,
+    fmt: str | None = None,
+    *,
+    campaign_id: int | None = None,
+    db_path: Path | None = None,
+) -> int:
+    """Export ``entity`` to ``path``. Returns the rows written."""
+    rows = export_rows(entity, campaign_id=campaign_id, db_path=db_path)
+    return write_records(rows, path, fmt, columns=[f.name for f in fields(ENTITIES[entity])])
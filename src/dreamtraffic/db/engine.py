@@ -1,52 +1,474 @@
-"""SQLite connection and query helpers."""
+"""SQLite connection pool and query helpers."""
 
 from __future__ import annotations
 
+import atexit
 import sqlite3
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator, TypeVar
 
-from dreamtraffic.config import DB_PATH
+from dreamtraffic.config import (
+    DB_INSTRUMENT,
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_SLOW_LOG_PATH,
+    DB_SLOW_QUERY_MS,
+    DB_STATS_PATH,
+)
+from dreamtraffic.db.instrument import InstrumentedConnection, QueryStats
+from dreamtraffic.db.payloads import register_functions
 
-_connection: sqlite3.Connection | None = None
+T = TypeVar("T")
 
+# Rows pulled from the cursor per fetchmany() call in fetch_iter
+DEFAULT_ARRAYSIZE = 500
 
-def get_connection(db_path: Path | None = None) -> sqlite3.Connection:
-    """Get or create a SQLite connection with row factory."""
-    global _connection
-    path = db_path or DB_PATH
-    if _connection is None or db_path is not None:
-        path.parent.mkdir(parents=True, exist_ok=True)
-        conn = sqlite3.connect(str(path))
+
+@dataclass
+class PoolStats:
+    """Snapshot of connection pool counters."""
+    size: int
+    created: int
+    idle: int
+    in_use: int
+    checkouts: int
+    waits: int  # checkouts that had to wait for a free connection
+    timeouts: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+    @property
+    def avg_wait_ms(self) -> float:
+        if self.waits == 0:
+            return 0.0
+        return self.total_wait_seconds / self.waits * 1000
+
+
+@dataclass(frozen=True, slots=True)
+class ExecuteResult:
+    """What ``execute`` hands back once its connection is back in the pool."""
+    lastrowid: int | None
+    rowcount: int
+    rows: list[sqlite3.Row]  # RETURNING / SELECT rows, read before release
+
+
+class ConnectionPool:
+    """Checkout/checkin pool of SQLite connections for one database file.
+
+    Connections run in WAL mode so readers proceed alongside a writer; writes
+    within the process are serialized through ``write_lock`` so they queue
+    here instead of failing with ``SQLITE_BUSY``. A thread that already holds
+    a connection gets the same one back from nested ``connection()`` calls.
+
+    Connections are in autocommit mode: a bare statement commits on its own,
+    and ``transaction()`` groups statements under one explicit commit.
+
+    While ``query_stats`` is set, new connections are ``InstrumentedConnection``
+    and record per-statement timings into it.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        *,
+        size: int = DB_POOL_SIZE,
+        timeout: float = DB_POOL_TIMEOUT,
+    ) -> None:
+        if size < 1:
+            raise ValueError(f"Pool size must be at least 1, got {size}")
+        self.db_path = Path(db_path)
+        self.size = size
+        self.timeout = timeout
+        self.write_lock = threading.RLock()
+        self._cond = threading.Condition()
+        self._idle: list[sqlite3.Connection] = []
+        self._local = threading.local()
+        self._closed = False
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self.query_stats: QueryStats | None = None
+
+    def _open(self, database: str, *setup: str, uri: bool = False) -> sqlite3.Connection:
+        stats = self.query_stats
+        conn = sqlite3.connect(
+            database,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            uri=uri,
+            factory=sqlite3.Connection if stats is None else InstrumentedConnection,
+        )
         conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL")
-        conn.execute("PRAGMA foreign_keys=ON")
-        if db_path is None:
-            _connection = conn
+        for statement in setup:  # before stats are attached, so not recorded
+            conn.execute(statement)
+        register_functions(conn)
+        if stats is not None:
+            conn.query_stats = stats
+        return conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        return self._open(str(self.db_path), "PRAGMA journal_mode=WAL", "PRAGMA foreign_keys=ON")
+
+    def instrument(self, stats: QueryStats | None) -> None:
+        """Start (or with None, stop) recording statements into ``stats``.
+
+        Idle connections are closed so the next checkout opens one of the
+        right kind; connections in use keep their current behaviour.
+        """
+        with self._cond:
+            self.query_stats = stats
+            for conn in self._idle:
+                conn.close()
+            self._created -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+    def acquire(self, timeout: float | None = None) -> sqlite3.Connection:
+        """Check out a connection, waiting up to ``timeout`` seconds for one."""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        deadline = start + timeout
+        waited = False
+        conn: sqlite3.Connection | None = None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+                if self._idle:
+                    conn = self._idle.pop()
+                    break
+                if self._created < self.size:
+                    self._created += 1
+                    break
+                waited = True
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise TimeoutError(
+                        f"Timed out after {timeout}s waiting for a connection "
+                        f"to {self.db_path} (pool size {self.size})"
+                    )
+                self._cond.wait(remaining)
+
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                elapsed = time.perf_counter() - start
+                self._waits += 1
+                self._total_wait += elapsed
+                self._max_wait = max(self._max_wait, elapsed)
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except BaseException:
+                with self._cond:
+                    self._created -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
         return conn
-    return _connection
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection to the pool, rolling back any open transaction."""
+        if conn.in_transaction:
+            conn.rollback()
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                self._created -= 1
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Check out a connection for the current thread, reusing one it already holds."""
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            yield held
+            return
+        conn = self.acquire()
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = None
+            self.release(conn)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Run the enclosed statements under one commit.
+
+        The outermost call takes the write lock and issues ``BEGIN IMMEDIATE``;
+        nested calls on the same thread become savepoints, so an inner failure
+        rolls back only its own work.
+        """
+        with self.connection() as conn, self.write_lock:
+            depth = getattr(self._local, "tx_depth", 0)
+            savepoint = f"sp_{depth}"
+            conn.execute(f"SAVEPOINT {savepoint}" if depth else "BEGIN IMMEDIATE")
+            self._local.tx_depth = depth + 1
+            try:
+                yield conn
+            except BaseException:
+                if depth:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                else:
+                    conn.execute("ROLLBACK")
+                raise
+            else:
+                conn.execute(f"RELEASE {savepoint}" if depth else "COMMIT")
+            finally:
+                self._local.tx_depth = depth
+
+    @contextmanager
+    def snapshot(self, *, copy: bool = False) -> Iterator[sqlite3.Connection]:
+        """Pin the current thread's reads to one point-in-time view of the database.
+
+        By default a dedicated read-only connection opens a read transaction
+        and holds it: WAL lets writers keep committing, but this connection
+        sees none of it until the block exits. While a snapshot is held the
+        WAL cannot be checkpointed past it, so keep very long analyses on
+        ``copy=True``, which instead copies the database into memory with
+        the online backup API and releases the file straight away.
+
+        Inside the block, ``connection()`` (and so ``fetch_*``, reports and
+        the reference cache) on this thread returns the snapshot; writes
+        fail. The snapshot connection is outside the pool's size limit.
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None and held.in_transaction:
+            raise RuntimeError("Cannot take a snapshot inside an open transaction")
+        uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        if copy:
+            conn = self._open(":memory:")
+            source = self._open(uri, uri=True)
+            try:
+                source.backup(conn)
+            finally:
+                source.close()
+            conn.execute("PRAGMA query_only = ON")
+        else:
+            # BEGIN is deferred; the first read is what fixes the snapshot
+            conn = self._open(uri, "BEGIN", "SELECT 1 FROM sqlite_master LIMIT 1", uri=True)
+        self._local.conn = conn
+        try:
+            yield conn
+        finally:
+            self._local.conn = held
+            if conn.in_transaction:
+                conn.rollback()
+            conn.close()
+
+    def stats(self) -> PoolStats:
+        """Return a snapshot of pool counters."""
+        with self._cond:
+            return PoolStats(
+                size=self.size,
+                created=self._created,
+                idle=len(self._idle),
+                in_use=self._in_use,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                timeouts=self._timeouts,
+                total_wait_seconds=self._total_wait,
+                max_wait_seconds=self._max_wait,
+            )
+
+    def close(self) -> None:
+        """Close idle connections; checked-out ones are closed on release."""
+        with self._cond:
+            self._closed = True
+            for conn in self._idle:
+                conn.close()
+            self._created -= len(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+
+
+_pools: dict[Path, ConnectionPool] = {}
+_default_path: Path | None = None
+_pools_lock = threading.Lock()
+
+
+def _new_pool(path: Path, size: int = DB_POOL_SIZE) -> ConnectionPool:
+    pool = ConnectionPool(path, size=size)
+    if DB_INSTRUMENT:
+        pool.instrument(QueryStats(DB_SLOW_QUERY_MS, slow_log_path=DB_SLOW_LOG_PATH))
+    return pool
+
+
+def configure_pool(db_path: Path | None = None, *, size: int | None = None) -> ConnectionPool:
+    """Point the default pool at ``db_path`` (and optionally resize it)."""
+    global _default_path
+    path = Path(db_path or DB_PATH).resolve()
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is not None and size is not None and pool.size != size:
+            pool.close()
+            pool = None
+        if pool is None:
+            pool = _pools[path] = _new_pool(path, size=size or DB_POOL_SIZE)
+        _default_path = path
+    return pool
+
+
+def get_pool(db_path: Path | None = None) -> ConnectionPool:
+    """Get the pool for ``db_path``, or the default pool if omitted."""
+    path = Path(db_path).resolve() if db_path is not None else _default_path
+    if path is None:
+        return configure_pool()
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = _new_pool(path)
+    return pool
+
+
+def connection(db_path: Path | None = None):
+    """Context manager checking out a pooled connection."""
+    return get_pool(db_path).connection()
+
+
+def transaction(db_path: Path | None = None):
+    """Context manager grouping writes under a single commit."""
+    return get_pool(db_path).transaction()
+
+
+def snapshot(db_path: Path | None = None, *, copy: bool = False):
+    """Context manager running this thread's reads against a point-in-time view."""
+    return get_pool(db_path).snapshot(copy=copy)
+
+
+def pool_stats(db_path: Path | None = None) -> PoolStats:
+    """Return counters for the pool serving ``db_path``."""
+    return get_pool(db_path).stats()
+
+
+def enable_instrumentation(
+    db_path: Path | None = None,
+    *,
+    slow_ms: float = DB_SLOW_QUERY_MS,
+    slow_log_path: Path | None = None,
+) -> QueryStats:
+    """Record per-statement timings for ``db_path``. Returns the collector."""
+    stats = QueryStats(slow_ms, slow_log_path=slow_log_path)
+    get_pool(db_path).instrument(stats)
+    return stats
+
+
+def disable_instrumentation(db_path: Path | None = None) -> None:
+    get_pool(db_path).instrument(None)
+
+
+def query_stats(db_path: Path | None = None) -> QueryStats | None:
+    """The collector for ``db_path``, or None when it is not instrumented."""
+    return get_pool(db_path).query_stats
+
+
+def save_query_stats(path: Path = DB_STATS_PATH) -> None:
+    """Merge the totals of every instrumented pool into the stats file."""
+    with _pools_lock:
+        collectors = [p.query_stats for p in _pools.values() if p.query_stats is not None]
+    for stats in collectors:
+        stats.save(path)
+
+
+if DB_INSTRUMENT:
+    atexit.register(save_query_stats)
+
+
+def close_pools() -> None:
+    """Close every pool and forget the default database."""
+    global _default_path
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+        _default_path = None
+
+
+def get_connection(db_path: Path | None = None) -> sqlite3.Connection:
+    """Deprecated: use ``connection()`` or ``transaction()``.
+
+    Checks out a pooled connection and keeps it as this thread's connection
+    until ``close_connection()``, so repeated calls return the same one.
+    """
+    warnings.warn(
+        "get_connection() is deprecated; use connection() or transaction()",
+        DeprecationWarning,
+        stacklevel=2,
+    )
+    pool = get_pool(db_path)
+    conn = getattr(pool._local, "conn", None)
+    if conn is None:
+        conn = pool._local.conn = pool._local.pinned = pool.acquire()
+    return conn
 
 
 def close_connection() -> None:
-    """Close the global connection."""
-    global _connection
-    if _connection:
-        _connection.close()
-        _connection = None
+    """Deprecated: use ``close_pools()``.
+
+    Returns connections this thread took with ``get_connection()``, then
+    closes every pool.
+    """
+    warnings.warn("close_connection() is deprecated; use close_pools()", DeprecationWarning, stacklevel=2)
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pinned = getattr(pool._local, "pinned", None)
+        if pinned is not None:
+            pool._local.conn = pool._local.pinned = None
+            pool.release(pinned)
+    close_pools()
+
+
+def execute(sql: str, params: tuple[Any, ...] = (), db_path: Path | None = None) -> ExecuteResult:
+    """Execute a SQL statement and return its row ID, row count and any rows.
 
+    Commits immediately unless called inside ``transaction()``. The statement
+    is run to completion before the connection goes back to the pool, so
+    nothing is left reading through a connection another thread now holds.
+    """
+    pool = get_pool(db_path)
+    with pool.connection() as conn, pool.write_lock:
+        cursor = conn.execute(sql, params)
+        rows = cursor.fetchall()
+        return ExecuteResult(cursor.lastrowid, cursor.rowcount, rows)
 
-def execute(sql: str, params: tuple[Any, ...] = (), db_path: Path | None = None) -> sqlite3.Cursor:
-    """Execute a SQL statement and return the cursor."""
-    conn = get_connection(db_path)
-    cursor = conn.execute(sql, params)
-    conn.commit()
-    return cursor
+
+def executemany(
+    sql: str,
+    seq_of_params: Iterable[tuple[Any, ...]],
+    db_path: Path | None = None,
+) -> int:
+    """Execute a statement for every parameter tuple under one commit.
+
+    Returns the total number of rows affected.
+    """
+    with transaction(db_path) as conn:
+        return conn.executemany(sql, seq_of_params).rowcount
 
 
 def fetch_one(sql: str, params: tuple[Any, ...] = (), db_path: Path | None = None) -> dict[str, Any] | None:
     """Fetch a single row as a dict."""
-    conn = get_connection(db_path)
-    row = conn.execute(sql, params).fetchone()
+    with connection(db_path) as conn:
+        row = conn.execute(sql, params).fetchone()
     if row is None:
         return None
     return dict(row)
@@ -54,6 +476,64 @@ def fetch_one(sql: str, params: tuple[Any, ...] = (), db_path: Path | None = Non
 
 def fetch_all(sql: str, params: tuple[Any, ...] = (), db_path: Path | None = None) -> list[dict[str, Any]]:
     """Fetch all rows as a list of dicts."""
-    conn = get_connection(db_path)
-    rows = conn.execute(sql, params).fetchall()
+    with connection(db_path) as conn:
+        rows = conn.execute(sql, params).fetchall()
     return [dict(r) for r in rows]
+
+
+def _model_factory(model: type[T], columns: list[str]) -> Callable[[tuple[Any, ...]], T]:
+    names = [f.name for f in fields(model)]
+    if columns == names[: len(columns)]:
+        # Columns line up with the leading fields: pass the tuple straight through
+        return lambda row: model(*row)
+    unknown = set(columns) - set(names)
+    if unknown:
+        raise ValueError(f"{model.__name__} has no field(s) {sorted(unknown)}")
+    return lambda row: model(**dict(zip(columns, row)))
+
+
+def fetch_iter(
+    sql: str,
+    params: tuple[Any, ...] = (),
+    db_path: Path | None = None,
+    *,
+    arraysize: int = DEFAULT_ARRAYSIZE,
+    model: type[T] | None = None,
+) -> Iterator[dict[str, Any]] | Iterator[T]:
+    """Stream rows from the cursor ``arraysize`` at a time.
+
+    Yields dicts like ``fetch_all``, or instances of the dataclass ``model``
+    built directly from the row tuples. Only one batch is held in memory, so
+    scans of large tables stay flat.
+
+    Inside ``transaction()`` or ``snapshot()`` (or any block already holding
+    a connection) rows are read through that connection, so consume the
+    iterator within the block. Otherwise the iterator checks out a connection
+    of its own, outside the thread's ``connection()`` slot, and returns it
+    once exhausted or closed: interleaved iterators and a suspended one
+    never share or pin the thread's connection.
+    """
+    pool = get_pool(db_path)
+    held = getattr(pool._local, "conn", None)
+    conn = held if held is not None else pool.acquire()
+    try:
+        cursor = conn.cursor()
+        if model is not None:
+            cursor.row_factory = None
+        cursor.arraysize = arraysize
+        cursor.execute(sql, params)
+        try:
+            build: Callable[[Any], Any] = dict
+            if model is not None:
+                build = _model_factory(model, [d[0] for d in cursor.description or ()])
+            while True:
+                batch = cursor.fetchmany()
+                if not batch:
+                    return
+                for row in batch:
+                    yield build(row)
+        finally:
+            cursor.close()
+    finally:
+        if held is None:
+            pool.release(conn)
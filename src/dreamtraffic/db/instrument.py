@@ -0,0 +1,295 @@
+"""Optional per-statement SQL instrumentation for pooled connections.
+
+When a pool is instrumented (``engine.enable_instrumentation()`` or
+``DREAMTRAFFIC_DB_INSTRUMENT=1``) its connections are created as
+``InstrumentedConnection``. Every statement is normalized — literals become
+``?``, whitespace is collapsed — and recorded under that key with its call
+count, row count, a latency histogram of the ``execute`` step and the total
+time including fetches. ``BEGIN``/``COMMIT`` go through the same path, so
+lock waits and commit times show up as statements of their own.
+
+Statements slower than ``slow_ms`` are kept, with their ``EXPLAIN QUERY PLAN``,
+in a bounded slow log and optionally appended to a JSONL file. ``save()``
+merges the totals into a JSON file that ``dreamtraffic db-stats`` reads.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterable
+
+# Upper bounds (ms) of the latency histogram buckets; a final bucket catches the rest
+BUCKETS_MS: tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500,
+)
+
+_NO_PLAN = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE", "PRAGMA", "END")
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_PLACEHOLDER = re.compile(r"[?:@$]\w*")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+_VALUES_ROWS = re.compile(r"(\(\s*\?(?:\s*,\s*\?)*\s*\))(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize(sql: str) -> str:
+    """Statement key: literals and parameters as ``?``, lists collapsed."""
+    text = _STRING.sub("?", sql)
+    text = _NUMBER.sub("?", text)
+    text = _PLACEHOLDER.sub("?", text)
+    text = _SPACE.sub(" ", text).strip().rstrip(";")
+    text = _VALUES_ROWS.sub(r"\1, ...", text)
+    return _IN_LIST.sub("IN (?, ...)", text)
+
+
+@dataclass
+class StatementStats:
+    """Totals for one normalized statement."""
+    statement: str
+    calls: int = 0
+    rows: int = 0
+    total_ms: float = 0.0  # execute plus fetches
+    execute_ms: float = 0.0
+    max_ms: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * (len(BUCKETS_MS) + 1))
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def observe(self, elapsed_ms: float, rows: int) -> None:
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.execute_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        for i, bound in enumerate(BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+    def percentile(self, q: float) -> float:
+        """Upper bound (ms) of the bucket holding the q-th execute latency."""
+        if not self.calls:
+            return 0.0
+        target = q * self.calls
+        seen = 0
+        for i, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def merge(self, other: StatementStats) -> None:
+        self.calls += other.calls
+        self.rows += other.rows
+        self.total_ms += other.total_ms
+        self.execute_ms += other.execute_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    sql: str
+    elapsed_ms: float
+    plan: list[str]
+    at: str
+
+
+class QueryStats:
+    """Thread-safe collector shared by the connections of one pool."""
+
+    def __init__(
+        self,
+        slow_ms: float = 100.0,
+        *,
+        slow_log_path: Path | None = None,
+        keep_slow: int = 100,
+    ) -> None:
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self.slow: deque[SlowQuery] = deque(maxlen=keep_slow)
+        self._statements: dict[str, StatementStats] = {}
+        self._keys: dict[str, str] = {}  # raw SQL -> normalized, to skip re-normalizing
+        self._lock = threading.Lock()
+
+    def _entry(self, sql: str) -> StatementStats:
+        key = self._keys.get(sql)
+        if key is None:
+            key = normalize(sql)
+            if len(self._keys) < 10_000:
+                self._keys[sql] = key
+        entry = self._statements.get(key)
+        if entry is None:
+            entry = self._statements[key] = StatementStats(key)
+        return entry
+
+    def record(self, sql: str, elapsed: float, rows: int) -> StatementStats:
+        with self._lock:
+            entry = self._entry(sql)
+            entry.observe(elapsed * 1000, rows)
+        return entry
+
+    def record_fetch(self, entry: StatementStats, elapsed: float, rows: int) -> None:
+        with self._lock:
+            entry.total_ms += elapsed * 1000
+            entry.rows += rows
+
+    def record_slow(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any,
+        elapsed: float,
+    ) -> None:
+        statement = normalize(sql)
+        plan: list[str] = []
+        if params is not None and not statement.upper().startswith(_NO_PLAN):
+            try:
+                rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [row[-1] for row in rows.fetchall()]
+            except sqlite3.Error:
+                pass
+        entry = SlowQuery(
+            statement=statement,
+            sql=sql.strip(),
+            elapsed_ms=round(elapsed * 1000, 3),
+            plan=plan,
+            at=datetime.now(timezone.utc).isoformat(),
+        )
+        with self._lock:
+            self.slow.append(entry)
+            if self.slow_log_path is not None:
+                self.slow_log_path.parent.mkdir(parents=True, exist_ok=True)
+                with self.slow_log_path.open("a") as f:
+                    f.write(json.dumps(asdict(entry)) + "\n")
+
+    def top(self, n: int = 20, by: str = "total_ms") -> list[StatementStats]:
+        """The ``n`` statements with the highest ``by`` (total_ms, avg_ms, max_ms, calls, rows)."""
+        with self._lock:
+            entries = list(self._statements.values())
+        return sorted(entries, key=lambda s: getattr(s, by), reverse=True)[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._statements.clear()
+            self.slow.clear()
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {key: asdict(s) for key, s in self._statements.items()}
+
+    def save(self, path: Path) -> None:
+        """Add this collector's totals to the stats file at ``path`` (once per run)."""
+        merged = load_stats(path)
+        for key, data in self.to_dict().items():
+            if key in merged:
+                merged[key].merge(StatementStats(**data))
+            else:
+                merged[key] = StatementStats(**data)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(json.dumps({k: asdict(s) for k, s in merged.items()}, indent=1))
+        tmp.replace(path)
+
+
+def load_stats(path: Path) -> dict[str, StatementStats]:
+    """Statement totals saved by ``QueryStats.save``."""
+    if not path.exists():
+        return {}
+    return {key: StatementStats(**data) for key, data in json.loads(path.read_text()).items()}
+
+
+def load_slow_log(path: Path, limit: int = 20) -> list[SlowQuery]:
+    """The last ``limit`` entries of a slow-query JSONL file."""
+    if not path.exists():
+        return []
+    lines = deque(path.open(), maxlen=limit)
+    return [SlowQuery(**json.loads(line)) for line in lines if line.strip()]
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor recording execute and fetch timings into the connection's QueryStats."""
+
+    _entry: StatementStats | None = None
+
+    def _observe(self, sql: str, params: Any, start: float) -> None:
+        elapsed = time.perf_counter() - start
+        stats: QueryStats | None = self.connection.query_stats
+        if stats is None:
+            return
+        rows = self.rowcount if self.description is None and self.rowcount > 0 else 0
+        self._entry = stats.record(sql, elapsed, rows)
+        if elapsed * 1000 >= stats.slow_ms:
+            stats.record_slow(self.connection, sql, params, elapsed)
+
+    def _fetched(self, start: float, rows: int) -> None:
+        stats: QueryStats | None = self.connection.query_stats
+        if stats is not None and self._entry is not None:
+            stats.record_fetch(self._entry, time.perf_counter() - start, rows)
+
+    def execute(self, sql: str, parameters: Any = ()) -> InstrumentedCursor:
+        start = time.perf_counter()
+        super().execute(sql, parameters)
+        self._observe(sql, parameters, start)
+        return self
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> InstrumentedCursor:
+        first = None
+        if isinstance(seq_of_parameters, (list, tuple)) and seq_of_parameters:
+            first = seq_of_parameters[0]
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_parameters)
+        self._observe(sql, first, start)
+        return self
+
+    def fetchone(self) -> Any:
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, row is not None)
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._fetched(start, len(rows))
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows))
+        return rows
+
+    def __next__(self) -> Any:
+        start = time.perf_counter()
+        row = super().__next__()
+        self._fetched(start, 1)
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors (including ``execute`` shortcuts) are instrumented."""
+
+    query_stats: QueryStats | None = None
+
+    def cursor(self, factory: type[sqlite3.Cursor] = InstrumentedCursor) -> sqlite3.Cursor:
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters: Any = ()) -> sqlite3.Cursor:
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Any]) -> sqlite3.Cursor:
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -1,10 +1,20 @@
-"""DDL + seed data — DSP specs, SSP configs, fee schedules, supply paths."""
+"""Versioned schema migrations + seed data — DSP specs, SSP configs, fee schedules, supply paths.
+
+The applied schema version lives in ``PRAGMA user_version``. ``init_db`` reads
+it once; a current database does no further work, and an older one (including
+pre-versioning databases at version 0) is upgraded in place, one migration per
+transaction.
+"""
 
 from __future__ import annotations
 
+import sqlite3
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Callable, Iterator
 
-from dreamtraffic.db.engine import get_connection
+from dreamtraffic.db.engine import get_pool
+from dreamtraffic.db.payloads import compress_existing
 
 DDL = """
 CREATE TABLE IF NOT EXISTS campaigns (
@@ -147,12 +157,594 @@ SEED_SUPPLY_PATHS = [
 ]
 
 
-def init_db(db_path: Path | None = None) -> None:
-    """Create tables and insert seed data."""
-    conn = get_connection(db_path)
-    conn.executescript(DDL)
+# Every hot lookup filters trafficking_records by creative_id (optionally with
+# dsp), so the composite index also serves creative_id-only queries.
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_creatives_campaign_id ON creatives(campaign_id);
+CREATE INDEX IF NOT EXISTS idx_trafficking_records_creative_dsp
+    ON trafficking_records(creative_id, dsp);
+CREATE INDEX IF NOT EXISTS idx_trafficking_records_dsp ON trafficking_records(dsp);
+CREATE INDEX IF NOT EXISTS idx_approval_events_creative_id ON approval_events(creative_id);
+"""
+
+
+# supply_paths and dsp_specs are read far more often than written; db.reference
+# caches them in-process and reloads only when this counter moves.
+REFERENCE_GENERATION = """
+CREATE TABLE IF NOT EXISTS reference_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO reference_generation (id, generation) VALUES (1, 0);
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS trg_{table}_{event.lower()}_generation
+AFTER {event} ON {table}
+BEGIN
+    UPDATE reference_generation SET generation = generation + 1 WHERE id = 1;
+END;
+"""
+    for table in ("supply_paths", "dsp_specs")
+    for event in ("INSERT", "UPDATE", "DELETE")
+)
+
+
+# Dashboard rollups kept current by triggers, so status views read one row per
+# campaign or creative instead of scanning the fact tables. Each DSP owns one
+# bit of creative_summary.dsp_mask; new DSPs are assigned the next free bit.
+SUMMARY_TABLES = """
+CREATE TABLE IF NOT EXISTS campaign_status_counts (
+    campaign_id INTEGER NOT NULL,
+    approval_status TEXT NOT NULL,
+    creative_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (campaign_id, approval_status)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS dsp_bits (
+    dsp TEXT PRIMARY KEY,
+    bit INTEGER NOT NULL UNIQUE
+);
+INSERT OR IGNORE INTO dsp_bits (dsp, bit) VALUES
+    ('amazon', 0), ('thetradedesk', 1), ('dv360', 2), ('stackadapt', 3), ('adelphic', 4);
+
+CREATE TABLE IF NOT EXISTS creative_summary (
+    creative_id INTEGER PRIMARY KEY,
+    dsp_mask INTEGER NOT NULL DEFAULT 0,
+    trafficking_count INTEGER NOT NULL DEFAULT 0,
+    approval_event_count INTEGER NOT NULL DEFAULT 0,
+    last_transition_at TEXT NOT NULL DEFAULT ''
+);
+
+CREATE TABLE IF NOT EXISTS dsp_audit_status (
+    creative_id INTEGER NOT NULL,
+    dsp TEXT NOT NULL,
+    audit_status TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (creative_id, dsp)
+) WITHOUT ROWID;
+
+-- Backfill from existing rows
+INSERT OR IGNORE INTO dsp_bits (dsp, bit)
+    SELECT dsp, (SELECT MAX(bit) FROM dsp_bits) + ROW_NUMBER() OVER (ORDER BY dsp)
+    FROM (SELECT DISTINCT dsp FROM trafficking_records
+          WHERE dsp NOT IN (SELECT dsp FROM dsp_bits));
+
+INSERT OR REPLACE INTO campaign_status_counts (campaign_id, approval_status, creative_count)
+    SELECT campaign_id, approval_status, COUNT(*) FROM creatives
+    GROUP BY campaign_id, approval_status;
+
+INSERT OR REPLACE INTO creative_summary
+    (creative_id, dsp_mask, trafficking_count, approval_event_count, last_transition_at)
+    SELECT cr.id,
+           COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                     JOIN dsp_bits b ON b.dsp = tr.dsp WHERE tr.creative_id = cr.id), 0),
+           (SELECT COUNT(*) FROM trafficking_records tr WHERE tr.creative_id = cr.id),
+           (SELECT COUNT(*) FROM approval_events ae WHERE ae.creative_id = cr.id),
+           COALESCE((SELECT MAX(created_at) FROM approval_events ae WHERE ae.creative_id = cr.id), '')
+    FROM creatives cr;
+
+INSERT OR REPLACE INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+    SELECT creative_id, dsp, audit_status, updated_at FROM trafficking_records
+    WHERE id IN (SELECT MAX(id) FROM trafficking_records GROUP BY creative_id, dsp);
+
+-- creatives -> campaign_status_counts, creative_summary
+CREATE TRIGGER IF NOT EXISTS trg_creatives_summary_insert
+AFTER INSERT ON creatives
+BEGIN
+    INSERT INTO campaign_status_counts (campaign_id, approval_status, creative_count)
+        VALUES (NEW.campaign_id, NEW.approval_status, 1)
+        ON CONFLICT (campaign_id, approval_status)
+        DO UPDATE SET creative_count = creative_count + 1;
+    INSERT OR IGNORE INTO creative_summary (creative_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_creatives_summary_update
+AFTER UPDATE OF campaign_id, approval_status ON creatives
+WHEN OLD.campaign_id IS NOT NEW.campaign_id OR OLD.approval_status IS NOT NEW.approval_status
+BEGIN
+    UPDATE campaign_status_counts SET creative_count = creative_count - 1
+        WHERE campaign_id = OLD.campaign_id AND approval_status = OLD.approval_status;
+    DELETE FROM campaign_status_counts
+        WHERE campaign_id = OLD.campaign_id AND approval_status = OLD.approval_status
+          AND creative_count <= 0;
+    INSERT INTO campaign_status_counts (campaign_id, approval_status, creative_count)
+        VALUES (NEW.campaign_id, NEW.approval_status, 1)
+        ON CONFLICT (campaign_id, approval_status)
+        DO UPDATE SET creative_count = creative_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_creatives_summary_delete
+AFTER DELETE ON creatives
+BEGIN
+    UPDATE campaign_status_counts SET creative_count = creative_count - 1
+        WHERE campaign_id = OLD.campaign_id AND approval_status = OLD.approval_status;
+    DELETE FROM campaign_status_counts
+        WHERE campaign_id = OLD.campaign_id AND approval_status = OLD.approval_status
+          AND creative_count <= 0;
+    DELETE FROM creative_summary WHERE creative_id = OLD.id;
+    DELETE FROM dsp_audit_status WHERE creative_id = OLD.id;
+END;
+
+-- trafficking_records -> dsp_bits, creative_summary, dsp_audit_status
+CREATE TRIGGER IF NOT EXISTS trg_trafficking_summary_insert
+AFTER INSERT ON trafficking_records
+BEGIN
+    INSERT OR IGNORE INTO dsp_bits (dsp, bit)
+        VALUES (NEW.dsp, (SELECT COALESCE(MAX(bit) + 1, 0) FROM dsp_bits));
+    INSERT INTO creative_summary (creative_id, dsp_mask, trafficking_count)
+        VALUES (NEW.creative_id, 1 << (SELECT bit FROM dsp_bits WHERE dsp = NEW.dsp), 1)
+        ON CONFLICT (creative_id) DO UPDATE SET
+            dsp_mask = dsp_mask | excluded.dsp_mask,
+            trafficking_count = trafficking_count + 1;
+    INSERT INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        VALUES (NEW.creative_id, NEW.dsp, NEW.audit_status, NEW.updated_at)
+        ON CONFLICT (creative_id, dsp) DO UPDATE SET
+            audit_status = excluded.audit_status, updated_at = excluded.updated_at;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_trafficking_summary_update
+AFTER UPDATE OF creative_id, dsp, audit_status ON trafficking_records
+BEGIN
+    INSERT OR IGNORE INTO dsp_bits (dsp, bit)
+        VALUES (NEW.dsp, (SELECT COALESCE(MAX(bit) + 1, 0) FROM dsp_bits));
+    INSERT OR IGNORE INTO creative_summary (creative_id) VALUES (NEW.creative_id);
+    UPDATE creative_summary SET
+        dsp_mask = COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                             JOIN dsp_bits b ON b.dsp = tr.dsp
+                             WHERE tr.creative_id = creative_summary.creative_id), 0),
+        trafficking_count = (SELECT COUNT(*) FROM trafficking_records tr
+                             WHERE tr.creative_id = creative_summary.creative_id)
+        WHERE creative_id IN (OLD.creative_id, NEW.creative_id);
+    DELETE FROM dsp_audit_status WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp;
+    INSERT OR REPLACE INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        SELECT creative_id, dsp, audit_status, updated_at FROM trafficking_records
+        WHERE id IN (SELECT MAX(id) FROM trafficking_records
+                     WHERE (creative_id = OLD.creative_id AND dsp = OLD.dsp)
+                        OR (creative_id = NEW.creative_id AND dsp = NEW.dsp)
+                     GROUP BY creative_id, dsp);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_trafficking_summary_delete
+AFTER DELETE ON trafficking_records
+BEGIN
+    UPDATE creative_summary SET
+        dsp_mask = COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                             JOIN dsp_bits b ON b.dsp = tr.dsp
+                             WHERE tr.creative_id = OLD.creative_id), 0),
+        trafficking_count = trafficking_count - 1
+        WHERE creative_id = OLD.creative_id;
+    DELETE FROM dsp_audit_status WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp;
+    INSERT OR REPLACE INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        SELECT creative_id, dsp, audit_status, updated_at FROM trafficking_records
+        WHERE id = (SELECT MAX(id) FROM trafficking_records
+                    WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp);
+END;
+
+-- approval_events -> creative_summary
+CREATE TRIGGER IF NOT EXISTS trg_approval_events_summary_insert
+AFTER INSERT ON approval_events
+BEGIN
+    INSERT INTO creative_summary (creative_id, approval_event_count, last_transition_at)
+        VALUES (NEW.creative_id, 1, NEW.created_at)
+        ON CONFLICT (creative_id) DO UPDATE SET
+            approval_event_count = approval_event_count + 1,
+            last_transition_at = MAX(last_transition_at, excluded.last_transition_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_approval_events_summary_delete
+AFTER DELETE ON approval_events
+BEGIN
+    UPDATE creative_summary SET
+        approval_event_count = approval_event_count - 1,
+        last_transition_at = COALESCE((SELECT MAX(created_at) FROM approval_events
+                                       WHERE creative_id = OLD.creative_id), '')
+        WHERE creative_id = OLD.creative_id;
+END;
+"""
+
+
+# db.archive moves old fact rows into monthly archive files. The summaries
+# keep counting archived rows: the delete triggers stand down while
+# archive_state.archiving is set, and creative_summary.archived_dsp_mask keeps
+# the DSP bits of archived rows for the triggers that recompute the mask.
+ARCHIVE_SUPPORT = """
+CREATE INDEX IF NOT EXISTS idx_trafficking_records_created_at ON trafficking_records(created_at);
+CREATE INDEX IF NOT EXISTS idx_approval_events_created_at ON approval_events(created_at);
+
+CREATE TABLE IF NOT EXISTS archive_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    archiving INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO archive_state (id, archiving) VALUES (1, 0);
+
+DROP TRIGGER IF EXISTS trg_trafficking_summary_update;
+CREATE TRIGGER trg_trafficking_summary_update
+AFTER UPDATE OF creative_id, dsp, audit_status ON trafficking_records
+BEGIN
+    INSERT OR IGNORE INTO dsp_bits (dsp, bit)
+        VALUES (NEW.dsp, (SELECT COALESCE(MAX(bit) + 1, 0) FROM dsp_bits));
+    INSERT OR IGNORE INTO creative_summary (creative_id) VALUES (NEW.creative_id);
+    UPDATE creative_summary SET
+        dsp_mask = archived_dsp_mask | COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                                                 JOIN dsp_bits b ON b.dsp = tr.dsp
+                                                 WHERE tr.creative_id = creative_summary.creative_id), 0),
+        trafficking_count = trafficking_count + (creative_id = NEW.creative_id) - (creative_id = OLD.creative_id)
+        WHERE creative_id IN (OLD.creative_id, NEW.creative_id);
+    DELETE FROM dsp_audit_status WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp;
+    INSERT OR REPLACE INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        SELECT creative_id, dsp, audit_status, updated_at FROM trafficking_records
+        WHERE id IN (SELECT MAX(id) FROM trafficking_records
+                     WHERE (creative_id = OLD.creative_id AND dsp = OLD.dsp)
+                        OR (creative_id = NEW.creative_id AND dsp = NEW.dsp)
+                     GROUP BY creative_id, dsp);
+END;
+
+DROP TRIGGER IF EXISTS trg_trafficking_summary_delete;
+CREATE TRIGGER trg_trafficking_summary_delete
+AFTER DELETE ON trafficking_records
+WHEN NOT (SELECT archiving FROM archive_state WHERE id = 1)
+BEGIN
+    UPDATE creative_summary SET
+        dsp_mask = archived_dsp_mask | COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                                                 JOIN dsp_bits b ON b.dsp = tr.dsp
+                                                 WHERE tr.creative_id = OLD.creative_id), 0),
+        trafficking_count = trafficking_count - 1
+        WHERE creative_id = OLD.creative_id;
+    DELETE FROM dsp_audit_status WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp;
+    INSERT OR REPLACE INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        SELECT creative_id, dsp, audit_status, updated_at FROM trafficking_records
+        WHERE id = (SELECT MAX(id) FROM trafficking_records
+                    WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp);
+END;
+
+DROP TRIGGER IF EXISTS trg_approval_events_summary_delete;
+CREATE TRIGGER trg_approval_events_summary_delete
+AFTER DELETE ON approval_events
+WHEN NOT (SELECT archiving FROM archive_state WHERE id = 1)
+BEGIN
+    UPDATE creative_summary SET
+        approval_event_count = approval_event_count - 1,
+        last_transition_at = COALESCE((SELECT MAX(created_at) FROM approval_events
+                                       WHERE creative_id = OLD.creative_id), '')
+        WHERE creative_id = OLD.creative_id;
+END;
+"""
+
+
+
+# db.bulk_io inserts creatives thousands at a time. While bulk_load_state.loading
+# is set the per-row summary trigger stands down and the loader updates
+# campaign_status_counts and creative_summary once per chunk.
+BULK_LOAD = """
+CREATE TABLE IF NOT EXISTS bulk_load_state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    loading INTEGER NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO bulk_load_state (id, loading) VALUES (1, 0);
+
+DROP TRIGGER IF EXISTS trg_creatives_summary_insert;
+CREATE TRIGGER trg_creatives_summary_insert
+AFTER INSERT ON creatives
+WHEN NOT (SELECT loading FROM bulk_load_state WHERE id = 1)
+BEGIN
+    INSERT INTO campaign_status_counts (campaign_id, approval_status, creative_count)
+        VALUES (NEW.campaign_id, NEW.approval_status, 1)
+        ON CONFLICT (campaign_id, approval_status)
+        DO UPDATE SET creative_count = creative_count + 1;
+    INSERT OR IGNORE INTO creative_summary (creative_id) VALUES (NEW.id);
+END;
+"""
+
+
+# External-content FTS5 indexes over creative names/prompts and campaign
+# names/briefs, for db.search. The rows live in creatives/campaigns; the
+# triggers keep the index in step. Bulk-loaded creatives are indexed per
+# chunk by db.bulk_io, like the summaries.
+SEARCH_INDEX = """
+CREATE VIRTUAL TABLE IF NOT EXISTS creatives_fts USING fts5(
+    name, prompt,
+    content = 'creatives', content_rowid = 'id',
+    tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3'
+);
+INSERT INTO creatives_fts (creatives_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)');
+INSERT INTO creatives_fts (creatives_fts) VALUES ('rebuild');
+
+CREATE VIRTUAL TABLE IF NOT EXISTS campaigns_fts USING fts5(
+    name, brief,
+    content = 'campaigns', content_rowid = 'id',
+    tokenize = 'porter unicode61 remove_diacritics 2', prefix = '2 3'
+);
+INSERT INTO campaigns_fts (campaigns_fts, rank) VALUES ('rank', 'bm25(2.0, 1.0)');
+INSERT INTO campaigns_fts (campaigns_fts) VALUES ('rebuild');
+
+DROP TRIGGER IF EXISTS trg_creatives_fts_insert;
+CREATE TRIGGER trg_creatives_fts_insert
+AFTER INSERT ON creatives
+WHEN NOT (SELECT loading FROM bulk_load_state WHERE id = 1)
+BEGIN
+    INSERT INTO creatives_fts (rowid, name, prompt) VALUES (NEW.id, NEW.name, NEW.prompt);
+END;
+
+DROP TRIGGER IF EXISTS trg_creatives_fts_delete;
+CREATE TRIGGER trg_creatives_fts_delete
+AFTER DELETE ON creatives
+BEGIN
+    INSERT INTO creatives_fts (creatives_fts, rowid, name, prompt)
+        VALUES ('delete', OLD.id, OLD.name, OLD.prompt);
+END;
+
+DROP TRIGGER IF EXISTS trg_creatives_fts_update;
+CREATE TRIGGER trg_creatives_fts_update
+AFTER UPDATE OF name, prompt ON creatives
+BEGIN
+    INSERT INTO creatives_fts (creatives_fts, rowid, name, prompt)
+        VALUES ('delete', OLD.id, OLD.name, OLD.prompt);
+    INSERT INTO creatives_fts (rowid, name, prompt) VALUES (NEW.id, NEW.name, NEW.prompt);
+END;
+
+DROP TRIGGER IF EXISTS trg_campaigns_fts_insert;
+CREATE TRIGGER trg_campaigns_fts_insert
+AFTER INSERT ON campaigns
+BEGIN
+    INSERT INTO campaigns_fts (rowid, name, brief) VALUES (NEW.id, NEW.name, NEW.brief);
+END;
+
+DROP TRIGGER IF EXISTS trg_campaigns_fts_delete;
+CREATE TRIGGER trg_campaigns_fts_delete
+AFTER DELETE ON campaigns
+BEGIN
+    INSERT INTO campaigns_fts (campaigns_fts, rowid, name, brief)
+        VALUES ('delete', OLD.id, OLD.name, OLD.brief);
+END;
+
+DROP TRIGGER IF EXISTS trg_campaigns_fts_update;
+CREATE TRIGGER trg_campaigns_fts_update
+AFTER UPDATE OF name, brief ON campaigns
+BEGIN
+    INSERT INTO campaigns_fts (campaigns_fts, rowid, name, brief)
+        VALUES ('delete', OLD.id, OLD.name, OLD.brief);
+    INSERT INTO campaigns_fts (rowid, name, brief) VALUES (NEW.id, NEW.name, NEW.brief);
+END;
+"""
 
-    # Seed DSP specs if empty
+
+# luma.cache: one row per normalized generation request (request_key is its
+# SHA-256), so an identical request reuses the paid generation.
+GENERATION_CACHE = """
+CREATE TABLE IF NOT EXISTS generation_cache (
+    request_key TEXT PRIMARY KEY,
+    generation_id TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    model TEXT NOT NULL,
+    resolution TEXT NOT NULL,
+    duration TEXT NOT NULL,
+    aspect_ratio TEXT NOT NULL,
+    loop INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL DEFAULT 'pending',
+    video_url TEXT NOT NULL DEFAULT '',
+    thumbnail_url TEXT NOT NULL DEFAULT '',
+    hits INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    last_used_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_generation_id ON generation_cache(generation_id);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_created_at ON generation_cache(created_at);
+CREATE INDEX IF NOT EXISTS idx_generation_cache_last_used_at ON generation_cache(last_used_at);
+"""
+
+ASSET_STORE = """
+CREATE TABLE IF NOT EXISTS assets (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    ext TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    last_access REAL NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_assets_last_access ON assets(last_access);
+
+CREATE TABLE IF NOT EXISTS asset_sources (
+    url TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL REFERENCES assets(sha256) ON DELETE CASCADE
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_asset_sources_sha256 ON asset_sources(sha256);
+
+-- creative_id is not a foreign key: with the remote store the creative may
+-- only exist remotely. Pinning asks the storage backend which are active.
+CREATE TABLE IF NOT EXISTS asset_refs (
+    sha256 TEXT NOT NULL REFERENCES assets(sha256) ON DELETE CASCADE,
+    creative_id INTEGER NOT NULL,
+    PRIMARY KEY (sha256, creative_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_asset_refs_creative_id ON asset_refs(creative_id);
+"""
+
+GENERATION_JOBS = """
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creative_id INTEGER REFERENCES creatives(id) ON DELETE SET NULL,
+    prompt TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'queued' CHECK (state IN
+        ('queued', 'submitted', 'polling', 'downloading', 'done', 'failed')),
+    generation_id TEXT NOT NULL DEFAULT '',
+    video_url TEXT NOT NULL DEFAULT '',
+    asset_sha256 TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    error TEXT NOT NULL DEFAULT '',
+    lease_owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_runnable ON generation_jobs(available_at)
+    WHERE state NOT IN ('done', 'failed');
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_generation_id ON generation_jobs(generation_id);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_creative_id ON generation_jobs(creative_id);
+"""
+
+# creative_id stops being a foreign key, as on asset_refs: with the remote
+# store the creative a job fills in may only exist remotely.
+GENERATION_JOBS_UNLINKED = """
+ALTER TABLE generation_jobs RENAME TO generation_jobs_old;
+DROP INDEX IF EXISTS idx_generation_jobs_runnable;
+DROP INDEX IF EXISTS idx_generation_jobs_generation_id;
+DROP INDEX IF EXISTS idx_generation_jobs_creative_id;
+CREATE TABLE generation_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    creative_id INTEGER,
+    prompt TEXT NOT NULL,
+    params TEXT NOT NULL DEFAULT '{}',
+    state TEXT NOT NULL DEFAULT 'queued' CHECK (state IN
+        ('queued', 'submitted', 'polling', 'downloading', 'done', 'failed')),
+    generation_id TEXT NOT NULL DEFAULT '',
+    video_url TEXT NOT NULL DEFAULT '',
+    asset_sha256 TEXT NOT NULL DEFAULT '',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    error TEXT NOT NULL DEFAULT '',
+    lease_owner TEXT,
+    lease_expires REAL,
+    available_at REAL NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT (datetime('now')),
+    updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+INSERT INTO generation_jobs SELECT * FROM generation_jobs_old;
+DROP TABLE generation_jobs_old;
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_runnable ON generation_jobs(available_at)
+    WHERE state NOT IN ('done', 'failed');
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_generation_id ON generation_jobs(generation_id);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_creative_id ON generation_jobs(creative_id);
+"""
+
+# creative_summary masks are signed 64-bit integers: 1 << 63 is the sign bit
+# and 1 << 64 is 0, so DSP bits stop at 62. Later DSPs get no bit and no mask
+# contribution; reporting lists them from dsp_audit_status instead.
+DSP_BIT_CAP = """
+DELETE FROM dsp_bits WHERE bit > 62;
+
+UPDATE creative_summary SET
+    archived_dsp_mask = archived_dsp_mask & ~(1 << 63),
+    dsp_mask = (archived_dsp_mask & ~(1 << 63)) | COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                                                          JOIN dsp_bits b ON b.dsp = tr.dsp
+                                                          WHERE tr.creative_id = creative_summary.creative_id), 0);
+
+DROP TRIGGER IF EXISTS trg_trafficking_summary_insert;
+CREATE TRIGGER trg_trafficking_summary_insert
+AFTER INSERT ON trafficking_records
+BEGIN
+    INSERT OR IGNORE INTO dsp_bits (dsp, bit)
+        SELECT NEW.dsp, next_bit FROM (SELECT COALESCE(MAX(bit) + 1, 0) AS next_bit FROM dsp_bits)
+        WHERE next_bit <= 62;
+    INSERT INTO creative_summary (creative_id, dsp_mask, trafficking_count)
+        VALUES (NEW.creative_id, COALESCE(1 << (SELECT bit FROM dsp_bits WHERE dsp = NEW.dsp), 0), 1)
+        ON CONFLICT (creative_id) DO UPDATE SET
+            dsp_mask = dsp_mask | excluded.dsp_mask,
+            trafficking_count = trafficking_count + 1;
+    INSERT INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        VALUES (NEW.creative_id, NEW.dsp, NEW.audit_status, NEW.updated_at)
+        ON CONFLICT (creative_id, dsp) DO UPDATE SET
+            audit_status = excluded.audit_status, updated_at = excluded.updated_at;
+END;
+
+DROP TRIGGER IF EXISTS trg_trafficking_summary_update;
+CREATE TRIGGER trg_trafficking_summary_update
+AFTER UPDATE OF creative_id, dsp, audit_status ON trafficking_records
+BEGIN
+    INSERT OR IGNORE INTO dsp_bits (dsp, bit)
+        SELECT NEW.dsp, next_bit FROM (SELECT COALESCE(MAX(bit) + 1, 0) AS next_bit FROM dsp_bits)
+        WHERE next_bit <= 62;
+    INSERT OR IGNORE INTO creative_summary (creative_id) VALUES (NEW.creative_id);
+    UPDATE creative_summary SET
+        dsp_mask = archived_dsp_mask | COALESCE((SELECT SUM(DISTINCT 1 << b.bit) FROM trafficking_records tr
+                                                 JOIN dsp_bits b ON b.dsp = tr.dsp
+                                                 WHERE tr.creative_id = creative_summary.creative_id), 0),
+        trafficking_count = trafficking_count + (creative_id = NEW.creative_id) - (creative_id = OLD.creative_id)
+        WHERE creative_id IN (OLD.creative_id, NEW.creative_id);
+    DELETE FROM dsp_audit_status WHERE creative_id = OLD.creative_id AND dsp = OLD.dsp;
+    INSERT OR REPLACE INTO dsp_audit_status (creative_id, dsp, audit_status, updated_at)
+        SELECT creative_id, dsp, audit_status, updated_at FROM trafficking_records
+        WHERE id IN (SELECT MAX(id) FROM trafficking_records
+                     WHERE (creative_id = OLD.creative_id AND dsp = OLD.dsp)
+                        OR (creative_id = NEW.creative_id AND dsp = NEW.dsp)
+                     GROUP BY creative_id, dsp);
+END;
+"""
+
+
+def _archive_support(conn: sqlite3.Connection) -> None:
+    """Add creative_summary.archived_dsp_mask (once), then the ARCHIVE_SUPPORT script."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(creative_summary)")}
+    if "archived_dsp_mask" not in columns:
+        conn.execute(
+            "ALTER TABLE creative_summary ADD COLUMN archived_dsp_mask INTEGER NOT NULL DEFAULT 0"
+        )
+    for statement in _statements(ARCHIVE_SUPPORT):
+        conn.execute(statement)
+
+
+def _video_metadata(conn: sqlite3.Connection) -> None:
+    """Add the probed video metadata columns to creatives (once)."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(creatives)")}
+    for column, ddl in (
+        ("codec", "TEXT NOT NULL DEFAULT ''"),
+        ("bitrate_kbps", "INTEGER NOT NULL DEFAULT 0"),
+        ("file_size", "INTEGER NOT NULL DEFAULT 0"),
+    ):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE creatives ADD COLUMN {column} {ddl}")
+
+
+def _approval_event_keys(conn: sqlite3.Connection) -> None:
+    """Add approval_events.event_key (once) with a unique index over non-empty keys."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(approval_events)")}
+    if "event_key" not in columns:
+        conn.execute("ALTER TABLE approval_events ADD COLUMN event_key TEXT NOT NULL DEFAULT ''")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_approval_events_event_key "
+        "ON approval_events(event_key) WHERE event_key != ''"
+    )
+
+
+def _trafficking_record_keys(conn: sqlite3.Connection) -> None:
+    """Add trafficking_records.record_key (once) with a unique index over non-empty keys.
+
+    Locally nothing upserts on these keys, so rows written without one (the
+    CLI's direct inserts) keep ''. The remote tables get plain unique
+    constraints instead (supabase/migrations), which ``on_conflict`` needs.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(trafficking_records)")}
+    if "record_key" not in columns:
+        conn.execute("ALTER TABLE trafficking_records ADD COLUMN record_key TEXT NOT NULL DEFAULT ''")
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_trafficking_records_record_key "
+        "ON trafficking_records(record_key) WHERE record_key != ''"
+    )
+
+
+def _seed_reference_data(conn: sqlite3.Connection) -> None:
+    """Seed DSP specs and supply paths into empty reference tables."""
     count = conn.execute("SELECT COUNT(*) FROM dsp_specs").fetchone()[0]
     if count == 0:
         conn.executemany(
@@ -163,7 +755,6 @@ def init_db(db_path: Path | None = None) -> None:
             SEED_DSP_SPECS,
         )
 
-    # Seed supply paths if empty
     count = conn.execute("SELECT COUNT(*) FROM supply_paths").fetchone()[0]
     if count == 0:
         conn.executemany(
@@ -174,4 +765,73 @@ def init_db(db_path: Path | None = None) -> None:
             SEED_SUPPLY_PATHS,
         )
 
-    conn.commit()
+
+@dataclass(frozen=True)
+class Migration:
+    """One schema step: a SQL script, then an optional Python hook."""
+    version: int
+    description: str
+    sql: str = ""
+    apply: Callable[[sqlite3.Connection], None] | None = None
+
+    def run(self, conn: sqlite3.Connection) -> None:
+        for statement in _statements(self.sql):
+            conn.execute(statement)
+        if self.apply is not None:
+            self.apply(conn)
+
+
+MIGRATIONS: list[Migration] = [
+    Migration(1, "Base schema and reference data", DDL, _seed_reference_data),
+    Migration(2, "Foreign-key and DSP lookup indexes", INDEXES),
+    Migration(3, "Reference data generation counter", REFERENCE_GENERATION),
+    Migration(4, "Trigger-maintained pipeline summary tables", SUMMARY_TABLES),
+    Migration(5, "Compress trafficking request/response payloads", apply=compress_existing),
+    Migration(6, "Archival support: created_at indexes, archive-aware summary triggers",
+              apply=_archive_support),
+    Migration(7, "Bulk-load switch for the creatives summary trigger", BULK_LOAD),
+    Migration(8, "Full-text search over creative prompts and campaign briefs", SEARCH_INDEX),
+    Migration(9, "Luma generation cache", GENERATION_CACHE),
+    Migration(10, "Content-addressed video asset index", ASSET_STORE),
+    Migration(11, "Probed video metadata on creatives", apply=_video_metadata),
+    Migration(12, "Persistent Luma generation job queue", GENERATION_JOBS),
+    Migration(13, "Idempotency keys on approval events", apply=_approval_event_keys),
+    Migration(14, "Cap DSP mask bits at 62", DSP_BIT_CAP),
+    Migration(15, "Generation jobs without the creatives foreign key", GENERATION_JOBS_UNLINKED),
+    Migration(16, "Idempotency keys on trafficking records", apply=_trafficking_record_keys),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+
+
+def _statements(script: str) -> Iterator[str]:
+    """Split a SQL script into complete statements (trigger bodies included)."""
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            yield buffer.strip()
+            buffer = ""
+    if buffer.strip():
+        raise ValueError(f"Incomplete SQL statement in migration: {buffer.strip()[:80]}")
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    """Read the applied schema version."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_db(db_path: Path | None = None) -> int:
+    """Bring the database up to SCHEMA_VERSION. Returns the schema version."""
+    pool = get_pool(db_path)
+    with pool.connection() as conn:
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            return SCHEMA_VERSION
+        for migration in MIGRATIONS:
+            with pool.transaction():
+                # Re-read under the write lock: another worker may have upgraded
+                if get_schema_version(conn) >= migration.version:
+                    continue
+                migration.run(conn)
+                conn.execute(f"PRAGMA user_version = {migration.version}")
+    return SCHEMA_VERSION
@@ -1,4 +1,8 @@
-"""Dataclass models for all database entities."""
+"""Dataclass models for all database entities.
+
+Models are slotted so that rows streamed through ``db.fetch_iter(model=...)``
+cost no per-instance ``__dict__``.
+"""
 
 from __future__ import annotations
 
@@ -32,7 +36,7 @@ class PlacementType(str, Enum):
     PREROLL = "preroll"
 
 
-@dataclass
+@dataclass(slots=True)
 class Campaign:
     id: int | None = None
     name: str = ""
@@ -47,7 +51,7 @@ class Campaign:
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
-@dataclass
+@dataclass(slots=True)
 class Creative:
     id: int | None = None
     campaign_id: int = 0
@@ -64,10 +68,13 @@ class Creative:
     approval_status: str = ApprovalStatus.DRAFT.value
     measurement_config: str = ""  # JSON string of vendor configs
     vast_url: str = ""
+    codec: str = ""  # from the file's metadata; empty until probed
+    bitrate_kbps: int = 0
+    file_size: int = 0
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
-@dataclass
+@dataclass(slots=True)
 class ApprovalEvent:
     id: int | None = None
     creative_id: int = 0
@@ -75,10 +82,11 @@ class ApprovalEvent:
     to_status: str = ""
     reviewer: str = ""
     notes: str = ""
+    event_key: str = ""  # client-generated idempotency key for remote writes
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
-@dataclass
+@dataclass(slots=True)
 class TraffickingRecord:
     id: int | None = None
     creative_id: int = 0
@@ -88,13 +96,14 @@ class TraffickingRecord:
     vast_url: str = ""
     audit_status: str = AuditStatus.PENDING.value
     placement_type: str = "olv"
-    request_payload: str = ""  # JSON
-    response_payload: str = ""  # JSON
+    request_payload: str = ""  # JSON (compressed in SQLite, see db.payloads)
+    response_payload: str = ""  # JSON (compressed in SQLite, see db.payloads)
+    record_key: str = ""  # client-generated idempotency key for remote writes
     created_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
 
 
-@dataclass
+@dataclass(slots=True)
 class SupplyPath:
     id: int | None = None
     dsp: str = ""
@@ -109,7 +118,7 @@ class SupplyPath:
     notes: str = ""
 
 
-@dataclass
+@dataclass(slots=True)
 class DSPSpec:
     id: int | None = None
     dsp: str = ""
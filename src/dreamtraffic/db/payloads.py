@@ -0,0 +1,119 @@
+"""Compact storage for DSP request/response JSON on trafficking_records.
+
+The payload columns hold the raw API exchange with each DSP. They are
+written on every trafficking call but almost never read, and as plain JSON
+text they made up most of the table. ``encode_payload`` stores them as
+zlib-compressed BLOBs primed with a preset dictionary of the keys and values
+the DSP adapters emit, so even a 100-byte payload shrinks by half or more.
+Status views and other scans never decompress anything; ``decode_payload``
+runs only where a caller actually asks for the payload.
+
+Stored format: one header byte, then the compressed bytes. Plain TEXT values
+(rows written before migration 5, or by other tools) decode as-is.
+
+Connections from the pool also get a ``payload_json(col)`` SQL function for
+ad-hoc queries::
+
+    SELECT payload_json(response_payload) FROM trafficking_records WHERE id = 1
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from typing import Any
+
+# Header byte of each stored payload format
+FORMAT_ZLIB = 0x00
+FORMAT_ZLIB_DICT_V1 = 0x01
+
+# Preset dictionary: representative fragments of the adapter payloads. Frozen
+# once written — changing it requires a new format byte.
+PAYLOAD_DICT_V1 = (
+    b'{"campaignName": "", "vastTag": "https://vast.dreamtraffic.demo/inline/", '
+    b'"viantHouseholdId": true, "contextualTargeting": true, "householdTargeting": true, '
+    b'{"creativeId": "sa-cr-", "adel-cr-", "status": "pending_review", "_simulated": true}'
+    b'{"advertiserId": "DV360_ADV_DEMO", "displayName": " - OLV", " - STV", '
+    b'"entityStatus": "ENTITY_STATUS_ACTIVE", "creativeType": "CREATIVE_TYPE_VIDEO", '
+    b'"assets": [{"asset": {"mediaId": "dv360-asset-"}, "role": "ASSET_ROLE_MAIN"}], '
+    b'"vastTagUrl": "https://vast.dreamtraffic.demo/inline/", '
+    b'"dimensions": {"widthPixels": 1920, "heightPixels": 1080}}'
+    b'{"creativeId": "dv360-cr-", "assetId": "dv360-asset-", "approvalStatus": '
+    b'{"status": "APPROVAL_STATUS_PENDING_REVIEW", "googleReview": true}, "_simulated": true}'
+    b'{"AdvertiserId": "TTD_ADV_DEMO", "CreativeName": "", "VastTagUrl": '
+    b'"https://vast.dreamtraffic.demo/inline/", "VideoAttributes": {"Duration": 15, '
+    b'"Width": 1920, "Height": 1080}, "Uid2Enabled": true, "KokaiOptimization": true}'
+    b'{"CreativeId": "ttd-cr-", "AssetId": "ttd-asset-", "AuditStatus": "pending", '
+    b'"Uid2Ready": true, "_simulated": true}'
+    b'{"assetId": "amzn-asset-", "creativeId": "amzn-cr-", "auditStatus": "pending", '
+    b'"placementType": "OLV", "estimatedReviewTime": "24-48 hours", '
+    b'"certifiedSupplyPartners": ["magnite", "pubmatic", "index_exchange"], '
+    b'"mcpServerCompatible": true, "_simulated": true}'
+    b'{"advertiserId": "AMZN_ADV_DEMO", "creativeType": "VIDEO", "placementType": "OLV", '
+    b'"videoAsset": {"url": "https://cdn.luma.example/", ".mp4", "vastTagUrl": '
+    b'"https://vast.dreamtraffic.demo/inline/", "duration": 30, "width": 1920, '
+    b'"height": 1080, "codec": "H.264"}, "campaignName": "", "certifiedSupplyExchange": '
+    b'["magnite", "pubmatic", "index_exchange"], "feeSchedule": {"type": "managed_service", '
+    b'"rate": 0.12, "effective_date": "2025-06-01", "note": "Post-June 2025 reduced rate"}}'
+)
+
+
+def encode_payload(payload: Any) -> bytes | str:
+    """Compress a JSON payload (dict or JSON text) for storage. Empty stays ``""``."""
+    if not isinstance(payload, (str, bytes)):
+        payload = json.dumps(payload)
+    if not payload:
+        return ""
+    raw = payload.encode() if isinstance(payload, str) else payload
+    compressor = zlib.compressobj(6, zdict=PAYLOAD_DICT_V1)
+    return bytes([FORMAT_ZLIB_DICT_V1]) + compressor.compress(raw) + compressor.flush()
+
+
+def decode_payload(value: bytes | str | None) -> str:
+    """JSON text of a stored payload, whatever format it was stored in."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value
+    fmt, data = value[0], value[1:]
+    if fmt == FORMAT_ZLIB_DICT_V1:
+        decompressor = zlib.decompressobj(zdict=PAYLOAD_DICT_V1)
+        return (decompressor.decompress(data) + decompressor.flush()).decode()
+    if fmt == FORMAT_ZLIB:
+        return zlib.decompress(data).decode()
+    raise ValueError(f"Unknown payload format byte: {fmt:#04x}")
+
+
+def load_payload(value: bytes | str | None) -> Any:
+    """Parsed JSON of a stored payload (None when empty)."""
+    text = decode_payload(value)
+    return json.loads(text) if text else None
+
+
+def register_functions(conn: sqlite3.Connection) -> None:
+    conn.create_function("payload_json", 1, decode_payload, deterministic=True)
+
+
+def compress_existing(conn: sqlite3.Connection, chunk: int = 5000) -> int:
+    """Rewrite plain-text payloads on ``trafficking_records`` in compressed form.
+
+    Works through the table by ``id`` in chunks. Returns the rows rewritten.
+    """
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            """SELECT id, request_payload, response_payload FROM trafficking_records
+               WHERE id > ? AND (typeof(request_payload) = 'text' OR typeof(response_payload) = 'text')
+               ORDER BY id LIMIT ?""",
+            (last_id, chunk),
+        ).fetchall()
+        if not rows:
+            return rewritten
+        conn.executemany(
+            "UPDATE trafficking_records SET request_payload = ?, response_payload = ? WHERE id = ?",
+            [(encode_payload(req), encode_payload(resp), row_id) for row_id, req, resp in rows],
+        )
+        rewritten += len(rows)
+        last_id = rows[-1][0]
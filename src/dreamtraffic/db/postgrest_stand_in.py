@@ -0,0 +1,235 @@
+"""Local in-memory HTTP server speaking the PostgREST subset ``RemoteStore`` uses.
+
+Lets the remote backend and the MCP tools on top of it be exercised and
+load-tested without the network or a Supabase project::
+
+    with PostgRESTStandIn() as server:
+        store = RemoteStore(server.url)
+
+Supported: ``GET`` with ``col=eq.value``, ``col=neq.value`` and
+``col=fts.query`` filters (plain word matching, no stemming), ``order`` and
+``limit``; ``POST`` of one object or an array, with
+``resolution=merge-duplicates`` + ``on_conflict`` upserts, which like
+Postgres need a unique constraint (``UNIQUE_CONSTRAINTS``) on exactly those
+columns; ``PATCH`` with filters. ``Prefer: return=representation`` returns the affected rows.
+``fail_next()`` injects error responses for retry testing.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from dataclasses import MISSING, fields
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from dreamtraffic.db.models import (
+    ApprovalEvent, Campaign, Creative, DSPSpec, SupplyPath, TraffickingRecord,
+)
+from dreamtraffic.db.search import term_pattern
+
+TABLE_MODELS: dict[str, type] = {
+    "campaigns": Campaign,
+    "creatives": Creative,
+    "approval_events": ApprovalEvent,
+    "trafficking_records": TraffickingRecord,
+    "supply_paths": SupplyPath,
+    "dsp_specs": DSPSpec,
+}
+
+
+# Mirrors the Supabase schema: primary keys plus supabase/migrations
+UNIQUE_CONSTRAINTS: dict[str, set[tuple[str, ...]]] = {
+    **{name: {("id",)} for name in TABLE_MODELS},
+    "trafficking_records": {("id",), ("record_key",)},
+    "approval_events": {("id",), ("event_key",)},
+}
+
+
+def _column_defaults(model: type) -> dict[str, Any]:
+    return {
+        f.name: f.default if f.default is not MISSING else f.default_factory()
+        for f in fields(model)
+        if (f.default is not MISSING or f.default_factory is not MISSING) and f.name != "id"
+    }
+
+
+class PostgRESTStandIn:
+    """Threaded stand-in for a Supabase ``/rest/v1`` endpoint."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, *, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.tables: dict[str, list[dict[str, Any]]] = {name: [] for name in TABLE_MODELS}
+        self.requests: dict[str, int] = {}
+        self._next_id: dict[str, int] = {name: 1 for name in TABLE_MODELS}
+        self._conflict_index: dict[tuple[str, tuple[str, ...]], dict[tuple, dict[str, Any]]] = {}
+        self._failures: list[int] = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PostgRESTStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "PostgRESTStandIn":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def fail_next(self, count: int = 1, status: int = 503) -> None:
+        """Answer the next ``count`` requests with ``status``."""
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    # ── Table operations ─────────────────────────────────────────────
+
+    def _insert(self, table: str, row: dict[str, Any]) -> dict[str, Any]:
+        now = datetime.now(timezone.utc).isoformat()
+        stored = {**_column_defaults(TABLE_MODELS[table]), **row}
+        if "created_at" in stored:
+            stored["created_at"] = row.get("created_at", now)
+        if "updated_at" in stored:
+            stored["updated_at"] = row.get("updated_at", now)
+        if stored.get("id") is None:
+            stored["id"] = self._next_id[table]
+        self._next_id[table] = max(self._next_id[table], stored["id"] + 1)
+        self.tables[table].append(stored)
+        return stored
+
+    def _upsert(self, table: str, row: dict[str, Any], keys: tuple[str, ...]) -> dict[str, Any]:
+        index = self._conflict_index.get((table, keys))
+        if index is None:
+            index = {
+                tuple(str(r.get(k)) for k in keys): r for r in self.tables[table]
+            }
+            self._conflict_index[(table, keys)] = index
+        if any(row.get(k) is None for k in keys):  # NULL never conflicts
+            return self._insert(table, row)
+        key = tuple(str(row.get(k)) for k in keys)
+        existing = index.get(key)
+        if existing is not None:
+            existing.update(row)
+            return existing
+        index[key] = stored = self._insert(table, row)
+        return stored
+
+    @staticmethod
+    def _matches(row: dict[str, Any], filters: list[tuple[str, str]]) -> bool:
+        for col, expr in filters:
+            op, _, value = expr.partition(".")
+            if op == "eq":
+                if str(row.get(col)) != value:
+                    return False
+            elif op == "neq":
+                if str(row.get(col)) == value:
+                    return False
+            elif op == "fts":
+                # to_tsquery subset: terms joined by &, phrases by <->, :* prefixes
+                for term in value.split(" & "):
+                    words = term.removesuffix(":*").split(" <-> ")
+                    if not term_pattern(words, term.endswith(":*")).search(row.get(col) or ""):
+                        return False
+            else:
+                return False
+        return True
+
+    def handle(self, method: str, path: str, query: str, body: Any, prefer: str) -> tuple[int, Any]:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            if self._failures:
+                return self._failures.pop(0), {"message": "injected failure"}
+
+            table = path.rsplit("/", 1)[-1]
+            if not path.startswith("/rest/v1/") or table not in self.tables:
+                return 404, {"message": f"relation {table} does not exist"}
+
+            params = parse_qsl(query, keep_blank_values=True)
+            control = {k: v for k, v in params if k in ("select", "order", "limit", "on_conflict")}
+            filters = [(k, v) for k, v in params if k not in control]
+            representation = "return=representation" in prefer
+
+            if method == "GET":
+                rows = [r for r in self.tables[table] if self._matches(r, filters)]
+                if "order" in control:
+                    col, _, direction = control["order"].partition(".")
+                    rows.sort(key=lambda r: r.get(col) or 0, reverse=direction == "desc")
+                if "limit" in control:
+                    rows = rows[: int(control["limit"])]
+                return 200, rows
+
+            if method == "POST":
+                items = body if isinstance(body, list) else [body]
+                keys = control.get("on_conflict", "")
+                if "resolution=merge-duplicates" in prefer and keys:
+                    if tuple(keys.split(",")) not in UNIQUE_CONSTRAINTS[table]:
+                        return 400, {
+                            "code": "42P10",
+                            "message": "there is no unique or exclusion constraint "
+                                       "matching the ON CONFLICT specification",
+                        }
+                    stored = [self._upsert(table, item, tuple(keys.split(","))) for item in items]
+                else:
+                    stored = [self._insert(table, item) for item in items]
+                return 201, stored if representation else None
+
+            if method == "PATCH":
+                rows = [r for r in self.tables[table] if self._matches(r, filters)]
+                for r in rows:
+                    r.update(body)
+                self._conflict_index = {
+                    k: v for k, v in self._conflict_index.items() if k[0] != table
+                }
+                return 200, rows if representation else None
+
+            return 405, {"message": f"method {method} not supported"}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def _dispatch(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                url = urlsplit(self.path)
+                status, payload = stand_in.handle(
+                    self.command, url.path, url.query, body, self.headers.get("Prefer", "")
+                )
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PATCH = _dispatch
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
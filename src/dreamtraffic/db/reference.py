@@ -0,0 +1,132 @@
+"""In-process read-through cache for the reference tables.
+
+``supply_paths`` and ``dsp_specs`` are seeded once and rarely edited, but the
+fee stack analysis reads them on every tool call. The cache keeps typed rows
+per database and revalidates with a single-row read of
+``reference_generation``, a counter bumped by triggers on both tables, so any
+write — from this process or another — is picked up on the next access::
+
+    ref = reference_data()
+    ref.dsp_spec("amazon", "stv").min_height      # 1080
+    ref.supply_path("amazon", "magnite").ssp_fee_pct
+
+Cached rows are shared between callers and must be treated as read-only.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+
+from dreamtraffic.db.engine import ConnectionPool, get_pool
+from dreamtraffic.db.models import DSPSpec, SupplyPath
+
+
+@dataclass(frozen=True)
+class ReferenceData:
+    """One consistent snapshot of supply paths and DSP specs."""
+    generation: int
+    supply_paths: tuple[SupplyPath, ...]  # ordered by dsp, ssp
+    dsp_specs: tuple[DSPSpec, ...]  # ordered by dsp, placement_type
+    specs_by_placement: dict[tuple[str, str], DSPSpec] = field(default_factory=dict)
+    paths_by_dsp_ssp: dict[tuple[str, str], tuple[SupplyPath, ...]] = field(default_factory=dict)
+
+    def dsp_spec(self, dsp: str, placement_type: str) -> DSPSpec | None:
+        return self.specs_by_placement.get((dsp, placement_type))
+
+    def supply_path(self, dsp: str, ssp: str) -> SupplyPath | None:
+        """First path from ``dsp`` to ``ssp`` (there is normally exactly one)."""
+        paths = self.paths_by_dsp_ssp.get((dsp, ssp))
+        return paths[0] if paths else None
+
+    def paths_for_dsp(self, dsp: str) -> list[SupplyPath]:
+        return [p for p in self.supply_paths if p.dsp == dsp]
+
+
+class ReferenceCache:
+    """Reference data for one database, reloaded when its generation changes."""
+
+    def __init__(self, pool: ConnectionPool) -> None:
+        self.pool = pool
+        self.hits = 0
+        self.loads = 0
+        self._data: ReferenceData | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> ReferenceData:
+        with self.pool.connection() as conn:
+            generation = _generation(conn)
+            data = self._data
+            if data is not None and data.generation == generation:
+                self.hits += 1
+                return data
+            with self._lock:
+                if self._data is None or self._data.generation != generation:
+                    self._data = _load(conn)
+                    self.loads += 1
+                return self._data
+
+    def invalidate(self) -> None:
+        self._data = None
+
+
+# Named columns, so the rows map onto the models whatever the table's column order
+_SUPPLY_PATH_COLUMNS = ", ".join(f.name for f in fields(SupplyPath))
+_DSP_SPEC_COLUMNS = ", ".join(f.name for f in fields(DSPSpec))
+
+
+def _generation(conn) -> int:
+    return conn.execute("SELECT generation FROM reference_generation WHERE id = 1").fetchone()[0]
+
+
+def _load(conn) -> ReferenceData:
+    while True:
+        generation = _generation(conn)
+        cur = conn.execute(f"SELECT {_SUPPLY_PATH_COLUMNS} FROM supply_paths ORDER BY dsp, ssp, id")
+        paths = tuple(SupplyPath(**dict(row)) for row in cur)
+        cur = conn.execute(f"SELECT {_DSP_SPEC_COLUMNS} FROM dsp_specs ORDER BY dsp, placement_type, id")
+        specs = tuple(
+            DSPSpec(**{
+                **dict(row),
+                "requires_vast": bool(row["requires_vast"]),
+                "requires_mraid": bool(row["requires_mraid"]),
+            })
+            for row in cur
+        )
+        # A writer slipped in between the reads: load again for a consistent view
+        if _generation(conn) == generation:
+            break
+
+    by_dsp_ssp: dict[tuple[str, str], list[SupplyPath]] = {}
+    for p in paths:
+        by_dsp_ssp.setdefault((p.dsp, p.ssp), []).append(p)
+    by_placement: dict[tuple[str, str], DSPSpec] = {}
+    for s in specs:
+        by_placement.setdefault((s.dsp, s.placement_type), s)
+    return ReferenceData(
+        generation=generation,
+        supply_paths=paths,
+        dsp_specs=specs,
+        specs_by_placement=by_placement,
+        paths_by_dsp_ssp={k: tuple(v) for k, v in by_dsp_ssp.items()},
+    )
+
+
+_caches: dict[Path, ReferenceCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_reference_cache(db_path: Path | None = None) -> ReferenceCache:
+    """The cache for ``db_path``, or for the default pool's database."""
+    pool = get_pool(db_path)
+    with _caches_lock:
+        cache = _caches.get(pool.db_path)
+        if cache is None or cache.pool is not pool:
+            cache = _caches[pool.db_path] = ReferenceCache(pool)
+    return cache
+
+
+def reference_data(db_path: Path | None = None) -> ReferenceData:
+    """Current supply paths and DSP specs, served from the cache when unchanged."""
+    return get_reference_cache(db_path).get()
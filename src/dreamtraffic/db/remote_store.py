@@ -0,0 +1,479 @@
+"""PostgREST (Supabase REST) storage backend with batched writes.
+
+Append-only fact rows — trafficking records and approval events — are the
+bulk of write traffic, so they are queued per table and sent as bulk
+upserts: a batch goes out once it reaches ``batch_size`` rows or once its
+oldest row has waited ``flush_interval`` seconds, whichever comes first.
+Inserts return a ``PendingRow`` straight away; reading a column only the
+server fills in (``id``, ``created_at``) sends the row's batch early and
+waits for it. Reads of a queued table flush it first, so callers see their
+own writes. Everything else is a direct request. All requests share one
+pooled ``httpx.Client`` and retry transient failures with exponential
+backoff; a batch that still fails fails its rows' ``result()`` and is
+re-raised by the next ``flush()``.
+
+Bulk writes are upserts on a key the client generates for every row
+(``UPSERT_KEYS``), so a batch re-sent after a transport error merges with
+what the first attempt stored instead of duplicating it. The Supabase
+project needs the matching unique constraints from ``supabase/migrations``.
+Status changes that must not race (approval transitions) are conditional
+``PATCH``es.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Iterable
+
+import httpx
+
+from dreamtraffic.db.search import (
+    CampaignHit,
+    CreativeHit,
+    parse_terms,
+    term_pattern,
+    tsquery_expression,
+)
+from dreamtraffic.db.store import (
+    APPROVAL_EVENT_COLUMNS,
+    CAMPAIGN_COLUMNS,
+    CREATIVE_COLUMNS,
+    TRAFFICKING_COLUMNS,
+    StorageBackend,
+    check_columns,
+)
+
+# Client-generated keys used to merge re-sent rows instead of duplicating them;
+# each needs a plain unique constraint remotely for on_conflict to accept it
+UPSERT_KEYS: dict[str, tuple[str, ...]] = {
+    "trafficking_records": ("record_key",),
+    "approval_events": ("event_key",),
+}
+
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class RemoteStoreError(RuntimeError):
+    """A remote request failed after all retries."""
+
+
+class PendingRow(dict):
+    """A queued insert: the values written, completed with the stored row on demand.
+
+    Reading a key the caller did not supply (``row["id"]``, ``row.get("created_at")``)
+    or calling ``result()`` sends the row's batch if it is still queued and
+    waits for it.
+    """
+
+    def __init__(self, values: dict[str, Any], send: Callable[[Future], None]) -> None:
+        super().__init__(values)
+        self._stored: Future[dict[str, Any]] = Future()
+        self._send = send
+        self._complete = False
+
+    def result(self, timeout: float | None = None) -> dict[str, Any]:
+        """Wait for the stored row and return it. Raises RemoteStoreError if the write failed."""
+        if not self._stored.done():
+            self._send(self._stored)
+        if not self._complete:
+            self.update(self._stored.result(timeout))
+            self._complete = True
+        return dict(self)
+
+    def __missing__(self, key: str) -> Any:
+        if self._complete:
+            raise KeyError(key)
+        return self.result()[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+@dataclass
+class RemoteStoreStats:
+    requests: int = 0
+    retries: int = 0
+    batches: int = 0
+    rows_written: int = 0
+    pending: int = 0
+    last_error: str = ""  # most recent failed batch
+
+
+class RemoteStore(StorageBackend):
+    """Storage backend speaking the PostgREST dialect served by Supabase."""
+
+    name = "remote"
+
+    def __init__(
+        self,
+        base_url: str,
+        api_key: str = "",
+        *,
+        batch_size: int = 500,
+        flush_interval: float = 0.05,
+        max_retries: int = 4,
+        backoff: float = 0.1,
+        max_connections: int = 10,
+        timeout: float = 10.0,
+        client: httpx.Client | None = None,
+    ) -> None:
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["apikey"] = api_key
+            headers["Authorization"] = f"Bearer {api_key}"
+        self._client = client or httpx.Client(
+            base_url=f"{base_url.rstrip('/')}/rest/v1",
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._pending: dict[str, list[tuple[dict[str, Any], Future]]] = {}
+        self._queued_since: dict[str, float] = {}  # table -> when its oldest queued row arrived
+        self._buffer_lock = threading.Lock()
+        self._queued = threading.Condition(self._buffer_lock)
+        self._flush_locks: dict[str, threading.Lock] = {}
+        self._stats = RemoteStoreStats()
+        self._stats_lock = threading.Lock()
+        self._last_error: Exception | None = None
+        self._closed = False
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="remote-store-flusher", daemon=True
+        )
+        self._flusher.start()
+
+    # ── HTTP ─────────────────────────────────────────────────────────
+
+    def _request(
+        self,
+        method: str,
+        table: str,
+        *,
+        params: dict[str, str] | None = None,
+        json: Any = None,
+        prefer: str = "",
+    ) -> Any:
+        headers = {"Prefer": prefer} if prefer else None
+        attempt = 0
+        while True:
+            with self._stats_lock:
+                self._stats.requests += 1
+            try:
+                resp = self._client.request(
+                    method, f"/{table}", params=params, json=json, headers=headers
+                )
+            except httpx.TransportError as exc:
+                error: Exception = exc
+                retry_after = None
+            else:
+                if resp.status_code not in RETRY_STATUSES:
+                    if resp.is_error:
+                        raise RemoteStoreError(
+                            f"{method} /{table} failed: {resp.status_code} {resp.text[:200]}"
+                        )
+                    return resp.json() if resp.content else None
+                error = RemoteStoreError(f"{method} /{table} returned {resp.status_code}")
+                retry_after = resp.headers.get("Retry-After")
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise RemoteStoreError(
+                    f"{method} /{table} failed after {self.max_retries} retries: {error}"
+                ) from error
+            with self._stats_lock:
+                self._stats.retries += 1
+            delay = self.backoff * (2 ** (attempt - 1)) * (1 + random.random())
+            if retry_after is not None:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            time.sleep(delay)
+
+    def _select(self, table: str, filters: dict[str, Any], order: str = "id.asc") -> list[dict[str, Any]]:
+        params = {col: f"eq.{value}" for col, value in filters.items()}
+        params["select"] = "*"
+        params["order"] = order
+        return self._request("GET", table, params=params)
+
+    def _insert(self, table: str, values: dict[str, Any], allowed: frozenset[str]) -> dict[str, Any]:
+        check_columns(table, values, allowed)
+        rows = self._request("POST", table, json=values, prefer="return=representation")
+        return rows[0]
+
+    # ── Write batching ───────────────────────────────────────────────
+
+    def _enqueue(self, table: str, values: dict[str, Any]) -> PendingRow:
+        row = PendingRow(values, lambda stored: self._flush_table(table, until=stored))
+        with self._queued:
+            queue = self._pending.setdefault(table, [])
+            queue.append((values, row._stored))
+            if len(queue) == 1:
+                self._queued_since[table] = time.monotonic()
+                self._queued.notify()
+            full = len(queue) >= self.batch_size
+        if full:
+            self._flush_table(table)
+        return row
+
+    def _flush_table(self, table: str, until: Future | None = None) -> None:
+        """Send ``table``'s queued rows up to the one resolving ``until`` (default: all queued now)."""
+        with self._buffer_lock:
+            lock = self._flush_locks.setdefault(table, threading.Lock())
+            queue = self._pending.get(table)
+            if until is None:
+                if not queue:
+                    return
+                # Rows queued after this point wait for their own deadline
+                until = queue[-1][1]
+        # One sender per table at a time keeps batches in submission order;
+        # a row that went out while we waited for the lock is already resolved
+        with lock:
+            while not until.done():
+                with self._buffer_lock:
+                    queue = self._pending.get(table, [])
+                    batch, self._pending[table] = queue[:self.batch_size], queue[self.batch_size:]
+                    if self._pending[table]:
+                        self._queued_since[table] = time.monotonic()
+                    else:
+                        self._queued_since.pop(table, None)
+                if not batch:
+                    return
+                self._send_batch(table, batch)
+
+    def _send_batch(self, table: str, batch: list[tuple[dict[str, Any], Future]]) -> None:
+        keys = UPSERT_KEYS[table]
+        # One row per key: Postgres refuses to upsert the same row twice in a statement
+        merged: dict[tuple, dict[str, Any]] = {}
+        for values, _ in batch:
+            key = tuple(str(values.get(k)) for k in keys)
+            merged[key] = {**merged.get(key, {}), **values}
+        try:
+            rows = self._request(
+                "POST", table, params={"on_conflict": ",".join(keys)}, json=list(merged.values()),
+                prefer="resolution=merge-duplicates,return=representation",
+            )
+        except Exception as exc:
+            with self._stats_lock:
+                self._last_error = exc
+                self._stats.last_error = str(exc)
+            for _, stored in batch:
+                stored.set_exception(exc)
+            return
+        by_key = {tuple(str(row.get(k)) for k in keys): row for row in rows or ()}
+        for values, stored in batch:
+            row = by_key.get(tuple(str(values.get(k)) for k in keys))
+            if row is None:
+                stored.set_exception(RemoteStoreError(f"POST /{table} did not return the stored row"))
+            else:
+                stored.set_result(dict(row))
+        with self._stats_lock:
+            self._stats.batches += 1
+            self._stats.rows_written += len(merged)
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._queued:
+                while not self._closed:
+                    now = time.monotonic()
+                    oldest = min(self._queued_since.values(), default=None)
+                    if oldest is not None and now - oldest >= self.flush_interval:
+                        break
+                    self._queued.wait(None if oldest is None else oldest + self.flush_interval - now)
+                if self._closed:
+                    return
+                due = [t for t, since in self._queued_since.items() if now - since >= self.flush_interval]
+            for table in due:
+                self._flush_table(table)
+
+    def flush(self) -> None:
+        """Send every queued row now. Raises RemoteStoreError if a batch failed since the last flush."""
+        with self._buffer_lock:
+            tables = list(self._pending)
+        for table in tables:
+            self._flush_table(table)
+        with self._stats_lock:
+            error, self._last_error = self._last_error, None
+        if error is not None:
+            raise RemoteStoreError(f"queued write failed: {error}") from error
+
+    def stats(self) -> RemoteStoreStats:
+        with self._buffer_lock:
+            pending = sum(len(queue) for queue in self._pending.values())
+        with self._stats_lock:
+            return RemoteStoreStats(
+                requests=self._stats.requests,
+                retries=self._stats.retries,
+                batches=self._stats.batches,
+                rows_written=self._stats.rows_written,
+                pending=pending,
+                last_error=self._stats.last_error,
+            )
+
+    def close(self) -> None:
+        """Stop the background flusher, send what is still queued and close the HTTP client."""
+        with self._queued:
+            self._closed = True
+            self._queued.notify()
+        self._flusher.join()
+        try:
+            self.flush()
+        finally:
+            self._client.close()
+
+    # ── StorageBackend ───────────────────────────────────────────────
+
+    def insert_campaign(self, **values: Any) -> dict[str, Any]:
+        return self._insert("campaigns", values, CAMPAIGN_COLUMNS)
+
+    def get_campaign(self, campaign_id: int) -> dict[str, Any] | None:
+        rows = self._select("campaigns", {"id": campaign_id})
+        return rows[0] if rows else None
+
+    def insert_creative(self, **values: Any) -> dict[str, Any]:
+        return self._insert("creatives", values, CREATIVE_COLUMNS)
+
+    def get_creative(self, creative_id: int) -> dict[str, Any] | None:
+        rows = self._select("creatives", {"id": creative_id})
+        return rows[0] if rows else None
+
+    def get_creatives(self, campaign_id: int | None = None) -> list[dict[str, Any]]:
+        filters = {} if campaign_id is None else {"campaign_id": campaign_id}
+        return self._select("creatives", filters)
+
+    def get_creative_ids(self, approval_status: str) -> list[int]:
+        rows = self._request("GET", "creatives", params={
+            "approval_status": f"eq.{approval_status}", "select": "id", "order": "id.asc",
+        })
+        return [r["id"] for r in rows]
+
+    def get_pending_generations(self) -> list[dict[str, Any]]:
+        return self._request("GET", "creatives", params={
+            "luma_generation_id": "neq.", "video_url": "eq.", "select": "*", "order": "id.asc",
+        })
+
+    def update_creative(self, creative_id: int, **values: Any) -> dict[str, Any] | None:
+        check_columns("creatives", values, CREATIVE_COLUMNS)
+        if not values:
+            return self.get_creative(creative_id)
+        rows = self._request(
+            "PATCH", "creatives",
+            params={"id": f"eq.{creative_id}"},
+            json=values,
+            prefer="return=representation",
+        )
+        return rows[0] if rows else None
+
+    def update_creative_status(self, creative_id: int, from_status: str, to_status: str) -> dict[str, Any] | None:
+        # Conditional PATCH: matches nothing if another writer moved the status first
+        rows = self._request(
+            "PATCH", "creatives",
+            params={"id": f"eq.{creative_id}", "approval_status": f"eq.{from_status}"},
+            json={"approval_status": to_status},
+            prefer="return=representation",
+        )
+        return rows[0] if rows else None
+
+    def set_video_urls(self, updates: Iterable[tuple[str, str, int | None]]) -> int:
+        # PostgREST has no multi-row PATCH with per-row values: one request per target
+        updated: set[int] = set()
+        for generation_id, video_url, creative_id in updates:
+            # An empty generation ID would match every creative never sent to Luma
+            targets = [{"luma_generation_id": f"eq.{generation_id}"}] if generation_id else []
+            if creative_id is not None:
+                targets.append({"id": f"eq.{creative_id}"})
+            for params in targets:
+                rows = self._request(
+                    "PATCH", "creatives",
+                    params={**params, "select": "id"},
+                    json={"video_url": video_url},
+                    prefer="return=representation",
+                )
+                updated.update(r["id"] for r in rows or ())
+        return len(updated)
+
+    def insert_trafficking_record(self, **values: Any) -> dict[str, Any]:
+        check_columns("trafficking_records", values, TRAFFICKING_COLUMNS)
+        values.setdefault("record_key", uuid.uuid4().hex)
+        return self._enqueue("trafficking_records", values)
+
+    def get_trafficking_records(self, creative_id: int | None = None) -> list[dict[str, Any]]:
+        self._flush_table("trafficking_records")
+        filters = {} if creative_id is None else {"creative_id": creative_id}
+        return self._select("trafficking_records", filters)
+
+    def insert_approval_event(self, **values: Any) -> dict[str, Any]:
+        check_columns("approval_events", values, APPROVAL_EVENT_COLUMNS)
+        values.setdefault("event_key", uuid.uuid4().hex)
+        return self._enqueue("approval_events", values)
+
+    def get_approval_events(self, creative_id: int) -> list[dict[str, Any]]:
+        self._flush_table("approval_events")
+        return self._select("approval_events", {"creative_id": creative_id})
+
+    def search(self, query: str, *, limit: int = 20) -> dict[str, list[dict[str, Any]]]:
+        # PostgREST filters one column at a time and cannot order by ts_rank:
+        # match name and body separately, then rank the union here the way the
+        # SQLite index does, name hits counting double
+        expression = tsquery_expression(query)
+        patterns = [term_pattern(words, prefix) for words, prefix in parse_terms(query)]
+        return {
+            "creatives": self._search("creatives", CreativeHit, "prompt", expression, patterns, limit),
+            "campaigns": self._search("campaigns", CampaignHit, "brief", expression, patterns, limit),
+        }
+
+    def _search(
+        self,
+        table: str,
+        hit: type[CreativeHit] | type[CampaignHit],
+        body: str,
+        expression: str,
+        patterns: list[re.Pattern[str]],
+        limit: int,
+    ) -> list[dict[str, Any]]:
+        columns = [f.name for f in fields(hit) if f.name not in ("snippet", "score")]
+        select = ",".join(dict.fromkeys([*columns, body]))
+        rows: dict[int, dict[str, Any]] = {}
+        for column in ("name", body):
+            for row in self._request("GET", table, params={column: f"fts.{expression}", "select": select}):
+                rows[row["id"]] = row
+        hits = [
+            hit(
+                **{col: row[col] for col in columns},
+                snippet=_snippet(row[body] or "", patterns),
+                score=float(sum(
+                    2 * len(p.findall(row["name"] or "")) + len(p.findall(row[body] or ""))
+                    for p in patterns
+                )),
+            )
+            for row in rows.values()
+        ]
+        hits.sort(key=lambda h: (-h.score, -h.id))
+        return [h.to_dict() for h in hits[:limit]]
+
+
+def _snippet(text: str, patterns: list[re.Pattern[str]], tokens: int = 16) -> str:
+    """About ``tokens`` words of ``text`` around its first match, matches in [brackets]."""
+    marked = text
+    for pattern in patterns:
+        marked = pattern.sub(lambda m: f"[{m.group(0)}]", marked)
+    words = marked.split()
+    first = next((i for i, w in enumerate(words) if "[" in w), 0)
+    start = max(0, min(first - tokens // 4, len(words) - tokens))
+    excerpt = " ".join(words[start:start + tokens])
+    return ("…" if start else "") + excerpt + ("…" if start + tokens < len(words) else "")
@@ -0,0 +1,136 @@
+"""Pipeline status report — campaigns, creatives and trafficked DSPs.
+
+The whole view is built from two queries regardless of how many creatives
+there are: one for the requested page of campaigns, one for their creatives.
+Both read the trigger-maintained summary tables (``campaign_status_counts``,
+``creative_summary``, ``dsp_audit_status``) rather than scanning
+``trafficking_records`` or ``approval_events``. Pagination is by campaign, so
+a page always carries complete campaigns.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+from dreamtraffic.db.engine import connection
+
+
+@dataclass(slots=True)
+class CreativeStatus:
+    id: int
+    campaign_id: int
+    name: str
+    approval_status: str
+    placement_type: str
+    duration_seconds: int
+    dsps: list[str] = field(default_factory=list)
+    audit_status: dict[str, str] = field(default_factory=dict)  # latest per DSP
+
+
+@dataclass(slots=True)
+class CampaignStatus:
+    id: int
+    name: str
+    advertiser: str
+    flight_start: str
+    flight_end: str
+    status_counts: dict[str, int] = field(default_factory=dict)  # creatives by approval status
+    creatives: list[CreativeStatus] = field(default_factory=list)
+
+
+@dataclass
+class StatusReport:
+    """One page of the pipeline status view."""
+    campaigns: list[CampaignStatus]
+    total_campaigns: int  # matching the filters, across all pages
+    limit: int | None
+    offset: int
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def _campaign_filter(
+    campaign_ids: Sequence[int] | None,
+    advertiser: str | None,
+) -> tuple[str, list[Any]]:
+    clauses: list[str] = []
+    params: list[Any] = []
+    if campaign_ids:
+        clauses.append(f"id IN ({', '.join('?' for _ in campaign_ids)})")
+        params.extend(campaign_ids)
+    if advertiser:
+        clauses.append("advertiser = ?")
+        params.append(advertiser)
+    return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+def pipeline_status(
+    *,
+    campaign_ids: Sequence[int] | None = None,
+    advertiser: str | None = None,
+    approval_status: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    db_path: Path | None = None,
+) -> StatusReport:
+    """Status of campaigns (ordered by ID) with their creatives and DSPs.
+
+    ``campaign_ids`` and ``advertiser`` select campaigns; ``approval_status``
+    narrows the creatives listed under them. ``limit``/``offset`` page
+    through the matching campaigns.
+    """
+    where, params = _campaign_filter(campaign_ids, advertiser)
+    page = f"""SELECT id FROM campaigns {where}
+               ORDER BY id LIMIT ? OFFSET ?"""
+    page_params = [*params, -1 if limit is None else limit, offset]
+
+    creative_filter = ""
+    creative_params: list[Any] = []
+    if approval_status:
+        creative_filter = "AND cr.approval_status = ?"
+        creative_params.append(approval_status)
+
+    with connection(db_path) as conn:
+        campaign_rows = conn.execute(
+            f"""SELECT id, name, advertiser, flight_start, flight_end,
+                       (SELECT json_group_object(approval_status, creative_count)
+                        FROM campaign_status_counts s WHERE s.campaign_id = campaigns.id),
+                       COUNT(*) OVER () AS total
+                FROM campaigns {where}
+                ORDER BY id LIMIT ? OFFSET ?""",
+            page_params,
+        ).fetchall()
+        if not campaign_rows:
+            total = conn.execute(f"SELECT COUNT(*) FROM campaigns {where}", params).fetchone()[0]
+            return StatusReport([], total, limit, offset)
+
+        creative_rows = conn.execute(
+            f"""SELECT cr.id, cr.campaign_id, cr.name, cr.approval_status,
+                       cr.placement_type, cr.duration_seconds,
+                       (SELECT GROUP_CONCAT(dsp) FROM (
+                            SELECT b.dsp FROM dsp_bits b WHERE s.dsp_mask & (1 << b.bit)
+                            UNION ALL  -- DSPs past the 62-bit cap have no bit
+                            SELECT a.dsp FROM dsp_audit_status a
+                            WHERE a.creative_id = cr.id AND a.dsp NOT IN (SELECT dsp FROM dsp_bits)
+                        )) AS dsps,
+                       (SELECT json_group_object(a.dsp, a.audit_status)
+                        FROM dsp_audit_status a WHERE a.creative_id = cr.id) AS audit
+                FROM creatives cr
+                LEFT JOIN creative_summary s ON s.creative_id = cr.id
+                WHERE cr.campaign_id IN ({page}) {creative_filter}
+                ORDER BY cr.campaign_id, cr.id""",
+            [*page_params, *creative_params],
+        ).fetchall()
+
+    campaigns = {
+        row[0]: CampaignStatus(*row[:5], json.loads(row[5]))
+        for row in campaign_rows
+    }
+    for row in creative_rows:
+        dsps = sorted(row[6].split(",")) if row[6] else []
+        campaigns[row[1]].creatives.append(CreativeStatus(*row[:6], dsps, json.loads(row[7])))
+    return StatusReport(list(campaigns.values()), campaign_rows[0][6], limit, offset)
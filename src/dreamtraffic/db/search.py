@@ -0,0 +1,181 @@
+"""Ranked full-text search over creative prompts and campaign briefs.
+
+Backed by the FTS5 indexes ``creatives_fts`` (name, prompt) and
+``campaigns_fts`` (name, brief) that migration 8 keeps in sync with their
+tables by trigger. Text is stemmed (Porter) and accent-folded, so "running
+surfers" finds "surfer runs". Results are ordered by BM25 with name matches
+weighted double.
+
+Queries are plain words, all of which must match; a trailing ``*`` makes a
+word a prefix (``coast*``) and double quotes keep a phrase together
+(``"golden hour"``). Other FTS5 syntax is treated as text, so user input
+cannot produce a syntax error. Pass ``raw=True`` to hand a full FTS5 query
+(``OR``, ``NEAR``, column filters) straight through.
+
+Every match is ranked by default. Scoring every match of a very common word
+("golden" in a million prompts) costs far more than finding them, so a
+caller that can live with recent results only may pass ``window``: just the
+newest ``window`` matches are scored, the index walked newest-first and
+stopped there, and an older but better match is then left out. Snippets
+are cut for the returned hits only.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from dreamtraffic.db.engine import connection
+
+DEFAULT_LIMIT = 20
+
+# "a phrase" | word* | word
+_TERM = re.compile(r'"([^"]*)"|(\S+)')
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(slots=True)
+class CreativeHit:
+    id: int
+    campaign_id: int
+    name: str
+    approval_status: str
+    snippet: str  # prompt excerpt, matches in [brackets]
+    score: float  # BM25 relevance; higher is better
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class CampaignHit:
+    id: int
+    name: str
+    advertiser: str
+    snippet: str  # brief excerpt, matches in [brackets]
+    score: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def parse_terms(text: str) -> list[tuple[list[str], bool]]:
+    """Free text as ``(words, prefix)`` terms, one per word or "phrase".
+
+    Raises ValueError if the text has nothing searchable in it.
+    """
+    terms = []
+    for phrase, word in _TERM.findall(text):
+        words = _WORD.findall(phrase or word)
+        if words:
+            terms.append((words, word.endswith("*")))
+    if not terms:
+        raise ValueError(f"Nothing to search for in {text!r}")
+    return terms
+
+
+def match_expression(text: str) -> str:
+    """Turn free text into an FTS5 query: every word or "phrase" must match.
+
+    Raises ValueError if the text has nothing searchable in it.
+    """
+    return " ".join(
+        '"' + " ".join(words) + '"' + ("*" if prefix else "") for words, prefix in parse_terms(text)
+    )
+
+
+def tsquery_expression(text: str) -> str:
+    """The same query in PostgreSQL ``to_tsquery`` syntax, for PostgREST's ``fts`` filter."""
+    return " & ".join(
+        " <-> ".join(words) + (":*" if prefix else "") for words, prefix in parse_terms(text)
+    )
+
+
+def term_pattern(words: list[str], prefix: bool = False) -> re.Pattern[str]:
+    """Case-insensitive regex finding one term in plain text, for backends without FTS5."""
+    body = r"\W+".join(re.escape(w) for w in words)
+    return re.compile(rf"\b{body}" + ("" if prefix else r"\b"), re.IGNORECASE)
+
+
+def _search(
+    conn: sqlite3.Connection,
+    table: str,
+    select: str,
+    expression: str,
+    filters: str,
+    params: list[Any],
+    limit: int,
+    window: int | None,
+) -> list[tuple[Any, ...]]:
+    """Best ``limit`` matches as ``(*select columns, snippet, score)`` rows.
+
+    ``table`` is an FTS index whose content table is joined as ``c``;
+    ``filters`` (an ``AND ...`` clause on ``c``) applies before the window,
+    so filtered searches still score ``window`` candidates. Snippets are
+    made afterwards, for the winners only, through one cursor over their
+    rowid range.
+    """
+    content = table.removesuffix("_fts")
+    newest = "ORDER BY f.rowid DESC LIMIT ?" if window is not None else ""
+    matches = f"""SELECT f.rowid AS id, f.rank AS rank
+                  FROM {table} f JOIN {content} c ON c.id = f.rowid
+                  WHERE {table} MATCH ? {filters} {newest}"""
+    args = [expression, *params, *([window] if window is not None else [])]
+    rows = conn.execute(
+        f"""SELECT {select}, -m.rank FROM ({matches}) m JOIN {content} c ON c.id = m.id
+            ORDER BY m.rank LIMIT ?""",
+        [*args, limit],
+    ).fetchall()
+    if not rows:
+        return []
+    ids = [row[0] for row in rows]
+    snippets = dict(conn.execute(
+        f"""SELECT rowid, snippet({table}, 1, '[', ']', '…', 16) FROM {table}
+            WHERE {table} MATCH ? AND rowid BETWEEN ? AND ?
+              AND +rowid IN ({", ".join("?" for _ in ids)})""",
+        [expression, min(ids), max(ids), *ids],
+    ).fetchall())
+    return [(*row[:-1], snippets.get(row[0], ""), row[-1]) for row in rows]
+
+
+def search_creatives(
+    query: str,
+    *,
+    campaign_id: int | None = None,
+    limit: int = DEFAULT_LIMIT,
+    window: int | None = None,
+    raw: bool = False,
+    db_path: Path | None = None,
+) -> list[CreativeHit]:
+    """Creatives whose name or prompt matches ``query``, best first."""
+    expression = query if raw else match_expression(query)
+    filters, params = ("AND c.campaign_id = ?", [campaign_id]) if campaign_id is not None else ("", [])
+    with connection(db_path) as conn:
+        rows = _search(
+            conn, "creatives_fts", "c.id, c.campaign_id, c.name, c.approval_status",
+            expression, filters, params, limit, window,
+        )
+    return [CreativeHit(*row) for row in rows]
+
+
+def search_campaigns(
+    query: str,
+    *,
+    advertiser: str | None = None,
+    limit: int = DEFAULT_LIMIT,
+    window: int | None = None,
+    raw: bool = False,
+    db_path: Path | None = None,
+) -> list[CampaignHit]:
+    """Campaigns whose name or brief matches ``query``, best first."""
+    expression = query if raw else match_expression(query)
+    filters, params = ("AND c.advertiser = ?", [advertiser]) if advertiser else ("", [])
+    with connection(db_path) as conn:
+        rows = _search(
+            conn, "campaigns_fts", "c.id, c.name, c.advertiser",
+            expression, filters, params, limit, window,
+        )
+    return [CampaignHit(*row) for row in rows]
@@ -0,0 +1,241 @@
+"""Storage backends behind the ``supabase_client`` façade.
+
+``StorageBackend`` is the row-level interface the MCP tools and approval
+workflow rely on; ``SQLiteStore`` implements it on the local database via
+``db.engine``. Rows are plain dicts keyed by column name, matching what the
+Supabase client returned.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import fields
+from typing import Any, Iterable
+
+from dreamtraffic.db.engine import fetch_all, fetch_one, get_pool
+from dreamtraffic.db.models import ApprovalEvent, Campaign, Creative, TraffickingRecord
+from dreamtraffic.db.payloads import decode_payload, encode_payload
+from dreamtraffic.db.search import search_campaigns, search_creatives
+
+PAYLOAD_COLUMNS = ("request_payload", "response_payload")
+
+
+def _writable_columns(model: type) -> frozenset[str]:
+    return frozenset(f.name for f in fields(model) if f.name not in ("id", "created_at"))
+
+
+CAMPAIGN_COLUMNS = _writable_columns(Campaign)
+CREATIVE_COLUMNS = _writable_columns(Creative)
+TRAFFICKING_COLUMNS = _writable_columns(TraffickingRecord)
+APPROVAL_EVENT_COLUMNS = _writable_columns(ApprovalEvent)
+
+
+def check_columns(table: str, values: dict[str, Any], allowed: frozenset[str]) -> None:
+    """Reject column names that are not part of the table's model."""
+    unknown = set(values) - allowed
+    if unknown:
+        raise ValueError(f"Unknown {table} column(s): {sorted(unknown)}")
+
+
+class StorageBackend(ABC):
+    """Row storage for campaigns, creatives, trafficking and approval events."""
+
+    name: str = ""
+
+    @abstractmethod
+    def insert_campaign(self, **values: Any) -> dict[str, Any]:
+        """Insert a campaign and return the stored row."""
+        ...
+
+    @abstractmethod
+    def get_campaign(self, campaign_id: int) -> dict[str, Any] | None:
+        ...
+
+    @abstractmethod
+    def insert_creative(self, **values: Any) -> dict[str, Any]:
+        """Insert a creative and return the stored row."""
+        ...
+
+    @abstractmethod
+    def get_creative(self, creative_id: int) -> dict[str, Any] | None:
+        ...
+
+    @abstractmethod
+    def get_creatives(self, campaign_id: int | None = None) -> list[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def get_creative_ids(self, approval_status: str) -> list[int]:
+        """IDs of the creatives in ``approval_status``."""
+        ...
+
+    @abstractmethod
+    def get_pending_generations(self) -> list[dict[str, Any]]:
+        """Creatives sent to Luma (a generation ID) that have no video URL yet."""
+        ...
+
+    @abstractmethod
+    def update_creative(self, creative_id: int, **values: Any) -> dict[str, Any] | None:
+        """Update columns on a creative and return the updated row."""
+        ...
+
+    @abstractmethod
+    def update_creative_status(self, creative_id: int, from_status: str, to_status: str) -> dict[str, Any] | None:
+        """Move a creative from ``from_status`` to ``to_status`` in one conditional write.
+
+        Returns the updated row, or None when the creative is missing or no
+        longer in ``from_status``.
+        """
+        ...
+
+    @abstractmethod
+    def set_video_urls(self, updates: Iterable[tuple[str, str, int | None]]) -> int:
+        """Apply ``(luma_generation_id, video_url, creative_id or None)`` updates to creatives.
+
+        Each sets ``video_url`` on the creatives with that generation ID and,
+        when given, on ``creative_id``; an empty generation ID matches
+        nothing. Returns the rows updated.
+        """
+        ...
+
+    @abstractmethod
+    def insert_trafficking_record(self, **values: Any) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_trafficking_records(self, creative_id: int | None = None) -> list[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def insert_approval_event(self, **values: Any) -> dict[str, Any]:
+        ...
+
+    @abstractmethod
+    def get_approval_events(self, creative_id: int) -> list[dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def search(self, query: str, *, limit: int = 20) -> dict[str, list[dict[str, Any]]]:
+        """Ranked full-text matches: ``{"creatives": [...], "campaigns": [...]}``.
+
+        Raises ValueError if the query has nothing searchable in it.
+        """
+        ...
+
+    def flush(self) -> None:
+        """Push any buffered writes. No-op for write-through backends."""
+
+    def close(self) -> None:
+        """Release backend resources."""
+
+
+class SQLiteStore(StorageBackend):
+    """Local SQLite backend using the pooled ``db.engine`` helpers."""
+
+    name = "sqlite"
+
+    def _write_returning(self, sql: str, params: tuple[Any, ...]) -> dict[str, Any] | None:
+        pool = get_pool()
+        with pool.connection() as conn, pool.write_lock:
+            rows = conn.execute(sql, params).fetchall()
+        return dict(rows[0]) if rows else None
+
+    def _insert(self, table: str, values: dict[str, Any], allowed: frozenset[str]) -> dict[str, Any]:
+        check_columns(table, values, allowed)
+        cols = ", ".join(values)
+        marks = ", ".join("?" for _ in values)
+        return self._write_returning(
+            f"INSERT INTO {table} ({cols}) VALUES ({marks}) RETURNING *",
+            tuple(values.values()),
+        )
+
+    def insert_campaign(self, **values: Any) -> dict[str, Any]:
+        return self._insert("campaigns", values, CAMPAIGN_COLUMNS)
+
+    def get_campaign(self, campaign_id: int) -> dict[str, Any] | None:
+        return fetch_one("SELECT * FROM campaigns WHERE id = ?", (campaign_id,))
+
+    def insert_creative(self, **values: Any) -> dict[str, Any]:
+        return self._insert("creatives", values, CREATIVE_COLUMNS)
+
+    def get_creative(self, creative_id: int) -> dict[str, Any] | None:
+        return fetch_one("SELECT * FROM creatives WHERE id = ?", (creative_id,))
+
+    def get_creatives(self, campaign_id: int | None = None) -> list[dict[str, Any]]:
+        if campaign_id is None:
+            return fetch_all("SELECT * FROM creatives ORDER BY id")
+        return fetch_all(
+            "SELECT * FROM creatives WHERE campaign_id = ? ORDER BY id", (campaign_id,)
+        )
+
+    def get_creative_ids(self, approval_status: str) -> list[int]:
+        rows = fetch_all("SELECT id FROM creatives WHERE approval_status = ? ORDER BY id", (approval_status,))
+        return [r["id"] for r in rows]
+
+    def get_pending_generations(self) -> list[dict[str, Any]]:
+        return fetch_all(
+            "SELECT * FROM creatives WHERE luma_generation_id != '' AND video_url = '' ORDER BY id"
+        )
+
+    def update_creative(self, creative_id: int, **values: Any) -> dict[str, Any] | None:
+        check_columns("creatives", values, CREATIVE_COLUMNS)
+        if not values:
+            return self.get_creative(creative_id)
+        assignments = ", ".join(f"{col} = ?" for col in values)
+        return self._write_returning(
+            f"UPDATE creatives SET {assignments} WHERE id = ? RETURNING *",
+            (*values.values(), creative_id),
+        )
+
+    def update_creative_status(self, creative_id: int, from_status: str, to_status: str) -> dict[str, Any] | None:
+        return self._write_returning(
+            "UPDATE creatives SET approval_status = ? WHERE id = ? AND approval_status = ? RETURNING *",
+            (to_status, creative_id, from_status),
+        )
+
+    def set_video_urls(self, updates: Iterable[tuple[str, str, int | None]]) -> int:
+        with get_pool().transaction() as conn:
+            return conn.executemany(
+                "UPDATE creatives SET video_url = ? WHERE luma_generation_id = ? OR id = ?",
+                # NULL never matches: an empty generation ID must not hit every unsent creative
+                [(url, generation_id or None, creative_id) for generation_id, url, creative_id in updates],
+            ).rowcount
+
+    @staticmethod
+    def _decode_payloads(row: dict[str, Any]) -> dict[str, Any]:
+        for col in PAYLOAD_COLUMNS:
+            if col in row:
+                row[col] = decode_payload(row[col])
+        return row
+
+    def insert_trafficking_record(self, **values: Any) -> dict[str, Any]:
+        for col in PAYLOAD_COLUMNS:
+            if col in values:
+                values[col] = encode_payload(values[col])
+        row = self._insert("trafficking_records", values, TRAFFICKING_COLUMNS)
+        return self._decode_payloads(row)
+
+    def get_trafficking_records(self, creative_id: int | None = None) -> list[dict[str, Any]]:
+        if creative_id is None:
+            rows = fetch_all("SELECT * FROM trafficking_records ORDER BY id")
+        else:
+            rows = fetch_all(
+                "SELECT * FROM trafficking_records WHERE creative_id = ? ORDER BY id",
+                (creative_id,),
+            )
+        return [self._decode_payloads(r) for r in rows]
+
+    def insert_approval_event(self, **values: Any) -> dict[str, Any]:
+        return self._insert("approval_events", values, APPROVAL_EVENT_COLUMNS)
+
+    def get_approval_events(self, creative_id: int) -> list[dict[str, Any]]:
+        return fetch_all(
+            "SELECT * FROM approval_events WHERE creative_id = ? ORDER BY id",
+            (creative_id,),
+        )
+
+    def search(self, query: str, *, limit: int = 20) -> dict[str, list[dict[str, Any]]]:
+        return {
+            "creatives": [hit.to_dict() for hit in search_creatives(query, limit=limit)],
+            "campaigns": [hit.to_dict() for hit in search_campaigns(query, limit=limit)],
+        }
@@ -0,0 +1,233 @@
+"""Storage façade used by the MCP tools and approval workflow.
+
+The module keeps the function names of the original Supabase helper module
+and delegates to a pluggable ``StorageBackend`` — the local SQLite store by
+default (``DREAMTRAFFIC_STORE=sqlite``), or the batched PostgREST client for a
+Supabase project (``DREAMTRAFFIC_STORE=remote``).
+
+Reads can be memoized for the duration of one request::
+
+    with request_scope():
+        creative = get_creative(1)   # backend read
+        creative = get_creative(1)   # served from the request cache
+
+Writes drop cached entries for the table they touch, so a scope always sees
+its own updates. Outside a scope every call goes to the backend.
+"""
+
+from __future__ import annotations
+
+import atexit
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Iterator
+
+from dreamtraffic.config import (
+    REMOTE_BATCH_SIZE,
+    REMOTE_FLUSH_INTERVAL,
+    STORE_BACKEND,
+    SUPABASE_KEY,
+    SUPABASE_URL,
+)
+from dreamtraffic.db.remote_store import RemoteStore
+from dreamtraffic.db.store import SQLiteStore, StorageBackend
+
+_backend: StorageBackend | None = None
+_request_cache: ContextVar[dict[tuple, Any] | None] = ContextVar(
+    "dreamtraffic_request_cache", default=None
+)
+
+
+def _create_backend(name: str) -> StorageBackend:
+    if name == "sqlite":
+        return SQLiteStore()
+    if name == "remote":
+        if not SUPABASE_URL:
+            raise ValueError("DREAMTRAFFIC_STORE=remote requires SUPABASE_URL")
+        store = RemoteStore(
+            SUPABASE_URL,
+            SUPABASE_KEY,
+            batch_size=REMOTE_BATCH_SIZE,
+            flush_interval=REMOTE_FLUSH_INTERVAL,
+        )
+        # Rows still queued at exit go out before the process ends
+        atexit.register(store.close)
+        return store
+    raise ValueError(f"Unknown storage backend: {name}. Available: ['sqlite', 'remote']")
+
+
+def get_backend() -> StorageBackend:
+    """Return the active storage backend, creating it from config on first use."""
+    global _backend
+    if _backend is None:
+        _backend = _create_backend(STORE_BACKEND)
+    return _backend
+
+
+def flush() -> None:
+    """Push writes the active backend has buffered."""
+    if _backend is not None:
+        _backend.flush()
+
+
+def set_backend(backend: StorageBackend | None) -> StorageBackend | None:
+    """Swap the active backend (None resets to config). Returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+@contextmanager
+def request_scope() -> Iterator[dict[tuple, Any]]:
+    """Memoize backend reads until the scope exits. Nested scopes share the outer cache."""
+    if _request_cache.get() is not None:
+        yield _request_cache.get()
+        return
+    cache: dict[tuple, Any] = {}
+    token = _request_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _request_cache.reset(token)
+
+
+def _copy(value: Any) -> Any:
+    if isinstance(value, dict):
+        return dict(value)
+    if isinstance(value, list):
+        return [dict(r) for r in value]
+    return value
+
+
+def _cached(key: tuple, load: Callable[[], Any]) -> Any:
+    cache = _request_cache.get()
+    if cache is None:
+        return load()
+    if key not in cache:
+        cache[key] = load()
+    return _copy(cache[key])
+
+
+def _invalidate(table: str) -> None:
+    cache = _request_cache.get()
+    if cache:
+        for key in [k for k in cache if k[0] == table]:
+            del cache[key]
+
+
+# ── Campaigns ────────────────────────────────────────────────────────
+
+def insert_campaign(
+    name: str,
+    advertiser: str = "",
+    objective: str = "",
+    audience: str = "",
+    placements: str = "",
+    budget: float = 0.0,
+    flight_start: str = "",
+    flight_end: str = "",
+    brief: str = "",
+) -> dict[str, Any]:
+    """Create a campaign. Returns the stored row including its ID."""
+    _invalidate("campaigns")
+    return get_backend().insert_campaign(
+        name=name, advertiser=advertiser, objective=objective, audience=audience,
+        placements=placements, budget=budget, flight_start=flight_start,
+        flight_end=flight_end, brief=brief,
+    )
+
+
+def get_campaign(campaign_id: int) -> dict[str, Any] | None:
+    return _cached(("campaigns", campaign_id), lambda: get_backend().get_campaign(campaign_id))
+
+
+# ── Creatives ────────────────────────────────────────────────────────
+
+def insert_creative(**values: Any) -> dict[str, Any]:
+    """Create a creative. Returns the stored row including its ID."""
+    _invalidate("creatives")
+    return get_backend().insert_creative(**values)
+
+
+def get_creative(creative_id: int) -> dict[str, Any] | None:
+    return _cached(("creatives", creative_id), lambda: get_backend().get_creative(creative_id))
+
+
+def get_creatives(campaign_id: int | None = None) -> list[dict[str, Any]]:
+    return _cached(
+        ("creatives", "campaign", campaign_id),
+        lambda: get_backend().get_creatives(campaign_id),
+    )
+
+
+def get_creative_ids(approval_status: str) -> list[int]:
+    """IDs of the creatives in ``approval_status``."""
+    return get_backend().get_creative_ids(approval_status)
+
+
+def get_pending_generations() -> list[dict[str, Any]]:
+    """Creatives with a Luma generation ID but no video URL yet."""
+    return get_backend().get_pending_generations()
+
+
+def update_creative(creative_id: int, **values: Any) -> dict[str, Any] | None:
+    """Update columns on a creative. Returns the updated row."""
+    _invalidate("creatives")
+    return get_backend().update_creative(creative_id, **values)
+
+
+def update_creative_status(creative_id: int, from_status: str, to_status: str) -> dict[str, Any] | None:
+    """Move a creative's approval status only if it is still ``from_status``.
+
+    Returns the updated row, or None if another writer changed it first.
+    """
+    _invalidate("creatives")
+    return get_backend().update_creative_status(creative_id, from_status, to_status)
+
+
+def set_video_urls(updates: Iterable[tuple[str, str, int | None]]) -> int:
+    """Write finished video URLs: ``(luma_generation_id, video_url, creative_id or None)`` each."""
+    _invalidate("creatives")
+    return get_backend().set_video_urls(list(updates))
+
+
+def search(query: str, limit: int = 20) -> dict[str, list[dict[str, Any]]]:
+    """Creatives (by name/prompt) and campaigns (by name/brief) matching ``query``."""
+    return get_backend().search(query, limit=limit)
+
+
+# ── Trafficking ──────────────────────────────────────────────────────
+
+def insert_trafficking_record(**values: Any) -> dict[str, Any]:
+    _invalidate("trafficking_records")
+    return get_backend().insert_trafficking_record(**values)
+
+
+def get_trafficking_records(creative_id: int | None = None) -> list[dict[str, Any]]:
+    return _cached(
+        ("trafficking_records", creative_id),
+        lambda: get_backend().get_trafficking_records(creative_id),
+    )
+
+
+# ── Approval events ──────────────────────────────────────────────────
+
+def insert_approval_event(
+    creative_id: int,
+    from_status: str,
+    to_status: str,
+    reviewer: str = "",
+    notes: str = "",
+) -> dict[str, Any]:
+    _invalidate("approval_events")
+    return get_backend().insert_approval_event(
+        creative_id=creative_id, from_status=from_status, to_status=to_status,
+        reviewer=reviewer, notes=notes,
+    )
+
+
+def get_approval_events(creative_id: int) -> list[dict[str, Any]]:
+    return _cached(
+        ("approval_events", creative_id),
+        lambda: get_backend().get_approval_events(creative_id),
+    )
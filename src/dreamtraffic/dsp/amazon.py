@@ -17,12 +17,14 @@ from __future__ import annotations
 import uuid
 
 from dreamtraffic.dsp.base import DSPAdapter, UploadResult
+from dreamtraffic.media.assets import Asset
 
 
 class AmazonDSPAdapter(DSPAdapter):
     """Amazon DSP — most detailed adapter, mirrors MCP Server patterns."""
 
     name = "amazon"
+    uploads_video = True
 
     # Post-June 2025 fee schedule
     MANAGED_SERVICE_FEE = 0.12  # 12% (reduced from ~15%)
@@ -69,11 +71,13 @@ class AmazonDSPAdapter(DSPAdapter):
         height: int,
         placement_type: str,
         campaign_name: str,
+        asset: Asset | None = None,
     ) -> UploadResult:
         """Simulate Amazon DSP creative upload.
 
         PRODUCTION NOTE: Real implementation would:
-        1. POST to /v3/creatives/video with asset URL
+        1. POST to /v3/creatives/video with the video file (``asset.path``),
+           or the asset URL when there is no local copy
         2. Receive assetId, submit for creative review
         3. Poll audit status via GET /v3/creatives/{creativeId}
         4. Associate with line items once approved
@@ -98,6 +102,7 @@ class AmazonDSPAdapter(DSPAdapter):
                 "width": width,
                 "height": height,
                 "codec": spec["codec"],
+                **({"fileSha256": asset.sha256, "fileSizeBytes": asset.size} if asset else {}),
             },
             "campaignName": campaign_name,
             "certifiedSupplyExchange": self.CERTIFIED_SUPPLY,
@@ -131,6 +136,7 @@ class AmazonDSPAdapter(DSPAdapter):
             vast_url=vast_url,
             request_payload=request_payload,
             response_payload=response_payload,
+            video_sha256=asset.sha256 if asset else "",
             _simulated=True,
         )
 
@@ -6,6 +6,10 @@ import json
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from datetime import datetime
+from typing import Any
+
+from dreamtraffic.media.assets import Asset, asset_store
+from dreamtraffic.media.download import DownloadError
 
 
 @dataclass
@@ -19,6 +23,7 @@ class UploadResult:
     vast_url: str
     request_payload: dict
     response_payload: dict
+    video_sha256: str = ""  # the file uploaded, for DSPs that take the video itself
     _simulated: bool = True
 
     def to_json(self) -> str:
@@ -38,6 +43,7 @@ class DSPAdapter(ABC):
     """Base interface for all DSP integrations."""
 
     name: str = ""
+    uploads_video: bool = False  # takes the video file, not just the VAST tag
 
     @abstractmethod
     def upload_creative(
@@ -50,10 +56,53 @@ class DSPAdapter(ABC):
         height: int,
         placement_type: str,
         campaign_name: str,
+        asset: Asset | None = None,
     ) -> UploadResult:
-        """Upload a creative asset and create a creative object in the DSP."""
+        """Upload a creative asset and create a creative object in the DSP.
+
+        ``asset`` is the local copy of the video (see ``video_asset``); without
+        it a file-uploading DSP is given ``video_url`` to fetch.
+        """
         ...
 
+    def upload(
+        self,
+        creative: dict[str, Any],
+        *,
+        campaign_name: str,
+        video_url: str | None = None,
+        vast_url: str | None = None,
+    ) -> UploadResult:
+        """Upload a ``creatives`` row; ``video_url``/``vast_url`` override the row's.
+
+        DSPs that take the file get it read through the asset store; the
+        others are only given the VAST tag and nothing is downloaded.
+        """
+        asset = self.video_asset(creative["video_url"], creative_id=creative["id"]) if self.uploads_video else None
+        return self.upload_creative(
+            video_url=video_url or creative["video_url"],
+            vast_url=vast_url or creative["vast_url"],
+            duration_seconds=creative["duration_seconds"],
+            width=creative["width"],
+            height=creative["height"],
+            placement_type=creative["placement_type"],
+            campaign_name=campaign_name,
+            asset=asset,
+        )
+
+    def video_asset(self, video_url: str | None, *, creative_id: int | None = None) -> Asset | None:
+        """The local copy of ``video_url`` for a file upload, read through the asset store.
+
+        Returns None when there is no URL or it cannot be fetched; the upload
+        then goes ahead by URL/VAST reference only.
+        """
+        if not video_url:
+            return None
+        try:
+            return asset_store().fetch(video_url, creative_id=creative_id)
+        except DownloadError:
+            return None
+
     @abstractmethod
     def check_audit_status(self, creative_id: str) -> str:
         """Check the audit/review status of a creative."""
@@ -10,6 +10,7 @@ from __future__ import annotations
 import uuid
 
 from dreamtraffic.dsp.base import DSPAdapter, UploadResult
+from dreamtraffic.media.assets import Asset
 
 
 class StackAdaptAdapter(DSPAdapter):
@@ -27,6 +28,7 @@ class StackAdaptAdapter(DSPAdapter):
         height: int,
         placement_type: str,
         campaign_name: str,
+        asset: Asset | None = None,
     ) -> UploadResult:
         asset_id = f"sa-asset-{uuid.uuid4().hex[:8]}"
         creative_id = f"sa-cr-{uuid.uuid4().hex[:8]}"
@@ -75,6 +77,7 @@ class AdelphicAdapter(DSPAdapter):
         height: int,
         placement_type: str,
         campaign_name: str,
+        asset: Asset | None = None,
     ) -> UploadResult:
         asset_id = f"adel-asset-{uuid.uuid4().hex[:8]}"
         creative_id = f"adel-cr-{uuid.uuid4().hex[:8]}"
@@ -10,12 +10,14 @@ from __future__ import annotations
 import uuid
 
 from dreamtraffic.dsp.base import DSPAdapter, UploadResult
+from dreamtraffic.media.assets import Asset
 
 
 class DV360Adapter(DSPAdapter):
     """Google DV360 — two-step upload, Google-preferred supply paths."""
 
     name = "dv360"
+    uploads_video = True
 
     FEE_PCT = 0.14  # ~14% platform fee
 
@@ -29,11 +31,12 @@ class DV360Adapter(DSPAdapter):
         height: int,
         placement_type: str,
         campaign_name: str,
+        asset: Asset | None = None,
     ) -> UploadResult:
         """Simulate DV360 two-step creative upload.
 
         PRODUCTION NOTE: Real implementation would:
-        1. POST asset to /v4/advertisers/{id}/assets with video file
+        1. POST asset to /v4/advertisers/{id}/assets with video file (``asset.path``)
         2. POST creative to /v4/advertisers/{id}/creatives with VAST tag + asset ref
         3. DV360 runs Google creative review (brand safety + policy)
         4. Associate with line item and insertion order
@@ -46,7 +49,13 @@ class DV360Adapter(DSPAdapter):
             "displayName": f"{campaign_name} - {placement_type.upper()}",
             "entityStatus": "ENTITY_STATUS_ACTIVE",
             "creativeType": "CREATIVE_TYPE_VIDEO",
-            "assets": [{"asset": {"mediaId": asset_id}, "role": "ASSET_ROLE_MAIN"}],
+            "assets": [{
+                "asset": {
+                    "mediaId": asset_id,
+                    **({"fileSha256": asset.sha256, "fileSizeBytes": asset.size} if asset else {"url": video_url}),
+                },
+                "role": "ASSET_ROLE_MAIN",
+            }],
             "vastTagUrl": vast_url,
             "dimensions": {"widthPixels": width, "heightPixels": height},
         }
@@ -70,6 +79,7 @@ class DV360Adapter(DSPAdapter):
             vast_url=vast_url,
             request_payload=request_payload,
             response_payload=response_payload,
+            video_sha256=asset.sha256 if asset else "",
             _simulated=True,
         )
 
@@ -10,6 +10,7 @@ from __future__ import annotations
 import uuid
 
 from dreamtraffic.dsp.base import DSPAdapter, UploadResult
+from dreamtraffic.media.assets import Asset
 
 
 class TTDAdapter(DSPAdapter):
@@ -29,6 +30,7 @@ class TTDAdapter(DSPAdapter):
         height: int,
         placement_type: str,
         campaign_name: str,
+        asset: Asset | None = None,
     ) -> UploadResult:
         """Simulate TTD creative upload.
 
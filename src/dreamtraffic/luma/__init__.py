@@ -1,5 +1,39 @@
 """Luma AI Dream Machine integration."""
 
+from dreamtraffic.luma.async_client import AsyncLumaClient, GenerationResult
+from dreamtraffic.luma.cache import CacheStats, GenerationCache, GenerationRequest, generation_cache
+from dreamtraffic.luma.callbacks import CallbackReceiver, CallbackStats
 from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.jobs import Job, JobQueue, JobState, LeaseLost
+from dreamtraffic.luma.poller import GenerationFailed, GenerationPoller, PollerStats
+from dreamtraffic.luma.scheduler import (
+    LumaScheduler, SchedulerStats, configure_scheduler, flight_priority, luma_priority, luma_scheduler,
+)
+from dreamtraffic.luma.worker import GenerationWorkers, WorkerStats
 
-__all__ = ["LumaClient"]
+__all__ = [
+    "LumaClient",
+    "AsyncLumaClient",
+    "GenerationResult",
+    "GenerationPoller",
+    "PollerStats",
+    "GenerationFailed",
+    "CallbackReceiver",
+    "CallbackStats",
+    "LumaScheduler",
+    "SchedulerStats",
+    "luma_scheduler",
+    "configure_scheduler",
+    "luma_priority",
+    "flight_priority",
+    "JobQueue",
+    "Job",
+    "JobState",
+    "LeaseLost",
+    "GenerationWorkers",
+    "WorkerStats",
+    "GenerationCache",
+    "GenerationRequest",
+    "CacheStats",
+    "generation_cache",
+]
@@ -0,0 +1,325 @@
+"""AsyncLumaClient — non-blocking generate, poll and batch generation.
+
+One ``httpx.AsyncClient`` connection pool is shared by every API request the
+client makes, so hundreds of generations can be submitted and polled from a
+single event loop::
+
+    async with AsyncLumaClient() as client:
+        requests = [GenerationRequest.normalized(p, aspect_ratio="9:16") for p in prompts]
+        async for result in client.generate_many(requests, max_concurrency=50):
+            print(result.index, result.video_url or result.error)
+
+``generate_many`` keeps up to ``max_concurrency`` generations in flight and
+yields each result as soon as it finishes, so a batch takes about as long as
+its slowest generation when the limit covers the batch. Like ``LumaClient``,
+requests go through the generation cache unless it is disabled; cache
+reads and writes run in a worker thread to keep the loop free. Waits are
+served by the client's ``GenerationPoller`` (backoff, jitter, creative
+write-back), awaited through ``asyncio.wrap_future``; its status reads are
+handed back to the client's event loop, so they go through the same
+connection pool (or ``http_client``) as everything else. API requests wait
+their turn in the process-wide ``LumaScheduler`` unless an ``http_client``
+of your own is passed in.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable
+
+import httpx
+from lumaai import AsyncLumaAI, DefaultAsyncHttpxClient
+
+from dreamtraffic.config import LUMAAI_API_KEY, LUMA_CACHE_ENABLED, LUMA_MAX_CONCURRENCY
+from dreamtraffic.luma.cache import CachedGeneration, GenerationCache, GenerationRequest, generation_cache
+from dreamtraffic.luma.poller import GenerationPoller
+from dreamtraffic.luma.scheduler import (
+    AsyncSchedulingTransport, LumaScheduler, current_priority, luma_priority, luma_scheduler,
+)
+from dreamtraffic.media.assets import download_to_data_dir
+
+_MAX_STARTED = 1024  # created generations remembered until watched; the oldest are dropped
+
+
+@dataclass
+class GenerationResult:
+    """Outcome of one request in a ``generate_many`` batch."""
+    index: int  # position of the request in the batch
+    request: GenerationRequest
+    generation_id: str = ""
+    state: str = ""  # completed | failed
+    video_url: str = ""
+    thumbnail_url: str = ""
+    error: str = ""
+    seconds: float = 0.0  # submit to result
+
+    @property
+    def ok(self) -> bool:
+        return self.state == "completed"
+
+
+class AsyncLumaClient:
+    """Async wrapper around the Luma AI SDK sharing one HTTP connection pool."""
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        *,
+        base_url: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        max_connections: int = 100,
+        cache: GenerationCache | None = None,
+        use_cache: bool = LUMA_CACHE_ENABLED,
+        scheduler: LumaScheduler | None = None,
+        poller_options: dict | None = None,
+    ) -> None:
+        self._owns_http = http_client is None
+        self.scheduler = scheduler or luma_scheduler()
+        self.http = http_client or DefaultAsyncHttpxClient(transport=AsyncSchedulingTransport(
+            self.scheduler,
+            httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            ),
+        ))
+        self._client = AsyncLumaAI(
+            auth_token=api_key or LUMAAI_API_KEY, base_url=base_url, http_client=self.http,
+        )
+        self._cache = cache
+        self.use_cache = use_cache
+        self._inflight: dict[str, asyncio.Task[CachedGeneration]] = {}
+        self._poller: GenerationPoller | None = None
+        self._poller_options = poller_options or {}
+        self._loop: asyncio.AbstractEventLoop | None = None  # where the poller's status reads run
+        # generation_id -> (model, monotonic start); only touched on the event loop
+        self._started: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._priorities: dict[str, str] = {}  # generation_id -> flight start, while watched
+
+    async def __aenter__(self) -> "AsyncLumaClient":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Stop the poller (cancelling pending waits), then close the connection pool (unless passed in)."""
+        if self._poller is not None:
+            await asyncio.to_thread(self._poller.close)
+            self._poller = None
+        if self._owns_http:
+            await self.http.aclose()
+
+    @property
+    def cache(self) -> GenerationCache | None:
+        if not self.use_cache:
+            return None
+        if self._cache is None:
+            self._cache = generation_cache()
+        return self._cache
+
+    @property
+    def poller(self) -> GenerationPoller:
+        """The poller shared by every ``watch``/``poll`` on this client, started on first use.
+
+        Must first be used from the event loop the client runs on.
+        """
+        if self._poller is None:
+            self._loop = asyncio.get_running_loop()
+            self._poller = GenerationPoller(self._get, cache=self.cache, **self._poller_options)
+        return self._poller
+
+    def _get(self, generation_id: str) -> Any:
+        # Called on a poller thread: run the read on the client's loop, through self._client
+        return asyncio.run_coroutine_threadsafe(self._get_async(generation_id), self._loop).result()
+
+    async def _get_async(self, generation_id: str) -> Any:
+        # The task does not inherit the watcher's context: restore its priority
+        with luma_priority(self._priorities.get(generation_id)):
+            return await self._client.generations.get(id=generation_id)
+
+    async def _create(self, request: GenerationRequest) -> str:
+        generation = await self._client.generations.create(
+            prompt=request.prompt,
+            model=request.model,
+            resolution=request.resolution,
+            duration=request.duration,
+            aspect_ratio=request.aspect_ratio,
+            loop=request.loop,
+        )
+        self._started[generation.id] = (request.model, time.monotonic())
+        while len(self._started) > _MAX_STARTED:
+            self._started.popitem(last=False)
+        return generation.id
+
+    async def _create_cached(self, cache: GenerationCache, request: GenerationRequest) -> CachedGeneration:
+        cache.count("misses")
+        generation_id = await self._create(request)
+        return await asyncio.to_thread(cache.store, request, generation_id)
+
+    async def start(self, request: GenerationRequest, *, refresh: bool = False) -> CachedGeneration | str:
+        """Start (or reuse) a generation: the cache entry, or the bare ID without a cache."""
+        cache = self.cache
+        if cache is None:
+            return await self._create(request)
+        if not refresh:
+            entry = await asyncio.to_thread(cache.lookup, request)
+            if entry is not None:
+                cache.count("hits")
+                return entry
+        task = self._inflight.get(request.key)
+        if task is None or refresh:
+            task = asyncio.ensure_future(self._create_cached(cache, request))
+            self._inflight[request.key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(request.key, None))
+        else:
+            cache.count("shared")
+        return await asyncio.shield(task)
+
+    async def generate(
+        self,
+        prompt: str,
+        *,
+        duration: str = "5s",
+        resolution: str = "1080p",
+        aspect_ratio: str = "16:9",
+        model: str = "ray2",
+        loop: bool = False,
+        refresh: bool = False,
+    ) -> str:
+        """Start a video generation and return the generation ID."""
+        request = GenerationRequest.normalized(
+            prompt, model=model, resolution=resolution, duration=duration,
+            aspect_ratio=aspect_ratio, loop=loop,
+        )
+        started = await self.start(request, refresh=refresh)
+        return started if isinstance(started, str) else started.generation_id
+
+    async def cached_result(self, generation_id: str) -> dict | None:
+        """``poll()``-shaped data for a generation the cache already saw complete."""
+        cache = self.cache
+        entry = await asyncio.to_thread(cache.by_generation_id, generation_id) if cache else None
+        if entry is None or not entry.completed:
+            return None
+        return {
+            "id": generation_id,
+            "state": entry.state,
+            "video_url": entry.video_url,
+            "thumbnail_url": entry.thumbnail_url,
+        }
+
+    def watch(
+        self,
+        generation_id: str,
+        *,
+        creative_id: int | None = None,
+        timeout: float = 300,
+    ) -> Future[dict]:
+        """A future of ``poll()`` data for ``generation_id``, resolved by the shared poller.
+
+        As with ``LumaClient.watch``, the finished ``video_url`` is written to
+        the creatives stored with this generation ID and to ``creative_id``,
+        and status reads keep the caller's ``luma_priority``.
+        """
+        model, started_at = self._started.pop(generation_id, ("", None))
+        priority = current_priority()
+        if priority:
+            self._priorities[generation_id] = priority
+        future = self.poller.watch(
+            generation_id, model=model, started_at=started_at, creative_id=creative_id, timeout=timeout,
+        )
+        if priority:
+            future.add_done_callback(lambda _: self._priorities.pop(generation_id, None))
+        return future
+
+    async def poll(self, generation_id: str, *, timeout: float = 300, creative_id: int | None = None) -> dict:
+        """Wait until generation completes without blocking the loop. Returns generation data."""
+        # Shielded: other callers may be waiting on the same generation's future
+        return await asyncio.shield(asyncio.wrap_future(
+            self.watch(generation_id, creative_id=creative_id, timeout=timeout),
+        ))
+
+    async def wait(
+        self,
+        request: GenerationRequest,
+        *,
+        timeout: float = 300,
+        refresh: bool = False,
+    ) -> dict:
+        """Generate ``request`` (or reuse it) and wait for the video."""
+        started = await self.start(request, refresh=refresh)
+        if isinstance(started, str):
+            return await self.poll(started, timeout=timeout)
+        return (await self.cached_result(started.generation_id)
+                or await self.poll(started.generation_id, timeout=timeout))
+
+    async def generate_and_wait(
+        self,
+        prompt: str,
+        *,
+        duration: str = "5s",
+        resolution: str = "1080p",
+        aspect_ratio: str = "16:9",
+        model: str = "ray2",
+        loop: bool = False,
+        timeout: float = 300,
+        refresh: bool = False,
+    ) -> dict:
+        """Generate a video and wait for completion. Returns generation data with video_url."""
+        request = GenerationRequest.normalized(
+            prompt, model=model, resolution=resolution, duration=duration,
+            aspect_ratio=aspect_ratio, loop=loop,
+        )
+        return await self.wait(request, timeout=timeout, refresh=refresh)
+
+    async def generate_many(
+        self,
+        requests: Iterable[GenerationRequest],
+        *,
+        max_concurrency: int = LUMA_MAX_CONCURRENCY,
+        timeout: float = 300,
+    ) -> AsyncIterator[GenerationResult]:
+        """Generate every request, at most ``max_concurrency`` in flight; yield results as they finish.
+
+        A failed, timed-out or rejected request yields a result with
+        ``error`` set rather than stopping the batch. Leaving the loop early
+        cancels the requests still running.
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def run(index: int, request: GenerationRequest) -> GenerationResult:
+            async with slots:
+                result = GenerationResult(index, request)
+                start = time.monotonic()
+                try:
+                    data = await self.wait(request, timeout=timeout)
+                    result.generation_id = data["id"]
+                    result.state = "completed"
+                    result.video_url = data["video_url"]
+                    result.thumbnail_url = data["thumbnail_url"] or ""
+                except Exception as e:  # reported per request
+                    result.state = "failed"
+                    result.error = str(e) or type(e).__name__
+                result.seconds = time.monotonic() - start
+                return result
+
+        tasks = [asyncio.ensure_future(run(i, r)) for i, r in enumerate(requests)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def download(self, video_url: str, filename: str | None = None) -> Path:
+        """Download a completed video to the data directory without blocking the loop.
+
+        Reads through the asset store (``media.assets``) on a worker thread.
+        """
+        return await asyncio.to_thread(download_to_data_dir, video_url, filename)
@@ -0,0 +1,279 @@
+"""Content-addressed cache of Luma generations, so a request is only paid for once.
+
+A request is normalized — prompt whitespace collapsed and Unicode NFKC
+folded; model, resolution, duration and aspect ratio in canonical spelling —
+and its SHA-256 is the key of a ``generation_cache`` row holding the
+generation ID and, once known, the video URL::
+
+    cache = generation_cache()
+    request = GenerationRequest.normalized("A drone shot  over the coast")
+    entry = cache.get_or_create(request, lambda: client.create(...))
+    entry.reused          # True when an earlier generation answered it
+
+Concurrent callers with the same request in one process share the
+in-flight create call instead of each starting a generation. Failed
+generations are dropped so the next request tries again.
+
+Policies: entries older than ``ttl`` seconds count as misses (Luma asset
+URLs do not live forever), and past ``max_entries`` the least recently used
+(``eviction="lru"``) or oldest (``"fifo"``) entries are evicted.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import Future
+from dataclasses import astuple, dataclass
+from pathlib import Path
+from typing import Callable
+
+from dreamtraffic.config import (
+    LUMA_CACHE_EVICTION,
+    LUMA_CACHE_MAX_ENTRIES,
+    LUMA_CACHE_TTL_DAYS,
+    LUMA_DEFAULTS,
+)
+from dreamtraffic.db.engine import ConnectionPool, get_pool
+
+EVICTION_POLICIES = {"lru": "last_used_at", "fifo": "created_at"}
+
+_SPACE = re.compile(r"\s+")
+
+
+@dataclass(frozen=True)
+class GenerationRequest:
+    """The parameters that decide what Luma renders, in canonical form."""
+    prompt: str
+    model: str = LUMA_DEFAULTS["model"]
+    resolution: str = LUMA_DEFAULTS["resolution"]
+    duration: str = "5s"
+    aspect_ratio: str = LUMA_DEFAULTS["aspect_ratio"]
+    loop: bool = False
+
+    @classmethod
+    def normalized(
+        cls,
+        prompt: str,
+        *,
+        model: str = LUMA_DEFAULTS["model"],
+        resolution: str = LUMA_DEFAULTS["resolution"],
+        duration: str = "5s",
+        aspect_ratio: str = LUMA_DEFAULTS["aspect_ratio"],
+        loop: bool = False,
+    ) -> GenerationRequest:
+        duration = duration.strip().lower()
+        return cls(
+            prompt=_SPACE.sub(" ", unicodedata.normalize("NFKC", prompt)).strip(),
+            model=model.strip().lower(),
+            resolution=resolution.strip().lower(),
+            duration=duration if duration.endswith("s") else f"{duration}s",
+            aspect_ratio=aspect_ratio.replace(" ", ""),
+            loop=bool(loop),
+        )
+
+    @property
+    def key(self) -> str:
+        encoded = json.dumps(astuple(self), ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedGeneration:
+    key: str
+    generation_id: str
+    state: str  # pending | completed
+    video_url: str
+    thumbnail_url: str
+    created_at: str
+    hits: int
+    reused: bool = False  # served from the cache rather than a new generation
+
+    @property
+    def completed(self) -> bool:
+        return self.state == "completed" and bool(self.video_url)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    shared: int = 0  # callers that joined another caller's in-flight generation
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses + self.shared
+        return (self.hits + self.shared) / total if total else 0.0
+
+
+_COLUMNS = "request_key, generation_id, state, video_url, thumbnail_url, created_at, hits"
+
+
+class GenerationCache:
+    """Generation cache in one database, with in-process sharing of in-flight requests."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        *,
+        ttl: float | None = LUMA_CACHE_TTL_DAYS * 86400 or None,
+        max_entries: int | None = LUMA_CACHE_MAX_ENTRIES or None,
+        eviction: str = LUMA_CACHE_EVICTION,
+    ) -> None:
+        if eviction not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy {eviction!r}; expected one of {sorted(EVICTION_POLICIES)}")
+        self.pool = pool
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.eviction = eviction
+        self.stats = CacheStats()
+        self._inflight: dict[str, Future[CachedGeneration]] = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self) -> tuple[str, tuple[str, ...]]:
+        if self.ttl is None:
+            return "", ()
+        return "AND created_at > datetime('now', ?)", (f"-{self.ttl} seconds",)
+
+    def lookup(self, request: GenerationRequest) -> CachedGeneration | None:
+        """The live entry for ``request``, counting it as used, or None."""
+        fresh, params = self._fresh()
+        with self.pool.connection() as conn, self.pool.write_lock:
+            row = conn.execute(
+                f"""UPDATE generation_cache SET hits = hits + 1, last_used_at = datetime('now')
+                    WHERE request_key = ? {fresh}
+                    RETURNING {_COLUMNS}""",
+                (request.key, *params),
+            ).fetchone()
+        return CachedGeneration(*row, reused=True) if row else None
+
+    def count(self, outcome: str, n: int = 1) -> None:
+        """Add ``n`` to ``stats.<outcome>`` (hits, misses, shared or evictions)."""
+        with self._lock:
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + n)
+
+    def get_or_create(
+        self,
+        request: GenerationRequest,
+        create: Callable[[], str],
+        *,
+        refresh: bool = False,
+    ) -> CachedGeneration:
+        """The cached generation for ``request``, or a new one from ``create()``.
+
+        ``create`` starts a generation and returns its ID; it runs at most once
+        per key at a time in this process. ``refresh`` skips the lookup and
+        replaces any cached entry.
+        """
+        if not refresh:
+            entry = self.lookup(request)
+            if entry is not None:
+                self.count("hits")
+                return entry
+        with self._lock:
+            future = self._inflight.get(request.key)
+            owner = future is None
+            if owner:
+                future = self._inflight[request.key] = Future()
+        if not owner:
+            self.count("shared")
+            entry = future.result()
+            return CachedGeneration(*astuple(entry)[:-1], reused=True)
+        try:
+            # Another caller may have stored it between the lookup and the claim
+            entry = None if refresh else self.lookup(request)
+            if entry is not None:
+                self.count("hits")
+            else:
+                self.count("misses")
+                entry = self.store(request, create())
+            future.set_result(entry)
+            return entry
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[request.key]
+
+    def store(self, request: GenerationRequest, generation_id: str) -> CachedGeneration:
+        """Cache ``generation_id`` as the answer to ``request``, replacing any entry."""
+        with self.pool.transaction() as conn:
+            row = conn.execute(
+                f"""INSERT OR REPLACE INTO generation_cache
+                        (request_key, generation_id, prompt, model, resolution, duration, aspect_ratio, loop)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    RETURNING {_COLUMNS}""",
+                (request.key, generation_id, *astuple(request)),
+            ).fetchone()
+            self._evict(conn)
+        return CachedGeneration(*row)
+
+    def by_generation_id(self, generation_id: str) -> CachedGeneration | None:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM generation_cache WHERE generation_id = ?", (generation_id,)
+            ).fetchone()
+        return CachedGeneration(*row) if row else None
+
+    def complete(self, generation_id: str, video_url: str, thumbnail_url: str = "") -> None:
+        """Record the finished video for every request answered by ``generation_id``."""
+        with self.pool.connection() as conn, self.pool.write_lock:
+            conn.execute(
+                """UPDATE generation_cache SET state = 'completed', video_url = ?, thumbnail_url = ?
+                   WHERE generation_id = ?""",
+                (video_url, thumbnail_url, generation_id),
+            )
+
+    def discard(self, generation_id: str) -> int:
+        """Forget a (failed) generation, so the next identical request starts a new one."""
+        with self.pool.connection() as conn, self.pool.write_lock:
+            return conn.execute(
+                "DELETE FROM generation_cache WHERE generation_id = ?", (generation_id,)
+            ).rowcount
+
+    def evict(self) -> int:
+        """Apply the TTL and size policies now. Returns the entries removed."""
+        with self.pool.transaction() as conn:
+            return self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection) -> int:
+        removed = 0
+        if self.ttl is not None:
+            removed += conn.execute(
+                "DELETE FROM generation_cache WHERE created_at <= datetime('now', ?)",
+                (f"-{self.ttl} seconds",),
+            ).rowcount
+        if self.max_entries is not None:
+            order = EVICTION_POLICIES[self.eviction]
+            removed += conn.execute(
+                f"""DELETE FROM generation_cache WHERE rowid IN (
+                        SELECT rowid FROM generation_cache ORDER BY {order} DESC, rowid DESC
+                        LIMIT -1 OFFSET ?)""",
+                (self.max_entries,),
+            ).rowcount
+        self.count("evictions", removed)
+        return removed
+
+    def clear(self) -> None:
+        with self.pool.connection() as conn, self.pool.write_lock:
+            conn.execute("DELETE FROM generation_cache")
+
+
+_caches: dict[Path, GenerationCache] = {}
+_caches_lock = threading.Lock()
+
+
+def generation_cache(db_path: Path | None = None) -> GenerationCache:
+    """The generation cache for ``db_path``, or for the default pool's database."""
+    pool = get_pool(db_path)
+    with _caches_lock:
+        cache = _caches.get(pool.db_path)
+        if cache is None or cache.pool is not pool:
+            cache = _caches[pool.db_path] = GenerationCache(pool)
+    return cache
@@ -0,0 +1,199 @@
+"""CallbackReceiver — a small asyncio HTTP server for Luma's generation callbacks.
+
+Luma POSTs the generation object to the ``callback_url`` given at creation
+each time its state changes. Receiving those instead of polling means a
+finished generation is known the moment Luma reports it::
+
+    with CallbackReceiver() as receiver, LumaClient(callback_receiver=receiver) as client:
+        gen_id = client.generate("Aerial shot of a coastline at dawn")
+        client.watch(gen_id, creative_id=7).result()    # settled by the callback
+
+The server runs on its own event loop thread and accepts ``POST`` on
+``callback_path`` carrying the receiver's secret ``token`` in the query
+string; anything else is refused (401 for a wrong token). Each accepted body
+is handed to the subscribed handlers (``LumaClient`` subscribes its poller's
+``notify``) before the 204 goes back, so a callback Luma saw acknowledged has
+been applied. When Luma reaches this machine through a tunnel or proxy, set
+``public_url`` (``DREAMTRAFFIC_LUMA_CALLBACK_URL``) to the address it uses.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import json
+import secrets
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from dreamtraffic.config import LUMA_CALLBACK_HOST, LUMA_CALLBACK_PORT, LUMA_CALLBACK_URL
+
+MAX_BODY = 1 << 20  # a generation object is a few KB
+_REASONS = {204: "No Content", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+            405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+@dataclass
+class CallbackStats:
+    received: int = 0  # accepted and handed to the handlers
+    rejected: int = 0  # bad path, method, token or body
+    handler_errors: int = 0
+
+
+class CallbackReceiver:
+    """Accepts Luma callbacks on ``host:port`` and passes each generation to the handlers."""
+
+    def __init__(
+        self,
+        host: str = LUMA_CALLBACK_HOST,
+        port: int = LUMA_CALLBACK_PORT,
+        *,
+        public_url: str = LUMA_CALLBACK_URL,
+        callback_path: str = "/luma/callback",
+        token: str | None = None,
+    ) -> None:
+        self.host = host
+        self.port = port  # 0 picks a free port; the real one is set on start
+        self.public_url = public_url.rstrip("/")
+        self.callback_path = callback_path
+        self.token = token or secrets.token_urlsafe(24)
+        self.stats = CallbackStats()
+        self._handlers: list[Callable[[dict[str, Any]], Any]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._last_error: BaseException | None = None
+
+    def __enter__(self) -> "CallbackReceiver":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    @property
+    def callback_url(self) -> str:
+        """The URL to give Luma as ``callback_url``."""
+        base = self.public_url or f"http://{self.host}:{self.port}"
+        return f"{base}{self.callback_path}?token={self.token}"
+
+    def subscribe(self, handler: Callable[[dict[str, Any]], Any]) -> None:
+        """Call ``handler(generation)`` for every accepted callback."""
+        if handler not in self._handlers:
+            self._handlers = [*self._handlers, handler]
+
+    def unsubscribe(self, handler: Callable[[dict[str, Any]], Any]) -> None:
+        self._handlers = [h for h in self._handlers if h != handler]
+
+    # ── Server thread ────────────────────────────────────────────────
+
+    def start(self) -> "CallbackReceiver":
+        """Start listening; returns once the port is bound (errors are raised here)."""
+        if self._thread is not None:
+            return self
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), name="luma-callbacks", daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._loop is None:
+            self._thread.join()
+            self._thread = None
+            raise self._last_error  # type: ignore[misc]
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._thread = None
+
+    def _serve(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            server = loop.run_until_complete(asyncio.start_server(self._connection, self.host, self.port))
+        except OSError as e:
+            self._last_error = e
+            loop.close()
+            ready.set()
+            return
+        self.port = server.sockets[0].getsockname()[1]
+        self._loop = loop
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            server.close()
+            connections = asyncio.all_tasks(loop)  # idle keep-alive connections
+            for task in connections:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*connections, return_exceptions=True))
+            loop.run_until_complete(server.wait_closed())
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+            self._loop = None
+
+    # ── HTTP ─────────────────────────────────────────────────────────
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                headers: dict[str, str] = {}
+                while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if length > MAX_BODY:
+                    status, keep_alive = 413, False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status = await self._dispatch(method, target, body)
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Length: 0\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass  # malformed request or client went away
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, target: str, body: bytes) -> int:
+        url = urlsplit(target)
+        status = 204
+        if url.path != self.callback_path:
+            status = 404
+        elif method != "POST":
+            status = 405
+        elif not hmac.compare_digest(parse_qs(url.query).get("token", [""])[0].encode(), self.token.encode()):
+            status = 401
+        else:
+            try:
+                generation = json.loads(body)
+            except ValueError:
+                generation = None
+            if not isinstance(generation, dict) or not generation.get("id"):
+                status = 400
+        if status != 204:
+            self.stats.rejected += 1
+            return status
+        self.stats.received += 1
+        # Handlers touch SQLite and futures: keep them off the event loop
+        await asyncio.get_running_loop().run_in_executor(None, self._deliver, generation)
+        return status
+
+    def _deliver(self, generation: dict[str, Any]) -> None:
+        for handler in self._handlers:
+            try:
+                handler(generation)
+            except Exception as e:  # one bad handler must not starve the others
+                self.stats.handler_errors += 1
+                self._last_error = e
@@ -1,21 +1,104 @@
-"""LumaClient — generate, poll, and download Dream Machine videos."""
+"""LumaClient — generate, poll, and download Dream Machine videos.
+
+Generations go through the generation cache (``luma.cache``) unless it is
+disabled, so an identical request returns the earlier generation instead of
+starting, and paying for, a new one. Waiting is done by one shared
+``GenerationPoller`` per client, so any number of pending generations cost
+one scheduler thread and a few polling workers. With a ``CallbackReceiver``
+attached, new generations ask Luma to call back on completion, which
+settles their waits at once; polling them is then only a fallback sweep.
+API requests pass through the process-wide ``LumaScheduler``, which paces
+them and rides out 429s.
+"""
 
 from __future__ import annotations
 
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future
 from pathlib import Path
+from typing import Any
+
+from lumaai import DefaultHttpxClient, LumaAI
 
-import httpx
-from lumaai import LumaAI
+from dreamtraffic.config import LUMAAI_API_KEY, LUMA_CACHE_ENABLED
+from dreamtraffic.luma.callbacks import CallbackReceiver
+from dreamtraffic.luma.cache import GenerationCache, GenerationRequest, generation_cache
+from dreamtraffic.luma.poller import GenerationPoller
+from dreamtraffic.luma.scheduler import (
+    LumaScheduler, SchedulingTransport, current_priority, luma_priority, luma_scheduler,
+)
+from dreamtraffic.media.assets import download_to_data_dir
 
-from dreamtraffic.config import LUMAAI_API_KEY, DATA_DIR
+_MAX_STARTED = 1024  # created generations remembered until watched; the oldest are dropped
 
 
 class LumaClient:
     """Wrapper around the Luma AI SDK for video generation."""
 
-    def __init__(self, api_key: str | None = None) -> None:
-        self._client = LumaAI(auth_token=api_key or LUMAAI_API_KEY)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        *,
+        base_url: str | None = None,
+        cache: GenerationCache | None = None,
+        use_cache: bool = LUMA_CACHE_ENABLED,
+        poller_options: dict | None = None,
+        callback_receiver: CallbackReceiver | None = None,
+        scheduler: LumaScheduler | None = None,
+    ) -> None:
+        self.scheduler = scheduler or luma_scheduler()
+        self._client = LumaAI(
+            auth_token=api_key or LUMAAI_API_KEY, base_url=base_url,
+            http_client=DefaultHttpxClient(transport=SchedulingTransport(self.scheduler)),
+        )
+        self._cache = cache
+        self.use_cache = use_cache
+        self._poller: GenerationPoller | None = None
+        self._poller_options = poller_options or {}
+        # generation_id -> (model, monotonic start, created with our callback_url)
+        self._started: OrderedDict[str, tuple[str, float, bool]] = OrderedDict()
+        self._started_lock = threading.Lock()
+        self.callback_receiver = callback_receiver
+        self._priorities: dict[str, str] = {}  # generation_id -> flight start, while watched
+
+    def __enter__(self) -> "LumaClient":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the poller (cancelling pending waits) and flush its video URL writes."""
+        if self._poller is not None:
+            if self.callback_receiver is not None:
+                self.callback_receiver.unsubscribe(self._poller.notify)
+            self._poller.close()
+            self._poller = None
+
+    @property
+    def cache(self) -> GenerationCache | None:
+        """The generation cache in use (the default database's unless given), or None."""
+        if not self.use_cache:
+            return None
+        if self._cache is None:
+            self._cache = generation_cache()
+        return self._cache
+
+    @property
+    def poller(self) -> GenerationPoller:
+        """The poller shared by every ``watch``/``poll`` on this client, started on first use."""
+        if self._poller is None:
+            self._poller = GenerationPoller(self._get, cache=self.cache, **self._poller_options)
+            if self.callback_receiver is not None:
+                self.callback_receiver.subscribe(self._poller.notify)
+        return self._poller
+
+    def _get(self, generation_id: str) -> Any:
+        # Poller threads do not inherit the watcher's context: restore its priority
+        with luma_priority(self._priorities.get(generation_id)):
+            return self._client.generations.get(id=generation_id)
 
     def generate(
         self,
@@ -26,49 +109,96 @@ class LumaClient:
         aspect_ratio: str = "16:9",
         model: str = "ray2",
         loop: bool = False,
+        refresh: bool = False,
+        callback_url: str | None = None,
     ) -> str:
-        """Start a video generation and return the generation ID."""
-        generation = self._client.generations.create(
-            prompt=prompt,
-            model=model,
-            resolution=resolution,
-            duration=duration,
-            aspect_ratio=aspect_ratio,
-            loop=loop,
+        """Start a video generation and return the generation ID.
+
+        An identical earlier request's generation ID is returned instead when
+        cached; ``refresh`` forces a new generation. Luma posts the finished
+        generation to ``callback_url``, which defaults to the attached
+        receiver's URL.
+        """
+        called_back = callback_url is None and self.callback_receiver is not None
+        if called_back:
+            callback_url = self.callback_receiver.callback_url
+            self.poller  # subscribed before Luma can call back
+
+        def create() -> str:
+            options = {"callback_url": callback_url} if callback_url else {}
+            generation = self._client.generations.create(
+                prompt=prompt,
+                model=model,
+                resolution=resolution,
+                duration=duration,
+                aspect_ratio=aspect_ratio,
+                loop=loop,
+                **options,
+            )
+            with self._started_lock:
+                self._started[generation.id] = (model, time.monotonic(), called_back)
+                while len(self._started) > _MAX_STARTED:
+                    self._started.popitem(last=False)
+            return generation.id
+
+        cache = self.cache
+        if cache is None:
+            return create()
+        request = GenerationRequest.normalized(
+            prompt, model=model, resolution=resolution, duration=duration,
+            aspect_ratio=aspect_ratio, loop=loop,
         )
-        return generation.id
-
-    def poll(self, generation_id: str, *, timeout: int = 300, interval: int = 5) -> dict:
-        """Poll until generation completes. Returns generation data."""
-        deadline = time.time() + timeout
-        while time.time() < deadline:
-            gen = self._client.generations.get(id=generation_id)
-            if gen.state == "completed":
-                return {
-                    "id": gen.id,
-                    "state": gen.state,
-                    "video_url": gen.assets.video if gen.assets else "",
-                    "thumbnail_url": getattr(gen.assets, "thumbnail", "") if gen.assets else "",
-                }
-            if gen.state == "failed":
-                reason = getattr(gen, "failure_reason", "unknown")
-                raise RuntimeError(f"Luma generation {generation_id} failed: {reason}")
-            time.sleep(interval)
-        raise TimeoutError(f"Luma generation {generation_id} timed out after {timeout}s")
+        return cache.get_or_create(request, create, refresh=refresh).generation_id
+
+    def cached_result(self, generation_id: str) -> dict | None:
+        """``poll()``-shaped data for a generation the cache already saw complete."""
+        cache = self.cache
+        entry = cache.by_generation_id(generation_id) if cache is not None else None
+        if entry is None or not entry.completed:
+            return None
+        return {
+            "id": generation_id,
+            "state": entry.state,
+            "video_url": entry.video_url,
+            "thumbnail_url": entry.thumbnail_url,
+        }
+
+    def watch(
+        self,
+        generation_id: str,
+        *,
+        creative_id: int | None = None,
+        timeout: float = 300,
+    ) -> Future[dict]:
+        """A future of ``poll()`` data for ``generation_id``, resolved by the shared poller.
+
+        The finished ``video_url`` is also written to the creatives stored
+        with this generation ID, and to ``creative_id`` when given. Its status
+        reads keep the caller's ``luma_priority``. Generations started with a
+        callback to this client's receiver are settled by the callback and
+        only swept by polling. (A ``callback_url`` passed to ``generate`` is
+        another receiver's business; those are polled as usual.)
+        """
+        with self._started_lock:
+            model, started_at, callback = self._started.pop(generation_id, ("", None, False))
+        priority = current_priority()
+        if priority:
+            self._priorities[generation_id] = priority
+        future = self.poller.watch(
+            generation_id, model=model, started_at=started_at,
+            creative_id=creative_id, timeout=timeout, callback=callback,
+        )
+        if priority:
+            future.add_done_callback(lambda _: self._priorities.pop(generation_id, None))
+        return future
+
+    def poll(self, generation_id: str, *, timeout: float = 300, creative_id: int | None = None) -> dict:
+        """Wait until generation completes. Returns generation data."""
+        return self.watch(generation_id, creative_id=creative_id, timeout=timeout).result()
 
     def download(self, video_url: str, filename: str | None = None) -> Path:
-        """Download a completed video to the data directory."""
-        DATA_DIR.mkdir(parents=True, exist_ok=True)
-        fname = filename or video_url.split("/")[-1].split("?")[0]
-        if not fname.endswith(".mp4"):
-            fname += ".mp4"
-        dest = DATA_DIR / fname
-        with httpx.stream("GET", video_url) as resp:
-            resp.raise_for_status()
-            with open(dest, "wb") as f:
-                for chunk in resp.iter_bytes(chunk_size=8192):
-                    f.write(chunk)
-        return dest
+        """Download a completed video to the data directory, reading through the asset store."""
+        return download_to_data_dir(video_url, filename)
 
     def generate_and_wait(
         self,
@@ -80,8 +210,12 @@ class LumaClient:
         model: str = "ray2",
         loop: bool = False,
         timeout: int = 300,
+        refresh: bool = False,
     ) -> dict:
-        """Generate a video and wait for completion. Returns generation data with video_url."""
+        """Generate a video and wait for completion. Returns generation data with video_url.
+
+        A cached, already completed generation returns immediately.
+        """
         gen_id = self.generate(
             prompt,
             duration=duration,
@@ -89,5 +223,6 @@ class LumaClient:
             aspect_ratio=aspect_ratio,
             model=model,
             loop=loop,
+            refresh=refresh,
         )
-        return self.poll(gen_id, timeout=timeout)
+        return self.cached_result(gen_id) or self.poll(gen_id, timeout=timeout)
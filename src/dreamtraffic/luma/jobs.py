@@ -0,0 +1,265 @@
+"""Persistent queue of Luma generation jobs with leases, in the ``generation_jobs`` table.
+
+A job moves ``queued`` -> ``submitted`` (generation ID recorded) ->
+``polling`` -> ``downloading`` -> ``done``, or ends ``failed`` once it has
+used ``max_attempts``. Because the generation ID is stored the moment Luma
+returns it, a job picked up again after a crash resumes polling that
+generation instead of paying for a new one::
+
+    queue = JobQueue()
+    queue.enqueue("Aerial shot of a coastline at dawn", creative_id=7)
+    job = queue.claim("worker-1")           # leased for lease_seconds
+    job = queue.advance(job, "worker-1", JobState.SUBMITTED, generation_id=gen_id)
+
+Every write after ``claim`` is conditional on the caller still holding the
+lease and raises ``LeaseLost`` otherwise. Holders extend their leases with
+``heartbeat``; a lease that runs out (the worker died) makes the job
+claimable again, and that counts as one of its attempts. ``claim`` hands out
+in-flight jobs before queued ones, so restarted workers resume generations
+already paid for first.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any
+
+from dreamtraffic.config import LUMA_JOB_LEASE_SECONDS, LUMA_JOB_MAX_ATTEMPTS
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.engine import ConnectionPool, get_pool
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    SUBMITTED = "submitted"
+    POLLING = "polling"
+    DOWNLOADING = "downloading"
+    DONE = "done"
+    FAILED = "failed"
+
+
+FINISHED = (JobState.DONE.value, JobState.FAILED.value)
+_UNFINISHED = f"state NOT IN {FINISHED!r}"
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired and another worker may now hold it."""
+
+
+@dataclass
+class Job:
+    id: int
+    prompt: str
+    params: dict[str, Any] = field(default_factory=dict)  # LumaClient.generate keyword arguments
+    creative_id: int | None = None
+    state: str = JobState.QUEUED.value
+    generation_id: str = ""
+    video_url: str = ""
+    asset_sha256: str = ""
+    attempts: int = 0
+    max_attempts: int = LUMA_JOB_MAX_ATTEMPTS
+    error: str = ""
+    lease_owner: str | None = None
+    lease_expires: float | None = None
+    available_at: float = 0.0
+    created_at: str = ""
+    updated_at: str = ""
+
+    @classmethod
+    def from_row(cls, row: Any) -> "Job":
+        values = dict(row)
+        values["params"] = json.loads(values["params"] or "{}")
+        return cls(**values)
+
+
+class JobQueue:
+    """Generation jobs stored in ``pool``'s database, handed out under leases."""
+
+    def __init__(
+        self,
+        pool: ConnectionPool | None = None,
+        *,
+        lease_seconds: float = LUMA_JOB_LEASE_SECONDS,
+        max_attempts: int = LUMA_JOB_MAX_ATTEMPTS,
+        retry_backoff: float = 5.0,
+        max_retry_delay: float = 300.0,
+    ) -> None:
+        self.pool = pool or get_pool()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_delay = max_retry_delay
+
+    # ── Producers ────────────────────────────────────────────────────
+
+    def enqueue(
+        self,
+        prompt: str,
+        *,
+        creative_id: int | None = None,
+        max_attempts: int | None = None,
+        **params: Any,
+    ) -> Job:
+        """Queue a generation; ``params`` are passed to ``LumaClient.generate``."""
+        with self.pool.transaction() as conn:
+            row = conn.execute(
+                """INSERT INTO generation_jobs (prompt, params, creative_id, max_attempts)
+                   VALUES (?, ?, ?, ?) RETURNING *""",
+                (prompt, json.dumps(params, sort_keys=True), creative_id,
+                 self.max_attempts if max_attempts is None else max_attempts),
+            ).fetchone()
+        return Job.from_row(row)
+
+    def adopt_orphans(self) -> list[Job]:
+        """Queue polling jobs for creatives with a generation ID but no video and no job.
+
+        These are generations started by a process that died while waiting.
+        The creatives are found through ``supabase_client``, so this works on
+        either storage backend; the jobs live in this queue's database.
+        """
+        orphans = supabase_client.get_pending_generations()
+        adopted: list[Job] = []
+        with self.pool.transaction() as conn:
+            for creative in orphans:
+                row = conn.execute(
+                    f"""INSERT INTO generation_jobs (prompt, creative_id, state, generation_id, max_attempts)
+                        SELECT ?, ?, '{JobState.SUBMITTED.value}', ?, ?
+                        WHERE NOT EXISTS (SELECT 1 FROM generation_jobs WHERE generation_id = ?)
+                        RETURNING *""",
+                    (creative["prompt"], creative["id"], creative["luma_generation_id"],
+                     self.max_attempts, creative["luma_generation_id"]),
+                ).fetchone()
+                if row is not None:
+                    adopted.append(Job.from_row(row))
+        return adopted
+
+    # ── Reads ────────────────────────────────────────────────────────
+
+    def get(self, job_id: int) -> Job | None:
+        with self.pool.connection() as conn:
+            row = conn.execute("SELECT * FROM generation_jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def jobs(self, state: str | None = None, limit: int = 50) -> list[Job]:
+        """Most recent jobs first, optionally in one state."""
+        sql = "SELECT * FROM generation_jobs"
+        params: tuple = ()
+        if state is not None:
+            sql, params = sql + " WHERE state = ?", (state,)
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql + " ORDER BY id DESC LIMIT ?", (*params, limit)).fetchall()
+        return [Job.from_row(r) for r in rows]
+
+    def counts(self) -> dict[str, int]:
+        """Jobs per state (every state present, zero when empty)."""
+        counts = {s.value: 0 for s in JobState}
+        with self.pool.connection() as conn:
+            for state, n in conn.execute("SELECT state, COUNT(*) FROM generation_jobs GROUP BY state"):
+                counts[state] = n
+        return counts
+
+    def unfinished(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM generation_jobs WHERE {_UNFINISHED}").fetchone()[0]
+
+    # ── Leases ───────────────────────────────────────────────────────
+
+    def claim(self, owner: str) -> Job | None:
+        """Lease the next runnable job to ``owner``: in-flight ones first, then queued by age.
+
+        Taking over a job whose lease ran out counts as an attempt.
+        """
+        now = time.time()
+        with self.pool.transaction() as conn:
+            row = conn.execute(
+                f"""UPDATE generation_jobs
+                    SET lease_owner = ?, lease_expires = ?,
+                        attempts = attempts + (lease_expires IS NOT NULL),
+                        updated_at = datetime('now')
+                    WHERE id = (
+                        SELECT id FROM generation_jobs
+                        WHERE {_UNFINISHED} AND available_at <= ?
+                          AND (lease_owner IS NULL OR lease_expires < ?)
+                        ORDER BY state = '{JobState.QUEUED.value}', available_at, id
+                        LIMIT 1)
+                    RETURNING *""",
+                (owner, now + self.lease_seconds, now, now),
+            ).fetchone()
+        return Job.from_row(row) if row else None
+
+    def heartbeat(self, owner: str) -> int:
+        """Extend every lease ``owner`` holds. Returns the jobs renewed."""
+        with self.pool.transaction() as conn:
+            return conn.execute(
+                f"""UPDATE generation_jobs SET lease_expires = ?
+                    WHERE lease_owner = ? AND {_UNFINISHED}""",
+                (time.time() + self.lease_seconds, owner),
+            ).rowcount
+
+    def reclaim(self) -> int:
+        """Free the expired leases of unfinished jobs. Returns how many were freed.
+
+        ``claim`` would take these over anyway; clearing them makes abandoned
+        jobs visible as unowned (and they still count the lost attempt).
+        """
+        with self.pool.transaction() as conn:
+            return conn.execute(
+                f"""UPDATE generation_jobs SET lease_owner = NULL
+                    WHERE lease_owner IS NOT NULL AND lease_expires < ? AND {_UNFINISHED}""",
+                (time.time(),),
+            ).rowcount
+
+    def _update(self, job: Job, owner: str, assignments: str, params: tuple) -> Job:
+        with self.pool.transaction() as conn:
+            row = conn.execute(
+                f"""UPDATE generation_jobs SET {assignments}, updated_at = datetime('now')
+                    WHERE id = ? AND lease_owner = ? RETURNING *""",
+                (*params, job.id, owner),
+            ).fetchone()
+        if row is None:
+            raise LeaseLost(f"Generation job {job.id} is no longer leased to {owner}")
+        return Job.from_row(row)
+
+    def advance(self, job: Job, owner: str, state: JobState, **fields: Any) -> Job:
+        """Move a leased job to ``state``, setting ``fields`` (generation_id, video_url, ...)."""
+        columns = ["state = ?", *(f"{name} = ?" for name in fields)]
+        return self._update(job, owner, ", ".join(columns), (state.value, *fields.values()))
+
+    def complete(self, job: Job, owner: str, **fields: Any) -> Job:
+        """Mark a leased job done and release it."""
+        columns = ["state = ?", "lease_owner = NULL", "lease_expires = NULL", "error = ''",
+                   *(f"{name} = ?" for name in fields)]
+        return self._update(job, owner, ", ".join(columns), (JobState.DONE.value, *fields.values()))
+
+    def release(self, job: Job, owner: str) -> Job:
+        """Give a job back unchanged (e.g. on shutdown), without using an attempt."""
+        return self._update(job, owner, "lease_owner = NULL, lease_expires = NULL", ())
+
+    def retry(self, job: Job, owner: str, error: str, *, restart: bool = False) -> Job:
+        """Record a failed attempt; back off and retry, or fail once attempts are used up.
+
+        ``restart`` clears the generation ID so the retry starts a new
+        generation (Luma failed the old one); otherwise it resumes where the
+        job left off.
+        """
+        attempts = job.attempts + 1
+        if attempts >= job.max_attempts:
+            return self.fail(job, owner, error, attempts=attempts)
+        delay = min(self.retry_backoff * 2 ** (attempts - 1), self.max_retry_delay)
+        columns = "attempts = ?, error = ?, available_at = ?, lease_owner = NULL, lease_expires = NULL"
+        params: tuple = (attempts, error, time.time() + delay)
+        if restart:
+            columns += ", state = ?, generation_id = '', video_url = ''"
+            params += (JobState.QUEUED.value,)
+        return self._update(job, owner, columns, params)
+
+    def fail(self, job: Job, owner: str, error: str, *, attempts: int | None = None) -> Job:
+        """Mark a leased job failed for good and release it."""
+        return self._update(
+            job, owner,
+            "state = ?, error = ?, attempts = ?, lease_owner = NULL, lease_expires = NULL",
+            (JobState.FAILED.value, error, job.attempts if attempts is None else attempts),
+        )
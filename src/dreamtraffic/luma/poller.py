@@ -0,0 +1,460 @@
+"""GenerationPoller — one scheduler polling every pending Luma generation.
+
+Rather than a sleep loop per generation, a single scheduler thread keeps the
+pending generation IDs in a heap ordered by next check, and a small worker
+pool issues the ``generations.get`` calls that come due::
+
+    poller = GenerationPoller(client.generations.get)
+    future = poller.watch(generation_id, model="ray2", started_at=time.monotonic())
+    future.result()     # poll()-shaped dict, or GenerationFailed / TimeoutError
+
+Schedule: a generation started at a known time is first checked once its
+model's typical render time has passed; after that the gap grows by
+``backoff`` per check from ``min_interval`` up to ``max_interval``. Each gap is
+jittered by ``±jitter`` so generations started together do not poll in step.
+
+Generations Luma will call back about (``watch(..., callback=True)``) are
+settled by ``notify`` as soon as the callback arrives; polling them drops to
+a fallback sweep every ``sweep_interval`` seconds in case the callback is
+lost. A callback for a generation nobody is watching yet is kept, so a
+later ``watch`` returns at once.
+
+Completed generations are recorded in the generation cache (if given) and
+their ``video_url`` is written to the matching ``creatives`` rows in batches
+of ``batch_size``, or at least every ``flush_interval`` seconds.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from dreamtraffic.config import (
+    LUMA_CALLBACK_SWEEP_INTERVAL,
+    LUMA_POLL_MAX_INTERVAL,
+    LUMA_POLL_MIN_INTERVAL,
+    LUMA_POLL_WORKERS,
+    LUMA_RENDER_SECONDS,
+)
+from dreamtraffic.luma.cache import GenerationCache
+
+
+_MAX_PUSHED = 1024  # early callbacks kept for a later watch()
+
+
+class GenerationFailed(RuntimeError):
+    """Luma reported the generation as failed (retrying means a new generation)."""
+
+
+@dataclass
+class PollerStats:
+    polls: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    written: int = 0  # creatives rows updated with a video_url
+    flushes: int = 0
+    callbacks: int = 0  # finished states pushed through notify()
+
+
+@dataclass(eq=False)
+class _Watch:
+    generation_id: str
+    model: str
+    started_at: float | None  # monotonic; None when unknown
+    watched_at: float
+    deadline: float
+    future: Future[dict[str, Any]]
+    creative_ids: set[int] = field(default_factory=set)
+    checks: int = 0
+    callback: bool = False  # Luma will call back: poll only as a sweep
+    settled: bool = False
+
+
+def result_from_generation(gen: Any) -> dict[str, Any]:
+    """``poll()``-shaped data for a completed SDK generation object."""
+    return {
+        "id": gen.id,
+        "state": gen.state,
+        "video_url": gen.assets.video if gen.assets else "",
+        "thumbnail_url": getattr(gen.assets, "thumbnail", "") if gen.assets else "",
+    }
+
+
+def _pushed_result(generation: dict[str, Any]) -> dict[str, Any]:
+    """``poll()``-shaped data for a completed generation as JSON (a callback body)."""
+    assets = generation.get("assets") or {}
+    return {
+        "id": generation["id"],
+        "state": generation["state"],
+        "video_url": assets.get("video") or "",
+        "thumbnail_url": assets.get("thumbnail") or "",
+    }
+
+
+def _failure(generation_id: str, reason: Any) -> GenerationFailed:
+    return GenerationFailed(f"Luma generation {generation_id} failed: {reason or 'unknown'}")
+
+
+class GenerationPoller:
+    """Polls all watched generations from one scheduler thread and a shared worker pool."""
+
+    def __init__(
+        self,
+        get: Callable[[str], Any],
+        *,
+        cache: GenerationCache | None = None,
+        min_interval: float = LUMA_POLL_MIN_INTERVAL,
+        max_interval: float = LUMA_POLL_MAX_INTERVAL,
+        backoff: float = 1.5,
+        jitter: float = 0.2,
+        render_seconds: dict[str, float] | None = None,
+        timeout: float = 300,
+        sweep_interval: float = LUMA_CALLBACK_SWEEP_INTERVAL,
+        workers: int = LUMA_POLL_WORKERS,
+        write_back: bool = True,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        rng: random.Random | None = None,
+    ) -> None:
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError(f"Need 0 < min_interval <= max_interval, got {min_interval}, {max_interval}")
+        self._get = get
+        self.cache = cache
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.render_seconds = LUMA_RENDER_SECONDS if render_seconds is None else render_seconds
+        self.timeout = timeout
+        self.sweep_interval = sweep_interval
+        self.write_back = write_back
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = PollerStats()
+        self._rng = rng or random.Random()
+        self._workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._watches: dict[str, _Watch] = {}
+        self._due: list[tuple[float, int, _Watch]] = []
+        self._seq = itertools.count()
+        self._in_check = 0
+        self._pushed: OrderedDict[str, dict[str, Any]] = OrderedDict()  # callbacks nobody watched yet
+        self._writes: list[tuple[str, str, int | None]] = []  # generation_id, video_url, creative_id
+        self._first_write_at: float | None = None
+        self._last_error: Exception | None = None
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def __enter__(self) -> "GenerationPoller":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """Generations still being watched."""
+        with self._cond:
+            return len(self._watches)
+
+    def watch(
+        self,
+        generation_id: str,
+        *,
+        model: str = "",
+        started_at: float | None = None,
+        creative_id: int | None = None,
+        timeout: float | None = None,
+        callback: bool = False,
+    ) -> Future[dict[str, Any]]:
+        """Track ``generation_id`` until it finishes. Returns a future of its ``poll()`` data.
+
+        ``started_at`` (``time.monotonic()`` when it was submitted) lets the
+        first check wait for the model's render time; without it the first
+        check is immediate. ``creative_id`` also receives the ``video_url``
+        besides creatives stored with this ``luma_generation_id``. ``callback``
+        says Luma was given a callback URL routed to ``notify``, so polling
+        only sweeps every ``sweep_interval``. Watching a generation already
+        being watched joins the existing future.
+        """
+        now = time.monotonic()
+        deadline = now + (self.timeout if timeout is None else timeout)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("GenerationPoller is closed")
+            watch = self._watches.get(generation_id)
+            pushed = None
+            if watch is None:
+                watch = self._watches[generation_id] = _Watch(
+                    generation_id, model, started_at, now, deadline, Future(), callback=callback,
+                )
+                pushed = self._pushed.pop(generation_id, None)
+                if pushed is None:
+                    self._schedule(watch, now)
+            else:
+                watch.deadline = max(watch.deadline, deadline)
+            if creative_id is not None:
+                watch.creative_ids.add(creative_id)
+            self._ensure_started()
+            self._cond.notify()
+        if pushed is not None:  # the callback beat us here
+            self._apply(watch, pushed)
+        return watch.future
+
+    def notify(self, generation: dict[str, Any]) -> bool:
+        """Apply a generation state Luma pushed (a callback body). True if it settled a watch.
+
+        Only ``completed`` and ``failed`` states count; anything else is
+        ignored and polling carries on. A finished generation nobody watches
+        yet is remembered for the next ``watch`` and, if completed, still
+        written back to its creatives.
+        """
+        generation_id, state = generation.get("id"), generation.get("state")
+        if not generation_id or state not in ("completed", "failed"):
+            return False
+        with self._cond:
+            self.stats.callbacks += 1
+            watch = self._watches.get(generation_id)
+            if watch is None:
+                self._pushed[generation_id] = generation
+                self._pushed.move_to_end(generation_id)
+                while len(self._pushed) > _MAX_PUSHED:
+                    self._pushed.popitem(last=False)
+                if self._closed:
+                    return False
+                self._ensure_started()  # the flush timer runs on the scheduler thread
+        if watch is None:
+            if state == "completed":
+                self._record(_Watch(generation_id, "", None, 0.0, 0.0, Future()), _pushed_result(generation))
+            return False
+        return self._apply(watch, generation)
+
+    def _apply(self, watch: _Watch, generation: dict[str, Any]) -> bool:
+        if generation.get("state") == "completed":
+            return self._complete(watch, _pushed_result(generation))
+        return self._fail(watch, _failure(watch.generation_id, generation.get("failure_reason")))
+
+    def delay(self, watch: _Watch, now: float) -> float:
+        """Seconds until ``watch`` should next be checked (before jitter)."""
+        if watch.callback:
+            return self.sweep_interval
+        if watch.checks == 0:
+            if watch.started_at is None:
+                return 0.0
+            expected = self.render_seconds.get(watch.model, self.render_seconds.get("", 0.0))
+            return min(max(watch.started_at + expected - now, 0.0), self.max_interval)
+        return min(self.min_interval * self.backoff ** (watch.checks - 1), self.max_interval)
+
+    def _schedule(self, watch: _Watch, now: float) -> None:
+        delay = self.delay(watch, now)
+        if delay and self.jitter:
+            delay *= self._rng.uniform(1 - self.jitter, 1 + self.jitter)
+        due = min(now + delay, watch.deadline)
+        heapq.heappush(self._due, (due, next(self._seq), watch))
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._executor = ThreadPoolExecutor(self._workers, thread_name_prefix="luma-poll")
+            self._thread = threading.Thread(target=self._run, name="luma-poller", daemon=True)
+            self._thread.start()
+
+    # ── Scheduler ────────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    if self._due and self._due[0][0] <= now:
+                        break
+                    if self._writes and self._flush_due(now):
+                        break
+                    wake = [self._due[0][0]] if self._due else []
+                    if self._first_write_at is not None:
+                        wake.append(self._first_write_at + self.flush_interval)
+                    self._cond.wait(min(wake) - now if wake else None)
+                ready = []
+                while self._due and self._due[0][0] <= now:
+                    watch = heapq.heappop(self._due)[2]
+                    if not watch.settled:  # else a callback finished it
+                        ready.append(watch)
+                self._in_check += len(ready)
+                flush = bool(self._writes) and self._flush_due(now)
+            for watch in ready:
+                self._executor.submit(self._check, watch)
+            if flush:
+                try:
+                    self.flush()
+                except Exception as exc:
+                    # Writes stay buffered; the next flush retries them
+                    self._last_error = exc
+
+    def _flush_due(self, now: float) -> bool:
+        return (len(self._writes) >= self.batch_size
+                or now - self._first_write_at >= self.flush_interval)
+
+    def _check(self, watch: _Watch) -> None:
+        try:
+            if watch.settled:
+                return  # a callback got here first
+            if watch.future.cancelled():
+                self._settle(watch)
+                return
+            try:
+                with self._cond:
+                    self.stats.polls += 1
+                gen = self._get(watch.generation_id)
+            except Exception as e:  # transient API errors: try again on schedule
+                gen, error = None, e
+            else:
+                error = None
+            if gen is not None and gen.state == "completed":
+                self._complete(watch, result_from_generation(gen))
+                return
+            if gen is not None and gen.state == "failed":
+                self._fail(watch, _failure(watch.generation_id, getattr(gen, "failure_reason", None)))
+                return
+            now = time.monotonic()
+            if now >= watch.deadline:
+                with self._cond:
+                    self.stats.timed_out += 1
+                waited = now - (watch.started_at if watch.started_at is not None else watch.watched_at)
+                message = f"Luma generation {watch.generation_id} timed out after {waited:.0f}s"
+                if error is not None:
+                    message += f" (last error: {error})"
+                self._settle(watch, TimeoutError(message))
+                return
+            watch.checks += 1
+            with self._cond:
+                if not watch.settled:
+                    self._schedule(watch, now)
+        except BaseException as e:
+            self._settle(watch, e)
+        finally:
+            with self._cond:
+                self._in_check -= 1
+                self._cond.notify_all()
+
+    def _complete(self, watch: _Watch, result: dict[str, Any]) -> bool:
+        if not self._claim(watch, "completed"):
+            return False
+        self._record(watch, result)
+        self._resolve(watch, result=result)
+        return True
+
+    def _fail(self, watch: _Watch, error: GenerationFailed) -> bool:
+        if not self._claim(watch, "failed"):
+            return False
+        if self.cache is not None:
+            self.cache.discard(watch.generation_id)
+        self._resolve(watch, error)
+        return True
+
+    def _record(self, watch: _Watch, result: dict[str, Any]) -> None:
+        """Cache the finished video and queue its creatives write-back."""
+        video_url = result["video_url"]
+        if self.cache is not None and video_url:
+            self.cache.complete(watch.generation_id, video_url, result["thumbnail_url"] or "")
+        if self.write_back and video_url:
+            with self._cond:
+                if self._first_write_at is None:
+                    self._first_write_at = time.monotonic()
+                self._writes.append((watch.generation_id, video_url, None))
+                self._writes.extend((watch.generation_id, video_url, c) for c in sorted(watch.creative_ids))
+                self._cond.notify()
+
+    def _claim(self, watch: _Watch, outcome: str = "") -> bool:
+        """Mark ``watch`` finished, counting ``outcome``; False if a poll or callback already did."""
+        with self._cond:
+            if watch.settled:
+                return False
+            watch.settled = True
+            if outcome:
+                setattr(self.stats, outcome, getattr(self.stats, outcome) + 1)
+            if self._watches.get(watch.generation_id) is watch:
+                del self._watches[watch.generation_id]
+            self._cond.notify_all()
+            return True
+
+    def _settle(self, watch: _Watch, error: BaseException | None = None) -> None:
+        if self._claim(watch):
+            self._resolve(watch, error)
+
+    @staticmethod
+    def _resolve(
+        watch: _Watch,
+        error: BaseException | None = None,
+        *,
+        result: dict[str, Any] | None = None,
+    ) -> None:
+        try:
+            if error is not None:
+                watch.future.set_exception(error)
+            else:
+                watch.future.set_result(result)
+        except InvalidStateError:  # cancelled by the caller meanwhile
+            pass
+
+    # ── Write-back ───────────────────────────────────────────────────
+
+    def flush(self) -> int:
+        """Write buffered video URLs to ``creatives`` now. Returns the rows updated."""
+        from dreamtraffic.db import supabase_client
+
+        with self._cond:
+            writes, self._writes = self._writes, []
+            self._first_write_at = None
+        if not writes:
+            return 0
+        try:
+            updated = supabase_client.set_video_urls(writes)
+        except Exception:
+            # Put the batch back in front so nothing is lost
+            with self._cond:
+                self._writes[:0] = writes
+                self._first_write_at = time.monotonic()
+            raise
+        with self._cond:
+            self.stats.written += updated
+            self.stats.flushes += 1
+        return updated
+
+    def drain(self, timeout: float | None = None) -> bool:
+        """Wait until nothing is pending, then flush. Returns False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._watches or self._in_check:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        self.flush()
+        return True
+
+    def close(self) -> None:
+        """Stop polling: pending futures are cancelled and buffered writes flushed."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            watches = list(self._watches.values())
+            self._watches.clear()
+            self._due.clear()
+            self._cond.notify_all()
+        for watch in watches:
+            watch.future.cancel()
+        if self._thread is not None:
+            self._thread.join()
+            self._executor.shutdown(wait=True)
+        self.flush()
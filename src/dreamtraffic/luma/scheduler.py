@@ -0,0 +1,407 @@
+"""LumaScheduler — one process-wide gate in front of the Luma API.
+
+Every ``LumaClient`` and ``AsyncLumaClient`` sends its API requests through
+the shared scheduler (it sits in their HTTP transport), so parallel agents,
+job workers and the poller draw on one request budget instead of each
+bursting into the provider's rate limit::
+
+    with luma_priority(campaign["flight_start"]):
+        gen_id = await client.generate(prompt)   # waits behind earlier flights only
+
+Generation creates (``POST``) and reads (``GET``) take tokens from separate
+buckets refilled at ``create_rate``/``get_rate`` per second up to their burst
+size (rate 0 = unlimited). Requests that have to wait are served in order of
+the flight start of the campaign they are for, earliest first, then those
+without one, first come first served within each. A 429 pauses its bucket for
+the response's ``Retry-After`` (an exponential backoff when absent) and the
+request is sent again after the pause, up to ``max_retries`` times, before
+the 429 reaches the SDK. ``metrics()`` reports queue depth and wait times.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Iterator
+
+import httpx
+
+from dreamtraffic.config import (
+    LUMA_CREATE_BURST,
+    LUMA_CREATE_RATE,
+    LUMA_GET_BURST,
+    LUMA_GET_RATE,
+    LUMA_RATE_LIMIT_RETRIES,
+)
+
+CREATE, GET = "create", "get"
+
+_priority: ContextVar[str | None] = ContextVar("luma_priority", default=None)
+
+
+@contextmanager
+def luma_priority(flight_start: str | date | None) -> Iterator[None]:
+    """Queue the Luma requests made inside the block by ``flight_start`` (ISO date)."""
+    token = _priority.set(str(flight_start) if flight_start else None)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> str | None:
+    return _priority.get()
+
+
+def flight_priority(*, campaign_id: int | None = None, creative_id: int | None = None) -> str | None:
+    """The flight start of the campaign (or the creative's campaign); None if unknown or undated."""
+    from dreamtraffic.db import supabase_client
+
+    if campaign_id is None and creative_id is not None:
+        creative = supabase_client.get_creative(creative_id)
+        campaign_id = creative["campaign_id"] if creative else None
+    if campaign_id is None:
+        return None
+    campaign = supabase_client.get_campaign(campaign_id)
+    return (campaign or {}).get("flight_start") or None
+
+
+class TokenBucket:
+    """``rate`` tokens a second up to ``burst``; a rate of 0 never runs out."""
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate:
+            self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token and return 0, or return the seconds until one is available."""
+        if not self.rate:
+            return 0.0
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def empty(self, now: float) -> None:
+        """Drop saved-up tokens, so a pause is not followed by a burst."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 0.0)
+
+
+@dataclass
+class SchedulerStats:
+    granted: int = 0
+    queued: int = 0  # of those, requests that had to wait
+    wait_seconds: float = 0.0
+    max_wait: float = 0.0
+    max_depth: int = 0
+    rate_limited: int = 0  # 429 responses
+    retried: int = 0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.wait_seconds / self.granted if self.granted else 0.0
+
+
+@dataclass(eq=False)
+class _Waiter:
+    kind: str
+    enqueued_at: float
+    wake: Callable[[], Any]
+    granted: bool = False
+    cancelled: bool = False
+
+
+class LumaScheduler:
+    """Token buckets per request kind, and a priority queue of the requests waiting on them."""
+
+    def __init__(
+        self,
+        *,
+        create_rate: float = LUMA_CREATE_RATE,
+        create_burst: int = LUMA_CREATE_BURST,
+        get_rate: float = LUMA_GET_RATE,
+        get_burst: int = LUMA_GET_BURST,
+        max_retries: int = LUMA_RATE_LIMIT_RETRIES,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.buckets = {CREATE: TokenBucket(create_rate, create_burst), GET: TokenBucket(get_rate, get_burst)}
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stats = {kind: SchedulerStats() for kind in self.buckets}
+        self._queues: dict[str, list[tuple[tuple[int, str], int, _Waiter]]] = {k: [] for k in self.buckets}
+        self._depth = dict.fromkeys(self.buckets, 0)
+        self._paused_until = dict.fromkeys(self.buckets, 0.0)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+
+    def queue_depth(self, kind: str | None = None) -> int:
+        """Requests waiting for a token (of ``kind``, or all)."""
+        with self._cond:
+            return self._depth[kind] if kind else sum(self._depth.values())
+
+    def metrics(self) -> dict[str, dict[str, Any]]:
+        """Per request kind: current depth and pause, plus the counters and wait times so far."""
+        now = time.monotonic()
+        with self._cond:
+            return {
+                kind: {
+                    "depth": self._depth[kind],
+                    "paused_for": round(max(self._paused_until[kind] - now, 0.0), 3),
+                    **asdict(stats),
+                    "mean_wait": stats.mean_wait,
+                }
+                for kind, stats in self.stats.items()
+            }
+
+    # ── Permits ──────────────────────────────────────────────────────
+
+    def acquire(self, kind: str, priority: str | None = None) -> None:
+        """Block until a request of ``kind`` may be sent."""
+        event = threading.Event()
+        waiter = self._take_or_enqueue(kind, priority, event.set)
+        if waiter is None:
+            return
+        try:
+            event.wait()
+        except BaseException:
+            self._cancel(waiter)
+            raise
+
+    async def acquire_async(self, kind: str, priority: str | None = None) -> None:
+        """``acquire`` without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        waiter = self._take_or_enqueue(kind, priority, wake)
+        if waiter is None:
+            return
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._cancel(waiter)
+            raise
+
+    def rate_limited(
+        self, kind: str, retry_after: float | None, attempt: int = 0, *, retrying: bool = False,
+    ) -> float:
+        """Pause ``kind`` after a 429: for ``retry_after`` seconds, else a backoff. Returns the pause.
+
+        ``retrying`` counts the request as retried once the pause is over.
+        """
+        delay = retry_after if retry_after is not None else min(self.backoff * 2 ** attempt, self.max_backoff)
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until[kind] = max(self._paused_until[kind], now + delay)
+            self.buckets[kind].empty(now)
+            self.stats[kind].rate_limited += 1
+            self.stats[kind].retried += retrying
+            self._cond.notify()
+        return delay
+
+    def _take_or_enqueue(self, kind: str, priority: str | None, wake: Callable[[], Any]) -> _Waiter | None:
+        now = time.monotonic()
+        with self._cond:
+            if self._closed or (
+                not self._depth[kind] and now >= self._paused_until[kind] and not self.buckets[kind].take(now)
+            ):
+                self._record(kind, 0.0)
+                return None
+            waiter = _Waiter(kind, now, wake)
+            key = (0, priority) if priority else (1, "")
+            heapq.heappush(self._queues[kind], (key, next(self._seq), waiter))
+            self._depth[kind] += 1
+            stats = self.stats[kind]
+            stats.max_depth = max(stats.max_depth, self._depth[kind])
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="luma-scheduler", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return waiter
+
+    def _cancel(self, waiter: _Waiter) -> None:
+        with self._cond:
+            if not waiter.granted and not waiter.cancelled:
+                waiter.cancelled = True
+                self._depth[waiter.kind] -= 1
+
+    def _record(self, kind: str, waited: float) -> None:
+        stats = self.stats[kind]
+        stats.granted += 1
+        if waited:
+            stats.queued += 1
+            stats.wait_seconds += waited
+            stats.max_wait = max(stats.max_wait, waited)
+
+    def _grant(self, waiter: _Waiter, now: float) -> None:
+        waiter.granted = True
+        self._depth[waiter.kind] -= 1
+        self._record(waiter.kind, now - waiter.enqueued_at)
+        try:
+            waiter.wake()
+        except RuntimeError:  # its event loop has closed
+            pass
+
+    # ── Dispatcher ───────────────────────────────────────────────────
+
+    def _run(self) -> None:
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                wake_at = None
+                for kind, queue in self._queues.items():
+                    while queue:
+                        waiter = queue[0][2]
+                        if waiter.cancelled:
+                            heapq.heappop(queue)
+                            continue
+                        ready_at = self._paused_until[kind]
+                        if now >= ready_at:
+                            wait = self.buckets[kind].take(now)
+                            if not wait:
+                                heapq.heappop(queue)
+                                self._grant(waiter, now)
+                                continue
+                            ready_at = now + wait
+                        wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+                        break
+                self._cond.wait(None if wake_at is None else wake_at - now)
+
+    def close(self) -> None:
+        """Stop the dispatcher; waiting requests are let through unthrottled."""
+        with self._cond:
+            self._closed = True
+            now = time.monotonic()
+            for queue in self._queues.values():
+                while queue:
+                    waiter = heapq.heappop(queue)[2]
+                    if not waiter.cancelled:
+                        self._grant(waiter, now)
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+# ── HTTP transports ──────────────────────────────────────────────────
+
+def request_kind(request: httpx.Request) -> str:
+    return CREATE if request.method == "POST" else GET
+
+
+def retry_after(response: httpx.Response) -> float | None:
+    """Seconds from a ``Retry-After`` header (delta-seconds or HTTP-date); None if absent."""
+    value = response.headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class SchedulingTransport(httpx.BaseTransport):
+    """Sends each request once the scheduler allows it; retries 429s after their pause."""
+
+    def __init__(self, scheduler: LumaScheduler | None = None, transport: httpx.BaseTransport | None = None) -> None:
+        self.scheduler = scheduler or luma_scheduler()
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        kind, priority = request_kind(request), current_priority()
+        attempt = 0
+        while True:
+            self.scheduler.acquire(kind, priority)
+            response = self.transport.handle_request(request)
+            if response.status_code != 429 or attempt >= self.scheduler.max_retries:
+                return response
+            response.close()
+            self.scheduler.rate_limited(kind, retry_after(response), attempt, retrying=True)
+            attempt += 1
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncSchedulingTransport(httpx.AsyncBaseTransport):
+    """``SchedulingTransport`` for ``httpx.AsyncClient``."""
+
+    def __init__(
+        self, scheduler: LumaScheduler | None = None, transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.scheduler = scheduler or luma_scheduler()
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        kind, priority = request_kind(request), current_priority()
+        attempt = 0
+        while True:
+            await self.scheduler.acquire_async(kind, priority)
+            response = await self.transport.handle_async_request(request)
+            if response.status_code != 429 or attempt >= self.scheduler.max_retries:
+                return response
+            await response.aclose()
+            self.scheduler.rate_limited(kind, retry_after(response), attempt, retrying=True)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+# ── Process-wide scheduler ───────────────────────────────────────────
+
+_scheduler: LumaScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def luma_scheduler() -> LumaScheduler:
+    """The scheduler every Luma client in this process shares (configured from the environment)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LumaScheduler()
+        return _scheduler
+
+
+def configure_scheduler(scheduler: LumaScheduler | None = None, **options: Any) -> LumaScheduler:
+    """Replace the shared scheduler (with ``scheduler``, or a new one built from ``options``).
+
+    Clients created afterwards use it. The previous one is closed, so clients
+    still holding it send unthrottled.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        previous, _scheduler = _scheduler, scheduler or LumaScheduler(**options)
+    if previous is not None:
+        previous.close()
+    return _scheduler
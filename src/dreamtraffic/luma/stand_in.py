@@ -0,0 +1,240 @@
+"""Local HTTP server speaking the slice of the Luma Dream Machine API the clients use.
+
+Lets ``LumaClient``/``AsyncLumaClient`` be exercised and load-tested without
+the network or paid generations::
+
+    with LumaStandIn(render_seconds=2.0) as luma:
+        client = AsyncLumaClient(api_key="test", base_url=luma.url)
+
+Supported: ``POST /generations`` (and ``/generations/video``) and
+``GET /generations/{id}``. A generation reports ``dreaming`` until
+``render_seconds`` after it was created — a number, or a function of the
+request body — then ``completed`` with an asset URL under ``asset_base`` (e.g. a
+``MediaStandIn`` serving the videos). Prompts listed in
+``failures`` end ``failed`` with that reason instead. ``fail_next()``
+injects error responses for retry testing; ``rate_limits`` (method ->
+requests per second) answers requests over the limit with 429 and a
+``Retry-After`` until the next one-second window, like the real API.
+
+A generation created with a ``callback_url`` is POSTed there, as Luma does,
+``callback_delay`` seconds after it finishes; set ``send_callbacks = False``
+to simulate callbacks that never arrive.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+API_PREFIX = "/dream-machine/v1"
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # batches open many connections at once; 5 drops SYNs
+
+
+class LumaStandIn:
+    """Threaded stand-in for ``https://api.lumalabs.ai/dream-machine/v1``."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        render_seconds: float | Callable[[dict[str, Any]], float] = 0.0,
+        latency: float = 0.0,
+        asset_base: str | None = None,
+        callback_delay: float = 0.0,
+    ) -> None:
+        self.render_seconds = render_seconds
+        self.latency = latency
+        self.asset_base = asset_base  # where completed videos point; defaults to this server
+        self.callback_delay = callback_delay
+        self.send_callbacks = True
+        self.callbacks: dict[str, int] = {"sent": 0, "failed": 0, "dropped": 0}
+        self._timers: set[threading.Timer] = set()
+        self.failures: dict[str, str] = {}  # prompt -> failure_reason
+        self.rate_limits: dict[str, float] = {}  # method -> requests per second
+        self.rate_limited = 0
+        self._windows: dict[str, tuple[float, int]] = {}  # method -> (window start, requests)
+        self.generations: dict[str, dict[str, Any]] = {}
+        self.requests: dict[str, int] = {}
+        self._ready_at: dict[str, float] = {}
+        self._errors: list[tuple[int, dict[str, str]]] = []
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL for the SDK (``base_url=``)."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "LumaStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            timers, self._timers = self._timers, set()
+        for timer in timers:
+            timer.cancel()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "LumaStandIn":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def fail_next(self, count: int = 1, status: int = 503, *, retry_after: float | None = None) -> None:
+        """Answer the next ``count`` requests with ``status`` (and ``Retry-After``, if given)."""
+        headers = {} if retry_after is None else {"Retry-After": f"{retry_after:g}"}
+        with self._lock:
+            self._errors.extend([(status, headers)] * count)
+
+    @property
+    def created(self) -> int:
+        """Generations started (each one would have been paid for)."""
+        return len(self.generations)
+
+    # ── Generations ──────────────────────────────────────────────────
+
+    def _create(self, body: dict[str, Any]) -> dict[str, Any]:
+        generation_id = str(uuid.uuid4())
+        render = self.render_seconds(body) if callable(self.render_seconds) else self.render_seconds
+        self._ready_at[generation_id] = time.monotonic() + render
+        self.generations[generation_id] = generation = {
+            "id": generation_id,
+            "generation_type": "video",
+            "state": "queued",
+            "failure_reason": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "assets": None,
+            "model": body.get("model"),
+            "request": body,
+        }
+        if body.get("callback_url"):
+            timer = threading.Timer(render + self.callback_delay, self._callback, (generation_id,))
+            timer.daemon = True
+            self._timers.add(timer)
+            timer.start()
+        return generation
+
+    def _callback(self, generation_id: str) -> None:
+        """POST the finished generation to its ``callback_url``."""
+        with self._lock:
+            self._timers.discard(threading.current_thread())
+            if not self.send_callbacks:
+                self.callbacks["dropped"] += 1
+                return
+            generation = json.loads(json.dumps(self._advance(self.generations[generation_id])))
+        try:
+            httpx.post(generation["request"]["callback_url"], json=generation, timeout=5).raise_for_status()
+        except httpx.HTTPError:
+            key = "failed"
+        else:
+            key = "sent"
+        with self._lock:
+            self.callbacks[key] += 1
+
+    def _advance(self, generation: dict[str, Any]) -> dict[str, Any]:
+        if generation["state"] in ("completed", "failed"):
+            return generation
+        if time.monotonic() < self._ready_at[generation["id"]]:
+            generation["state"] = "dreaming"
+            return generation
+        reason = self.failures.get(generation["request"].get("prompt", ""))
+        if reason is not None:
+            generation.update(state="failed", failure_reason=reason)
+        else:
+            base = self.asset_base or self.url.removesuffix(API_PREFIX)
+            generation.update(state="completed", assets={
+                "video": f"{base}/assets/{generation['id']}.mp4",
+                "image": f"{base}/assets/{generation['id']}.jpg",
+            })
+        return generation
+
+    def _over_limit(self, method: str) -> float | None:
+        """Seconds until ``method`` may be sent again, or None if this request is within the limit."""
+        limit = self.rate_limits.get(method)
+        if not limit:
+            return None
+        now = time.monotonic()
+        start, count = self._windows.get(method, (now, 0))
+        if now - start >= 1.0:
+            start, count = now, 0
+        if count >= limit:
+            return start + 1.0 - now
+        self._windows[method] = (start, count + 1)
+        return None
+
+    def handle(self, method: str, path: str, body: Any) -> tuple[int, Any] | tuple[int, Any, dict[str, str]]:
+        """Answer one API call: ``(status, json)``, plus response headers when there are any."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.requests[method] = self.requests.get(method, 0) + 1
+            if self._errors:
+                status, headers = self._errors.pop(0)
+                return status, {"detail": "injected failure"}, headers
+            wait = self._over_limit(method)
+            if wait is not None:
+                self.rate_limited += 1
+                return 429, {"detail": "Too many requests"}, {"Retry-After": f"{wait:.3f}"}
+            if not path.startswith(API_PREFIX + "/generations"):
+                return 404, {"detail": "Not Found"}
+            rest = path[len(API_PREFIX + "/generations"):].strip("/")
+
+            if method == "POST" and rest in ("", "video"):
+                return 201, self._create(body or {})
+            if method == "GET" and rest:
+                generation = self.generations.get(rest)
+                if generation is None:
+                    return 404, {"detail": "Generation not found"}
+                return 200, self._advance(generation)
+            return 405, {"detail": f"method {method} not supported"}
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True  # headers and body go out as separate writes
+
+            def _dispatch(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                status, payload, *headers = stand_in.handle(self.command, urlsplit(self.path).path, body)
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in (headers[0] if headers else {}).items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = _dispatch
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,226 @@
+"""Worker pool that runs queued generation jobs to completion (``dreamtraffic worker``).
+
+Each worker thread claims a job from the ``JobQueue`` and carries it as far
+as it can: submit the generation, wait on the client's shared poller, fetch
+the finished video through the asset store, probe it into the creative, and
+mark the job done. The job's state is saved after every step, so whichever
+worker claims it next (in this process or after a restart) continues from
+there::
+
+    with LumaClient() as client, GenerationWorkers(client, workers=4) as workers:
+        workers.wait_idle()      # or run() to serve until stopped
+
+Luma requests for a job queue in the shared ``LumaScheduler`` by its
+campaign's flight start. One heartbeat thread keeps every lease the pool
+holds alive. On start the
+pool frees leases left by dead workers; jobs Luma failed are retried as new
+generations, other errors resume the same step after a backoff.
+"""
+
+from __future__ import annotations
+
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from typing import Any
+
+from dreamtraffic.config import LUMA_JOB_WORKERS
+from dreamtraffic.db import supabase_client
+from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.jobs import Job, JobQueue, JobState, LeaseLost
+from dreamtraffic.luma.poller import GenerationFailed
+from dreamtraffic.luma.scheduler import flight_priority, luma_priority
+from dreamtraffic.media.assets import asset_store
+from dreamtraffic.media.probe import ProbeError, probe
+
+
+@dataclass
+class WorkerStats:
+    claimed: int = 0
+    submitted: int = 0  # new generations started
+    resumed: int = 0  # claimed with a generation already in flight
+    done: int = 0
+    retried: int = 0
+    failed: int = 0
+    reclaimed: int = 0  # expired leases freed at start
+    adopted: int = 0  # orphaned creatives queued at start
+
+
+class _Stopped(Exception):
+    pass
+
+
+class GenerationWorkers:
+    """``workers`` threads draining a ``JobQueue`` through one ``LumaClient``."""
+
+    def __init__(
+        self,
+        client: LumaClient,
+        queue: JobQueue | None = None,
+        *,
+        workers: int = LUMA_JOB_WORKERS,
+        poll_timeout: float = 900,
+        idle_interval: float = 1.0,
+        adopt_orphans: bool = False,
+        owner: str | None = None,
+    ) -> None:
+        self.client = client
+        self.queue = queue or JobQueue()
+        self.workers = workers
+        self.poll_timeout = poll_timeout
+        self.idle_interval = idle_interval
+        self.adopt_orphans = adopt_orphans
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.stats = WorkerStats()
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._last_error: BaseException | None = None
+
+    def __enter__(self) -> "GenerationWorkers":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def start(self) -> "GenerationWorkers":
+        """Free expired leases, optionally adopt orphaned generations, and start the threads."""
+        self._count("reclaimed", self.queue.reclaim())
+        if self.adopt_orphans:
+            self._count("adopted", len(self.queue.adopt_orphans()))
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"luma-job-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._heartbeat, name="luma-job-heartbeat", daemon=True))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop claiming, give in-progress jobs back to the queue, and join the threads."""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def run(self) -> None:
+        """Serve jobs until ``stop`` (or Ctrl-C) — the ``worker`` command's loop."""
+        self.start()
+        try:
+            while not self._stop.wait(0.5):
+                pass
+        finally:
+            self.stop()
+
+    def wait_idle(self, timeout: float | None = None, *, interval: float = 0.05) -> bool:
+        """Block until no unfinished job remains in the queue. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.queue.unfinished():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+
+    def _count(self, outcome: str, n: int = 1) -> None:
+        with self._stats_lock:
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + n)
+
+    # ── Threads ──────────────────────────────────────────────────────
+
+    def _heartbeat(self) -> None:
+        interval = self.queue.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                self.queue.heartbeat(self.owner)
+            except Exception as e:  # database busy: the next beat is still inside the lease
+                self._last_error = e
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                job = self.queue.claim(self.owner)
+            except Exception as e:
+                self._last_error = e
+                job = None
+            if job is None:
+                self._stop.wait(self.idle_interval)
+                continue
+            self._count("claimed")
+            try:
+                priority = flight_priority(creative_id=job.creative_id)
+            except Exception as e:  # unknown flight: queue it behind dated work
+                self._last_error, priority = e, None
+            with luma_priority(priority):
+                self._process(job)
+
+    def _process(self, job: Job) -> None:
+        owner = self.owner
+        try:
+            if job.attempts >= job.max_attempts:
+                self.queue.fail(job, owner, job.error or "abandoned: attempts used up by lost workers")
+                self._count("failed")
+                return
+            if job.state == JobState.QUEUED.value:
+                generation_id = self.client.generate(job.prompt, **job.params)
+                job = self.queue.advance(job, owner, JobState.SUBMITTED, generation_id=generation_id)
+                self._count("submitted")
+            elif job.state in (JobState.SUBMITTED.value, JobState.POLLING.value):
+                self._count("resumed")
+            if job.state in (JobState.SUBMITTED.value, JobState.POLLING.value):
+                job = self.queue.advance(job, owner, JobState.POLLING)
+                result = self.client.cached_result(job.generation_id) or self._wait(
+                    self.client.watch(job.generation_id, creative_id=job.creative_id, timeout=self.poll_timeout)
+                )
+                job = self.queue.advance(job, owner, JobState.DOWNLOADING, video_url=result["video_url"])
+            self._download(job, owner)
+            self._count("done")
+        except LeaseLost:
+            pass  # another worker has it now
+        except _Stopped:
+            self._give_back(job)
+        except GenerationFailed as e:
+            self._retry(job, str(e), restart=True)
+        except Exception as e:
+            self._last_error = e
+            self._retry(job, f"{type(e).__name__}: {e}")
+
+    def _wait(self, future: Future[dict]) -> dict:
+        while not self._stop.is_set():
+            if wait([future], timeout=0.25).done:
+                return future.result()
+        future.cancel()
+        raise _Stopped()
+
+    def _download(self, job: Job, owner: str) -> None:
+        """Fetch the video into the asset store, fill in the creative, and finish the job."""
+        asset = asset_store().fetch(job.video_url, creative_id=job.creative_id)
+        if job.creative_id is not None:
+            fields: dict[str, Any] = {"video_url": job.video_url}
+            try:
+                fields.update(probe(asset.path).creative_fields())
+            except ProbeError:
+                pass  # not an MP4 we can read: keep the requested values
+            supabase_client.update_creative(job.creative_id, **fields)
+        self.queue.complete(job, owner, asset_sha256=asset.sha256)
+
+    def _retry(self, job: Job, error: str, *, restart: bool = False) -> None:
+        try:
+            job = self.queue.retry(self.queue.get(job.id) or job, self.owner, error, restart=restart)
+        except LeaseLost:
+            return
+        if job.state == JobState.FAILED.value:
+            self._count("failed")
+        else:
+            self._count("retried")
+
+    def _give_back(self, job: Job) -> None:
+        try:
+            self.queue.release(job, self.owner)
+        except LeaseLost:
+            pass
@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 
-from dreamtraffic.db import fetch_all
+from dreamtraffic.db.reference import reference_data
 
 
 @dataclass
@@ -77,21 +77,19 @@ class FeeStackCalculator:
 
     def calculate_all_paths(self) -> list[FeeBreakdown]:
         """Calculate fee breakdowns for all supply paths in the database."""
-        paths = fetch_all("SELECT * FROM supply_paths ORDER BY dsp, ssp")
-        results = []
-        for p in paths:
-            fb = self.calculate_path(
-                dsp_fee_pct=p["dsp_fee_pct"],
-                exchange_fee_pct=p["exchange_fee_pct"],
-                ssp_fee_pct=p["ssp_fee_pct"],
-                measurement_cpm=p["measurement_cpm"],
-                dsp=p["dsp"],
-                exchange=p["exchange"],
-                ssp=p["ssp"],
-                notes=p["notes"],
+        return [
+            self.calculate_path(
+                dsp_fee_pct=p.dsp_fee_pct,
+                exchange_fee_pct=p.exchange_fee_pct,
+                ssp_fee_pct=p.ssp_fee_pct,
+                measurement_cpm=p.measurement_cpm,
+                dsp=p.dsp,
+                exchange=p.exchange,
+                ssp=p.ssp,
+                notes=p.notes,
             )
-            results.append(fb)
-        return results
+            for p in reference_data().supply_paths
+        ]
 
     def compare_dsps(self) -> dict[str, dict]:
         """Compare average fee stacks by DSP. Returns dict keyed by DSP name."""
@@ -1,12 +1,182 @@
-"""VAST 4.2 XML generator with InLine, Wrapper, and AdVerification support."""
+"""VAST 4.2 XML generator with InLine, Wrapper, and AdVerification support.
+
+Tags are rendered from string templates compiled once per layout: the tag
+skeleton with every constant already escaped and ``{slots}`` for the
+per-request values, which are escaped as they are filled in. Each
+measurement vendor combination's AdVerifications block is rendered once and
+reused. ``pretty`` output (the default) is indented two spaces per level;
+``VastGenerator(pretty=False)`` emits the same document without whitespace
+between elements, for the serving path::
+
+    xml = VastGenerator(pretty=False).generate_inline(video_url=url, vendors=["ias"])
+"""
 
 from __future__ import annotations
 
 import uuid
-from xml.etree.ElementTree import Element, SubElement, tostring
-from xml.dom.minidom import parseString
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any
+
+from dreamtraffic.measurement.vendors import VENDORS, VendorConfig
+
+VAST_NS = "http://www.iab.com/VAST"
+_WRAPPER_EVENTS = ("start", "firstQuartile", "midpoint", "thirdQuartile", "complete")
+
+
+def media_file_params(creative: dict[str, Any]) -> dict[str, Any]:
+    """MediaFile keyword arguments for ``generate_inline`` from a creatives row.
+
+    Unprobed creatives (no codec or bitrate yet) keep the generator defaults.
+    """
+    params: dict[str, Any] = {"width": creative["width"], "height": creative["height"]}
+    if creative.get("codec"):
+        params["codec"] = creative["codec"]
+    if creative.get("bitrate_kbps"):
+        params["bitrate"] = creative["bitrate_kbps"]
+    return params
+
+
+def _escape(value: Any) -> str:
+    """Escape text or an attribute value (the same four characters minidom escapes)."""
+    return (str(value).replace("&", "&amp;").replace("<", "&lt;")
+            .replace('"', "&quot;").replace(">", "&gt;"))
+
+
+# ── Template compiler ────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class _Slot:
+    """A per-request value; inside ``children``, markup rendered elsewhere."""
+    name: str
+
+
+@dataclass(frozen=True)
+class _Node:
+    tag: str
+    attrs: tuple[tuple[str, Any], ...] = ()  # value: str, _Slot, or a tuple of both
+    text: Any = None
+    children: tuple[Any, ...] = ()
+
+
+def _n(tag: str, *children: Any, text: Any = None, **attrs: Any) -> _Node:
+    return _Node(tag, tuple(attrs.items()), text, children)
+
+
+def _parts(value: Any) -> str:
+    parts = value if isinstance(value, tuple) else (value,)
+    return "".join(
+        f"{{{p.name}}}" if isinstance(p, _Slot) else _escape(p).replace("{", "{{").replace("}", "}}")
+        for p in parts
+    )
 
-from dreamtraffic.measurement.vendors import VendorConfig, VENDORS
+
+def _compile(node: _Node, pretty: bool, empty: frozenset[str] = frozenset(), depth: int = 0) -> str:
+    """``str.format`` template for ``node``, laid out as minidom's ``toprettyxml`` would.
+
+    Elements whose only text is a slot named in ``empty`` are written
+    self-closing, as they are when the value is blank.
+    """
+    lead = ("\n" if depth else "") + "  " * depth if pretty else ""
+    attrs = "".join(f' {name}="{_parts(value)}"' for name, value in node.attrs)
+    text = node.text
+    if isinstance(text, _Slot) and text.name in empty:
+        text = None
+    if text is not None:
+        return f"{lead}<{node.tag}{attrs}>{_parts(text)}</{node.tag}>"
+    if not node.children:
+        return f"{lead}<{node.tag}{attrs}/>"
+    inner = "".join(
+        f"{{{child.name}}}" if isinstance(child, _Slot) else _compile(child, pretty, empty, depth + 1)
+        for child in node.children
+    )
+    close = "\n" + "  " * depth if pretty else ""
+    return f"{lead}<{node.tag}{attrs}>{inner}{close}</{node.tag}>"
+
+
+@lru_cache(maxsize=64)
+def _verifications(vendor_keys: tuple[str, ...], pretty: bool, depth: int) -> str:
+    """The rendered AdVerifications block for these vendors ("" for none)."""
+    if not vendor_keys:
+        return ""
+    block = _n("AdVerifications", *(_verification(VENDORS[key]) for key in vendor_keys))
+    return _compile(block, pretty, depth=depth).format()
+
+
+def _verification(vendor: VendorConfig) -> _Node:
+    """An OMID-compliant AdVerification element."""
+    return _n(
+        "Verification",
+        _n("JavaScriptResource", text=vendor.js_url, apiFramework="omid", browserOptional="true"),
+        _n("TrackingEvents", _n(
+            "Tracking", event="verificationNotExecuted",
+            text=f"{vendor.verification_url}/verify-not-executed?vendor={vendor.key}&reason=[REASON]",
+        )),
+        _n("VerificationParameters",
+           text=f'{{"partner":"{vendor.omid_partner}","vendorKey":"{vendor.vendor_key}"}}'),
+        vendor=vendor.vendor_key,
+    )
+
+
+def _inline(cache_buster: str, timestamp: str, events: tuple[str, ...]) -> _Node:
+    ad = _Slot("ad_id")
+    return _n("VAST", _n("Ad", _n(
+        "InLine",
+        _n("AdSystem", text="DreamTraffic"),
+        _n("AdTitle", text=_Slot("title")),
+        _n("Advertiser", text=_Slot("advertiser")),
+        _n("Impression", id="dt-imp",
+           text=("https://track.dreamtraffic.demo/impression?id=", ad, f"&cb={cache_buster}")),
+        _Slot("verifications"),
+        _n("Creatives", _n("Creative", _n(
+            "Linear",
+            _n("Duration", text=_Slot("duration")),
+            _n("MediaFiles", _n(
+                "MediaFile", delivery="progressive", type="video/mp4", width=_Slot("width"),
+                height=_Slot("height"), codec=_Slot("codec"), bitrate=_Slot("bitrate"), text=_Slot("video_url"),
+            )),
+            _n("TrackingEvents", *(
+                _n("Tracking", event=event, text=(
+                    f"https://track.dreamtraffic.demo/{event}?id=", ad, f"&cb={cache_buster}&ts={timestamp}",
+                ))
+                for event in events
+            )),
+            _n("VideoClicks",
+               _n("ClickThrough", id="dt-click", text=_Slot("click_through")),
+               _n("ClickTracking", id="dt-click-track",
+                  text=("https://track.dreamtraffic.demo/click?id=", ad, f"&cb={cache_buster}"))),
+        ), id=("creative-", ad), adId=ad)),
+    ), id=ad), version="4.2", xmlns=VAST_NS)
+
+
+def _wrapper(cache_buster: str, events: tuple[str, ...]) -> _Node:
+    ad = _Slot("ad_id")
+    return _n("VAST", _n("Ad", _n(
+        "Wrapper",
+        _n("AdSystem", text="DreamTraffic Wrapper"),
+        _n("VASTAdTagURI", text=_Slot("vast_ad_tag_uri")),
+        _n("Impression", id="dt-wrapper-imp",
+           text=("https://track.dreamtraffic.demo/wrapper-impression?id=", ad, f"&cb={cache_buster}")),
+        _Slot("verifications"),
+        _n("Creatives", _n("Creative", _n("Linear", _n("TrackingEvents", *(
+            _n("Tracking", event=event,
+               text=(f"https://track.dreamtraffic.demo/wrapper-{event}?id=", ad, f"&cb={cache_buster}"))
+            for event in events
+        ))))),
+    ), id=ad), version="4.2", xmlns=VAST_NS)
+
+
+_TEXT_SLOTS = {
+    "inline": ("title", "advertiser", "duration", "video_url", "click_through"),
+    "wrapper": ("vast_ad_tag_uri",),
+}
+
+
+@lru_cache(maxsize=128)
+def _template(kind: str, pretty: bool, cache_buster: str, timestamp: str,
+              events: tuple[str, ...], empty: frozenset[str]) -> str:
+    tree = _inline(cache_buster, timestamp, events) if kind == "inline" else _wrapper(cache_buster, _WRAPPER_EVENTS)
+    return _compile(tree, pretty, empty)
 
 
 class VastGenerator:
@@ -18,7 +188,8 @@ class VastGenerator:
         "fullscreen", "exitFullscreen", "skip",
     ]
 
-    def __init__(self) -> None:
+    def __init__(self, pretty: bool = True) -> None:
+        self.pretty = pretty
         self._cache_buster = "[CACHEBUSTING]"
         self._timestamp = "[TIMESTAMP]"
 
@@ -32,64 +203,29 @@ class VastGenerator:
         vendors: list[str] | None = None,
         click_through: str = "https://lumalabs.ai",
         ad_id: str | None = None,
+        width: int = 1920,
+        height: int = 1080,
+        codec: str = "H.264",
+        bitrate: int = 5000,
     ) -> str:
-        """Generate a VAST 4.2 InLine tag with AdVerification elements."""
-        ad_id = ad_id or f"dt-{uuid.uuid4().hex[:12]}"
-        vendor_configs = self._resolve_vendors(vendors)
-
-        vast = Element("VAST", version="4.2")
-        ad = SubElement(vast, "Ad", id=ad_id)
-        inline = SubElement(ad, "InLine")
-
-        SubElement(inline, "AdSystem").text = "DreamTraffic"
-        SubElement(inline, "AdTitle").text = title
-        SubElement(inline, "Advertiser").text = advertiser
-
-        impression = SubElement(inline, "Impression", id="dt-imp")
-        impression.text = f"https://track.dreamtraffic.demo/impression?id={ad_id}&cb={self._cache_buster}"
-
-        # AdVerification — OMID-compliant elements for each measurement vendor
-        if vendor_configs:
-            verifications = SubElement(inline, "AdVerifications")
-            for vc in vendor_configs:
-                self._add_verification(verifications, vc)
-
-        # Creatives
-        creatives = SubElement(inline, "Creatives")
-        creative = SubElement(creatives, "Creative", id=f"creative-{ad_id}", adId=ad_id)
-        linear = SubElement(creative, "Linear")
-        SubElement(linear, "Duration").text = duration
-
-        # MediaFiles
-        media_files = SubElement(linear, "MediaFiles")
-        mf = SubElement(
-            media_files, "MediaFile",
-            delivery="progressive",
-            type="video/mp4",
-            width="1920",
-            height="1080",
-            codec="H.264",
-            bitrate="5000",
-        )
-        mf.text = video_url
-
-        # TrackingEvents
-        tracking_events = SubElement(linear, "TrackingEvents")
-        for event in self.TRACKING_EVENTS:
-            te = SubElement(tracking_events, "Tracking", event=event)
-            te.text = (
-                f"https://track.dreamtraffic.demo/{event}"
-                f"?id={ad_id}&cb={self._cache_buster}&ts={self._timestamp}"
-            )
-
-        # VideoClicks
-        video_clicks = SubElement(linear, "VideoClicks")
-        ct = SubElement(video_clicks, "ClickThrough", id="dt-click")
-        ct.text = click_through
-        click_track = SubElement(video_clicks, "ClickTracking", id="dt-click-track")
-        click_track.text = f"https://track.dreamtraffic.demo/click?id={ad_id}&cb={self._cache_buster}"
-
-        return self._prettify(vast)
+        """Generate a VAST 4.2 InLine tag with AdVerification elements.
+
+        ``width``, ``height``, ``codec`` and ``bitrate`` (kbps) describe the
+        MediaFile; pass ``media_file_params(creative)`` for a probed creative.
+        """
+        values = {
+            "ad_id": _escape(ad_id or f"dt-{uuid.uuid4().hex[:12]}"),
+            "title": _escape(title),
+            "advertiser": _escape(advertiser),
+            "duration": _escape(duration),
+            "video_url": _escape(video_url),
+            "click_through": _escape(click_through),
+            "width": _escape(width),
+            "height": _escape(height),
+            "codec": _escape(codec),
+            "bitrate": _escape(bitrate),
+        }
+        return self._render("inline", values, vendors)
 
     def generate_wrapper(
         self,
@@ -99,80 +235,24 @@ class VastGenerator:
         ad_id: str | None = None,
     ) -> str:
         """Generate a VAST 4.2 Wrapper tag that references another VAST tag."""
-        ad_id = ad_id or f"dt-wrapper-{uuid.uuid4().hex[:8]}"
-        vendor_configs = self._resolve_vendors(vendors)
-
-        vast = Element("VAST", version="4.2")
-        ad = SubElement(vast, "Ad", id=ad_id)
-        wrapper = SubElement(ad, "Wrapper")
-
-        SubElement(wrapper, "AdSystem").text = "DreamTraffic Wrapper"
-
-        tag_uri = SubElement(wrapper, "VASTAdTagURI")
-        tag_uri.text = vast_ad_tag_uri
-
-        impression = SubElement(wrapper, "Impression", id="dt-wrapper-imp")
-        impression.text = f"https://track.dreamtraffic.demo/wrapper-impression?id={ad_id}&cb={self._cache_buster}"
-
-        if vendor_configs:
-            verifications = SubElement(wrapper, "AdVerifications")
-            for vc in vendor_configs:
-                self._add_verification(verifications, vc)
-
-        # Wrapper tracking events
-        creatives = SubElement(wrapper, "Creatives")
-        creative = SubElement(creatives, "Creative")
-        linear = SubElement(creative, "Linear")
-        tracking_events = SubElement(linear, "TrackingEvents")
-        for event in ["start", "firstQuartile", "midpoint", "thirdQuartile", "complete"]:
-            te = SubElement(tracking_events, "Tracking", event=event)
-            te.text = (
-                f"https://track.dreamtraffic.demo/wrapper-{event}"
-                f"?id={ad_id}&cb={self._cache_buster}"
-            )
-
-        return self._prettify(vast)
-
-    def _add_verification(self, parent: Element, vendor: VendorConfig) -> None:
-        """Add an OMID-compliant AdVerification element."""
-        verification = SubElement(parent, "Verification", vendor=vendor.vendor_key)
-
-        js_resource = SubElement(
-            verification, "JavaScriptResource",
-            apiFramework="omid",
-            browserOptional="true",
-        )
-        js_resource.text = vendor.js_url
-
-        tracking = SubElement(verification, "TrackingEvents")
-        ve = SubElement(tracking, "Tracking", event="verificationNotExecuted")
-        ve.text = (
-            f"{vendor.verification_url}/verify-not-executed"
-            f"?vendor={vendor.key}&reason=[REASON]"
-        )
-
-        vp = SubElement(verification, "VerificationParameters")
-        vp.text = f'{{"partner":"{vendor.omid_partner}","vendorKey":"{vendor.vendor_key}"}}'
+        values = {
+            "ad_id": _escape(ad_id or f"dt-wrapper-{uuid.uuid4().hex[:8]}"),
+            "vast_ad_tag_uri": _escape(vast_ad_tag_uri),
+        }
+        return self._render("wrapper", values, vendors)
+
+    def _render(self, kind: str, values: dict[str, str], vendors: list[str] | None) -> str:
+        """Fill the compiled template for ``kind`` with escaped ``values``."""
+        empty = frozenset(name for name in _TEXT_SLOTS[kind] if not values[name])
+        template = _template(kind, self.pretty, self._cache_buster, self._timestamp,
+                             tuple(self.TRACKING_EVENTS), empty)
+        vendor_keys = tuple(vc.key for vc in self._resolve_vendors(vendors))
+        # AdVerifications sits directly under InLine / Wrapper
+        values["verifications"] = _verifications(vendor_keys, self.pretty, 3)
+        return template.format_map(values)
 
     def _resolve_vendors(self, vendor_keys: list[str] | None) -> list[VendorConfig]:
         """Resolve vendor keys to configs. Default: all vendors."""
         if vendor_keys is None:
             return list(VENDORS.values())
         return [VENDORS[k] for k in vendor_keys if k in VENDORS]
-
-    def _prettify(self, elem: Element) -> str:
-        """Pretty-print XML with proper indentation."""
-        raw = tostring(elem, encoding="unicode", xml_declaration=False)
-        dom = parseString(raw)
-        pretty = dom.toprettyxml(indent="  ", encoding=None)
-        # Remove the XML declaration that minidom adds
-        lines = pretty.split("\n")
-        if lines[0].startswith("<?xml"):
-            lines = lines[1:]
-        result = "\n".join(lines).strip()
-        # Add xmlns to the VAST element for spec compliance
-        result = result.replace(
-            '<VAST version="4.2">',
-            '<VAST version="4.2" xmlns="http://www.iab.com/VAST">',
-        )
-        return result
@@ -0,0 +1,11 @@
+"""Media handling for generated video assets."""
+
+from dreamtraffic.media.assets import Asset, AssetStats, AssetStore, asset_store
+from dreamtraffic.media.download import DownloadError, DownloadResult, Downloader, default_downloader
+from dreamtraffic.media.probe import ProbeError, VideoInfo, probe, probe_creative
+
+__all__ = [
+    "Downloader", "DownloadResult", "DownloadError", "default_downloader",
+    "AssetStore", "Asset", "AssetStats", "asset_store",
+    "probe", "probe_creative", "VideoInfo", "ProbeError",
+]
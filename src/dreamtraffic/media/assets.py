@@ -0,0 +1,347 @@
+"""Content-addressed store of downloaded videos with an SQLite index and a disk quota.
+
+Each distinct file is kept once, at ``<root>/objects/<sha[:2]>/<sha><ext>``,
+and indexed in the ``assets`` table with its size and last access. Source
+URLs map to content in ``asset_sources`` and the creatives using an asset in
+``asset_refs``::
+
+    store = asset_store()
+    asset = store.fetch(video_url, creative_id=7)   # downloads on a miss
+    asset.path, asset.sha256
+
+Two URLs serving the same bytes share one object. Files already on disk are
+adopted with ``add_file``, which hard-links them into the store and replaces
+duplicates by hard links to the stored copy, and ``link`` gives an asset a
+friendly name without copying it.
+
+When the stored total exceeds ``quota`` bytes the least recently accessed
+assets are evicted, except those referenced by a creative whose approval
+status is ``active`` (asked of the ``supabase_client`` backend, so remote
+creatives count too). A hard link made by ``link``/``add_file`` outside the
+store keeps its data on disk after eviction.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from urllib.parse import urlsplit
+
+from dreamtraffic.config import ASSET_DIR, ASSET_QUOTA_GB, DATA_DIR, DB_PATH
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.engine import ConnectionPool, get_pool
+from dreamtraffic.db.models import ApprovalStatus
+from dreamtraffic.media.download import BUFFER_SIZE, Downloader, default_downloader
+
+# Bound to a JSON array of the active creative IDs, which come from the
+# storage backend: with the remote store they have no local rows
+_PINNED = """EXISTS (
+    SELECT 1 FROM asset_refs r
+    WHERE r.sha256 = assets.sha256 AND r.creative_id IN (SELECT value FROM json_each(?)))"""
+
+
+@dataclass(frozen=True)
+class Asset:
+    sha256: str
+    size: int
+    path: Path
+    last_access: float
+
+
+@dataclass
+class AssetStats:
+    hits: int = 0
+    misses: int = 0
+    deduplicated: int = 0  # files that turned out to be stored already
+    evictions: int = 0
+    evicted_bytes: int = 0
+
+
+def _ext(name: str) -> str:
+    suffix = PurePosixPath(name).suffix.lower()
+    return suffix if 1 < len(suffix) <= 8 and suffix[1:].isalnum() else ""
+
+
+def _hash_file(path: Path) -> tuple[str, int]:
+    sha = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while block := f.read(BUFFER_SIZE):
+            sha.update(block)
+            size += len(block)
+    return sha.hexdigest(), size
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    """Hard-link ``src`` at ``dest`` (replacing it), copying across filesystems."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.with_name(f".{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+class AssetStore:
+    """Video files stored once per content hash, indexed in ``pool``'s database."""
+
+    def __init__(
+        self,
+        root: Path = ASSET_DIR,
+        *,
+        pool: ConnectionPool | None = None,
+        quota: int | None = int(ASSET_QUOTA_GB * (1 << 30)) or None,
+        downloader: Downloader | None = None,
+    ) -> None:
+        self.root = Path(root)
+        self.pool = pool or get_pool()
+        self.quota = quota
+        self._downloader = downloader
+        self.stats = AssetStats()
+        self._inflight: dict[str, Future[Asset]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def downloader(self) -> Downloader:
+        return self._downloader or default_downloader()
+
+    def object_path(self, sha256: str, ext: str = "") -> Path:
+        return self.root / "objects" / sha256[:2] / f"{sha256}{ext}"
+
+    def _asset(self, row) -> Asset:
+        sha256, size, ext, last_access = row
+        return Asset(sha256, size, self.object_path(sha256, ext), last_access)
+
+    # ── Lookup ───────────────────────────────────────────────────────
+
+    def get(self, url: str) -> Asset | None:
+        """The stored asset for ``url``, marking it used, or None. Does not download."""
+        with self.pool.connection() as conn, self.pool.write_lock:
+            row = conn.execute(
+                """UPDATE assets SET last_access = ?
+                   WHERE sha256 = (SELECT sha256 FROM asset_sources WHERE url = ?)
+                   RETURNING sha256, size, ext, last_access""",
+                (time.time(), url),
+            ).fetchone()
+        if row is None:
+            return None
+        asset = self._asset(row)
+        if not asset.path.exists():  # removed behind the index's back
+            self._forget(asset.sha256)
+            return None
+        return asset
+
+    def by_hash(self, sha256: str) -> Asset | None:
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT sha256, size, ext, last_access FROM assets WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return self._asset(row) if row else None
+
+    def usage(self) -> tuple[int, int]:
+        """(assets, bytes) currently stored."""
+        with self.pool.connection() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM assets").fetchone()
+        return count, total
+
+    # ── Adding ───────────────────────────────────────────────────────
+
+    def fetch(self, url: str, *, creative_id: int | None = None, expected_sha256: str | None = None) -> Asset:
+        """The asset for ``url``, downloading it on a miss (read-through).
+
+        Concurrent fetches of one URL in this process share a single download.
+        ``creative_id`` records the creative as a user of the asset, which
+        pins it while the creative is active.
+        """
+        asset = self.get(url)
+        if asset is not None:
+            self._count("hits")
+        else:
+            with self._lock:
+                future = self._inflight.get(url)
+                owner = future is None
+                if owner:
+                    future = self._inflight[url] = Future()
+            if not owner:
+                asset = future.result()
+            else:
+                try:
+                    self._count("misses")
+                    asset = self._download(url, expected_sha256)
+                    future.set_result(asset)
+                except BaseException as e:
+                    future.set_exception(e)
+                    raise
+                finally:
+                    with self._lock:
+                        del self._inflight[url]
+        if creative_id is not None:
+            self.reference(asset.sha256, creative_id)
+        return asset
+
+    def _download(self, url: str, expected_sha256: str | None) -> Asset:
+        ext = _ext(urlsplit(url).path)
+        # Named after the URL so an interrupted download resumes on the next fetch
+        staging = self.root / "tmp" / (hashlib.sha256(url.encode()).hexdigest()[:32] + ext)
+        result = self.downloader.download(url, staging, expected_sha256=expected_sha256)
+        return self._commit(staging, result.sha256, result.size, ext, url=url, move=True)
+
+    def add_file(
+        self,
+        path: Path | str,
+        *,
+        url: str | None = None,
+        creative_id: int | None = None,
+        replace_with_link: bool = True,
+    ) -> Asset:
+        """Adopt an existing file: hard-link it into the store instead of copying.
+
+        If the content is already stored and ``replace_with_link`` is set, the
+        file at ``path`` is replaced by a hard link to the stored copy, so
+        duplicates stop taking space.
+        """
+        path = Path(path)
+        sha256, size = _hash_file(path)
+        asset = self._commit(path, sha256, size, _ext(path.name), url=url, move=False)
+        if replace_with_link and not path.samefile(asset.path):
+            _link_or_copy(asset.path, path)
+        if creative_id is not None:
+            self.reference(asset.sha256, creative_id)
+        return asset
+
+    def _commit(self, src: Path, sha256: str, size: int, ext: str, *, url: str | None, move: bool) -> Asset:
+        """Place ``src`` at its object path (unless stored already) and index it."""
+        now = time.time()
+        with self.pool.transaction() as conn:
+            row = conn.execute("SELECT ext FROM assets WHERE sha256 = ?", (sha256,)).fetchone()
+            if row is not None and self.object_path(sha256, row[0]).exists():
+                ext = row[0]
+                self._count("deduplicated")
+                if move:
+                    src.unlink(missing_ok=True)
+            else:
+                dest = self.object_path(sha256, ext)
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                if move:
+                    os.replace(src, dest)
+                else:
+                    _link_or_copy(src, dest)
+            conn.execute(
+                """INSERT INTO assets (sha256, size, ext, last_access) VALUES (?, ?, ?, ?)
+                   ON CONFLICT(sha256) DO UPDATE SET last_access = excluded.last_access""",
+                (sha256, size, ext, now),
+            )
+            if url is not None:
+                conn.execute("INSERT OR REPLACE INTO asset_sources (url, sha256) VALUES (?, ?)", (url, sha256))
+        self.evict(keep=sha256)
+        return Asset(sha256, size, self.object_path(sha256, ext), now)
+
+    def reference(self, sha256: str, creative_id: int) -> None:
+        """Record ``creative_id`` as using the asset (pins it while the creative is active)."""
+        with self.pool.connection() as conn, self.pool.write_lock:
+            conn.execute(
+                "INSERT OR IGNORE INTO asset_refs (sha256, creative_id) VALUES (?, ?)", (sha256, creative_id)
+            )
+
+    def link(self, asset: Asset, dest: Path | str) -> Path:
+        """Make ``dest`` a hard link to the stored file (a copy across filesystems)."""
+        dest = Path(dest)
+        _link_or_copy(asset.path, dest)
+        return dest
+
+    # ── Eviction ─────────────────────────────────────────────────────
+
+    def _count(self, outcome: str, n: int = 1) -> None:
+        with self._lock:
+            setattr(self.stats, outcome, getattr(self.stats, outcome) + n)
+
+    @staticmethod
+    def _active_creatives() -> str:
+        ids = supabase_client.get_creative_ids(ApprovalStatus.ACTIVE.value)
+        return json.dumps(ids)
+
+    def pinned(self) -> set[str]:
+        """Hashes of assets used by an active creative."""
+        active = self._active_creatives()
+        with self.pool.connection() as conn:
+            return {r[0] for r in conn.execute(f"SELECT sha256 FROM assets WHERE {_PINNED}", (active,))}
+
+    def evict(self, quota: int | None = None, *, keep: str | None = None) -> list[Asset]:
+        """Remove least recently used, unpinned assets until the total fits ``quota``.
+
+        ``quota`` defaults to the store's; ``keep`` is never evicted (the
+        asset being returned). Returns the evicted assets.
+        """
+        quota = self.quota if quota is None else quota
+        if quota is None:
+            return []
+        if self.usage()[1] <= quota:
+            return []
+        # Looked up once, outside the write transaction (it may be a remote request)
+        active = self._active_creatives()
+        evicted: list[Asset] = []
+        with self.pool.transaction() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM assets").fetchone()[0]
+            if total <= quota:
+                return []
+            candidates = conn.execute(
+                f"""SELECT sha256, size, ext, last_access FROM assets
+                    WHERE sha256 != ? AND NOT {_PINNED}
+                    ORDER BY last_access""",
+                (keep or "", active),
+            )
+            for row in candidates:
+                if total <= quota:
+                    break
+                evicted.append(self._asset(row))
+                total -= row[1]
+            conn.executemany("DELETE FROM assets WHERE sha256 = ?", [(a.sha256,) for a in evicted])
+        for asset in evicted:
+            asset.path.unlink(missing_ok=True)
+        self._count("evictions", len(evicted))
+        self._count("evicted_bytes", sum(a.size for a in evicted))
+        return evicted
+
+    def _forget(self, sha256: str) -> None:
+        with self.pool.connection() as conn, self.pool.write_lock:
+            conn.execute("DELETE FROM assets WHERE sha256 = ?", (sha256,))
+
+
+_stores: dict[Path, AssetStore] = {}
+_stores_lock = threading.Lock()
+
+
+def asset_store(db_path: Path | None = None) -> AssetStore:
+    """The asset store indexed in ``db_path``, or in the default pool's database.
+
+    The default database keeps its files in ``ASSET_DIR``; any other keeps
+    them in an ``assets`` directory beside it, so an index never evicts files
+    another database still lists.
+    """
+    pool = get_pool(db_path)
+    with _stores_lock:
+        store = _stores.get(pool.db_path)
+        if store is None or store.pool is not pool:
+            root = ASSET_DIR if pool.db_path == DB_PATH else pool.db_path.parent / "assets"
+            store = _stores[pool.db_path] = AssetStore(root, pool=pool)
+    return store
+
+
+def download_to_data_dir(url: str, filename: str | None = None, *, creative_id: int | None = None) -> Path:
+    """Fetch a video through the asset store and hard-link it into the data directory.
+
+    The name is taken from the URL unless given.
+    """
+    fname = filename or url.split("/")[-1].split("?")[0]
+    if not fname.endswith(".mp4"):
+        fname += ".mp4"
+    store = asset_store()
+    return store.link(store.fetch(url, creative_id=creative_id), DATA_DIR / fname)
@@ -0,0 +1,424 @@
+"""Parallel, resumable media downloads with a streaming SHA-256.
+
+    with Downloader() as downloader:
+        result = downloader.download(video_url, DATA_DIR / "spot.mp4")
+    result.sha256, result.size
+
+A file is fetched as up to ``segments`` HTTP Range requests, each written in
+place into ``<dest>.part`` through a large reusable buffer. Progress is
+checkpointed in ``<dest>.part.json``, so an interrupted download resumes where
+each segment stopped — as long as the server still reports the same size and
+validator (ETag or Last-Modified). Servers without Range support get one
+streamed GET. Dropped connections are retried from the last written byte.
+
+The SHA-256 is computed in file order as the contiguous downloaded prefix
+grows: straight from the receive buffer when a write lands at the hash
+frontier, otherwise read back from the part file. The digest is ready when
+the last byte is written, with no second pass over the file.
+
+Every ``Downloader`` shares one process-wide cap on open download
+connections (``DOWNLOAD_MAX_CONNECTIONS``), however many files are in flight.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+from dreamtraffic.config import DOWNLOAD_MAX_CONNECTIONS, DOWNLOAD_SEGMENTS
+
+BUFFER_SIZE = 1 << 20  # bytes gathered per write (and per hash read-back)
+MIN_SEGMENT_SIZE = 4 << 20  # smaller files use fewer segments
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_CONTENT_RANGE = re.compile(r"bytes \d+-\d+/(\d+)")
+
+# Shared by every Downloader: the process-wide limit on open download connections
+_connections = threading.BoundedSemaphore(DOWNLOAD_MAX_CONNECTIONS)
+
+
+class DownloadError(RuntimeError):
+    """A download could not be completed (partial data is kept for resuming)."""
+
+
+@dataclass
+class DownloadResult:
+    path: Path
+    size: int
+    sha256: str
+    segments: int  # Range requests the file was split into; 1 for a single stream
+    resumed_bytes: int  # already on disk from an earlier attempt
+    seconds: float
+
+
+@dataclass
+class _Segment:
+    start: int
+    end: int  # exclusive
+    pos: int  # next byte to write
+
+    @property
+    def done(self) -> bool:
+        return self.pos >= self.end
+
+
+class _Retry(Exception):
+    """A response worth retrying (5xx, 429)."""
+
+
+class _OrderedHash:
+    """SHA-256 of the file, advanced as the contiguous downloaded prefix grows."""
+
+    def __init__(self, fd: int, segments: list[_Segment]) -> None:
+        self._fd = fd
+        self._segments = segments
+        self._sha = hashlib.sha256()
+        self._lock = threading.Lock()
+        self.offset = 0
+
+    def _ready(self) -> int:
+        for segment in self._segments:
+            if not segment.done:
+                return segment.pos
+        return self._segments[-1].end if self._segments else 0
+
+    def advance(self, data: memoryview | None = None, offset: int = -1) -> None:
+        """Hash everything downloaded up to the first gap; ``data`` at ``offset`` was just written."""
+        with self._lock:
+            if data is not None and offset == self.offset:
+                self._sha.update(data)
+                self.offset += len(data)
+            ready = self._ready()
+            while self.offset < ready:
+                block = os.pread(self._fd, min(BUFFER_SIZE, ready - self.offset), self.offset)
+                if not block:
+                    raise DownloadError(f"Part file is shorter than its checkpoint at byte {self.offset}")
+                self._sha.update(block)
+                self.offset += len(block)
+
+    def hexdigest(self) -> str:
+        return self._sha.hexdigest()
+
+
+def _unresolvable(exc: BaseException) -> bool:
+    """Whether a connect error is a failed name lookup, which retrying will not fix."""
+    while exc is not None:
+        if isinstance(exc, socket.gaierror):
+            return True
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def _validator(resp: httpx.Response) -> str:
+    return resp.headers.get("ETag") or resp.headers.get("Last-Modified") or ""
+
+
+class Downloader:
+    """Downloads files over one pooled HTTP client with ranged, resumable segments."""
+
+    def __init__(
+        self,
+        *,
+        segments: int = DOWNLOAD_SEGMENTS,
+        buffer_size: int = BUFFER_SIZE,
+        min_segment_size: int = MIN_SEGMENT_SIZE,
+        retries: int = 5,
+        backoff: float = 0.25,
+        checkpoint_interval: float = 1.0,
+        http_client: httpx.Client | None = None,
+        connections: threading.Semaphore | None = None,
+    ) -> None:
+        if segments < 1:
+            raise ValueError(f"segments must be at least 1, got {segments}")
+        self.segments = segments
+        self.buffer_size = buffer_size
+        self.min_segment_size = min_segment_size
+        self.retries = retries
+        self.backoff = backoff
+        self.checkpoint_interval = checkpoint_interval
+        self._connections = connections or _connections
+        self._owns_http = http_client is None
+        self.http = http_client or httpx.Client(
+            follow_redirects=True,
+            timeout=httpx.Timeout(30.0, read=60.0),
+            limits=httpx.Limits(max_connections=DOWNLOAD_MAX_CONNECTIONS,
+                                max_keepalive_connections=DOWNLOAD_MAX_CONNECTIONS),
+            headers={"Accept-Encoding": "identity"},
+        )
+
+    def __enter__(self) -> "Downloader":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._owns_http:
+            self.http.close()
+
+    def download(self, url: str, dest: Path | str, *, expected_sha256: str | None = None) -> DownloadResult:
+        """Download ``url`` to ``dest``, resuming a matching ``.part`` file if one exists.
+
+        Raises DownloadError when the transfer fails after retries (the part
+        file is kept), or when the content does not match ``expected_sha256``
+        (the part file is removed).
+        """
+        dest = Path(dest)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        part = dest.with_name(dest.name + ".part")
+        state_path = dest.with_name(dest.name + ".part.json")
+        started = time.monotonic()
+
+        with self._connections:
+            probe = self._probe(url)
+            try:
+                if probe.status_code == 200:
+                    # No Range support: this response is the whole file
+                    state_path.unlink(missing_ok=True)
+                    size, digest = self._stream_whole(probe, part)
+                    segments, resumed = 1, 0
+            finally:
+                probe.close()
+        if probe.status_code != 200:
+            match = _CONTENT_RANGE.fullmatch(probe.headers.get("Content-Range", ""))
+            if probe.status_code != 206 or match is None:
+                raise DownloadError(f"GET {url} answered {probe.status_code} to a Range request")
+            size = int(match.group(1))
+            size, digest, segments, resumed = self._download_ranges(
+                url, size, _validator(probe), part, state_path,
+            )
+
+        if expected_sha256 is not None and digest != expected_sha256.lower():
+            part.unlink(missing_ok=True)
+            state_path.unlink(missing_ok=True)
+            raise DownloadError(f"SHA-256 mismatch for {url}: expected {expected_sha256}, got {digest}")
+        os.replace(part, dest)
+        state_path.unlink(missing_ok=True)
+        return DownloadResult(dest, size, digest, segments, resumed, time.monotonic() - started)
+
+    # ── HTTP ─────────────────────────────────────────────────────────
+
+    def _request(self, url: str, headers: dict[str, str]) -> httpx.Response:
+        """Open a streamed GET, retrying connection errors and retryable statuses."""
+        attempt = 0
+        while True:
+            try:
+                resp = self.http.send(self.http.build_request("GET", url, headers=headers), stream=True)
+                if resp.status_code in RETRY_STATUSES:
+                    resp.close()
+                    raise _Retry(f"GET {url} returned {resp.status_code}")
+                if resp.is_error:
+                    resp.close()
+                    raise DownloadError(f"GET {url} failed: {resp.status_code}")
+                return resp
+            except (httpx.TransportError, _Retry) as exc:
+                if _unresolvable(exc):
+                    raise DownloadError(f"GET {url} failed: {exc}") from exc
+                attempt += 1
+                if attempt > self.retries:
+                    raise DownloadError(f"GET {url} failed after {self.retries} retries: {exc}") from exc
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    def _probe(self, url: str) -> httpx.Response:
+        """A one-byte Range request: size and validator, or the whole body if ranges are unsupported."""
+        attempt = 0
+        while True:
+            resp = self._request(url, {"Range": "bytes=0-0"})
+            if resp.status_code != 206:
+                return resp
+            try:
+                resp.read()  # one byte; lets the connection be reused
+                return resp
+            except httpx.TransportError as exc:
+                resp.close()
+                attempt += 1
+                if attempt > self.retries:
+                    raise DownloadError(f"GET {url} failed after {self.retries} retries: {exc}") from exc
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+
+    def _stream_whole(self, resp: httpx.Response, part: Path) -> tuple[int, str]:
+        sha = hashlib.sha256()
+        size = 0
+        buffer = bytearray(self.buffer_size)
+        view = memoryview(buffer)
+        fill = 0
+        try:
+            with open(part, "wb") as f:
+                for raw in resp.iter_raw():
+                    chunk = memoryview(raw)
+                    while chunk:
+                        n = min(len(chunk), len(buffer) - fill)
+                        view[fill:fill + n] = chunk[:n]
+                        fill += n
+                        chunk = chunk[n:]
+                        if fill == len(buffer):
+                            f.write(view)
+                            sha.update(view)
+                            size += fill
+                            fill = 0
+                if fill:
+                    f.write(view[:fill])
+                    sha.update(view[:fill])
+                    size += fill
+        except httpx.TransportError as exc:
+            raise DownloadError(f"Download of {resp.url} interrupted: {exc}") from exc
+        return size, sha.hexdigest()
+
+    # ── Ranged download ──────────────────────────────────────────────
+
+    def _plan(self, size: int) -> list[_Segment]:
+        count = max(1, min(self.segments, -(-size // self.min_segment_size)))
+        bounds = [size * i // count for i in range(count + 1)]
+        return [_Segment(bounds[i], bounds[i + 1], bounds[i]) for i in range(count)]
+
+    def _resume(self, state_path: Path, part: Path, size: int, validator: str) -> list[_Segment] | None:
+        try:
+            state = json.loads(state_path.read_text())
+        except (OSError, ValueError):
+            return None
+        if (state.get("size") != size or state.get("validator") != validator or not validator
+                or not part.exists() or part.stat().st_size != size):
+            return None
+        return [_Segment(**s) for s in state["segments"]]
+
+    def _checkpoint(self, state_path: Path, url: str, size: int, validator: str, segments: list[_Segment]) -> None:
+        tmp = state_path.with_name(state_path.name + ".tmp")
+        tmp.write_text(json.dumps({
+            "url": url, "size": size, "validator": validator,
+            "segments": [asdict(s) for s in segments],
+        }))
+        os.replace(tmp, state_path)
+
+    def _download_ranges(
+        self, url: str, size: int, validator: str, part: Path, state_path: Path,
+    ) -> tuple[int, str, int, int]:
+        segments = self._resume(state_path, part, size, validator)
+        fresh = segments is None
+        if fresh:
+            segments = self._plan(size)
+        resumed = sum(s.pos - s.start for s in segments)
+
+        fd = os.open(part, os.O_RDWR | os.O_CREAT | (os.O_TRUNC if fresh else 0), 0o644)
+        try:
+            if fresh:
+                os.ftruncate(fd, size)
+            hasher = _OrderedHash(fd, segments)
+            hasher.advance()  # the part already on disk
+            stop = threading.Event()
+            headers = {"If-Range": validator} if validator else {}
+            pending = [s for s in segments if not s.done]
+            with ThreadPoolExecutor(max(1, len(pending)), thread_name_prefix="download") as pool:
+                futures = [pool.submit(self._fetch, url, s, fd, hasher, headers, stop) for s in pending]
+                while True:
+                    done, running = wait(futures, self.checkpoint_interval, return_when=FIRST_EXCEPTION)
+                    failed = [f for f in done if f.exception() is not None]
+                    if failed or not running:
+                        break
+                    self._checkpoint(state_path, url, size, validator, segments)
+                if failed:
+                    stop.set()
+                    wait(futures)
+                    self._checkpoint(state_path, url, size, validator, segments)
+                    raise failed[0].exception()
+            hasher.advance()
+            if hasher.offset != size:
+                raise DownloadError(f"Download of {url} ended at byte {hasher.offset} of {size}")
+        finally:
+            os.close(fd)
+        return size, hasher.hexdigest(), len(segments), resumed
+
+    def _fetch(
+        self,
+        url: str,
+        segment: _Segment,
+        fd: int,
+        hasher: _OrderedHash,
+        headers: dict[str, str],
+        stop: threading.Event,
+    ) -> None:
+        buffer = bytearray(self.buffer_size)
+        attempt = 0
+        while not segment.done and not stop.is_set():
+            before = segment.pos
+            try:
+                with self._connections:
+                    resp = self._request(url, {**headers, "Range": f"bytes={segment.pos}-{segment.end - 1}"})
+                    try:
+                        if resp.status_code != 206:
+                            raise DownloadError(f"{url} changed on the server; delete the .part file to restart")
+                        self._copy(resp, segment, fd, hasher, buffer, stop)
+                    finally:
+                        resp.close()
+            except httpx.TransportError as exc:
+                attempt = 0 if segment.pos > before else attempt + 1
+                if attempt > self.retries:
+                    raise DownloadError(
+                        f"Segment {segment.start}-{segment.end} of {url} failed after "
+                        f"{self.retries} retries: {exc}"
+                    ) from exc
+                time.sleep(self.backoff * 2 ** max(attempt - 1, 0))
+
+    def _copy(
+        self,
+        resp: httpx.Response,
+        segment: _Segment,
+        fd: int,
+        hasher: _OrderedHash,
+        buffer: bytearray,
+        stop: threading.Event,
+    ) -> None:
+        view = memoryview(buffer)
+        fill = 0
+
+        def flush() -> None:
+            nonlocal fill
+            offset = segment.pos
+            written = 0
+            while written < fill:
+                written += os.pwrite(fd, view[written:fill], offset + written)
+            segment.pos += fill
+            hasher.advance(view[:fill], offset)
+            fill = 0
+
+        try:
+            for raw in resp.iter_raw():
+                if segment.pos + fill + len(raw) > segment.end:
+                    raise DownloadError(f"{resp.url} sent more than the requested range")
+                chunk = memoryview(raw)
+                while chunk:
+                    n = min(len(chunk), len(buffer) - fill)
+                    view[fill:fill + n] = chunk[:n]
+                    fill += n
+                    chunk = chunk[n:]
+                    if fill == len(buffer):
+                        flush()
+                if stop.is_set():
+                    break
+        finally:
+            if fill:
+                flush()  # keep what arrived before a disconnect
+
+
+_default: Downloader | None = None
+_default_lock = threading.Lock()
+
+
+def default_downloader() -> Downloader:
+    """The shared process-wide Downloader."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = Downloader()
+        return _default
+
@@ -0,0 +1,200 @@
+"""MP4 / ISO-BMFF metadata probe: duration, resolution, codec and bitrate without decoding.
+
+The file is memory-mapped and only box headers plus the ``moov`` metadata
+are touched: ``mvhd`` (duration), ``tkhd`` (display size), ``hdlr`` (which
+track is video) and ``stsd`` (codec, coded size). The ``mdat`` payload is
+stepped over by its header, so probing a 500 MB file reads a few pages
+whether ``moov`` sits at the front (fast-start) or at the end::
+
+    info = probe(asset.path)
+    supabase_client.update_creative(creative_id, **info.creative_fields())
+
+``bitrate_kbps`` is the overall rate, file size over duration, which is
+what VAST ``MediaFile@bitrate`` advertises.
+"""
+
+from __future__ import annotations
+
+import mmap
+import struct
+from dataclasses import dataclass
+from math import gcd
+from pathlib import Path
+from typing import Any, Iterator
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.media.assets import asset_store
+
+# Sample entry fourcc -> the codec name VAST and the DSPs use
+CODECS = {
+    "avc1": "H.264", "avc3": "H.264",
+    "hvc1": "H.265", "hev1": "H.265",
+    "av01": "AV1",
+    "vp09": "VP9",
+    "mp4v": "MPEG-4",
+}
+
+
+class ProbeError(ValueError):
+    """The file is not an MP4 this probe can read (no ``moov``, no video track, truncated)."""
+
+
+@dataclass(frozen=True)
+class VideoInfo:
+    duration: float  # seconds
+    width: int
+    height: int
+    codec: str  # e.g. "H.264"; the raw fourcc when unrecognised
+    fourcc: str
+    bitrate_kbps: int
+    size: int  # bytes
+    format: str = "mp4"
+
+    @property
+    def aspect_ratio(self) -> str:
+        if not self.width or not self.height:
+            return ""
+        d = gcd(self.width, self.height)
+        return f"{self.width // d}:{self.height // d}"
+
+    def creative_fields(self) -> dict[str, Any]:
+        """Column values for the ``creatives`` row of this video."""
+        return {
+            "duration_seconds": round(self.duration),
+            "width": self.width,
+            "height": self.height,
+            "aspect_ratio": self.aspect_ratio,
+            "format": self.format,
+            "codec": self.codec,
+            "bitrate_kbps": self.bitrate_kbps,
+            "file_size": self.size,
+        }
+
+
+def _boxes(buf: mmap.mmap, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """(type, payload start, box end) for each box in ``buf[start:end]``."""
+    pos = start
+    while pos + 8 <= end:
+        size, kind = struct.unpack_from(">I4s", buf, pos)
+        header = 8
+        if size == 1:
+            if pos + 16 > end:
+                raise ProbeError(f"truncated {kind!r} box header at {pos}")
+            (size,) = struct.unpack_from(">Q", buf, pos + 8)
+            header = 16
+        elif size == 0:  # extends to the end of its container
+            size = end - pos
+        if size < header or pos + size > end:
+            raise ProbeError(f"{kind!r} box at {pos} overruns its container")
+        yield kind, pos + header, pos + size
+        pos += size
+
+
+def _find(buf: mmap.mmap, start: int, end: int, kind: bytes) -> tuple[int, int] | None:
+    for k, payload, box_end in _boxes(buf, start, end):
+        if k == kind:
+            return payload, box_end
+    return None
+
+
+def _unpack(fmt: str, buf: mmap.mmap, pos: int, end: int, kind: str) -> tuple[Any, ...]:
+    """``struct.unpack_from`` that refuses to read past ``end``, the end of the ``kind`` box."""
+    if pos + struct.calcsize(fmt) > end:
+        raise ProbeError(f"truncated {kind} box at {pos}")
+    return struct.unpack_from(fmt, buf, pos)
+
+
+def _mvhd(buf: mmap.mmap, pos: int, end: int) -> float:
+    (version,) = _unpack(">B", buf, pos, end, "mvhd")
+    if version == 1:
+        timescale, duration = _unpack(">IQ", buf, pos + 20, end, "mvhd")
+    else:
+        timescale, duration = _unpack(">II", buf, pos + 12, end, "mvhd")
+    return duration / timescale if timescale else 0.0
+
+
+def _tkhd_size(buf: mmap.mmap, pos: int, end: int) -> tuple[int, int]:
+    # width and height are 16.16 fixed point after the matrix
+    (version,) = _unpack(">B", buf, pos, end, "tkhd")
+    width, height = _unpack(">II", buf, pos + (88 if version == 1 else 76), end, "tkhd")
+    return width >> 16, height >> 16
+
+
+def _video_track(buf: mmap.mmap, start: int, end: int) -> tuple[str, int, int] | None:
+    """(fourcc, width, height) if the ``trak`` is a video track."""
+    mdia = _find(buf, start, end, b"mdia")
+    if mdia is None:
+        return None
+    hdlr = _find(buf, *mdia, b"hdlr")
+    if hdlr is None or buf[hdlr[0] + 8:min(hdlr[0] + 12, hdlr[1])] != b"vide":
+        return None
+    width = height = 0
+    tkhd = _find(buf, start, end, b"tkhd")
+    if tkhd is not None:
+        width, height = _tkhd_size(buf, *tkhd)
+    fourcc = ""
+    minf = _find(buf, *mdia, b"minf")
+    stbl = minf and _find(buf, *minf, b"stbl")
+    stsd = stbl and _find(buf, *stbl, b"stsd")
+    if stsd:
+        entry = stsd[0] + 8  # after version/flags and entry_count
+        fourcc = _unpack(">4s", buf, entry + 4, stsd[1], "stsd")[0].decode("latin-1")
+        if not (width and height):  # fall back to the coded size
+            width, height = _unpack(">HH", buf, entry + 32, stsd[1], "stsd")
+    return fourcc, width, height
+
+
+def probe(path: Path | str) -> VideoInfo:
+    """Read an MP4's video metadata from its ``moov`` box."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size < 8:
+            raise ProbeError(f"{path.name} is too small to be an MP4")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            fmt = "mp4"
+            moov = None
+            for kind, payload, box_end in _boxes(buf, 0, size):
+                if kind == b"ftyp" and buf[payload:payload + 4] == b"qt  ":
+                    fmt = "mov"
+                elif kind == b"moov":
+                    moov = payload, box_end
+                    break
+            if moov is None:
+                raise ProbeError(f"{path.name} has no moov box")
+            mvhd = _find(buf, *moov, b"mvhd")
+            if mvhd is None:
+                raise ProbeError(f"{path.name} has no mvhd box")
+            duration = _mvhd(buf, *mvhd)
+            for kind, payload, box_end in _boxes(buf, *moov):
+                if kind == b"trak" and (video := _video_track(buf, payload, box_end)):
+                    break
+            else:
+                raise ProbeError(f"{path.name} has no video track")
+    fourcc, width, height = video
+    return VideoInfo(
+        duration=duration,
+        width=width,
+        height=height,
+        codec=CODECS.get(fourcc, fourcc),
+        fourcc=fourcc,
+        bitrate_kbps=round(size * 8 / duration / 1000) if duration else 0,
+        size=size,
+        format=fmt,
+    )
+
+
+def probe_creative(creative_id: int, video_url: str | None = None) -> VideoInfo:
+    """Fetch a creative's video through the asset store, probe it, and store the metadata.
+
+    ``video_url`` defaults to the creative's own. Raises ``DownloadError``
+    or ``ProbeError`` without touching the row.
+    """
+    if video_url is None:
+        creative = supabase_client.get_creative(creative_id)
+        if creative is None:
+            raise LookupError(f"Creative {creative_id} not found")
+        video_url = creative["video_url"]
+    info = probe(asset_store().fetch(video_url, creative_id=creative_id).path)
+    supabase_client.update_creative(creative_id, **info.creative_fields())
+    return info
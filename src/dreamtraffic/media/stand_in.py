@@ -0,0 +1,183 @@
+"""Local HTTP server for large media files, with Range support, throttling and disconnects.
+
+Lets the download engine be exercised and benchmarked without a CDN::
+
+    with MediaStandIn(throttle=20 << 20) as cdn:
+        url = cdn.add("spot.mp4", os.urandom(64 << 20))
+        Downloader().download(url, tmp_path / "spot.mp4")
+
+Serves ``GET`` of added files, with single ``Range: bytes=a-b`` requests
+answered ``206`` (honouring ``If-Range``) unless ``ranges=False``.
+``throttle`` caps each connection's bytes per second, like a CDN edge
+shaping one stream; ``disconnect_next()`` drops upcoming responses part-way
+through the body. ``peak_connections`` records the most bodies sent at once.
+``default``, when set, is served for any path not added.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import urlsplit
+
+CHUNK_SIZE = 64 << 10
+
+_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class MediaStandIn:
+    """Threaded static file server standing in for a video CDN."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        *,
+        ranges: bool = True,
+        throttle: float = 0.0,
+    ) -> None:
+        self.ranges = ranges
+        self.throttle = throttle  # bytes per second per connection; 0 = unthrottled
+        self.files: dict[str, bytes] = {}
+        self.default: bytes | None = None  # served for names not added
+        self.etags: dict[str, str] = {}
+        self.requests: list[dict[str, Any]] = []  # {"path", "range", "status"}
+        self.bytes_sent = 0
+        self.active_connections = 0
+        self.peak_connections = 0
+        self._disconnects: list[int] = []  # body bytes to send before dropping
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), self._handler_class())
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MediaStandIn":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "MediaStandIn":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    def add(self, name: str, data: bytes) -> str:
+        """Serve ``data`` at ``/<name>`` (replacing any earlier version). Returns its URL."""
+        with self._lock:
+            self.files[name] = data
+            self.etags[name] = '"' + hashlib.md5(data).hexdigest() + '"'
+        return f"{self.url}/{name}"
+
+    def disconnect_next(self, count: int = 1, after: int = 0) -> None:
+        """Drop the next ``count`` responses after ``after`` bytes of body."""
+        with self._lock:
+            self._disconnects.extend([after] * count)
+
+    def _plan(self, path: str, headers: Any) -> tuple[int, dict[str, str], bytes, int | None]:
+        name = path.lstrip("/")
+        with self._lock:
+            data = self.files.get(name, self.default)
+            if data is None:
+                return 404, {}, b"not found", None
+            etag = self.etags.get(name) or '"' + hashlib.md5(data).hexdigest() + '"'
+            response_headers = {"ETag": etag, "Content-Type": "video/mp4"}
+            status, body = 200, data
+            requested = headers.get("Range")
+            if_range = headers.get("If-Range")
+            if self.ranges:
+                response_headers["Accept-Ranges"] = "bytes"
+            match = _RANGE.fullmatch(requested or "")
+            if self.ranges and match and (if_range is None or if_range == etag):
+                first, last = match.groups()
+                if first:
+                    start, end = int(first), min(int(last) + 1 if last else len(data), len(data))
+                else:
+                    start, end = max(len(data) - int(last or 0), 0), len(data)
+                if start >= len(data) or start >= end:
+                    response_headers["Content-Range"] = f"bytes */{len(data)}"
+                    return 416, response_headers, b"", None
+                status, body = 206, data[start:end]
+                response_headers["Content-Range"] = f"bytes {start}-{end - 1}/{len(data)}"
+            drop = self._disconnects.pop(0) if self._disconnects else None
+            self.requests.append({"path": path, "range": requested, "status": status})
+        return status, response_headers, body, drop
+
+    def _handler_class(self) -> type[BaseHTTPRequestHandler]:
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:
+                status, headers, body, drop = stand_in._plan(urlsplit(self.path).path, self.headers)
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                with stand_in._lock:
+                    stand_in.active_connections += 1
+                    stand_in.peak_connections = max(stand_in.peak_connections, stand_in.active_connections)
+                self._send_body(memoryview(body), drop)
+
+            def _finished(self) -> None:
+                # Called before the last write, so the client cannot already hold
+                # the next connection while this one still counts as active
+                with stand_in._lock:
+                    stand_in.active_connections -= 1
+
+            def _send_body(self, body: memoryview, drop: int | None) -> None:
+                limit = len(body) if drop is None else min(drop, len(body))
+                started = time.monotonic()
+                sent = 0
+                finished = False
+                try:
+                    while sent < limit:
+                        chunk = body[sent:min(sent + CHUNK_SIZE, limit)]
+                        if sent + len(chunk) == limit:
+                            finished = True
+                            self._finished()
+                        self.wfile.write(chunk)
+                        sent += len(chunk)
+                        with stand_in._lock:
+                            stand_in.bytes_sent += len(chunk)
+                        if stand_in.throttle:
+                            ahead = sent / stand_in.throttle - (time.monotonic() - started)
+                            if ahead > 0:
+                                time.sleep(ahead)
+                finally:
+                    if not finished:
+                        self._finished()
+                if drop is not None:
+                    self.wfile.flush()
+                    self.connection.shutdown(socket.SHUT_RDWR)
+                    self.close_connection = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
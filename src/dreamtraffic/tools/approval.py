@@ -8,6 +8,7 @@ from typing import Any
 from claude_agent_sdk import tool
 
 from dreamtraffic.approval.workflow import ApprovalWorkflow
+from dreamtraffic.db import supabase_client
 
 
 _workflow = ApprovalWorkflow()
@@ -49,9 +50,10 @@ async def request_revision(args: dict[str, Any]) -> dict[str, Any]:
     {"creative_id": int},
 )
 async def get_approval_status(args: dict[str, Any]) -> dict[str, Any]:
-    status = _workflow.get_status(args["creative_id"])
-    valid = _workflow.get_valid_transitions(args["creative_id"])
-    trail = _workflow.get_audit_trail(args["creative_id"])
+    with supabase_client.request_scope():
+        status = _workflow.get_status(args["creative_id"])
+        valid = _workflow.get_valid_transitions(args["creative_id"])
+        trail = _workflow.get_audit_trail(args["creative_id"])
     return {"content": [{"type": "text", "text": json.dumps({
         "creative_id": args["creative_id"],
         "current_status": status,
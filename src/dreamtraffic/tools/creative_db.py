@@ -107,3 +107,17 @@ async def list_creatives(args: dict[str, Any]) -> dict[str, Any]:
         for r in rows
     ]
     return {"content": [{"type": "text", "text": json.dumps(filtered, indent=2)}]}
+
+
+@tool(
+    "search_creatives",
+    "Full-text search of past creative prompts and campaign briefs, best matches first. "
+    "All words must match; end a word with * for a prefix, quote a phrase.",
+    {"query": str},
+)
+async def search_creatives(args: dict[str, Any]) -> dict[str, Any]:
+    try:
+        hits = supabase_client.search(args["query"])
+    except ValueError as e:
+        return {"content": [{"type": "text", "text": str(e)}]}
+    return {"content": [{"type": "text", "text": json.dumps(hits, indent=2)}]}
@@ -2,26 +2,45 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 from typing import Any
 
 from claude_agent_sdk import tool
 
-from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.async_client import AsyncLumaClient
+from dreamtraffic.luma.scheduler import flight_priority, luma_priority, luma_scheduler
 from dreamtraffic.db import supabase_client
 
+_client: AsyncLumaClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _luma() -> AsyncLumaClient:
+    """One client, and so one connection pool, per event loop for all Luma tool calls."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client, _client_loop = AsyncLumaClient(), loop
+    return _client
+
 
 @tool(
     "generate_video",
-    "Generate a video using Luma Dream Machine. Returns the generation ID for polling.",
+    "Generate a video using Luma Dream Machine. Returns the generation ID for polling. "
+    "An identical earlier request is reused instead of paying for a new generation.",
     {"prompt": str, "duration": str, "resolution": str, "campaign_id": int},
 )
 async def generate_video(args: dict[str, Any]) -> dict[str, Any]:
-    client = LumaClient()
-    gen_id = client.generate(
-        prompt=args["prompt"],
-        duration=args.get("duration", "5s"),
-        resolution=args.get("resolution", "1080p"),
-    )
+    client = _luma()
+    with luma_priority(flight_priority(campaign_id=args.get("campaign_id"))):
+        gen_id = await client.generate(
+            prompt=args["prompt"],
+            duration=args.get("duration", "5s"),
+            resolution=args.get("resolution", "1080p"),
+        )
+    ready = await client.cached_result(gen_id)
+    video_url = ready["video_url"] if ready else ""
     # Store generation reference
     if args.get("campaign_id"):
         supabase_client.insert_creative(
@@ -29,7 +48,7 @@ async def generate_video(args: dict[str, Any]) -> dict[str, Any]:
             name="",
             luma_generation_id=gen_id,
             prompt=args["prompt"],
-            video_url="",
+            video_url=video_url,
             duration_seconds=0,
             width=1920,
             height=1080,
@@ -40,7 +59,11 @@ async def generate_video(args: dict[str, Any]) -> dict[str, Any]:
             measurement_config="",
             vast_url="",
         )
-    return {"content": [{"type": "text", "text": f"Generation started: {gen_id}"}]}
+    if ready:
+        text = f"Reused completed generation {gen_id}. Video URL: {video_url}"
+    else:
+        text = f"Generation started: {gen_id}"
+    return {"content": [{"type": "text", "text": text}]}
 
 
 @tool(
@@ -49,12 +72,12 @@ async def generate_video(args: dict[str, Any]) -> dict[str, Any]:
     {"generation_id": str, "creative_id": int},
 )
 async def poll_generation(args: dict[str, Any]) -> dict[str, Any]:
-    client = LumaClient()
-    result = client.poll(args["generation_id"])
+    client = _luma()
+    with luma_priority(flight_priority(creative_id=args.get("creative_id"))):
+        result = await client.poll(args["generation_id"], creative_id=args.get("creative_id"))
     video_url = result.get("video_url", "")
-
-    if args.get("creative_id") and video_url:
-        supabase_client.update_creative(args["creative_id"], video_url=video_url)
+    # The poller batches its creatives write-back; the agent's next tool call should see it
+    await asyncio.to_thread(client.poller.flush)
 
     return {"content": [{"type": "text", "text": f"Generation complete. Video URL: {video_url}"}]}
 
@@ -65,6 +88,14 @@ async def poll_generation(args: dict[str, Any]) -> dict[str, Any]:
     {"video_url": str, "filename": str},
 )
 async def download_video(args: dict[str, Any]) -> dict[str, Any]:
-    client = LumaClient()
-    path = client.download(args["video_url"], args.get("filename"))
+    path = await _luma().download(args["video_url"], args.get("filename"))
     return {"content": [{"type": "text", "text": f"Downloaded to: {path}"}]}
+
+
+@tool(
+    "luma_queue_status",
+    "Show the shared Luma request queue: requests waiting, wait times and rate-limit pauses.",
+    {},
+)
+async def luma_queue_status(args: dict[str, Any]) -> dict[str, Any]:
+    return {"content": [{"type": "text", "text": json.dumps(luma_scheduler().metrics(), indent=2)}]}
@@ -8,7 +8,7 @@ from typing import Any
 from claude_agent_sdk import tool
 
 from dreamtraffic.measurement.vendors import get_vendor_config, VENDORS
-from dreamtraffic.measurement.vast import VastGenerator
+from dreamtraffic.measurement.vast import VastGenerator, media_file_params
 from dreamtraffic.measurement.fee_stack import FeeStackCalculator
 from dreamtraffic.db import supabase_client
 
@@ -35,6 +35,7 @@ async def generate_vast_tag(args: dict[str, Any]) -> dict[str, Any]:
         duration=duration_str,
         title=creative["name"] or "DreamTraffic Creative",
         vendors=vendor_keys,
+        **media_file_params(creative),
     )
 
     # Store VAST URL reference and measurement config
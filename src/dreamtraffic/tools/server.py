@@ -4,9 +4,10 @@ from __future__ import annotations
 
 from claude_agent_sdk import create_sdk_mcp_server
 
-from dreamtraffic.tools.luma import generate_video, poll_generation, download_video
+from dreamtraffic.tools.luma import generate_video, poll_generation, download_video, luma_queue_status
 from dreamtraffic.tools.creative_db import (
     create_campaign, get_campaign, create_creative, get_creative, list_creatives,
+    search_creatives,
 )
 from dreamtraffic.tools.approval import (
     submit_for_review, approve_creative, request_revision,
@@ -28,12 +29,14 @@ ALL_TOOLS = [
     generate_video,
     poll_generation,
     download_video,
+    luma_queue_status,
     # Creative DB
     create_campaign,
     get_campaign,
     create_creative,
     get_creative,
     list_creatives,
+    search_creatives,
     # Approval
     submit_for_review,
     approve_creative,
@@ -58,7 +61,7 @@ ALL_TOOLS = [
     calculate_measurement_cost,
 ]
 
-TOOL_NAMES = [f"mcp__dreamtraffic__{t.__name__}" for t in ALL_TOOLS]
+TOOL_NAMES = [f"mcp__dreamtraffic__{t.name}" for t in ALL_TOOLS]
 
 
 def create_dreamtraffic_server():
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import Any
 
@@ -31,15 +32,8 @@ async def traffic_creative(args: dict[str, Any]) -> dict[str, Any]:
     campaign_name = campaign["name"] if campaign else "Unknown Campaign"
 
     adapter = get_adapter(args["dsp"])
-    result = adapter.upload_creative(
-        video_url=creative["video_url"],
-        vast_url=creative["vast_url"],
-        duration_seconds=creative["duration_seconds"],
-        width=creative["width"],
-        height=creative["height"],
-        placement_type=creative["placement_type"],
-        campaign_name=campaign_name,
-    )
+    # File-uploading DSPs read the video through the asset store: keep that off the loop
+    result = await asyncio.to_thread(adapter.upload, creative, campaign_name=campaign_name)
 
     # Record trafficking
     supabase_client.insert_trafficking_record(
@@ -59,6 +53,7 @@ async def traffic_creative(args: dict[str, Any]) -> dict[str, Any]:
         "creative_id": result.creative_id,
         "asset_id": result.asset_id,
         "audit_status": result.audit_status,
+        "video_sha256": result.video_sha256 or None,
         "_simulated": result._simulated,
     }, indent=2)}]}
 
@@ -71,10 +66,12 @@ async def traffic_creative(args: dict[str, Any]) -> dict[str, Any]:
 async def traffic_all_dsps(args: dict[str, Any]) -> dict[str, Any]:
     dsp_list = [d.strip() for d in args["dsps"].split(",")]
     results = []
-    for dsp in dsp_list:
-        # Re-use the single trafficking logic
-        r = await traffic_creative({"creative_id": args["creative_id"], "dsp": dsp})
-        results.append({"dsp": dsp, "result": r["content"][0]["text"]})
+    # One request scope: the creative and campaign are read once, not per DSP
+    with supabase_client.request_scope():
+        for dsp in dsp_list:
+            # Re-use the single trafficking logic
+            r = await traffic_creative.handler({"creative_id": args["creative_id"], "dsp": dsp})
+            results.append({"dsp": dsp, "result": r["content"][0]["text"]})
     return {"content": [{"type": "text", "text": json.dumps(results, indent=2)}]}
 
 
@@ -0,0 +1,15 @@
+-- Unique keys the batched remote store upserts on (UPSERT_KEYS in
+-- src/dreamtraffic/db/remote_store.py). PostgREST's on_conflict needs a plain
+-- unique constraint on exactly these columns; a partial unique index does not
+-- qualify and the request fails with 42P10.
+--
+-- The store generates a key for every row it writes. Rows written by other
+-- clients leave the key NULL, and NULLs never conflict.
+
+ALTER TABLE trafficking_records ADD COLUMN IF NOT EXISTS record_key text;
+ALTER TABLE trafficking_records
+    ADD CONSTRAINT trafficking_records_record_key_key UNIQUE (record_key);
+
+ALTER TABLE approval_events ADD COLUMN IF NOT EXISTS event_key text;
+ALTER TABLE approval_events
+    ADD CONSTRAINT approval_events_event_key_key UNIQUE (event_key);
@@ -3,6 +3,7 @@
 import pytest
 
 from dreamtraffic.approval.workflow import ApprovalWorkflow, TRANSITIONS
+from dreamtraffic.db import supabase_client
 from dreamtraffic.db.engine import fetch_one
 
 
@@ -62,6 +63,20 @@ class TestApprovalWorkflow:
         assert trail[0]["from_status"] == "draft"
         assert trail[1]["to_status"] == "approved"
 
+    def test_concurrent_transition_is_revalidated(self, test_db, monkeypatch):
+        read = self.workflow.get_status
+
+        def stale_read(creative_id):
+            # Another reviewer submits the creative between our read and our write
+            status = read(creative_id)
+            if status == "draft":
+                supabase_client.update_creative(creative_id, approval_status="pending_review")
+            return status
+
+        monkeypatch.setattr(self.workflow, "get_status", stale_read)
+        with pytest.raises(ValueError, match="pending_review → pending_review"):
+            self.workflow.submit_for_review(1)
+
     def test_valid_transitions(self, test_db):
         valid = self.workflow.get_valid_transitions(1)
         assert valid == ["pending_review"]
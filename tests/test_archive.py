@@ -0,0 +1,124 @@
+"""Tests for monthly archival of the fact tables and the history views."""
+
+import sqlite3
+
+import pytest
+from click.testing import CliRunner
+
+from dreamtraffic.cli import cli
+from dreamtraffic.db.archive import archive, archive_months, history
+from dreamtraffic.db.engine import execute, executemany, fetch_all, fetch_one
+from dreamtraffic.db.payloads import encode_payload, load_payload
+
+OLD = [
+    ("2024-01-10 09:00:00", "amazon", "approved"),
+    ("2024-01-20 09:00:00", "dv360", "pending"),
+    ("2024-02-05 09:00:00", "amazon", "approved"),
+]
+
+
+@pytest.fixture
+def records(test_db):
+    executemany(
+        """INSERT INTO trafficking_records (creative_id, dsp, audit_status, created_at, request_payload)
+           VALUES (1, ?, ?, ?, ?)""",
+        [(dsp, status, at, encode_payload({"at": at})) for at, dsp, status in OLD],
+    )
+    execute("INSERT INTO trafficking_records (creative_id, dsp) VALUES (1, 'thetradedesk')")
+    executemany(
+        "INSERT INTO approval_events (creative_id, from_status, to_status, created_at) VALUES (1, ?, ?, ?)",
+        [("draft", "pending_review", "2024-01-11 10:00:00"),
+         ("pending_review", "approved", "2024-03-01 10:00:00")],
+    )
+
+
+def _live(table):
+    return fetch_one(f"SELECT COUNT(*) AS n FROM {table}")["n"]
+
+
+class TestArchive:
+    def test_moves_old_rows_into_monthly_files(self, records, tmp_path):
+        results = archive(older_than_days=30, archive_dir=tmp_path)
+        assert [(r.month, r.trafficking_records, r.approval_events) for r in results] == [
+            ("2024-01", 2, 1), ("2024-02", 1, 0), ("2024-03", 0, 1),
+        ]
+        assert archive_months(tmp_path) == ["2024-01", "2024-02", "2024-03"]
+        assert _live("trafficking_records") == 1
+        assert _live("approval_events") == 0
+
+    def test_dry_run_writes_nothing(self, records, tmp_path):
+        results = archive(older_than_days=30, archive_dir=tmp_path, dry_run=True)
+        assert sum(r.trafficking_records for r in results) == 3
+        assert archive_months(tmp_path) == []
+        assert _live("trafficking_records") == 4
+
+    def test_rerun_is_idempotent(self, records, tmp_path):
+        archive(older_than_days=30, archive_dir=tmp_path)
+        assert archive(older_than_days=30, archive_dir=tmp_path) == []
+        with history(archive_dir=tmp_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM trafficking_records_history").fetchone()[0] == 4
+
+    def test_summaries_keep_archived_rows(self, records, tmp_path):
+        before = fetch_one("SELECT * FROM creative_summary WHERE creative_id = 1")
+        audit = fetch_all("SELECT * FROM dsp_audit_status ORDER BY dsp")
+        archive(older_than_days=30, archive_dir=tmp_path)
+        assert fetch_one("SELECT * FROM creative_summary WHERE creative_id = 1") == {
+            **before, "archived_dsp_mask": before["archived_dsp_mask"] | _bits("amazon", "dv360"),
+        }
+        assert fetch_all("SELECT * FROM dsp_audit_status ORDER BY dsp") == audit
+
+        # Later changes to live rows recompute the mask without losing archived DSPs
+        execute("UPDATE trafficking_records SET audit_status = 'approved' WHERE dsp = 'thetradedesk'")
+        execute("DELETE FROM trafficking_records WHERE dsp = 'thetradedesk'")
+        summary = fetch_one("SELECT * FROM creative_summary WHERE creative_id = 1")
+        assert summary["dsp_mask"] == _bits("amazon", "dv360")
+        assert summary["trafficking_count"] == before["trafficking_count"] - 1
+
+    def test_rejects_negative_age(self, test_db, tmp_path):
+        with pytest.raises(ValueError):
+            archive(older_than_days=-1, archive_dir=tmp_path)
+
+
+def _bits(*dsps):
+    return sum(1 << r["bit"] for r in fetch_all("SELECT dsp, bit FROM dsp_bits") if r["dsp"] in dsps)
+
+
+class TestHistory:
+    def test_views_union_live_and_archived(self, records, tmp_path):
+        archive(older_than_days=30, archive_dir=tmp_path)
+        with history(archive_dir=tmp_path) as conn:
+            rows = conn.execute(
+                "SELECT dsp, request_payload FROM trafficking_records_history ORDER BY id"
+            ).fetchall()
+            events = conn.execute("SELECT COUNT(*) FROM approval_events_history").fetchone()[0]
+        assert [r["dsp"] for r in rows] == ["amazon", "dv360", "amazon", "thetradedesk"]
+        assert load_payload(rows[0]["request_payload"]) == {"at": "2024-01-10 09:00:00"}
+        assert events == 2
+
+    def test_month_range_limits_attached_files(self, records, tmp_path):
+        archive(older_than_days=30, archive_dir=tmp_path)
+        with history(since="2024-02", until="2024-02", archive_dir=tmp_path) as conn:
+            count = conn.execute("SELECT COUNT(*) FROM trafficking_records_history").fetchone()[0]
+            attached = {r["name"] for r in conn.execute("PRAGMA database_list")}
+        assert count == 2
+        assert attached == {"main", "temp", "archive_2024_02"}
+        with history(archive_dir=tmp_path) as conn:
+            pass
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("SELECT * FROM trafficking_records_history")
+
+
+class TestArchiveCommand:
+    def test_dry_run_and_archive(self, records, tmp_path):
+        args = ["db", "archive", "--older-than-days", "30", "--archive-dir", str(tmp_path)]
+        result = CliRunner().invoke(cli, [*args, "--dry-run"])
+        assert result.exit_code == 0
+        assert "2024-01" in result.output
+        assert _live("trafficking_records") == 4
+
+        result = CliRunner().invoke(cli, args)
+        assert result.exit_code == 0
+        assert _live("trafficking_records") == 1
+
+        result = CliRunner().invoke(cli, args)
+        assert "Nothing older than 30 days" in result.output
@@ -0,0 +1,170 @@
+"""Tests for the content-addressed asset store against the local media stand-in."""
+
+import asyncio
+import hashlib
+import json
+import os
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.engine import connection
+from dreamtraffic.db.postgrest_stand_in import PostgRESTStandIn
+from dreamtraffic.db.remote_store import RemoteStore
+from dreamtraffic.media.assets import AssetStore, asset_store
+from dreamtraffic.media.download import DownloadError, Downloader
+from dreamtraffic.media.stand_in import MediaStandIn
+
+MB = 1 << 20
+CLIP = os.urandom(2 * MB)
+
+
+@pytest.fixture
+def cdn():
+    with MediaStandIn() as server:
+        yield server
+
+
+@pytest.fixture
+def store(tmp_path):
+    with Downloader(segments=2, min_segment_size=MB, retries=1, backoff=0.01) as downloader:
+        yield AssetStore(tmp_path / "assets", quota=5 * MB, downloader=downloader)
+
+
+def set_status(creative_id, status):
+    with connection() as conn:
+        conn.execute("UPDATE creatives SET approval_status = ? WHERE id = ?", (status, creative_id))
+        conn.commit()
+
+
+class TestAssetStore:
+    def test_read_through(self, cdn, store):
+        url = cdn.add("spot.mp4", CLIP)
+        asset = store.fetch(url)
+        assert asset.sha256 == hashlib.sha256(CLIP).hexdigest()
+        assert asset.path.read_bytes() == CLIP and asset.path.suffix == ".mp4"
+        requests = len(cdn.requests)
+        assert store.fetch(url).path == asset.path
+        assert len(cdn.requests) == requests
+        assert (store.stats.hits, store.stats.misses) == (1, 1)
+        assert store.usage() == (1, len(CLIP))
+
+    def test_identical_files_share_one_object(self, cdn, store, tmp_path):
+        first = store.fetch(cdn.add("a.mp4", CLIP))
+        second = store.fetch(cdn.add("b.mp4", CLIP))
+        assert first.path == second.path
+        assert store.usage() == (1, len(CLIP))
+        assert not list((tmp_path / "assets" / "tmp").iterdir())
+
+        copy = tmp_path / "copy.mp4"
+        copy.write_bytes(CLIP)
+        store.add_file(copy)
+        assert os.path.samestat(copy.stat(), first.path.stat())
+        assert first.path.stat().st_nlink == 2
+        assert store.stats.deduplicated == 2
+
+    def test_link_gives_a_name_without_copying(self, cdn, store, tmp_path):
+        asset = store.fetch(cdn.add("spot.mp4", CLIP))
+        dest = store.link(asset, tmp_path / "named" / "spot.mp4")
+        assert os.path.samestat(dest.stat(), asset.path.stat())
+
+    def test_lru_eviction_under_quota(self, cdn, store):
+        store.quota = 7 * MB
+        urls = [cdn.add(f"spot{i}.mp4", os.urandom(2 * MB)) for i in range(3)]
+        oldest, middle, _ = (store.fetch(u) for u in urls)
+        store.fetch(urls[0])  # now the most recent: middle is the LRU
+        store.fetch(cdn.add("spot3.mp4", os.urandom(2 * MB)))
+        assert store.get(urls[1]) is None and not middle.path.exists()
+        assert store.get(urls[0]) is not None and oldest.path.exists()
+        assert store.usage() == (3, 6 * MB)
+        assert store.stats.evictions == 1
+
+    def test_active_creatives_are_pinned(self, cdn, store):
+        pinned_url = cdn.add("pinned.mp4", os.urandom(2 * MB))
+        pinned = store.fetch(pinned_url, creative_id=1)
+        set_status(1, "active")
+        for i in range(3):
+            store.fetch(cdn.add(f"spot{i}.mp4", os.urandom(2 * MB)))
+        assert store.pinned() == {pinned.sha256}
+        assert store.get(pinned_url) is not None
+
+        set_status(1, "paused")
+        assert pinned.sha256 in {a.sha256 for a in store.evict(0)}
+        assert not pinned.path.exists()
+
+    def test_creatives_active_in_the_remote_store_are_pinned(self, cdn, store):
+        with PostgRESTStandIn() as server:
+            remote = RemoteStore(server.url, backoff=0.001)
+            campaign = remote.insert_campaign(name="Remote")
+            remote.insert_creative(campaign_id=campaign["id"], name="Local twin")
+            creative = remote.insert_creative(campaign_id=campaign["id"], name="Remote only", approval_status="active")
+            previous = supabase_client.set_backend(remote)
+            try:
+                pinned = store.fetch(cdn.add("pinned.mp4", os.urandom(2 * MB)), creative_id=creative["id"])
+                for i in range(3):
+                    store.fetch(cdn.add(f"spot{i}.mp4", os.urandom(2 * MB)))
+                assert store.pinned() == {pinned.sha256}
+                assert pinned.path.exists()
+            finally:
+                supabase_client.set_backend(previous)
+                remote.close()
+
+    def test_missing_file_is_fetched_again(self, cdn, store):
+        url = cdn.add("spot.mp4", CLIP)
+        store.fetch(url).path.unlink()
+        assert store.get(url) is None
+        assert store.fetch(url).path.read_bytes() == CLIP
+
+    def test_failed_fetch_raises(self, store):
+        with pytest.raises(DownloadError):
+            store.fetch("http://cdn.luma.example/missing.mp4")
+        assert store.usage() == (0, 0)
+
+    def test_default_store_sits_beside_the_database(self, test_db):
+        assert asset_store().root == test_db.parent / "assets"
+
+
+class TestReadThrough:
+    def test_luma_download_links_into_data_dir(self, cdn, monkeypatch, tmp_path):
+        import dreamtraffic.media.assets as assets
+        from dreamtraffic.luma.client import LumaClient
+
+        monkeypatch.setattr(assets, "DATA_DIR", tmp_path / "data")
+        url = cdn.add("gen.mp4", CLIP)
+        client = LumaClient(api_key="test")
+        path = client.download(url, "creative-1")
+        assert path == tmp_path / "data" / "creative-1.mp4"
+        assert os.path.samestat(path.stat(), asset_store().get(url).path.stat())
+
+    def test_dsp_upload_reads_through_and_pins(self, cdn):
+        from dreamtraffic.tools.trafficking import traffic_creative
+
+        url = cdn.add("creative.mp4", CLIP)
+        with connection() as conn:
+            conn.execute("UPDATE creatives SET video_url = ? WHERE id = 1", (url,))
+            conn.commit()
+        set_status(1, "approved")
+        out = json.loads(asyncio.run(traffic_creative.handler({"creative_id": 1, "dsp": "dv360"}))["content"][0]["text"])
+        assert out["video_sha256"] == hashlib.sha256(CLIP).hexdigest()
+        set_status(1, "active")
+        assert asset_store().pinned() == {out["video_sha256"]}
+
+    def test_vast_only_dsp_downloads_nothing(self, cdn):
+        from dreamtraffic.tools.trafficking import traffic_creative
+
+        url = cdn.add("creative.mp4", CLIP)
+        with connection() as conn:
+            conn.execute("UPDATE creatives SET video_url = ? WHERE id = 1", (url,))
+            conn.commit()
+        set_status(1, "approved")
+        out = json.loads(asyncio.run(
+            traffic_creative.handler({"creative_id": 1, "dsp": "thetradedesk"})
+        )["content"][0]["text"])
+        assert out["video_sha256"] is None and asset_store().usage() == (0, 0)
+
+    def test_dsp_upload_falls_back_to_url_when_unreachable(self):
+        from dreamtraffic.tools.trafficking import traffic_creative
+
+        set_status(1, "approved")
+        out = json.loads(asyncio.run(traffic_creative.handler({"creative_id": 1, "dsp": "dv360"}))["content"][0]["text"])
+        assert out["video_sha256"] is None and out["creative_id"]
@@ -0,0 +1,114 @@
+"""Tests for AsyncLumaClient against the local Luma stand-in."""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from dreamtraffic.db.engine import execute, fetch_one
+from dreamtraffic.luma.async_client import AsyncLumaClient
+from dreamtraffic.luma.cache import GenerationRequest
+from dreamtraffic.luma.stand_in import LumaStandIn
+
+
+@pytest.fixture
+def luma():
+    with LumaStandIn(render_seconds=lambda body: float(body["prompt"].split()[-1])) as server:
+        yield server
+
+
+FAST = {"min_interval": 0.01, "max_interval": 0.05, "render_seconds": {}, "flush_interval": 0.05}
+
+
+def _client(server, **options):
+    return AsyncLumaClient(api_key="test-key", base_url=server.url, poller_options=FAST, **options)
+
+
+def _requests(*seconds):
+    return [GenerationRequest.normalized(f"Variant {i} {s}") for i, s in enumerate(seconds)]
+
+
+class TestAsyncLumaClient:
+    @pytest.mark.asyncio
+    async def test_wait(self, luma):
+        async with _client(luma, use_cache=False) as client:
+            result = await client.wait(GenerationRequest.normalized("Coast 0.05"))
+        assert result["state"] == "completed"
+        assert result["video_url"].endswith(f"/assets/{result['id']}.mp4")
+
+    @pytest.mark.asyncio
+    async def test_batch_takes_about_the_slowest_generation(self, luma):
+        seconds = [0.8, 0.05] * 10
+        start = time.monotonic()
+        async with _client(luma, use_cache=False) as client:
+            results = [r async for r in client.generate_many(_requests(*seconds), max_concurrency=20)]
+        elapsed = time.monotonic() - start
+        assert sorted(r.index for r in results) == list(range(20))
+        assert all(r.ok and r.video_url for r in results)
+        assert elapsed < 2.0  # vs. 8.5s one after another
+        # Yielded as they finish: the quick ones first
+        assert [r.request.prompt.split()[-1] for r in results[:10]] == ["0.05"] * 10
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit(self, luma):
+        start = time.monotonic()
+        async with _client(luma, use_cache=False) as client:
+            results = [r async for r in client.generate_many(_requests(0.2, 0.2, 0.2, 0.2),
+                                                             max_concurrency=2)]
+        assert len(results) == 4
+        assert time.monotonic() - start >= 0.4
+
+    @pytest.mark.asyncio
+    async def test_failures_reported_per_request(self, luma):
+        requests = _requests(0.05, 0.05)
+        luma.failures[requests[1].prompt] = "content policy"
+        async with _client(luma, use_cache=False) as client:
+            results = {r.index: r async for r in client.generate_many(requests)}
+        assert results[0].ok
+        assert not results[1].ok and "content policy" in results[1].error
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_generate_once(self, luma):
+        requests = _requests(0.05) * 3
+        async with _client(luma) as client:
+            results = [r async for r in client.generate_many(requests)]
+            assert {r.generation_id for r in results} == {results[0].generation_id}
+            assert luma.created == 1
+            # Completed and cached: a rerun does not poll at all
+            gets = luma.requests.get("GET", 0)
+            assert (await client.generate_and_wait("Variant 0 0.05"))["id"] == results[0].generation_id
+            assert luma.requests.get("GET", 0) == gets
+
+    @pytest.mark.asyncio
+    async def test_leaving_early_cancels_the_rest(self, luma):
+        async with _client(luma, use_cache=False) as client:
+            async for result in client.generate_many(_requests(0.05, 5, 5)):
+                break
+        assert result.index == 0
+
+    @pytest.mark.asyncio
+    async def test_poll_goes_through_the_poller(self, luma):
+        execute("UPDATE creatives SET video_url = '' WHERE id = 1")
+        async with _client(luma, use_cache=False) as client:
+            gen_id = await client.generate("Coast 0.05")
+            waiters = [asyncio.ensure_future(client.poll(gen_id, creative_id=1)) for _ in range(2)]
+            await asyncio.sleep(0)
+            waiters[0].cancel()  # leaving one wait does not cancel the other
+            result = await waiters[1]
+            await asyncio.to_thread(client.poller.flush)
+            assert client.poller.stats.completed == 1
+        assert fetch_one("SELECT video_url FROM creatives WHERE id = 1")["video_url"] == result["video_url"]
+
+    @pytest.mark.asyncio
+    async def test_status_reads_go_through_the_callers_http_client(self, luma):
+        seen = []
+
+        async def record(request):
+            seen.append((request.method, request.url.path))
+
+        async with httpx.AsyncClient(event_hooks={"request": [record]}) as http:
+            async with _client(luma, use_cache=False, http_client=http) as client:
+                result = await client.wait(GenerationRequest.normalized("Coast 0.05"))
+        assert result["state"] == "completed"
+        assert any(method == "GET" and path.endswith(result["id"]) for method, path in seen)
@@ -0,0 +1,133 @@
+"""Tests for streaming bulk import/export of campaigns and creatives."""
+
+import gzip
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from dreamtraffic.cli import cli
+from dreamtraffic.db.bulk_io import (
+    BulkImportError, detect_format, export_file, import_file, import_records, read_records,
+)
+from dreamtraffic.db.engine import fetch_all, fetch_one
+
+
+def _creatives(n, campaign_id=1):
+    return [{"campaign_id": campaign_id, "name": f"Creative {i}", "duration_seconds": 15}
+            for i in range(n)]
+
+
+class TestFormats:
+    @pytest.mark.parametrize("name, fmt", [
+        ("a.jsonl", "jsonl"), ("a.ndjson.gz", "jsonl"), ("a.CSV", "csv"), ("a.csv.gz", "csv"),
+    ])
+    def test_detect(self, tmp_path, name, fmt):
+        assert detect_format(tmp_path / name) == fmt
+
+    def test_unknown_suffix(self, tmp_path):
+        with pytest.raises(ValueError):
+            detect_format(tmp_path / "a.txt")
+
+    def test_gzip_jsonl_read(self, tmp_path):
+        path = tmp_path / "c.jsonl.gz"
+        with gzip.open(path, "wt") as f:
+            f.write('{"name": "a"}\n\n{"name": "b"}\n')
+        assert [r["name"] for r in read_records(path)] == ["a", "b"]
+
+
+class TestImport:
+    def test_chunked_commits(self, test_db):
+        result = import_records("creatives", iter(_creatives(25)), chunk_size=10)
+        assert (result.rows, result.chunks) == (25, 3)
+        row = fetch_one("SELECT * FROM creatives WHERE name = 'Creative 24'")
+        assert row["duration_seconds"] == 15 and row["approval_status"] == "draft"
+        assert row["created_at"]  # stamped by the database
+
+    def test_summaries_maintained_per_chunk(self, test_db):
+        records = [*_creatives(7), {"campaign_id": 1, "approval_status": "approved"}]
+        import_records("creatives", records, chunk_size=3)
+        import_records("creatives", [{"id": 500, "campaign_id": 1}])  # explicit id: per-row trigger
+        counts = fetch_all("SELECT approval_status, creative_count FROM campaign_status_counts")
+        assert {r["approval_status"]: r["creative_count"] for r in counts} == {"draft": 9, "approved": 1}
+        assert fetch_one("SELECT COUNT(*) AS n FROM creative_summary")["n"] == 10
+        assert fetch_one("SELECT loading FROM bulk_load_state")["loading"] == 0
+
+    def test_csv_values_coerced(self, tmp_path, test_db):
+        path = tmp_path / "campaigns.csv"
+        path.write_text("id,name,budget,flight_start\n,Spring,2500.5,2026-04-01\n")
+        import_file("campaigns", path)
+        row = fetch_one("SELECT * FROM campaigns WHERE name = 'Spring'")
+        assert row["budget"] == 2500.5 and row["id"] == 2
+
+    def test_invalid_record_stops_import(self, test_db):
+        records = [*_creatives(3), {"campaign_id": 1, "duration_seconds": "long"}]
+        with pytest.raises(BulkImportError) as exc:
+            import_records("creatives", records, chunk_size=2)
+        assert exc.value.record == 4
+        assert "duration_seconds" in str(exc.value)
+        assert fetch_one("SELECT COUNT(*) AS n FROM creatives")["n"] == 3  # seed + first chunk
+
+    def test_skip_invalid(self, test_db):
+        records = [{"name": "x", "bogus": 1}, *_creatives(2)]
+        result = import_records("creatives", records, skip_invalid=True)
+        assert (result.rows, result.skipped) == (2, 1)
+        assert "bogus" in result.errors[0]
+
+    def test_constraint_failure_rolls_back_chunk(self, test_db):
+        records = [*_creatives(2), *_creatives(2, campaign_id=999)]
+        with pytest.raises(BulkImportError) as exc:
+            import_records("creatives", records, chunk_size=2)
+        assert exc.value.record == 3
+        assert fetch_one("SELECT COUNT(*) AS n FROM creatives")["n"] == 3
+
+    def test_constraint_failure_rolls_back_valid_rows_of_default_chunk(self, test_db):
+        records = [*_creatives(5), *_creatives(1, campaign_id=999)]
+        with pytest.raises(BulkImportError, match="chunk of 6 rolled back"):
+            import_records("creatives", records)
+        assert fetch_one("SELECT COUNT(*) AS n FROM creatives")["n"] == 1  # seed only
+
+
+class TestExport:
+    @pytest.mark.parametrize("name", ["creatives.jsonl", "creatives.csv.gz"])
+    def test_round_trip(self, tmp_path, test_db, name):
+        import_records("creatives", _creatives(5))
+        path = tmp_path / name
+        assert export_file("creatives", path) == 6
+        exported = list(read_records(path))
+        assert exported[0]["name"] == "Test Creative"
+
+        for record in exported:
+            record["id"] = ""  # re-import as new rows
+        result = import_records("creatives", exported)
+        assert result.rows == 6
+        names = [r["name"] for r in fetch_all("SELECT name FROM creatives ORDER BY id")]
+        assert names[6:] == names[:6]
+
+    def test_campaign_filter(self, tmp_path, test_db):
+        import_records("campaigns", [{"name": "Other"}])
+        import_records("creatives", _creatives(2, campaign_id=2))
+        path = tmp_path / "c.jsonl"
+        assert export_file("creatives", path, campaign_id=2) == 2
+        assert {json.loads(line)["campaign_id"] for line in path.read_text().splitlines()} == {2}
+
+
+class TestCommands:
+    def test_import_then_export(self, tmp_path, test_db):
+        source = tmp_path / "in.jsonl"
+        source.write_text("".join(json.dumps(r) + "\n" for r in _creatives(3)))
+        result = CliRunner().invoke(cli, ["import", "creatives", str(source), "--chunk-size", "2"])
+        assert result.exit_code == 0, result.output
+        assert "Imported 3 creatives in 2 chunk(s)" in result.output
+
+        target = tmp_path / "out.csv"
+        result = CliRunner().invoke(cli, ["export", "creatives", str(target)])
+        assert result.exit_code == 0
+        assert len(target.read_text().splitlines()) == 5  # header + seed + 3
+
+    def test_import_error_reported(self, tmp_path, test_db):
+        source = tmp_path / "in.jsonl"
+        source.write_text('{"nope": 1}\n')
+        result = CliRunner().invoke(cli, ["import", "campaigns", str(source)])
+        assert result.exit_code != 0
+        assert "record 1" in result.output
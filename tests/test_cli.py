@@ -29,3 +29,11 @@ class TestCLI:
         # The fixture seeds a campaign, so we should see it
         result = self.runner.invoke(cli, ["status"])
         assert result.exit_code == 0
+
+    def test_queue_generation_and_list_jobs(self, test_db):
+        result = self.runner.invoke(cli, ["generate", "--campaign-id", "1", "--prompt", "Aerial coastline", "--queue"])
+        assert result.exit_code == 0
+        assert "Queued generation job 1" in result.output
+        result = self.runner.invoke(cli, ["jobs"])
+        assert result.exit_code == 0
+        assert "queued: 1" in result.output
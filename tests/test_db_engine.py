@@ -0,0 +1,284 @@
+"""Tests for the SQLite connection pool and query helpers."""
+
+import sqlite3
+import threading
+
+import pytest
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.engine import (
+    ConnectionPool, execute, executemany, fetch_all, fetch_iter, fetch_one, snapshot, transaction,
+)
+from dreamtraffic.db.models import SupplyPath, TraffickingRecord
+from dreamtraffic.db.reporting import pipeline_status
+
+
+class TestConnectionPool:
+    def test_connection_reused_after_release(self, tmp_path):
+        pool = ConnectionPool(tmp_path / "pool.db", size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        assert first is second
+        assert pool.stats().created == 1
+        assert pool.stats().checkouts == 2
+        pool.close()
+
+    def test_nested_checkout_reuses_thread_connection(self, tmp_path):
+        pool = ConnectionPool(tmp_path / "pool.db", size=1)
+        with pool.connection() as outer:
+            with pool.connection() as inner:
+                assert inner is outer
+        assert pool.stats().in_use == 0
+        pool.close()
+
+    def test_exhausted_pool_times_out(self, tmp_path):
+        pool = ConnectionPool(tmp_path / "pool.db", size=1, timeout=0.05)
+        conn = pool.acquire()
+        with pytest.raises(TimeoutError, match="waiting for a connection"):
+            pool.acquire()
+        pool.release(conn)
+        stats = pool.stats()
+        assert stats.timeouts == 1
+        assert stats.idle == 1
+        pool.close()
+
+    def test_waiters_are_counted(self, tmp_path):
+        pool = ConnectionPool(tmp_path / "pool.db", size=1)
+        conn = pool.acquire()
+        acquired = threading.Event()
+
+        def worker():
+            c = pool.acquire()
+            acquired.set()
+            pool.release(c)
+
+        t = threading.Thread(target=worker)
+        t.start()
+        assert not acquired.wait(0.05)
+        pool.release(conn)
+        t.join(timeout=2)
+        stats = pool.stats()
+        assert acquired.is_set()
+        assert stats.waits == 1
+        assert stats.max_wait_seconds > 0
+        assert stats.avg_wait_ms > 0
+        pool.close()
+
+    def test_invalid_size(self, tmp_path):
+        with pytest.raises(ValueError, match="at least 1"):
+            ConnectionPool(tmp_path / "pool.db", size=0)
+
+    def test_wal_mode(self, tmp_path):
+        pool = ConnectionPool(tmp_path / "pool.db")
+        with pool.connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        pool.close()
+
+
+class TestQueryHelpers:
+    def test_execute_and_fetch(self, test_db):
+        cursor = execute(
+            "INSERT INTO campaigns (name, advertiser) VALUES (?, ?)",
+            ("Pool Campaign", "Acme"),
+        )
+        row = fetch_one("SELECT * FROM campaigns WHERE id = ?", (cursor.lastrowid,))
+        assert row["name"] == "Pool Campaign"
+        assert len(fetch_all("SELECT * FROM campaigns")) == 2
+
+    def test_execute_reads_returning_rows_before_release(self, test_db):
+        result = execute("INSERT INTO campaigns (name) VALUES ('Returned') RETURNING id, name")
+        assert [tuple(r) for r in result.rows] == [(result.lastrowid, "Returned")]
+        assert engine.pool_stats().in_use == 0
+
+    def test_deprecated_get_connection(self, test_db):
+        with pytest.deprecated_call():
+            conn = engine.get_connection()
+        with pytest.deprecated_call():
+            assert engine.get_connection() is conn
+        with engine.connection() as held:
+            assert held is conn
+        assert conn.execute("SELECT name FROM campaigns").fetchone()[0] == "Test Campaign"
+        assert engine.pool_stats().in_use == 1
+        with pytest.deprecated_call():
+            engine.close_connection()
+        assert engine._pools == {}
+
+    def test_concurrent_readers_and_writers(self, test_db):
+        errors = []
+
+        def writer(n):
+            try:
+                for i in range(20):
+                    execute(
+                        "INSERT INTO approval_events (creative_id, from_status, to_status) "
+                        "VALUES (1, 'draft', ?)",
+                        (f"w{n}-{i}",),
+                    )
+            except Exception as exc:  # pragma: no cover - surfaced by assertion
+                errors.append(exc)
+
+        def reader():
+            try:
+                for _ in range(20):
+                    fetch_all("SELECT * FROM approval_events WHERE creative_id = 1")
+            except Exception as exc:  # pragma: no cover - surfaced by assertion
+                errors.append(exc)
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+        threads += [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert errors == []
+        count = fetch_one("SELECT COUNT(*) AS n FROM approval_events")["n"]
+        assert count == 80
+        stats = engine.pool_stats()
+        assert stats.created <= stats.size
+        assert stats.in_use == 0
+
+
+class TestTransactions:
+    def test_transaction_commits_once(self, test_db):
+        with transaction():
+            execute("INSERT INTO campaigns (name) VALUES ('A')")
+            execute("INSERT INTO campaigns (name) VALUES ('B')")
+        assert fetch_one("SELECT COUNT(*) AS n FROM campaigns")["n"] == 3
+
+    def test_transaction_rolls_back_on_error(self, test_db):
+        with pytest.raises(RuntimeError):
+            with transaction():
+                execute("INSERT INTO campaigns (name) VALUES ('A')")
+                raise RuntimeError("boom")
+        assert fetch_one("SELECT COUNT(*) AS n FROM campaigns")["n"] == 1
+
+    def test_nested_transaction_is_savepoint(self, test_db):
+        with transaction():
+            execute("INSERT INTO campaigns (name) VALUES ('outer')")
+            with pytest.raises(RuntimeError):
+                with transaction():
+                    execute("INSERT INTO campaigns (name) VALUES ('inner')")
+                    raise RuntimeError("boom")
+        names = [r["name"] for r in fetch_all("SELECT name FROM campaigns ORDER BY id")]
+        assert names == ["Test Campaign", "outer"]
+
+    def test_uncommitted_writes_invisible_to_other_threads(self, test_db):
+        seen = []
+        with transaction():
+            execute("INSERT INTO campaigns (name) VALUES ('pending')")
+            t = threading.Thread(
+                target=lambda: seen.append(fetch_one("SELECT COUNT(*) AS n FROM campaigns")["n"])
+            )
+            t.start()
+            t.join()
+        assert seen == [1]
+        assert fetch_one("SELECT COUNT(*) AS n FROM campaigns")["n"] == 2
+
+    def test_executemany(self, test_db):
+        count = executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp) VALUES (?, ?)",
+            [(1, f"dsp-{i}") for i in range(100)],
+        )
+        assert count == 100
+        assert fetch_one("SELECT COUNT(*) AS n FROM trafficking_records")["n"] == 100
+
+
+class TestFetchIter:
+    def test_yields_dicts_like_fetch_all(self, test_db):
+        sql = "SELECT * FROM supply_paths ORDER BY id"
+        assert list(fetch_iter(sql, arraysize=3)) == fetch_all(sql)
+
+    def test_builds_slotted_models(self, test_db):
+        paths = list(fetch_iter("SELECT * FROM supply_paths ORDER BY id", model=SupplyPath))
+        assert paths and all(isinstance(p, SupplyPath) for p in paths)
+        assert not hasattr(paths[0], "__dict__")
+        assert paths[0].id == 1 and paths[0].dsp
+
+    def test_column_subset_maps_by_name(self, test_db):
+        executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp) VALUES (?, ?)",
+            [(1, "amazon"), (1, "dv360")],
+        )
+        rows = list(fetch_iter(
+            "SELECT dsp, creative_id FROM trafficking_records ORDER BY id",
+            model=TraffickingRecord,
+        ))
+        assert [(r.dsp, r.creative_id, r.id) for r in rows] == [("amazon", 1, None), ("dv360", 1, None)]
+
+    def test_unknown_column_rejected(self, test_db):
+        with pytest.raises(ValueError, match="no field"):
+            next(fetch_iter("SELECT 1 AS bogus", model=SupplyPath))
+
+    def test_streams_in_batches(self, test_db):
+        executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp) VALUES (?, ?)",
+            [(1, f"dsp-{i}") for i in range(25)],
+        )
+        rows = fetch_iter("SELECT dsp FROM trafficking_records ORDER BY id", arraysize=10)
+        assert next(rows) == {"dsp": "dsp-0"}
+        assert engine.pool_stats().in_use == 1
+        assert sum(1 for _ in rows) == 24
+
+    def test_closing_early_releases_connection(self, test_db):
+        rows = fetch_iter("SELECT * FROM supply_paths", arraysize=1)
+        next(rows)
+        rows.close()
+        assert engine.pool_stats().in_use == 0
+
+
+    def test_interleaved_iterators_use_their_own_connections(self, test_db):
+        first = fetch_iter("SELECT id FROM supply_paths ORDER BY id", arraysize=1)
+        second = fetch_iter("SELECT id FROM supply_paths ORDER BY id", arraysize=1)
+        assert next(first) == next(second) == {"id": 1}
+        assert engine.pool_stats().in_use == 2
+        # Neither suspended iterator is the thread's connection
+        assert getattr(engine.get_pool()._local, "conn", None) is None
+        assert sum(1 for _ in first) == sum(1 for _ in second)
+        assert engine.pool_stats().in_use == 0
+
+    def test_reads_through_the_open_transaction(self, test_db):
+        with transaction():
+            execute("INSERT INTO campaigns (name) VALUES ('Uncommitted')")
+            names = [r["name"] for r in fetch_iter("SELECT name FROM campaigns ORDER BY id")]
+            assert engine.pool_stats().in_use == 1
+        assert names[-1] == "Uncommitted"
+
+
+class TestSnapshot:
+    def _insert_from_other_thread(self, name):
+        t = threading.Thread(target=execute, args=("INSERT INTO campaigns (name) VALUES (?)", (name,)))
+        t.start()
+        t.join()
+
+    @pytest.mark.parametrize("copy", [False, True])
+    def test_reads_frozen_while_writers_commit(self, test_db, copy):
+        with snapshot(copy=copy):
+            self._insert_from_other_thread("during")
+            assert fetch_one("SELECT COUNT(*) AS n FROM campaigns")["n"] == 1
+            assert pipeline_status().total_campaigns == 1
+        assert fetch_one("SELECT COUNT(*) AS n FROM campaigns")["n"] == 2
+
+    @pytest.mark.parametrize("copy", [False, True])
+    def test_writes_rejected(self, test_db, copy):
+        with snapshot(copy=copy):
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                execute("INSERT INTO campaigns (name) VALUES ('x')")
+
+    def test_restores_thread_connection(self, test_db):
+        with engine.connection() as held:
+            with snapshot() as snap:
+                assert snap is not held
+                with engine.connection() as conn:
+                    assert conn is snap
+            with engine.connection() as conn:
+                assert conn is held
+        assert engine.pool_stats().in_use == 0
+
+    def test_refused_inside_transaction(self, test_db):
+        with transaction():
+            with pytest.raises(RuntimeError):
+                with snapshot():
+                    pass
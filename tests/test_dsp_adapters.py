@@ -7,6 +7,7 @@ from dreamtraffic.dsp.amazon import AmazonDSPAdapter
 from dreamtraffic.dsp.thetradedesk import TTDAdapter
 from dreamtraffic.dsp.dv360 import DV360Adapter
 from dreamtraffic.dsp.challenger import StackAdaptAdapter, AdelphicAdapter
+from dreamtraffic.media.assets import Asset
 
 
 UPLOAD_KWARGS = {
@@ -61,6 +62,12 @@ class TestAmazonDSP:
         result = AmazonDSPAdapter().upload_creative(**kwargs)
         assert result.placement_type == "stv"
 
+    def test_uploads_the_local_file(self, tmp_path):
+        asset = Asset(sha256="ab" * 32, size=1024, path=tmp_path / "v.mp4", last_access=0.0)
+        result = AmazonDSPAdapter().upload_creative(**UPLOAD_KWARGS, asset=asset)
+        assert result.request_payload["videoAsset"]["fileSha256"] == asset.sha256
+        assert result.video_sha256 == asset.sha256
+
     def test_request_payload_structure(self):
         result = AmazonDSPAdapter().upload_creative(**UPLOAD_KWARGS)
         payload = result.request_payload
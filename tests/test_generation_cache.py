@@ -0,0 +1,150 @@
+"""Tests for the Luma generation cache — mocked SDK, real SQLite."""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dreamtraffic.db.engine import execute, fetch_all, fetch_one, get_pool
+from dreamtraffic.luma.cache import GenerationCache, GenerationRequest
+from dreamtraffic.luma.client import LumaClient
+
+
+@pytest.fixture
+def sdk():
+    with patch("dreamtraffic.luma.client.LumaAI") as mock_luma_class:
+        mock_client = MagicMock()
+        mock_luma_class.return_value = mock_client
+        ids = iter(f"gen-{i}" for i in range(100))
+        mock_client.generations.create.side_effect = lambda **kw: MagicMock(id=next(ids))
+        yield mock_client
+
+
+def _client(**cache_options):
+    return LumaClient(
+        api_key="test-key",
+        cache=GenerationCache(get_pool(), **cache_options),
+        poller_options={"render_seconds": {}},  # first check right away
+    )
+
+
+def _completed(url="https://cdn.luma.example/out.mp4"):
+    gen = MagicMock(id="gen-0", state="completed")
+    gen.assets.video = url
+    gen.assets.thumbnail = "https://cdn.luma.example/thumb.jpg"
+    return gen
+
+
+class TestGenerationRequest:
+    def test_normalized_requests_share_a_key(self):
+        a = GenerationRequest.normalized("A drone  shot\nover the coast ", duration="5", resolution="1080P")
+        b = GenerationRequest.normalized("A drone shot over the coast")
+        assert a == b and a.key == b.key
+
+    @pytest.mark.parametrize("change", [
+        {"prompt": "A drone shot over the sea"}, {"model": "ray-flash-2"}, {"resolution": "720p"},
+        {"duration": "9s"}, {"aspect_ratio": "9:16"}, {"loop": True},
+    ])
+    def test_any_parameter_changes_the_key(self, change):
+        base = {"prompt": "A drone shot over the coast"}
+        prompt = {**base, **change}.pop("prompt")
+        options = {k: v for k, v in change.items() if k != "prompt"}
+        assert GenerationRequest.normalized(prompt, **options).key != GenerationRequest(**base).key
+
+
+class TestGenerationCache:
+    def test_identical_request_reuses_generation(self, sdk):
+        client = _client()
+        assert client.generate("A drone shot") == client.generate(" A drone   shot", duration="5") == "gen-0"
+        assert sdk.generations.create.call_count == 1
+        assert (client.cache.stats.hits, client.cache.stats.misses) == (1, 1)
+        assert fetch_one("SELECT hits FROM generation_cache")["hits"] == 1
+
+    def test_completed_generation_returns_instantly(self, sdk):
+        client = _client()
+        sdk.generations.get.return_value = _completed()
+        first = client.generate_and_wait("A drone shot")
+        sdk.generations.get.reset_mock()
+
+        assert client.generate_and_wait("A drone shot") == first
+        sdk.generations.get.assert_not_called()
+        assert first["video_url"] == "https://cdn.luma.example/out.mp4"
+
+    def test_failed_generation_is_dropped(self, sdk):
+        client = _client()
+        sdk.generations.get.return_value = MagicMock(state="failed", failure_reason="policy")
+        with pytest.raises(RuntimeError):
+            client.generate_and_wait("A drone shot")
+        assert client.generate("A drone shot") == "gen-1"
+
+    def test_concurrent_callers_share_in_flight_generation(self, sdk):
+        client = _client()
+        create = sdk.generations.create.side_effect
+        sdk.generations.create.side_effect = lambda **kw: (time.sleep(0.2), create(**kw))[1]
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(client.generate("Same"))) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert results == ["gen-0"] * 4
+        assert sdk.generations.create.call_count == 1
+        stats = client.cache.stats
+        assert stats.misses == 1 and stats.hits + stats.shared == 3
+
+    def test_create_error_is_not_cached(self, sdk):
+        client = _client()
+        sdk.generations.create.side_effect = ConnectionError("down")
+        with pytest.raises(ConnectionError):
+            client.generate("Same")
+        assert fetch_one("SELECT COUNT(*) AS n FROM generation_cache")["n"] == 0
+
+    def test_refresh_and_disabled_cache_start_new_generations(self, sdk):
+        client = _client()
+        client.generate("A drone shot")
+        assert client.generate("A drone shot", refresh=True) == "gen-1"
+        assert client.generate("A drone shot") == "gen-1"
+        uncached = LumaClient(api_key="test-key", use_cache=False)
+        assert uncached.generate("A drone shot") == "gen-2"
+        assert uncached.cache is None
+
+    def test_expired_entries_miss(self, sdk):
+        client = _client(ttl=3600)
+        client.generate("A drone shot")
+        execute("UPDATE generation_cache SET created_at = datetime('now', '-2 hours')")
+        assert client.generate("A drone shot") == "gen-1"
+        assert client.cache.evict() == 0  # replaced in place
+
+    @pytest.mark.parametrize("eviction, kept", [("lru", {"a", "c"}), ("fifo", {"b", "c"})])
+    def test_size_limit_evicts_by_policy(self, sdk, eviction, kept):
+        client = _client(max_entries=2, eviction=eviction)
+        client.generate("a")
+        execute("UPDATE generation_cache SET created_at = datetime('now', '-1 minute'), "
+                "last_used_at = datetime('now', '-1 minute')")
+        client.generate("b")
+        execute("UPDATE generation_cache SET last_used_at = datetime('now', '-2 minutes') WHERE prompt = 'b'")
+        client.generate("a")  # hit: "a" is now the most recently used
+        client.generate("c")
+        assert {r["prompt"] for r in fetch_all("SELECT prompt FROM generation_cache")} == kept
+        assert client.cache.stats.evictions == 1
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            GenerationCache(get_pool(), eviction="random")
+
+
+class TestGenerateVideoTool:
+    @pytest.mark.asyncio
+    async def test_reuses_completed_generation(self, sdk):
+        from dreamtraffic.luma.async_client import AsyncLumaClient
+        from dreamtraffic.tools.luma import generate_video
+
+        sdk.generations.get.return_value = _completed()
+        _client().generate_and_wait("A drone shot")  # sync client fills the shared cache
+        async with AsyncLumaClient(api_key="test-key") as client:
+            with patch("dreamtraffic.tools.luma._luma", return_value=client):
+                result = await generate_video.handler({"prompt": "A drone shot", "campaign_id": 1})
+        assert "Reused completed generation gen-0" in result["content"][0]["text"]
+        row = fetch_one("SELECT video_url FROM creatives WHERE luma_generation_id = 'gen-0'")
+        assert row["video_url"] == "https://cdn.luma.example/out.mp4"
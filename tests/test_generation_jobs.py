@@ -0,0 +1,177 @@
+"""Tests for the persistent generation job queue and its worker pool — stand-in Luma API and CDN."""
+
+import os
+import time
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.engine import execute, fetch_one
+from dreamtraffic.db.postgrest_stand_in import PostgRESTStandIn
+from dreamtraffic.db.remote_store import RemoteStore
+from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.jobs import JobQueue, JobState, LeaseLost
+from dreamtraffic.luma.stand_in import LumaStandIn
+from dreamtraffic.luma.worker import GenerationWorkers
+from dreamtraffic.media.stand_in import MediaStandIn
+
+FAST = {"min_interval": 0.02, "max_interval": 0.1, "render_seconds": {}, "flush_interval": 0.05}
+VIDEO = os.urandom(64 << 10)
+
+
+@pytest.fixture
+def cdn():
+    with MediaStandIn() as server:
+        server.default = VIDEO
+        yield server
+
+
+@pytest.fixture
+def luma(cdn):
+    with LumaStandIn(render_seconds=0.1, asset_base=cdn.url) as server:
+        yield server
+
+
+@pytest.fixture
+def client(luma):
+    with LumaClient(api_key="test-key", base_url=luma.url, use_cache=False, poller_options=FAST) as c:
+        yield c
+
+
+@pytest.fixture
+def queue():
+    return JobQueue(lease_seconds=30, retry_backoff=0)
+
+
+def new_creative(prompt="A test video prompt", generation_id=""):
+    return execute(
+        "INSERT INTO creatives (campaign_id, prompt, luma_generation_id) VALUES (1, ?, ?)",
+        (prompt, generation_id),
+    ).lastrowid
+
+
+def expire(job_id):
+    execute("UPDATE generation_jobs SET lease_expires = ? WHERE id = ?", (time.time() - 1, job_id))
+
+
+class TestJobQueue:
+    def test_claim_leases_one_job_to_one_owner(self, queue):
+        job = queue.enqueue("Coastline at dawn", creative_id=1, model="ray2")
+        assert job.params == {"model": "ray2"} and job.state == "queued"
+        claimed = queue.claim("a")
+        assert (claimed.id, claimed.lease_owner, claimed.attempts) == (job.id, "a", 0)
+        assert queue.claim("b") is None
+        with pytest.raises(LeaseLost):
+            queue.advance(claimed, "b", JobState.SUBMITTED, generation_id="gen-1")
+        assert queue.advance(claimed, "a", JobState.SUBMITTED, generation_id="gen-1").generation_id == "gen-1"
+
+    def test_expired_lease_is_taken_over_and_counts_an_attempt(self, queue):
+        job = queue.enqueue("Coastline at dawn")
+        queue.claim("dead")
+        expire(job.id)
+        assert queue.reclaim() == 1
+        assert queue.get(job.id).lease_owner is None
+        taken = queue.claim("b")
+        assert (taken.lease_owner, taken.attempts) == ("b", 1)
+
+    def test_heartbeat_keeps_the_lease(self, queue):
+        job = queue.enqueue("Coastline at dawn")
+        queue.claim("a")
+        expire(job.id)
+        assert queue.heartbeat("a") == 1
+        assert queue.claim("b") is None
+
+    def test_in_flight_jobs_are_claimed_before_queued(self, queue):
+        queue.enqueue("older, still queued")
+        polling = queue.enqueue("newer, already polling")
+        execute("UPDATE generation_jobs SET state = 'polling', generation_id = 'gen-2' WHERE id = ?", (polling.id,))
+        assert queue.claim("a").id == polling.id
+
+    def test_retry_backs_off_then_fails(self):
+        queue = JobQueue(retry_backoff=60)
+        job = queue.enqueue("Coastline at dawn", max_attempts=2)
+        job = queue.advance(queue.claim("a"), "a", JobState.SUBMITTED, generation_id="gen-1")
+        job = queue.retry(job, "a", "boom", restart=True)
+        assert (job.state, job.generation_id, job.attempts, job.error) == ("queued", "", 1, "boom")
+        assert job.available_at > time.time() + 50 and queue.claim("a") is None
+        execute("UPDATE generation_jobs SET available_at = 0")
+        job = queue.retry(queue.claim("a"), "a", "boom again")
+        assert (job.state, job.attempts, job.lease_owner) == ("failed", 2, None)
+        assert queue.counts()["failed"] == 1 and queue.unfinished() == 0
+
+
+class TestGenerationWorkers:
+    def test_jobs_run_to_completion(self, client, luma, queue):
+        creatives = [new_creative(f"Variant {i}") for i in range(6)]
+        jobs = [queue.enqueue(f"Variant {i}", creative_id=c) for i, c in enumerate(creatives)]
+        with GenerationWorkers(client, queue, workers=3, idle_interval=0.02) as workers:
+            assert workers.wait_idle(timeout=30)
+        assert workers.stats.done == 6 and luma.created == 6
+        for job, creative_id in zip(jobs, creatives):
+            job = queue.get(job.id)
+            assert job.state == "done" and job.lease_owner is None and job.asset_sha256
+            row = fetch_one("SELECT video_url, luma_generation_id FROM creatives WHERE id = ?", (creative_id,))
+            assert row["video_url"] == job.video_url and job.video_url.endswith(f"{job.generation_id}.mp4")
+
+    def test_restart_resumes_polling_without_resubmitting(self, client, luma, queue):
+        creative_id = new_creative()
+        job = queue.enqueue("A test video prompt", creative_id=creative_id)
+        # A worker that died after Luma accepted the generation
+        generation_id = client.generate("A test video prompt")
+        queue.advance(queue.claim("dead"), "dead", JobState.POLLING, generation_id=generation_id)
+        expire(job.id)
+
+        with GenerationWorkers(client, queue, workers=2, idle_interval=0.02) as workers:
+            assert workers.wait_idle(timeout=30)
+        assert (workers.stats.reclaimed, workers.stats.resumed, workers.stats.submitted) == (1, 1, 0)
+        assert luma.created == 1
+        job = queue.get(job.id)
+        assert (job.state, job.generation_id, job.attempts) == ("done", generation_id, 1)
+
+    def test_failed_generation_is_retried_as_a_new_one(self, client, luma, queue):
+        luma.failures["Doomed"] = "moderation"
+        job = queue.enqueue("Doomed", max_attempts=2)
+        with GenerationWorkers(client, queue, workers=1, idle_interval=0.02) as workers:
+            assert workers.wait_idle(timeout=30)
+        job = queue.get(job.id)
+        assert job.state == "failed" and "moderation" in job.error
+        assert luma.created == 2 and workers.stats.failed == 1
+
+    def test_orphaned_creatives_are_adopted(self, client, luma, queue):
+        creative_id = new_creative(generation_id=client.generate("Orphan"))
+        with GenerationWorkers(client, queue, workers=1, idle_interval=0.02, adopt_orphans=True) as workers:
+            assert workers.wait_idle(timeout=30)
+        assert workers.stats.adopted == 1
+        assert fetch_one("SELECT video_url FROM creatives WHERE id = ?", (creative_id,))["video_url"]
+        assert queue.adopt_orphans() == []
+
+    def test_orphans_are_found_through_the_remote_store(self, queue):
+        with PostgRESTStandIn() as server:
+            store = RemoteStore(server.url, backoff=0.001)
+            campaign = store.insert_campaign(name="Remote")
+            store.insert_creative(campaign_id=campaign["id"], prompt="Done", luma_generation_id="gen-done",
+                                  video_url="https://cdn.luma.example/done.mp4")
+            store.insert_creative(campaign_id=campaign["id"], prompt="Remote orphan", luma_generation_id="gen-remote")
+            store.insert_creative(campaign_id=campaign["id"], prompt="Never sent")
+            previous = supabase_client.set_backend(store)
+            try:
+                adopted = queue.adopt_orphans()
+                assert queue.adopt_orphans() == []
+            finally:
+                supabase_client.set_backend(previous)
+                store.close()
+        # Creative 2 exists only remotely
+        assert [(j.creative_id, j.generation_id, j.state, j.prompt) for j in adopted] == [
+            (2, "gen-remote", "submitted", "Remote orphan"),
+        ]
+
+    def test_stop_gives_jobs_back_unused(self, client, luma, queue):
+        luma.render_seconds = 60
+        job = queue.enqueue("Slow render")
+        workers = GenerationWorkers(client, queue, workers=1, idle_interval=0.02).start()
+        deadline = time.monotonic() + 10
+        while queue.get(job.id).state != "polling" and time.monotonic() < deadline:
+            time.sleep(0.02)
+        workers.stop()
+        job = queue.get(job.id)
+        assert (job.state, job.lease_owner, job.attempts) == ("polling", None, 0)
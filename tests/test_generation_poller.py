@@ -0,0 +1,127 @@
+"""Tests for the shared GenerationPoller — stand-in Luma API, real SQLite."""
+
+import random
+import threading
+import time
+
+import pytest
+
+from dreamtraffic.db.engine import execute, fetch_all, fetch_one, get_pool
+from dreamtraffic.luma.cache import GenerationCache, GenerationRequest
+from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.poller import GenerationPoller, _Watch
+from dreamtraffic.luma.stand_in import LumaStandIn
+
+FAST = {"min_interval": 0.02, "max_interval": 0.1, "render_seconds": {}, "flush_interval": 0.05}
+
+
+@pytest.fixture
+def luma():
+    with LumaStandIn(render_seconds=lambda body: float(body["prompt"].split()[-1])) as server:
+        yield server
+
+
+@pytest.fixture
+def client(luma):
+    with LumaClient(api_key="test-key", base_url=luma.url, use_cache=False, poller_options=FAST) as c:
+        yield c
+
+
+def _watch(checks=0, started_at=None, model="ray2"):
+    return _Watch("gen", model, started_at, 0.0, 1e9, None, checks=checks)
+
+
+class TestSchedule:
+    def test_first_check_waits_for_the_models_render_time(self):
+        poller = GenerationPoller(lambda _: None, min_interval=2, max_interval=30,
+                                  render_seconds={"ray2": 40, "ray-flash-2": 15})
+        assert poller.delay(_watch(started_at=100.0), now=100.0) == 30  # capped at max_interval
+        assert poller.delay(_watch(started_at=100.0, model="ray-flash-2"), now=105.0) == 10
+        assert poller.delay(_watch(started_at=0.0), now=100.0) == 0  # already overdue
+        assert poller.delay(_watch(), now=100.0) == 0  # start unknown: check now
+
+    def test_backoff_grows_to_the_cap(self):
+        poller = GenerationPoller(lambda _: None, min_interval=2, max_interval=30, backoff=2)
+        assert [poller.delay(_watch(checks=n), now=0.0) for n in range(1, 7)] == [2, 4, 8, 16, 30, 30]
+
+    def test_jitter_spreads_checks(self):
+        poller = GenerationPoller(lambda _: None, min_interval=10, max_interval=10, jitter=0.2,
+                                  rng=random.Random(1))
+        watch = _watch(checks=1)
+        for _ in range(20):
+            poller._schedule(watch, now=0.0)
+        due = [d for d, _, _ in poller._due]
+        assert all(8 <= d <= 12 for d in due) and len(set(due)) == 20
+
+
+class TestGenerationPoller:
+    def test_many_generations_share_one_scheduler(self, client, luma):
+        before = set(threading.enumerate())
+        ids = [client.generate(f"Variant {i} {0.05 * (i % 4)}") for i in range(60)]
+        futures = [client.watch(g) for g in ids]
+        results = [f.result(timeout=10) for f in futures]
+        assert [r["id"] for r in results] == ids
+        assert all(r["state"] == "completed" and r["video_url"] for r in results)
+        # One scheduler thread plus the worker pool, not one thread per generation
+        pollers = [t for t in set(threading.enumerate()) - before if t.name.startswith("luma-poll")]
+        assert len(pollers) <= 1 + 8
+
+    def test_video_urls_written_back_in_batches(self, client, luma):
+        campaign_id = 1
+        ids = [client.generate(f"Spot {i} 0.05") for i in range(30)]
+        for g in ids:
+            execute("INSERT INTO creatives (campaign_id, luma_generation_id) VALUES (?, ?)", (campaign_id, g))
+        for g in ids:
+            client.watch(g)
+        assert client.poller.drain(timeout=10)
+        rows = fetch_all("SELECT luma_generation_id, video_url FROM creatives WHERE luma_generation_id LIKE '%-%-%'")
+        assert {r["luma_generation_id"] for r in rows if r["video_url"].endswith(".mp4")} >= set(ids)
+        stats = client.poller.stats
+        assert stats.written == 30
+        assert stats.flushes < 30
+
+    def test_creative_id_receives_the_url(self, client, luma):
+        gen_id = client.generate("Hero 0.02")
+        result = client.poll(gen_id, creative_id=1)
+        client.poller.flush()
+        assert fetch_one("SELECT video_url FROM creatives WHERE id = 1")["video_url"] == result["video_url"]
+
+    def test_watching_twice_shares_the_future(self, client, luma):
+        gen_id = client.generate("Hero 0.05")
+        assert client.watch(gen_id) is client.watch(gen_id)
+
+    def test_failure_and_timeout(self, client, luma):
+        luma.failures["Bad 0.02"] = "content policy"
+        with pytest.raises(RuntimeError, match="content policy"):
+            client.poll(client.generate("Bad 0.02"))
+        with pytest.raises(TimeoutError):
+            client.poll(client.generate("Slow 60"), timeout=0.2)
+
+    def test_transient_errors_are_retried(self, client, luma):
+        gen_id = client.generate("Hero 0.02")
+        luma.fail_next(3, status=400)  # not retried by the SDK itself
+        assert client.poll(gen_id, timeout=5)["state"] == "completed"
+
+    def test_completion_recorded_in_cache(self, luma):
+        cache = GenerationCache(get_pool())
+        with LumaClient(api_key="test-key", base_url=luma.url, cache=cache, poller_options=FAST) as c:
+            c.generate_and_wait("Cached 0.02")
+            gets = luma.requests["GET"]
+            assert c.generate_and_wait("Cached 0.02")["video_url"]
+            assert luma.requests["GET"] == gets
+        assert cache.lookup(GenerationRequest.normalized("Cached 0.02")).completed
+
+    def test_close_cancels_pending(self, luma):
+        c = LumaClient(api_key="test-key", base_url=luma.url, use_cache=False, poller_options=FAST)
+        future = c.watch(c.generate("Slow 60"))
+        c.close()
+        assert future.cancelled()
+
+    def test_requests_back_off(self, luma):
+        with LumaClient(api_key="test-key", base_url=luma.url, use_cache=False,
+                        poller_options={**FAST, "max_interval": 1, "backoff": 2, "jitter": 0}) as c:
+            gen_id = c.generate("Slow 1.2")
+            start = time.monotonic()
+            c.poll(gen_id, timeout=5)
+        # 0.02 * 2**n gaps reach 1.2s in about six checks, not sixty
+        assert luma.requests["GET"] <= 9 and time.monotonic() - start < 3
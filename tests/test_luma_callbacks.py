@@ -0,0 +1,114 @@
+"""Tests for Luma completion callbacks — receiver, poller notify, and the stand-in's callbacks."""
+
+import time
+
+import httpx
+import pytest
+
+from dreamtraffic.db.engine import execute, fetch_one
+from dreamtraffic.luma.callbacks import CallbackReceiver
+from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.poller import GenerationFailed, GenerationPoller
+from dreamtraffic.luma.stand_in import LumaStandIn
+
+FAST = {"min_interval": 0.02, "max_interval": 0.1, "render_seconds": {}, "flush_interval": 0.05}
+
+
+@pytest.fixture
+def receiver():
+    with CallbackReceiver(port=0) as r:
+        yield r
+
+
+@pytest.fixture
+def luma():
+    with LumaStandIn(render_seconds=0.2, callback_delay=0.05) as server:
+        yield server
+
+
+def client_for(luma, receiver, sweep_interval=30.0):
+    return LumaClient(
+        api_key="test-key", base_url=luma.url, use_cache=False,
+        poller_options={**FAST, "sweep_interval": sweep_interval}, callback_receiver=receiver,
+    )
+
+
+def completed(generation_id, video="https://cdn.luma.example/v.mp4"):
+    return {"id": generation_id, "state": "completed", "assets": {"video": video}}
+
+
+class TestReceiver:
+    def test_rejects_bad_requests(self, receiver):
+        seen = []
+        receiver.subscribe(seen.append)
+        base = f"http://{receiver.host}:{receiver.port}{receiver.callback_path}"
+        with httpx.Client() as http:
+            assert http.post(f"{base}?token=wrong", json=completed("gen-1")).status_code == 401
+            assert http.post(receiver.callback_url, content=b"{not json").status_code == 400
+            assert http.post(receiver.callback_url, json={"state": "completed"}).status_code == 400
+            assert http.get(receiver.callback_url).status_code == 405
+            assert http.post(f"http://{receiver.host}:{receiver.port}/elsewhere", json={}).status_code == 404
+            assert http.post(receiver.callback_url, json=completed("gen-1")).status_code == 204
+        assert [g["id"] for g in seen] == ["gen-1"]
+        assert (receiver.stats.received, receiver.stats.rejected) == (1, 5)
+
+    def test_public_url_is_what_luma_gets(self):
+        r = CallbackReceiver(public_url="https://hooks.example.com/", token="s3cret")
+        assert r.callback_url == "https://hooks.example.com/luma/callback?token=s3cret"
+
+
+class TestPollerNotify:
+    def test_callback_settles_a_watch_without_polling(self):
+        calls = []
+        with GenerationPoller(calls.append, write_back=False, **FAST) as poller:
+            future = poller.watch("gen-1", callback=True)
+            assert poller.notify({"id": "gen-1", "state": "dreaming"}) is False
+            assert poller.notify(completed("gen-1")) is True
+            assert future.result(timeout=1)["video_url"] == "https://cdn.luma.example/v.mp4"
+            assert poller.notify(completed("gen-1")) is False  # repeated delivery
+        assert calls == [] and poller.stats.completed == 1
+
+    def test_early_callback_is_kept_for_watch(self):
+        with GenerationPoller(lambda _: pytest.fail("polled"), **FAST) as poller:
+            poller.notify({"id": "gen-2", "state": "failed", "failure_reason": "moderation"})
+            with pytest.raises(GenerationFailed, match="moderation"):
+                poller.watch("gen-2").result(timeout=1)
+
+    def test_unwatched_completion_is_written_back(self):
+        execute("UPDATE creatives SET video_url = '' WHERE id = 1")
+        with GenerationPoller(lambda _: None, **FAST) as poller:
+            poller.notify(completed("gen-test-001", "https://cdn.luma.example/new.mp4"))
+        assert fetch_one("SELECT video_url FROM creatives WHERE id = 1")["video_url"].endswith("new.mp4")
+
+
+class TestClientCallbacks:
+    def test_generations_finish_on_callback(self, luma, receiver):
+        creative_ids = [
+            execute("INSERT INTO creatives (campaign_id, prompt) VALUES (1, ?)", (f"Variant {i}",)).lastrowid
+            for i in range(4)
+        ]
+        with client_for(luma, receiver) as client:
+            start = time.monotonic()
+            futures = [client.watch(client.generate(f"Variant {i}"), creative_id=c)
+                       for i, c in enumerate(creative_ids)]
+            results = [f.result(timeout=10) for f in futures]
+            elapsed = time.monotonic() - start
+            client.poller.flush()
+        assert elapsed < 5 and luma.requests.get("GET", 0) == 0
+        assert receiver.stats.received == 4
+        for creative_id, result in zip(creative_ids, results):
+            row = fetch_one("SELECT video_url FROM creatives WHERE id = ?", (creative_id,))
+            assert row["video_url"] == result["video_url"]
+
+    def test_lost_callback_is_caught_by_the_sweep(self, luma, receiver):
+        luma.send_callbacks = False
+        with client_for(luma, receiver, sweep_interval=0.3) as client:
+            result = client.poll(client.generate("Dropped"), timeout=10)
+        assert result["state"] == "completed"
+        assert luma.callbacks["dropped"] == 1 and 1 <= luma.requests["GET"] <= 3
+
+    def test_explicit_callback_url_is_polled_normally(self, luma, receiver):
+        with client_for(luma, receiver) as client:
+            gen_id = client.generate("Elsewhere", callback_url="http://127.0.0.1:9/hook")
+            assert client.poll(gen_id, timeout=10)["state"] == "completed"
+        assert luma.generations[gen_id]["request"]["callback_url"] == "http://127.0.0.1:9/hook"
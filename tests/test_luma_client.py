@@ -72,3 +72,15 @@ class TestLumaClient:
             aspect_ratio="16:9",
             loop=False,
         )
+
+    @patch("dreamtraffic.luma.client._MAX_STARTED", 2)
+    @patch("dreamtraffic.luma.client.LumaAI")
+    def test_unwatched_generations_are_not_kept_forever(self, mock_luma_class):
+        mock_client = MagicMock()
+        mock_luma_class.return_value = mock_client
+        mock_client.generations.create.side_effect = [MagicMock(id=f"gen-{i}") for i in range(3)]
+
+        client = LumaClient(api_key="test-key", use_cache=False)
+        for i in range(3):
+            client.generate(f"prompt {i}")
+        assert list(client._started) == ["gen-1", "gen-2"]
@@ -0,0 +1,132 @@
+"""Tests for the shared Luma request scheduler — token buckets, priorities and 429 handling."""
+
+import asyncio
+import threading
+import time
+from email.utils import format_datetime
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from dreamtraffic.luma.async_client import AsyncLumaClient
+from dreamtraffic.luma.client import LumaClient
+from dreamtraffic.luma.scheduler import (
+    CREATE, GET, LumaScheduler, TokenBucket, flight_priority, luma_priority, retry_after,
+)
+from dreamtraffic.luma.stand_in import LumaStandIn
+
+FAST = {"min_interval": 0.02, "max_interval": 0.1, "render_seconds": {}, "flush_interval": 0.05}
+
+
+@pytest.fixture
+def luma():
+    with LumaStandIn() as server:
+        yield server
+
+
+class TestTokenBucket:
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=2, burst=3)
+        now = bucket._updated
+        assert [bucket.take(now) for _ in range(3)] == [0, 0, 0]
+        assert bucket.take(now) == pytest.approx(0.5)
+        assert bucket.take(now + 0.5) == 0
+
+    def test_zero_rate_is_unlimited(self):
+        bucket = TokenBucket(rate=0, burst=1)
+        assert all(bucket.take(0.0) == 0 for _ in range(100))
+
+
+class TestScheduler:
+    def test_waiters_are_served_by_flight_start(self):
+        scheduler = LumaScheduler(create_rate=20, create_burst=1)
+        scheduler.rate_limited(CREATE, 0.2)  # everyone queues behind the pause
+        order = []
+
+        def request(priority):
+            scheduler.acquire(CREATE, priority)
+            order.append(priority)
+
+        threads = []
+        for priority in [None, "2026-09-01", "2026-03-01", None, "2026-06-15"]:
+            threads.append(threading.Thread(target=request, args=(priority,)))
+            threads[-1].start()
+            time.sleep(0.01)
+        for t in threads:
+            t.join()
+        scheduler.close()
+        assert order == ["2026-03-01", "2026-06-15", "2026-09-01", None, None]
+        stats = scheduler.stats[CREATE]
+        assert (stats.granted, stats.queued, stats.max_depth) == (5, 5, 5) and stats.max_wait >= 0.2
+        assert (stats.rate_limited, stats.retried) == (1, 0)  # paused, but nothing was re-sent
+
+    def test_cancelled_async_waiter_leaves_the_queue(self):
+        scheduler = LumaScheduler(get_rate=1, get_burst=1)
+
+        async def main():
+            await scheduler.acquire_async(GET)
+            waiting = asyncio.ensure_future(scheduler.acquire_async(GET))
+            await asyncio.sleep(0.05)
+            assert scheduler.queue_depth(GET) == 1
+            waiting.cancel()
+            await asyncio.gather(waiting, return_exceptions=True)
+            return scheduler.queue_depth()
+
+        assert asyncio.run(main()) == 0
+        scheduler.close()
+
+    def test_retry_after_forms(self):
+        def response(value):
+            return httpx.Response(429, headers={} if value is None else {"Retry-After": value})
+
+        later = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True)
+        assert retry_after(response("2.5")) == 2.5
+        assert 28 <= retry_after(response(later)) <= 30
+        assert retry_after(response(None)) is None and retry_after(response("soon")) is None
+
+    def test_flight_priority(self):
+        assert flight_priority(creative_id=1) == flight_priority(campaign_id=1) == "2026-03-01"
+        assert flight_priority(creative_id=999) is None and flight_priority() is None
+
+
+class TestClients:
+    def test_429_is_retried_after_retry_after(self, luma):
+        scheduler = LumaScheduler(create_rate=0)
+        luma.fail_next(2, status=429, retry_after=0.2)
+        start = time.monotonic()
+        with LumaClient(api_key="test-key", base_url=luma.url, use_cache=False, scheduler=scheduler) as client:
+            assert client.generate("Coastline at dawn")
+        assert time.monotonic() - start >= 0.4
+        stats = scheduler.stats[CREATE]
+        assert (stats.rate_limited, stats.retried, luma.requests["POST"]) == (2, 2, 3)
+        scheduler.close()
+
+    def test_burst_of_agents_stays_under_the_provider_limit(self, luma):
+        luma.rate_limits["POST"] = 12
+        scheduler = LumaScheduler(create_rate=10, create_burst=1)
+
+        async def main():
+            async with AsyncLumaClient(api_key="test-key", base_url=luma.url, use_cache=False,
+                                       scheduler=scheduler) as client:
+                return await asyncio.gather(*(client.generate(f"Variant {i}") for i in range(12)))
+
+        assert len(set(asyncio.run(main()))) == 12
+        metrics = scheduler.metrics()[CREATE]
+        assert luma.rate_limited == 0 and metrics["depth"] == 0
+        assert metrics["max_depth"] >= 10 and metrics["mean_wait"] > 0
+        scheduler.close()
+
+    def test_poller_reads_keep_the_watchers_priority(self, luma):
+        scheduler = LumaScheduler(create_rate=0, get_rate=0)
+        seen = []
+        acquire = scheduler.acquire
+        scheduler.acquire = lambda kind, priority=None: (seen.append((kind, priority)), acquire(kind, priority))
+        with LumaClient(api_key="test-key", base_url=luma.url, use_cache=False,
+                        poller_options=FAST, scheduler=scheduler) as client:
+            with luma_priority("2026-03-01"):
+                future = client.watch(client.generate("Coastline at dawn"))
+            future.result(timeout=10)
+        assert ("create", "2026-03-01") in seen and ("get", "2026-03-01") in seen
+        assert client._priorities == {}
+        scheduler.close()
@@ -0,0 +1,112 @@
+"""Tests for the ranged, resumable download engine against the local media stand-in."""
+
+import hashlib
+import json
+import os
+import threading
+
+import pytest
+
+from dreamtraffic.media.download import DownloadError, Downloader
+from dreamtraffic.media.stand_in import MediaStandIn
+
+MB = 1 << 20
+DATA = os.urandom(12 * MB)
+DIGEST = hashlib.sha256(DATA).hexdigest()
+
+
+@pytest.fixture
+def cdn():
+    with MediaStandIn() as server:
+        yield server
+
+
+@pytest.fixture
+def downloader():
+    with Downloader(segments=4, min_segment_size=MB, backoff=0.01) as d:
+        yield d
+
+
+class TestDownloader:
+    def test_parallel_ranged_download(self, cdn, downloader, tmp_path):
+        url = cdn.add("spot.mp4", DATA)
+        result = downloader.download(url, tmp_path / "spot.mp4", expected_sha256=DIGEST)
+        assert (tmp_path / "spot.mp4").read_bytes() == DATA
+        assert (result.size, result.sha256, result.segments, result.resumed_bytes) == (len(DATA), DIGEST, 4, 0)
+        ranges = sorted(r["range"] for r in cdn.requests if r["status"] == 206)
+        assert "bytes=0-0" in ranges and len(ranges) == 5
+        assert not list(tmp_path.glob("*.part*"))
+
+    def test_small_files_use_fewer_segments(self, cdn, downloader, tmp_path):
+        url = cdn.add("short.mp4", DATA[: MB + 10])
+        assert downloader.download(url, tmp_path / "short.mp4").segments == 2
+
+    def test_server_without_ranges_streams_once(self, cdn, downloader, tmp_path):
+        cdn.ranges = False
+        url = cdn.add("spot.mp4", DATA)
+        result = downloader.download(url, tmp_path / "spot.mp4")
+        assert (result.segments, result.sha256) == (1, DIGEST)
+        assert len(cdn.requests) == 1
+
+    def test_disconnects_are_retried_from_the_last_byte(self, cdn, downloader, tmp_path):
+        url = cdn.add("spot.mp4", DATA)
+        cdn.disconnect_next(3, after=2 * MB)  # the probe plus two segments
+        result = downloader.download(url, tmp_path / "spot.mp4")
+        assert result.sha256 == DIGEST
+        assert cdn.bytes_sent < len(DATA) * 1.1
+
+    def test_resumes_from_part_file(self, cdn, tmp_path):
+        url = cdn.add("spot.mp4", DATA)
+        dest = tmp_path / "spot.mp4"
+        fragile = Downloader(segments=4, min_segment_size=MB, retries=0, backoff=0.01)
+        cdn.disconnect_next(5, after=2 * MB)  # the probe's one byte, then each segment
+        cdn.disconnect_next(4)  # and their retries, before any progress
+        with fragile, pytest.raises(DownloadError):
+            fragile.download(url, dest)
+        state = json.loads((tmp_path / "spot.mp4.part.json").read_text())
+        assert state["size"] == len(DATA)
+        sent = cdn.bytes_sent
+
+        with Downloader(segments=4, min_segment_size=MB) as downloader:
+            result = downloader.download(url, dest, expected_sha256=DIGEST)
+        assert result.resumed_bytes > 0
+        assert cdn.bytes_sent - sent == len(DATA) - result.resumed_bytes + 1
+        assert dest.read_bytes() == DATA
+
+    def test_changed_file_restarts(self, cdn, tmp_path):
+        url = cdn.add("spot.mp4", DATA)
+        dest = tmp_path / "spot.mp4"
+        cdn.disconnect_next(5, after=2 * MB)
+        cdn.disconnect_next(4)
+        with Downloader(segments=4, min_segment_size=MB, retries=0) as fragile, pytest.raises(DownloadError):
+            fragile.download(url, dest)
+        replacement = os.urandom(len(DATA))
+        cdn.add("spot.mp4", replacement)
+        with Downloader(segments=4, min_segment_size=MB) as downloader:
+            result = downloader.download(url, dest)
+        assert result.resumed_bytes == 0
+        assert result.sha256 == hashlib.sha256(replacement).hexdigest()
+
+    def test_checksum_mismatch(self, cdn, downloader, tmp_path):
+        url = cdn.add("spot.mp4", DATA)
+        with pytest.raises(DownloadError, match="SHA-256 mismatch"):
+            downloader.download(url, tmp_path / "spot.mp4", expected_sha256="0" * 64)
+        assert not list(tmp_path.glob("spot.mp4*"))
+
+    def test_connection_cap_is_shared(self, tmp_path):
+        with MediaStandIn(throttle=8 * MB) as cdn:
+            urls = [cdn.add(f"spot{i}.mp4", DATA[: 4 * MB]) for i in range(3)]
+            cap = threading.BoundedSemaphore(2)
+            downloaders = [Downloader(segments=4, min_segment_size=MB, connections=cap) for _ in urls]
+            threads = [
+                threading.Thread(target=d.download, args=(url, tmp_path / f"spot{i}.mp4"))
+                for i, (d, url) in enumerate(zip(downloaders, urls))
+            ]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            for d in downloaders:
+                d.close()
+        assert cdn.peak_connections <= 2
+        assert all((tmp_path / f"spot{i}.mp4").stat().st_size == 4 * MB for i in range(3))
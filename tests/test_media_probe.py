@@ -0,0 +1,126 @@
+"""Tests for the MP4 metadata probe on synthetic ISO-BMFF files."""
+
+import struct
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.measurement.vast import VastGenerator, media_file_params
+from dreamtraffic.media.probe import ProbeError, probe, probe_creative
+from dreamtraffic.media.stand_in import MediaStandIn
+
+
+def box(kind: bytes, *payload: bytes) -> bytes:
+    body = b"".join(payload)
+    return struct.pack(">I4s", 8 + len(body), kind) + body
+
+
+def full_box(kind: bytes, version: int, payload: bytes) -> bytes:
+    return box(kind, bytes([version, 0, 0, 0]), payload)
+
+
+def mvhd(timescale: int, duration: int, version: int = 0) -> bytes:
+    times = struct.pack(">QQIQ", 0, 0, timescale, duration) if version else struct.pack(">IIII", 0, 0, timescale, duration)
+    return full_box(b"mvhd", version, times + bytes(80))
+
+
+def tkhd(width: int, height: int, version: int = 0) -> bytes:
+    head = struct.pack(">QQIIQ", 0, 0, 1, 0, 0) if version else struct.pack(">IIIII", 0, 0, 1, 0, 0)
+    return full_box(b"tkhd", version, head + bytes(16) + bytes(36) + struct.pack(">II", width << 16, height << 16))
+
+
+def trak(
+    handler: bytes, fourcc: bytes, width: int, height: int,
+    display: tuple[int, int] | None = None, version: int = 0,
+) -> bytes:
+    entry = box(fourcc, bytes(6), struct.pack(">H", 1), bytes(16), struct.pack(">HH", width, height), bytes(50))
+    stsd = full_box(b"stsd", 0, struct.pack(">I", 1) + entry)
+    hdlr = full_box(b"hdlr", 0, bytes(4) + handler + bytes(12) + b"\0")
+    mdia = box(b"mdia", hdlr, box(b"minf", box(b"stbl", stsd)))
+    return box(b"trak", tkhd(*(display or (width, height)), version=version), mdia)
+
+
+def mp4(*traks: bytes, seconds: float = 15.0, mdat_size: int = 1 << 20, moov_first: bool = True, version: int = 0) -> bytes:
+    ftyp = box(b"ftyp", b"isom", struct.pack(">I", 512), b"isomavc1")
+    moov = box(b"moov", mvhd(1000, int(seconds * 1000), version), *traks)
+    mdat = box(b"mdat", bytes(mdat_size))
+    return ftyp + (moov + mdat if moov_first else mdat + moov)
+
+
+AUDIO = trak(b"soun", b"mp4a", 0, 0)
+VIDEO = trak(b"vide", b"avc1", 1920, 1080)
+VIDEO_MDIA = VIDEO[8 + len(tkhd(1920, 1080)):]
+HDLR = full_box(b"hdlr", 0, bytes(4) + b"vide" + bytes(12) + b"\0")
+
+
+class TestProbe:
+    def test_fast_start_file(self, tmp_path):
+        path = tmp_path / "spot.mp4"
+        path.write_bytes(mp4(AUDIO, VIDEO))
+        info = probe(path)
+        assert (info.duration, info.width, info.height, info.codec, info.fourcc) == (15.0, 1920, 1080, "H.264", "avc1")
+        assert info.size == path.stat().st_size
+        assert info.bitrate_kbps == round(info.size * 8 / 15 / 1000)
+        assert info.creative_fields()["aspect_ratio"] == "16:9"
+
+    def test_moov_after_large_mdat(self, tmp_path):
+        # 64-bit mdat header over a sparse 3 GB body, moov at the end
+        path = tmp_path / "long.mp4"
+        mdat_size = 3 << 30
+        with open(path, "wb") as f:
+            f.write(box(b"ftyp", b"isom", bytes(4)))
+            f.write(struct.pack(">I4sQ", 1, b"mdat", mdat_size))
+            f.seek(mdat_size - 16, 1)
+            f.write(box(b"moov", mvhd(600, 600 * 30, version=1), trak(b"vide", b"hvc1", 3840, 2160)))
+        info = probe(path)
+        assert (info.duration, info.width, info.height, info.codec) == (30.0, 3840, 2160, "H.265")
+
+    def test_version_1_boxes(self, tmp_path):
+        path = tmp_path / "v1.mp4"
+        path.write_bytes(mp4(trak(b"vide", b"av01", 1080, 1920, version=1), version=1))
+        info = probe(path)
+        assert (info.width, info.height, info.codec, info.aspect_ratio) == (1080, 1920, "AV1", "9:16")
+
+    def test_coded_size_when_track_header_has_none(self, tmp_path):
+        path = tmp_path / "coded.mp4"
+        path.write_bytes(mp4(trak(b"vide", b"avc1", 1280, 720, display=(0, 0))))
+        assert (probe(path).width, probe(path).height) == (1280, 720)
+
+    def test_quicktime_brand(self, tmp_path):
+        path = tmp_path / "spot.mov"
+        path.write_bytes(box(b"ftyp", b"qt  ", bytes(4)) + mp4(VIDEO)[24:])
+        assert probe(path).format == "mov"
+
+    @pytest.mark.parametrize("data, message", [
+        (b"", "too small"),
+        (box(b"ftyp", b"isom", bytes(4)) + box(b"mdat", bytes(64)), "no moov"),
+        (mp4(AUDIO), "no video track"),
+        (mp4(VIDEO, moov_first=False)[:-100], "overruns"),
+        (box(b"moov", box(b"mvhd", bytes(10)), VIDEO), "truncated mvhd"),
+        (box(b"moov", mvhd(1000, 15000), box(b"trak", box(b"tkhd", bytes(10)), VIDEO_MDIA)), "truncated tkhd"),
+        (box(b"moov", mvhd(1000, 15000), box(b"trak", tkhd(0, 0), box(
+            b"mdia", HDLR, box(b"minf", box(b"stbl", full_box(b"stsd", 0, struct.pack(">I", 1) + b"av")))),
+        )), "truncated stsd"),
+    ], ids=["empty", "no-moov", "audio-only", "truncated", "short-mvhd", "short-tkhd", "short-stsd"])
+    def test_unreadable_files(self, tmp_path, data, message):
+        path = tmp_path / "bad.mp4"
+        path.write_bytes(data)
+        with pytest.raises(ProbeError, match=message):
+            probe(path)
+
+
+class TestProbeCreative:
+    def test_fills_creative_and_vast(self):
+        with MediaStandIn() as cdn:
+            url = cdn.add("creative.mp4", mp4(VIDEO, trak(b"vide", b"avc1", 1280, 720), seconds=6.4))
+            info = probe_creative(1, url)
+        creative = supabase_client.get_creative(1)
+        assert (creative["duration_seconds"], creative["width"], creative["height"]) == (6, 1920, 1080)
+        assert (creative["codec"], creative["bitrate_kbps"], creative["file_size"]) == ("H.264", info.bitrate_kbps, info.size)
+
+        xml = VastGenerator().generate_inline(video_url=url, **media_file_params(creative))
+        assert f'bitrate="{info.bitrate_kbps}"' in xml and 'codec="H.264"' in xml
+
+    def test_unprobed_creative_keeps_vast_defaults(self):
+        creative = supabase_client.get_creative(1)
+        assert media_file_params(creative) == {"width": 1920, "height": 1080}
@@ -0,0 +1,82 @@
+"""Tests for versioned schema migrations."""
+
+import sqlite3
+
+import pytest
+
+from dreamtraffic.db import engine
+from dreamtraffic.db.migrations import (
+    DDL, MIGRATIONS, SCHEMA_VERSION, Migration, get_schema_version, init_db,
+)
+
+
+def _indexes(conn) -> set[str]:
+    rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'").fetchall()
+    return {r[0] for r in rows}
+
+
+class TestMigrations:
+    def test_fresh_database_is_current(self, test_db):
+        with engine.connection() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            assert {
+                "idx_creatives_campaign_id",
+                "idx_trafficking_records_creative_dsp",
+                "idx_trafficking_records_dsp",
+                "idx_approval_events_creative_id",
+            } <= _indexes(conn)
+
+    def test_current_database_reads_one_pragma(self, test_db):
+        statements = []
+        with engine.connection() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                assert init_db() == SCHEMA_VERSION
+            finally:
+                conn.set_trace_callback(None)
+        assert statements == ["PRAGMA user_version"]
+
+    def test_seed_data_not_duplicated(self, test_db):
+        with engine.connection() as conn:
+            conn.execute("PRAGMA user_version = 0")
+        init_db()
+        row = engine.fetch_one("SELECT COUNT(*) AS n FROM supply_paths")
+        assert row["n"] == 11
+
+    def test_upgrades_unversioned_database(self, tmp_path):
+        db_path = tmp_path / "legacy.db"
+        legacy = sqlite3.connect(db_path)
+        legacy.executescript(DDL)
+        legacy.execute("INSERT INTO campaigns (name) VALUES ('Legacy')")
+        legacy.commit()
+        legacy.close()
+
+        assert init_db(db_path) == SCHEMA_VERSION
+        with engine.connection(db_path) as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            assert "idx_trafficking_records_creative_dsp" in _indexes(conn)
+            assert conn.execute("SELECT name FROM campaigns").fetchone()[0] == "Legacy"
+
+    def test_hot_queries_use_indexes(self, test_db):
+        with engine.connection() as conn:
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN SELECT DISTINCT dsp FROM trafficking_records "
+                "WHERE creative_id = ?", (1,),
+            ).fetchall()
+        assert any("idx_trafficking_records_creative_dsp" in row[3] for row in plan)
+
+    def test_failed_migration_rolls_back(self, test_db, monkeypatch):
+        def boom(conn):
+            raise RuntimeError("boom")
+
+        broken = Migration(SCHEMA_VERSION + 1, "broken", "CREATE TABLE scratch (id INTEGER);", boom)
+        monkeypatch.setattr("dreamtraffic.db.migrations.MIGRATIONS", [*MIGRATIONS, broken])
+        monkeypatch.setattr("dreamtraffic.db.migrations.SCHEMA_VERSION", broken.version)
+        with pytest.raises(RuntimeError):
+            init_db()
+        with engine.connection() as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            tables = conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'scratch'"
+            ).fetchall()
+        assert tables == []
@@ -0,0 +1,96 @@
+"""Tests for compressed trafficking payload storage."""
+
+import json
+import sqlite3
+import zlib
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.engine import execute, fetch_one
+from dreamtraffic.db.migrations import MIGRATIONS, init_db
+from dreamtraffic.db.payloads import decode_payload, encode_payload, load_payload
+from dreamtraffic.dsp import get_adapter
+
+
+@pytest.fixture
+def upload():
+    return get_adapter("amazon").upload_creative(
+        video_url="https://cdn.luma.example/demo.mp4",
+        vast_url="https://vast.dreamtraffic.demo/inline/1",
+        duration_seconds=30, width=1920, height=1080,
+        placement_type="olv", campaign_name="Spring Launch",
+    )
+
+
+class TestEncoding:
+    def test_round_trip(self, upload):
+        stored = encode_payload(upload.request_payload)
+        assert isinstance(stored, bytes)
+        assert load_payload(stored) == upload.request_payload
+        assert decode_payload(encode_payload('{"a": 1}')) == '{"a": 1}'
+
+    def test_preset_dictionary_shrinks_small_payloads(self, upload):
+        text = json.dumps(upload.response_payload)
+        stored = encode_payload(text)
+        assert len(stored) < len(text) / 2
+        assert len(stored) < len(zlib.compress(text.encode()))
+
+    def test_plain_text_and_empty(self):
+        assert decode_payload('{"legacy": true}') == '{"legacy": true}'
+        assert encode_payload("") == "" and decode_payload("") == ""
+        assert decode_payload(None) == "" and load_payload("") is None
+
+    def test_plain_zlib_format(self):
+        assert decode_payload(b"\x00" + zlib.compress(b"[1]")) == "[1]"
+        with pytest.raises(ValueError, match="Unknown payload format"):
+            decode_payload(b"\x7fxyz")
+
+
+class TestStorage:
+    def test_store_compresses_and_decodes(self, test_db, upload):
+        row = supabase_client.insert_trafficking_record(
+            creative_id=1, dsp="amazon",
+            request_payload=json.dumps(upload.request_payload),
+            response_payload=json.dumps(upload.response_payload),
+        )
+        assert json.loads(row["request_payload"]) == upload.request_payload
+        raw = fetch_one("SELECT typeof(request_payload) AS t FROM trafficking_records")
+        assert raw["t"] == "blob"
+        records = supabase_client.get_trafficking_records(creative_id=1)
+        assert json.loads(records[0]["response_payload"]) == upload.response_payload
+
+    def test_sql_function(self, test_db):
+        execute(
+            "INSERT INTO trafficking_records (creative_id, dsp, response_payload) VALUES (1, 'amazon', ?)",
+            (encode_payload({"creativeId": "amzn-cr-1"}),),
+        )
+        row = fetch_one(
+            "SELECT json_extract(payload_json(response_payload), '$.creativeId') AS cid "
+            "FROM trafficking_records"
+        )
+        assert row["cid"] == "amzn-cr-1"
+
+    def test_migration_compresses_existing_rows(self, tmp_path, upload):
+        path = tmp_path / "v4.db"
+        conn = sqlite3.connect(path)
+        for migration in MIGRATIONS[:4]:
+            migration.run(conn)
+        conn.execute("PRAGMA user_version = 4")
+        conn.execute("INSERT INTO campaigns (id, name) VALUES (1, 'c')")
+        conn.execute("INSERT INTO creatives (id, campaign_id) VALUES (1, 1)")
+        conn.executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp, request_payload, response_payload) "
+            "VALUES (1, 'amazon', ?, ?)",
+            [(json.dumps(upload.request_payload), "")] * 3,
+        )
+        conn.commit()
+        conn.close()
+
+        init_db(path)
+        row = fetch_one(
+            "SELECT typeof(request_payload) AS t, request_payload FROM trafficking_records",
+            db_path=path,
+        )
+        assert row["t"] == "blob"
+        assert load_payload(row["request_payload"]) == upload.request_payload
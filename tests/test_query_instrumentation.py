@@ -0,0 +1,115 @@
+"""Tests for per-statement query instrumentation and the db-stats command."""
+
+import sqlite3
+
+import pytest
+from click.testing import CliRunner
+
+from dreamtraffic.cli import cli
+from dreamtraffic.db import engine
+from dreamtraffic.db.engine import execute, executemany, fetch_all, fetch_iter, fetch_one, transaction
+from dreamtraffic.db.instrument import InstrumentedConnection, QueryStats, load_stats, normalize
+
+
+@pytest.fixture
+def stats(test_db):
+    collector = engine.enable_instrumentation(slow_ms=1e9)
+    yield collector
+    engine.disable_instrumentation()
+
+
+class TestNormalize:
+    def test_literals_become_placeholders(self):
+        assert normalize("SELECT * FROM t WHERE id = 42 AND name = 'it''s'") == \
+            "SELECT * FROM t WHERE id = ? AND name = ?"
+
+    def test_lists_and_whitespace_collapse(self):
+        assert normalize("SELECT *\n  FROM t WHERE id IN (1, 2, 3)") == "SELECT * FROM t WHERE id IN (?, ...)"
+        assert normalize("INSERT INTO t (a, b) VALUES (?, ?), (?, ?), (?, ?)") == \
+            "INSERT INTO t (a, b) VALUES (?, ?), ..."
+
+    def test_identifiers_with_digits_kept(self):
+        assert normalize("RELEASE sp_1") == "RELEASE sp_1"
+
+
+class TestInstrumentation:
+    def test_connections_are_instrumented(self, stats):
+        with engine.connection() as conn:
+            assert isinstance(conn, InstrumentedConnection)
+        engine.disable_instrumentation()
+        with engine.connection() as conn:
+            assert not isinstance(conn, InstrumentedConnection)
+
+    def test_statements_grouped_with_rows(self, stats):
+        fetch_one("SELECT * FROM creatives WHERE id = ?", (1,))
+        fetch_one("SELECT * FROM creatives WHERE id = 1")
+        fetch_all("SELECT * FROM supply_paths")
+        by_key = {s.statement: s for s in stats.top(50)}
+
+        creative = by_key["SELECT * FROM creatives WHERE id = ?"]
+        assert creative.calls == 2 and creative.rows == 2
+        paths = by_key["SELECT * FROM supply_paths"]
+        assert paths.rows == fetch_one("SELECT COUNT(*) AS n FROM supply_paths")["n"]
+        assert sum(paths.histogram) == paths.calls
+
+    def test_streamed_rows_counted(self, stats):
+        count = sum(1 for _ in fetch_iter("SELECT * FROM supply_paths", arraysize=2))
+        assert {s.statement: s.rows for s in stats.top(50)}["SELECT * FROM supply_paths"] == count
+
+    def test_writes_and_commits_recorded(self, stats):
+        with transaction():
+            execute("UPDATE creatives SET name = 'x' WHERE id = ?", (1,))
+        executemany("INSERT INTO trafficking_records (creative_id, dsp) VALUES (?, ?)",
+                    [(1, "amazon"), (1, "dv360")])
+        by_key = {s.statement: s for s in stats.top(50)}
+        assert by_key["UPDATE creatives SET name = ? WHERE id = ?"].rows == 1
+        assert by_key["INSERT INTO trafficking_records (creative_id, dsp) VALUES (?, ?)"].rows == 2
+        assert by_key["COMMIT"].calls == 2
+        assert by_key["BEGIN IMMEDIATE"].calls == 2
+
+    def test_slow_queries_capture_plan(self, stats):
+        stats.slow_ms = 0
+        fetch_all("SELECT * FROM trafficking_records WHERE creative_id = ?", (1,))
+        slow = [q for q in stats.slow if q.statement.startswith("SELECT * FROM trafficking_records")]
+        assert slow and any("idx_trafficking_records_creative_dsp" in step for step in slow[0].plan)
+        assert not [q for q in stats.slow if q.statement == "COMMIT" and q.plan]
+
+    def test_slow_log_file(self, test_db, tmp_path):
+        log = tmp_path / "slow.jsonl"
+        stats = engine.enable_instrumentation(slow_ms=0, slow_log_path=log)
+        try:
+            fetch_one("SELECT * FROM campaigns WHERE id = ?", (1,))
+        finally:
+            engine.disable_instrumentation()
+        assert "SELECT * FROM campaigns WHERE id = ?" in log.read_text()
+        assert stats.slow
+
+    def test_save_merges(self, tmp_path):
+        path = tmp_path / "stats.json"
+        conn = sqlite3.connect(":memory:", factory=InstrumentedConnection)
+        conn.query_stats = QueryStats()
+        conn.execute("SELECT 1").fetchall()
+        conn.query_stats.save(path)
+        conn.query_stats.save(path)
+        assert load_stats(path)["SELECT ?"].calls == 2
+
+
+class TestDbStatsCommand:
+    def test_no_stats(self, tmp_path):
+        result = CliRunner().invoke(cli, ["db-stats", "--stats-file", str(tmp_path / "none.json")])
+        assert result.exit_code == 0
+        assert "No query stats recorded" in result.output
+
+    def test_top_statements(self, stats, tmp_path):
+        path = tmp_path / "stats.json"
+        fetch_all("SELECT * FROM supply_paths")
+        stats.save(path)
+        result = CliRunner().invoke(cli, [
+            "db-stats", "--stats-file", str(path), "--slow-log", str(tmp_path / "slow.jsonl"),
+        ])
+        assert result.exit_code == 0
+        assert "supply_paths" in result.output
+
+        result = CliRunner().invoke(cli, ["db-stats", "--stats-file", str(path), "--reset"])
+        assert result.exit_code == 0
+        assert not path.exists()
@@ -0,0 +1,70 @@
+"""Tests for the reference-data cache over supply_paths and dsp_specs."""
+
+import threading
+
+from dreamtraffic.db.engine import execute, fetch_one
+from dreamtraffic.db.migrations import init_db
+from dreamtraffic.db.models import DSPSpec, SupplyPath
+from dreamtraffic.db.reference import get_reference_cache, reference_data
+
+
+class TestReferenceData:
+    def test_typed_rows(self, test_db):
+        ref = reference_data()
+        assert ref.supply_paths and all(isinstance(p, SupplyPath) for p in ref.supply_paths)
+        assert ref.dsp_specs and all(isinstance(s, DSPSpec) for s in ref.dsp_specs)
+        assert [(p.dsp, p.ssp) for p in ref.supply_paths] == sorted((p.dsp, p.ssp) for p in ref.supply_paths)
+        assert ref.dsp_specs[0].requires_vast is True
+
+    def test_columns_added_later_are_ignored(self, test_db):
+        execute("ALTER TABLE supply_paths ADD COLUMN region TEXT NOT NULL DEFAULT 'us'")
+        execute("ALTER TABLE dsp_specs ADD COLUMN max_bitrate_kbps INTEGER NOT NULL DEFAULT 0")
+        get_reference_cache().invalidate()
+        ref = reference_data()
+        assert ref.supply_path("amazon", "freewheel").notes != "us"
+        assert ref.dsp_spec("amazon", "stv").requires_mraid is False
+
+    def test_indexes(self, test_db):
+        ref = reference_data()
+        assert ref.dsp_spec("amazon", "stv").min_height == 1080
+        assert ref.dsp_spec("amazon", "preroll") is None
+        path = ref.supply_path("amazon", "freewheel")
+        assert path.exchange == "direct" and path.ssp_fee_pct == 18.0
+        assert {p.ssp for p in ref.paths_for_dsp("dv360")} == {"magnite", "freewheel"}
+
+
+class TestReferenceCache:
+    def test_served_from_cache_until_changed(self, test_db):
+        cache = get_reference_cache()
+        first = reference_data()
+        assert reference_data() is first
+        assert cache.loads == 1 and cache.hits == 1
+
+    def test_write_invalidates(self, test_db):
+        before = reference_data()
+        execute("UPDATE supply_paths SET ssp_fee_pct = 9.5 WHERE dsp = 'amazon' AND ssp = 'magnite'")
+        after = reference_data()
+        assert after.generation > before.generation
+        assert after.supply_path("amazon", "magnite").ssp_fee_pct == 9.5
+
+    def test_write_from_another_thread_invalidates(self, test_db):
+        reference_data()
+        t = threading.Thread(target=execute, args=("DELETE FROM dsp_specs WHERE dsp = 'adelphic'",))
+        t.start()
+        t.join()
+        assert reference_data().dsp_spec("adelphic", "olv") is None
+
+    def test_triggers_bump_generation(self, test_db):
+        gen = lambda: fetch_one("SELECT generation FROM reference_generation")["generation"]
+        start = gen()
+        execute("INSERT INTO dsp_specs (dsp, placement_type) VALUES ('newdsp', 'olv')")
+        execute("UPDATE dsp_specs SET notes = 'x' WHERE dsp = 'newdsp'")
+        execute("DELETE FROM dsp_specs WHERE dsp = 'newdsp'")
+        assert gen() == start + 3
+
+    def test_separate_cache_per_database(self, test_db, tmp_path):
+        other = tmp_path / "other.db"
+        init_db(other)
+        execute("DELETE FROM supply_paths WHERE dsp = 'amazon'", db_path=other)
+        assert reference_data(other).paths_for_dsp("amazon") == []
+        assert reference_data().paths_for_dsp("amazon")
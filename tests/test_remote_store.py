@@ -0,0 +1,259 @@
+"""Tests for the batched PostgREST store against the local stand-in server."""
+
+import json
+import re
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.postgrest_stand_in import UNIQUE_CONSTRAINTS, PostgRESTStandIn
+from dreamtraffic.db.remote_store import UPSERT_KEYS, RemoteStore, RemoteStoreError
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[1] / "supabase" / "migrations"
+
+
+@pytest.fixture
+def server():
+    with PostgRESTStandIn() as s:
+        yield s
+
+
+@pytest.fixture
+def store(server):
+    s = RemoteStore(server.url, "anon-key", batch_size=50, backoff=0.001)
+    yield s
+    s.close()
+
+
+class TestRemoteStore:
+    def test_campaign_and_creative_round_trip(self, store):
+        campaign = store.insert_campaign(name="Remote", advertiser="Acme")
+        creative = store.insert_creative(campaign_id=campaign["id"], name="Spot", prompt="p")
+        assert creative["approval_status"] == "draft"
+        assert store.get_campaign(campaign["id"])["advertiser"] == "Acme"
+        updated = store.update_creative(creative["id"], approval_status="approved")
+        assert updated["approval_status"] == "approved"
+        assert [c["id"] for c in store.get_creatives(campaign["id"])] == [creative["id"]]
+        assert store.get_creative(999) is None
+
+    def test_set_video_urls(self, store):
+        campaign = store.insert_campaign(name="Remote")
+        by_generation = store.insert_creative(campaign_id=campaign["id"], luma_generation_id="gen-a")
+        by_id = store.insert_creative(campaign_id=campaign["id"])
+        updates = [("gen-a", "https://v/a.mp4", None), ("gen-b", "https://v/b.mp4", by_id["id"])]
+        assert store.set_video_urls(updates) == 2
+        assert store.get_creative(by_generation["id"])["video_url"] == "https://v/a.mp4"
+        assert store.get_creative(by_id["id"])["video_url"] == "https://v/b.mp4"
+
+    def test_empty_generation_id_matches_nothing(self, server, store):
+        campaign = store.insert_campaign(name="Remote")
+        unsent = store.insert_creative(campaign_id=campaign["id"])
+        target = store.insert_creative(campaign_id=campaign["id"])
+        assert store.set_video_urls([("", "https://v/x.mp4", target["id"])]) == 1
+        assert store.get_creative(unsent["id"])["video_url"] == ""
+
+    def test_search_ranks_name_and_body_matches(self, store):
+        campaign = store.insert_campaign(name="Coastal Summer", brief="Surf at golden hour")
+        store.insert_campaign(name="Winter", brief="Snow at dawn")
+        prompt_hit = store.insert_creative(
+            campaign_id=campaign["id"], name="Spot A", prompt="A surfer rides a wave at golden hour",
+        )
+        name_hit = store.insert_creative(campaign_id=campaign["id"], name="Golden Hour Surfer", prompt="Beach")
+        store.insert_creative(campaign_id=campaign["id"], name="Spot C", prompt="Golden retriever")
+        hits = store.search('"golden hour"')
+        assert [h["id"] for h in hits["creatives"]] == [name_hit["id"], prompt_hit["id"]]
+        assert hits["creatives"][1]["snippet"] == "A surfer rides a wave at [golden hour]"
+        assert set(hits["creatives"][0]) == {"id", "campaign_id", "name", "approval_status", "snippet", "score"}
+        assert [h["id"] for h in hits["campaigns"]] == [campaign["id"]]
+        assert [h["id"] for h in store.search("coast*")["campaigns"]] == [campaign["id"]]
+        with pytest.raises(ValueError, match="Nothing to search for"):
+            store.search("***")
+
+    def test_inserts_return_the_stored_row(self, server, store):
+        record = store.insert_trafficking_record(creative_id=1, dsp="amazon", dsp_creative_id="cr-1")
+        event = store.insert_approval_event(creative_id=1, from_status="draft", to_status="pending_review")
+        assert record["id"] == 1 and record["created_at"]
+        assert event["id"] == 1 and event["created_at"] and event["event_key"]
+        assert store.get_approval_events(1) == [event]
+
+    def test_sequential_writes_go_out_in_one_request(self, server):
+        store = RemoteStore(server.url, batch_size=50, flush_interval=0.2)
+        try:
+            rows = [
+                store.insert_trafficking_record(creative_id=1, dsp="amazon", dsp_creative_id=f"cr-{i}")
+                for i in range(30)
+            ]
+            assert "POST" not in server.requests
+            assert store.stats().pending == 30
+            deadline = time.monotonic() + 2
+            while len(server.tables["trafficking_records"]) < 30 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert server.requests["POST"] == 1
+            assert [r["id"] for r in rows] == list(range(1, 31))
+        finally:
+            store.close()
+
+    def test_full_batches_go_out_without_waiting(self, server):
+        store = RemoteStore(server.url, batch_size=10, flush_interval=60)
+        try:
+            for i in range(25):
+                store.insert_approval_event(creative_id=1, from_status="draft", to_status=f"s{i}")
+            assert server.requests["POST"] == 2
+            assert store.stats().pending == 5
+        finally:
+            store.close()
+        assert len(server.tables["approval_events"]) == 25
+        assert server.requests["POST"] == 3
+
+    def test_concurrent_writes_coalesce_into_bulk_requests(self, server):
+        server.latency = 0.02
+        store = RemoteStore(server.url, batch_size=50)
+        barrier = threading.Barrier(40)
+
+        def insert(i: int) -> None:
+            barrier.wait()
+            ids.append(store.insert_trafficking_record(
+                creative_id=1, dsp="amazon", dsp_creative_id=f"cr-{i}"
+            )["id"])
+
+        ids: list[int] = []
+        threads = [threading.Thread(target=insert, args=(i,)) for i in range(40)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            store.close()
+        assert sorted(ids) == list(range(1, 41))
+        # Rows queued while a POST was in flight went out together
+        assert server.requests["POST"] < 40
+        assert store.stats().rows_written == 40
+
+    def test_resent_rows_are_merged(self, server, store):
+        store.insert_trafficking_record(creative_id=1, dsp="amazon", dsp_creative_id="cr-1", record_key="rec-1")
+        store.insert_trafficking_record(
+            creative_id=1, dsp="amazon", dsp_creative_id="cr-1", audit_status="approved", record_key="rec-1"
+        )
+        records = store.get_trafficking_records(creative_id=1)
+        assert len(records) == 1
+        assert records[0]["audit_status"] == "approved"
+
+    def test_rows_without_a_dsp_creative_id_stay_apart(self, server, store):
+        first = store.insert_trafficking_record(creative_id=1, dsp="amazon", dsp_creative_id="")
+        second = store.insert_trafficking_record(creative_id=1, dsp="amazon", dsp_creative_id="")
+        assert first["record_key"] != second["record_key"]
+        store.flush()
+        assert len(server.tables["trafficking_records"]) == 2
+
+    def test_upsert_needs_a_unique_constraint(self, server, store):
+        with pytest.raises(RemoteStoreError, match="42P10"):
+            store._request(
+                "POST", "trafficking_records", params={"on_conflict": "dsp,dsp_creative_id"},
+                json=[{"dsp": "amazon", "dsp_creative_id": "cr-1"}], prefer="resolution=merge-duplicates",
+            )
+        assert server.tables["trafficking_records"] == []
+
+    def test_upsert_keys_have_supabase_constraints(self):
+        sql = "\n".join(p.read_text() for p in MIGRATIONS_DIR.glob("*.sql"))
+        constraints = set(re.findall(r"ALTER TABLE (\w+)\s+ADD CONSTRAINT \w+ UNIQUE \(([\w, ]+)\)", sql))
+        for table, keys in UPSERT_KEYS.items():
+            assert (table, ", ".join(keys)) in constraints
+            assert keys in UNIQUE_CONSTRAINTS[table]
+
+    def test_resent_approval_event_is_not_duplicated(self, server, store):
+        first = store.insert_approval_event(
+            creative_id=1, from_status="draft", to_status="pending_review", event_key="evt-1"
+        )
+        # A retried POST carries the same key and lands on the same row
+        again = store.insert_approval_event(
+            creative_id=1, from_status="draft", to_status="pending_review", event_key="evt-1"
+        )
+        assert again["id"] == first["id"]
+        assert len(server.tables["approval_events"]) == 1
+
+    def test_conditional_status_update(self, store):
+        campaign = store.insert_campaign(name="Remote")
+        creative = store.insert_creative(campaign_id=campaign["id"])
+        moved = store.update_creative_status(creative["id"], "draft", "pending_review")
+        assert moved["approval_status"] == "pending_review"
+        # Stale from_status: nothing matches, nothing changes
+        assert store.update_creative_status(creative["id"], "draft", "approved") is None
+        assert store.get_creative(creative["id"])["approval_status"] == "pending_review"
+
+    def test_retries_transient_failures(self, server, store):
+        server.fail_next(2, status=503)
+        campaign = store.insert_campaign(name="Retry")
+        assert campaign["name"] == "Retry"
+        assert store.stats().retries == 2
+
+    def test_gives_up_after_max_retries(self, server, store):
+        server.fail_next(5, status=503)
+        event = store.insert_approval_event(creative_id=1, from_status="a", to_status="b")
+        with pytest.raises(RemoteStoreError, match="after 4 retries"):
+            event.result()
+        # The failure is raised once more by the next flush, then cleared
+        with pytest.raises(RemoteStoreError, match="after 4 retries"):
+            store.flush()
+        assert server.tables["approval_events"] == []
+        assert store.stats().last_error
+        store.insert_approval_event(creative_id=1, from_status="a", to_status="b")
+        store.flush()
+        assert len(server.tables["approval_events"]) == 1
+
+    def test_client_errors_are_not_retried(self, server, store):
+        with pytest.raises(RemoteStoreError, match="404"):
+            store._request("GET", "no_such_table")
+        assert store.stats().retries == 0
+
+
+class TestRemoteToolLayer:
+    @pytest.mark.asyncio
+    async def test_traffic_all_dsps_through_remote_store(self, server, store):
+        from dreamtraffic.tools.trafficking import traffic_all_dsps
+
+        campaign = store.insert_campaign(name="Remote Campaign")
+        creative = store.insert_creative(
+            campaign_id=campaign["id"], name="Spot", approval_status="approved",
+            video_url="https://cdn/x.mp4", vast_url="https://vast/x",
+        )
+        previous = supabase_client.set_backend(store)
+        try:
+            await traffic_all_dsps.handler({"creative_id": creative["id"], "dsps": "amazon,dv360"})
+            assert server.requests["GET"] == 2  # creative + campaign, once each
+            supabase_client.flush()
+        finally:
+            supabase_client.set_backend(previous)
+        assert {r["dsp"] for r in server.tables["trafficking_records"]} == {"amazon", "dv360"}
+
+    @pytest.mark.asyncio
+    async def test_search_tool_through_remote_store(self, server, store):
+        from dreamtraffic.tools.creative_db import search_creatives
+
+        campaign = store.insert_campaign(name="Remote Campaign")
+        store.insert_creative(campaign_id=campaign["id"], name="Spot", prompt="Volcano at dusk")
+        previous = supabase_client.set_backend(store)
+        try:
+            result = await search_creatives.handler({"query": "volcano"})
+        finally:
+            supabase_client.set_backend(previous)
+        hits = json.loads(result["content"][0]["text"])
+        assert [c["name"] for c in hits["creatives"]] == ["Spot"]
+
+    def test_approval_transition_through_remote_store(self, server, store):
+        from dreamtraffic.approval.workflow import ApprovalWorkflow
+
+        campaign = store.insert_campaign(name="Remote Campaign")
+        creative = store.insert_creative(campaign_id=campaign["id"], name="Spot")
+        previous = supabase_client.set_backend(store)
+        try:
+            result = ApprovalWorkflow().submit_for_review(creative["id"])
+            trail = ApprovalWorkflow().get_audit_trail(creative["id"])
+        finally:
+            supabase_client.set_backend(previous)
+        assert result["from_status"] == "draft"
+        assert server.tables["creatives"][0]["approval_status"] == "pending_review"
+        assert [e["to_status"] for e in trail] == ["pending_review"]
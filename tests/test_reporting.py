@@ -0,0 +1,81 @@
+"""Tests for the aggregated pipeline status report."""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from dreamtraffic.cli import cli
+from dreamtraffic.db import engine
+from dreamtraffic.db.engine import execute, executemany
+from dreamtraffic.db.reporting import pipeline_status
+
+
+@pytest.fixture
+def pipeline(test_db):
+    """Three campaigns; campaign 1 has creatives trafficked to several DSPs."""
+    executemany(
+        "INSERT INTO campaigns (id, name, advertiser) VALUES (?, ?, ?)",
+        [(2, "Second", "Acme"), (3, "Third", "Globex")],
+    )
+    execute("UPDATE campaigns SET advertiser = 'Acme' WHERE id = 1")
+    executemany(
+        "INSERT INTO creatives (id, campaign_id, name, approval_status) VALUES (?, ?, ?, ?)",
+        [(2, 1, "Second Creative", "approved"), (3, 3, "Globex Creative", "draft")],
+    )
+    executemany(
+        "INSERT INTO trafficking_records (creative_id, dsp) VALUES (?, ?)",
+        [(2, "thetradedesk"), (2, "amazon"), (2, "amazon"), (1, "dv360")],
+    )
+
+
+class TestPipelineStatus:
+    def test_full_report(self, pipeline):
+        report = pipeline_status()
+        assert report.total_campaigns == 3
+        assert [c.id for c in report.campaigns] == [1, 2, 3]
+        first = report.campaigns[0]
+        assert [(cr.id, cr.dsps) for cr in first.creatives] == [
+            (1, ["dv360"]), (2, ["amazon", "thetradedesk"]),
+        ]
+        assert report.campaigns[1].creatives == []
+
+    def test_two_queries_regardless_of_size(self, pipeline):
+        executemany(
+            "INSERT INTO creatives (campaign_id, name) VALUES (?, ?)",
+            [(1, f"bulk-{i}") for i in range(200)],
+        )
+        stats = engine.enable_instrumentation(slow_ms=1e9)
+        try:
+            pipeline_status()
+        finally:
+            engine.disable_instrumentation()
+        assert sum(s.calls for s in stats.top(100)) == 2
+
+    def test_pagination(self, pipeline):
+        page = pipeline_status(limit=2, offset=1)
+        assert [c.id for c in page.campaigns] == [2, 3]
+        assert page.total_campaigns == 3
+        past_end = pipeline_status(limit=2, offset=10)
+        assert past_end.campaigns == [] and past_end.total_campaigns == 3
+
+    def test_filters(self, pipeline):
+        assert [c.id for c in pipeline_status(campaign_ids=[1, 3]).campaigns] == [1, 3]
+        assert [c.id for c in pipeline_status(advertiser="Acme").campaigns] == [1, 2]
+        approved = pipeline_status(campaign_ids=[1], approval_status="approved")
+        assert [cr.id for cr in approved.campaigns[0].creatives] == [2]
+
+
+class TestStatusCommand:
+    def test_json_output(self, pipeline):
+        result = CliRunner().invoke(cli, ["status", "--json", "--limit", "1"])
+        assert result.exit_code == 0
+        data = json.loads(result.output)
+        assert data["total_campaigns"] == 3
+        assert data["campaigns"][0]["creatives"][1]["dsps"] == ["amazon", "thetradedesk"]
+
+    def test_table_output(self, pipeline):
+        result = CliRunner().invoke(cli, ["status", "--campaign-id", "1", "--campaign-id", "3"])
+        assert result.exit_code == 0
+        assert "Globex Creative" in result.output
+        assert "(ID: 2)" not in result.output
@@ -0,0 +1,99 @@
+"""Tests for the FTS5 search index over creative prompts and campaign briefs."""
+
+import json
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.bulk_io import import_records
+from dreamtraffic.db.engine import execute, fetch_one
+from dreamtraffic.db.search import match_expression, search_campaigns, search_creatives
+
+
+@pytest.fixture
+def prompts(test_db):
+    for name, prompt in [
+        ("Coastline", "A cinematic drone shot over a coastline at golden hour"),
+        ("Surf", "Surfers running into the waves at dawn, golden light"),
+        ("Golden Hour Kitchen", "A family cooking dinner in a sunlit kitchen"),
+    ]:
+        execute("INSERT INTO creatives (campaign_id, name, prompt) VALUES (1, ?, ?)", (name, prompt))
+
+
+def _names(hits):
+    return [h.name for h in hits]
+
+
+class TestMatchExpression:
+    @pytest.mark.parametrize("text, expected", [
+        ("golden hour", '"golden" "hour"'),
+        ('"golden hour" coast*', '"golden hour" "coast"*'),
+        ("drone OR (NEAR", '"drone" "OR" "NEAR"'),
+    ])
+    def test_terms_are_quoted(self, text, expected):
+        assert match_expression(text) == expected
+
+    def test_nothing_to_search(self):
+        with pytest.raises(ValueError):
+            match_expression(' "" * ')
+
+
+class TestSearch:
+    def test_ranked_with_name_weighted(self, prompts):
+        hits = search_creatives("golden")
+        assert _names(hits)[0] == "Golden Hour Kitchen"
+        assert set(_names(hits)) == {"Golden Hour Kitchen", "Coastline", "Surf"}
+        assert hits[0].score >= hits[1].score > 0
+
+    def test_stemming_prefix_and_snippet(self, prompts):
+        [hit] = search_creatives("surfer runs")
+        assert hit.name == "Surf"
+        assert "[Surfers] [running]" in hit.snippet
+        assert _names(search_creatives("coast*")) == ["Coastline"]
+
+    def test_index_follows_updates_and_deletes(self, prompts):
+        execute("UPDATE creatives SET prompt = 'Snowboarders at night' WHERE name = 'Surf'")
+        assert _names(search_creatives("surfers")) == []
+        assert _names(search_creatives("snowboard*")) == ["Surf"]
+        execute("DELETE FROM creatives WHERE name = 'Surf'")
+        assert search_creatives("snowboard*") == []
+
+    def test_campaign_filter(self, prompts):
+        execute("INSERT INTO campaigns (id, name) VALUES (2, 'Other')")
+        execute("INSERT INTO creatives (campaign_id, name, prompt) VALUES (2, 'Drone 2', 'drone')")
+        assert [h.campaign_id for h in search_creatives("drone")] == [2, 1]
+        assert _names(search_creatives("drone", campaign_id=2)) == ["Drone 2"]
+
+    def test_window_scores_newest_matches(self, prompts):
+        execute("INSERT INTO campaigns (id, name) VALUES (2, 'Other')")
+        execute("INSERT INTO creatives (campaign_id, name, prompt) VALUES (2, 'Golden 2', 'golden')")
+        execute("INSERT INTO creatives (campaign_id, name, prompt) VALUES (1, 'Late', 'golden')")
+        assert _names(search_creatives("golden", window=1)) == ["Late"]
+        # Filters apply before the window
+        assert _names(search_creatives("golden", campaign_id=2, window=1)) == ["Golden 2"]
+        assert len(search_creatives("golden")) == 5  # every match ranked by default
+
+    def test_campaign_briefs(self, test_db):
+        execute("INSERT INTO campaigns (name, advertiser, brief) VALUES ('Q3', 'Acme', 'Back to school')")
+        assert [h.name for h in search_campaigns("school")] == ["Q3"]
+        assert [h.name for h in search_campaigns("brief", advertiser="Test Advertiser")] == ["Test Campaign"]
+
+    def test_bulk_import_indexed(self, test_db):
+        import_records("creatives", [{"campaign_id": 1, "prompt": f"volcano {i}"} for i in range(5)])
+        assert len(search_creatives("volcano", limit=10)) == 5
+        row = fetch_one("SELECT COUNT(*) AS n FROM creatives_fts WHERE creatives_fts MATCH 'volcano'")
+        assert row["n"] == 5
+
+
+class TestSearchTool:
+    @pytest.mark.asyncio
+    async def test_search_creatives_tool(self, prompts):
+        from dreamtraffic.tools.creative_db import search_creatives as tool
+
+        result = await tool.handler({"query": "brief OR drone"})
+        hits = json.loads(result["content"][0]["text"])
+        assert [c["name"] for c in hits["creatives"]] == []  # quoted: OR is a word
+        result = await tool.handler({"query": "test"})
+        hits = json.loads(result["content"][0]["text"])
+        assert [c["name"] for c in hits["creatives"]] == ["Test Creative"]
+        assert [c["name"] for c in hits["campaigns"]] == ["Test Campaign"]
@@ -0,0 +1,117 @@
+"""Tests for the storage façade, SQLite backend, and request-scoped caching."""
+
+import json
+
+import pytest
+
+from dreamtraffic.db import supabase_client
+from dreamtraffic.db.store import SQLiteStore
+
+
+class CountingStore(SQLiteStore):
+    """SQLite store that counts backend reads."""
+
+    def __init__(self):
+        self.reads: list[str] = []
+
+    def get_creative(self, creative_id):
+        self.reads.append("creative")
+        return super().get_creative(creative_id)
+
+    def get_campaign(self, campaign_id):
+        self.reads.append("campaign")
+        return super().get_campaign(campaign_id)
+
+
+@pytest.fixture
+def counting_store():
+    store = CountingStore()
+    previous = supabase_client.set_backend(store)
+    yield store
+    supabase_client.set_backend(previous)
+
+
+class TestSQLiteStore:
+    def test_insert_and_get_campaign(self, test_db):
+        row = supabase_client.insert_campaign(
+            "Spring Launch", "Acme", "awareness", "adults", "olv", 5000.0,
+            "2026-03-01", "2026-03-31", "Brief text",
+        )
+        assert row["id"] > 1
+        assert supabase_client.get_campaign(row["id"])["advertiser"] == "Acme"
+
+    def test_insert_and_update_creative(self, test_db):
+        row = supabase_client.insert_creative(campaign_id=1, name="New", prompt="p")
+        assert row["approval_status"] == "draft"
+        updated = supabase_client.update_creative(row["id"], video_url="https://cdn/x.mp4")
+        assert updated["video_url"] == "https://cdn/x.mp4"
+        assert [c["id"] for c in supabase_client.get_creatives(campaign_id=1)] == [1, row["id"]]
+
+    def test_unknown_column_rejected(self, test_db):
+        with pytest.raises(ValueError, match="Unknown creatives column"):
+            supabase_client.update_creative(1, bogus="x")
+
+    def test_missing_rows(self, test_db):
+        assert supabase_client.get_creative(999) is None
+        assert supabase_client.update_creative(999, name="x") is None
+
+    def test_empty_generation_id_matches_nothing(self, test_db):
+        unsent = supabase_client.insert_creative(campaign_id=1, name="Unsent")
+        assert unsent["luma_generation_id"] == ""
+        assert supabase_client.set_video_urls([("", "https://cdn/x.mp4", 1)]) == 1
+        assert supabase_client.get_creative(unsent["id"])["video_url"] != "https://cdn/x.mp4"
+
+    def test_trafficking_records(self, test_db):
+        supabase_client.insert_trafficking_record(creative_id=1, dsp="amazon")
+        supabase_client.insert_trafficking_record(creative_id=1, dsp="dv360")
+        records = supabase_client.get_trafficking_records(creative_id=1)
+        assert [r["dsp"] for r in records] == ["amazon", "dv360"]
+
+    def test_approval_events(self, test_db):
+        supabase_client.insert_approval_event(1, "draft", "pending_review", "system", "")
+        events = supabase_client.get_approval_events(1)
+        assert events[0]["to_status"] == "pending_review"
+
+    def test_unknown_backend(self, monkeypatch):
+        monkeypatch.setattr("dreamtraffic.db.supabase_client.STORE_BACKEND", "nope")
+        previous = supabase_client.set_backend(None)
+        try:
+            with pytest.raises(ValueError, match="Unknown storage backend"):
+                supabase_client.get_backend()
+        finally:
+            supabase_client.set_backend(previous)
+
+
+class TestRequestScope:
+    def test_no_caching_outside_scope(self, test_db, counting_store):
+        supabase_client.get_creative(1)
+        supabase_client.get_creative(1)
+        assert counting_store.reads == ["creative", "creative"]
+
+    def test_reads_cached_within_scope(self, test_db, counting_store):
+        with supabase_client.request_scope():
+            first = supabase_client.get_creative(1)
+            first["name"] = "mutated"
+            second = supabase_client.get_creative(1)
+        assert counting_store.reads == ["creative"]
+        assert second["name"] == "Test Creative"
+
+    def test_write_invalidates_cache(self, test_db, counting_store):
+        with supabase_client.request_scope():
+            supabase_client.get_creative(1)
+            supabase_client.update_creative(1, approval_status="pending_review")
+            assert supabase_client.get_creative(1)["approval_status"] == "pending_review"
+        assert counting_store.reads == ["creative", "creative"]
+
+    @pytest.mark.asyncio
+    async def test_traffic_all_dsps_reads_once(self, test_db, counting_store):
+        from dreamtraffic.tools.trafficking import traffic_all_dsps
+
+        supabase_client.update_creative(1, approval_status="approved")
+        counting_store.reads.clear()
+        result = await traffic_all_dsps.handler({"creative_id": 1, "dsps": "amazon,thetradedesk,dv360"})
+
+        results = json.loads(result["content"][0]["text"])
+        assert [r["dsp"] for r in results] == ["amazon", "thetradedesk", "dv360"]
+        assert counting_store.reads == ["creative", "campaign"]
+        assert len(supabase_client.get_trafficking_records(creative_id=1)) == 3
@@ -0,0 +1,135 @@
+"""Tests for the trigger-maintained pipeline summary tables."""
+
+import sqlite3
+
+from dreamtraffic.approval.workflow import ApprovalWorkflow
+from dreamtraffic.db.engine import execute, executemany, fetch_all, fetch_one
+from dreamtraffic.db.migrations import MIGRATIONS, init_db
+from dreamtraffic.db.reporting import pipeline_status
+
+
+def _counts(campaign_id):
+    rows = fetch_all(
+        "SELECT approval_status, creative_count FROM campaign_status_counts WHERE campaign_id = ?",
+        (campaign_id,),
+    )
+    return {r["approval_status"]: r["creative_count"] for r in rows}
+
+
+def _summary(creative_id):
+    return fetch_one("SELECT * FROM creative_summary WHERE creative_id = ?", (creative_id,))
+
+
+def _mask(*dsps):
+    bits = fetch_all("SELECT dsp, bit FROM dsp_bits")
+    return sum(1 << r["bit"] for r in bits if r["dsp"] in dsps)
+
+
+class TestCampaignStatusCounts:
+    def test_insert_update_delete(self, test_db):
+        assert _counts(1) == {"draft": 1}
+        execute("INSERT INTO creatives (id, campaign_id, name) VALUES (2, 1, 'b')")
+        assert _counts(1) == {"draft": 2}
+        execute("UPDATE creatives SET approval_status = 'approved' WHERE id = 2")
+        assert _counts(1) == {"draft": 1, "approved": 1}
+        execute("DELETE FROM creatives WHERE id = 2")
+        assert _counts(1) == {"draft": 1}
+        assert _summary(2) is None
+
+    def test_workflow_transitions(self, test_db):
+        workflow = ApprovalWorkflow()
+        workflow.submit_for_review(1)
+        workflow.approve(1)
+        assert _counts(1) == {"approved": 1}
+        summary = _summary(1)
+        assert summary["approval_event_count"] == 2
+        assert summary["last_transition_at"]
+
+
+class TestCreativeSummary:
+    def test_dsp_mask_and_counts(self, test_db):
+        executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp, audit_status) VALUES (?, ?, ?)",
+            [(1, "amazon", "pending"), (1, "dv360", "pending"), (1, "amazon", "approved")],
+        )
+        summary = _summary(1)
+        assert summary["dsp_mask"] == _mask("amazon", "dv360")
+        assert summary["trafficking_count"] == 3
+
+        execute("DELETE FROM trafficking_records WHERE dsp = 'dv360'")
+        assert _summary(1)["dsp_mask"] == _mask("amazon")
+        assert _summary(1)["trafficking_count"] == 2
+
+    def test_unknown_dsp_gets_new_bit(self, test_db):
+        execute("INSERT INTO trafficking_records (creative_id, dsp) VALUES (1, 'newdsp')")
+        bit = fetch_one("SELECT bit FROM dsp_bits WHERE dsp = 'newdsp'")["bit"]
+        assert bit == fetch_one("SELECT MAX(bit) AS b FROM dsp_bits")["b"]
+        assert _summary(1)["dsp_mask"] == 1 << bit
+
+
+class TestDspAuditStatus:
+    def test_latest_status_per_dsp(self, test_db):
+        execute("INSERT INTO trafficking_records (id, creative_id, dsp, audit_status) VALUES (1, 1, 'amazon', 'pending')")
+        execute("UPDATE trafficking_records SET audit_status = 'approved' WHERE id = 1")
+        execute("INSERT INTO trafficking_records (id, creative_id, dsp, audit_status) VALUES (2, 1, 'dv360', 'under_review')")
+        rows = fetch_all("SELECT dsp, audit_status FROM dsp_audit_status WHERE creative_id = 1 ORDER BY dsp")
+        assert [(r["dsp"], r["audit_status"]) for r in rows] == [("amazon", "approved"), ("dv360", "under_review")]
+
+        execute("DELETE FROM trafficking_records WHERE id = 2")
+        assert fetch_one("SELECT * FROM dsp_audit_status WHERE dsp = 'dv360'") is None
+
+
+class TestReportUsesSummaries:
+    def test_report_matches_fact_tables(self, test_db):
+        executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp, audit_status) VALUES (?, ?, ?)",
+            [(1, "thetradedesk", "pending"), (1, "amazon", "approved")],
+        )
+        campaign = pipeline_status().campaigns[0]
+        assert campaign.status_counts == {"draft": 1}
+        creative = campaign.creatives[0]
+        assert creative.dsps == ["amazon", "thetradedesk"]
+        assert creative.audit_status == {"amazon": "approved", "thetradedesk": "pending"}
+
+
+    def test_dsps_past_the_bit_cap(self, test_db):
+        dsps = [f"dsp-{i:02d}" for i in range(70)]
+        executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp) VALUES (1, ?)", [(d,) for d in dsps]
+        )
+        assert fetch_one("SELECT MAX(bit) AS b FROM dsp_bits")["b"] == 62
+        mask = _summary(1)["dsp_mask"]
+        assert mask == _mask(*dsps) and 0 < mask < 1 << 63
+        # The 12 DSPs without a bit are still reported, read off dsp_audit_status
+        assert pipeline_status().campaigns[0].creatives[0].dsps == dsps
+
+class TestBackfill:
+    def test_existing_rows_summarized_on_upgrade(self, tmp_path):
+        path = tmp_path / "v3.db"
+        conn = sqlite3.connect(path)
+        for migration in MIGRATIONS[:3]:
+            migration.run(conn)
+        conn.execute("PRAGMA user_version = 3")
+        conn.execute("INSERT INTO campaigns (id, name) VALUES (1, 'c')")
+        conn.executemany(
+            "INSERT INTO creatives (id, campaign_id, approval_status) VALUES (?, 1, ?)",
+            [(1, "draft"), (2, "approved"), (3, "approved")],
+        )
+        conn.executemany(
+            "INSERT INTO trafficking_records (creative_id, dsp, audit_status) VALUES (?, ?, ?)",
+            [(2, "amazon", "pending"), (2, "legacydsp", "approved"), (2, "amazon", "approved")],
+        )
+        conn.commit()
+        conn.close()
+
+        init_db(path)
+        assert {r["approval_status"]: r["creative_count"] for r in fetch_all(
+            "SELECT * FROM campaign_status_counts", db_path=path)} == {"draft": 1, "approved": 2}
+        summary = fetch_one("SELECT * FROM creative_summary WHERE creative_id = 2", db_path=path)
+        assert summary["trafficking_count"] == 3
+        assert bin(summary["dsp_mask"]).count("1") == 2
+        audit = fetch_one(
+            "SELECT audit_status FROM dsp_audit_status WHERE creative_id = 2 AND dsp = 'amazon'",
+            db_path=path,
+        )
+        assert audit["audit_status"] == "approved"
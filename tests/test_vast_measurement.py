@@ -160,3 +160,52 @@ class TestVastWrapper:
         root = ET.fromstring(xml)
         events = root.findall(".//v:Tracking", NS)
         assert len(events) > 0
+
+
+class TestVastTemplates:
+    SPECIAL = dict(
+        video_url="https://cdn.example.com/v.mp4?a=1&b=<2>",
+        ad_id='dt-"q"&<>',
+        title='Tom & Jerry\'s "Big" <Day> {x}',
+        advertiser="Café — 日本",
+        click_through="https://x.test/?u=1&v='2'",
+        vendors=["moat", "ias"],
+    )
+
+    @staticmethod
+    def minidom_pretty(xml):
+        """What the ElementTree + minidom renderer produced for the same document."""
+        from xml.dom.minidom import parseString
+        xml = xml.replace(' xmlns="http://www.iab.com/VAST"', "", 1)
+        pretty = parseString(xml).toprettyxml(indent="  ").split("\n", 1)[1].strip()
+        return pretty.replace('<VAST version="4.2">', '<VAST version="4.2" xmlns="http://www.iab.com/VAST">')
+
+    @pytest.mark.parametrize("kwargs", [
+        {"video_url": "https://cdn.example.com/video.mp4", "ad_id": "dt-1"},
+        {"video_url": "", "title": "", "vendors": [], "ad_id": "dt-2"},
+        SPECIAL,
+    ])
+    def test_pretty_matches_minidom_layout(self, kwargs):
+        compact = VastGenerator(pretty=False).generate_inline(**kwargs)
+        assert "\n" not in compact
+        assert VastGenerator().generate_inline(**kwargs) == self.minidom_pretty(compact)
+
+    def test_wrapper_pretty_matches_minidom_layout(self):
+        kwargs = {"vast_ad_tag_uri": "https://vast.example.com/original?a=1&b=2", "vendors": ["doubleverify"],
+                  "ad_id": "dt-wrapper-1"}
+        compact = VastGenerator(pretty=False).generate_wrapper(**kwargs)
+        assert VastGenerator().generate_wrapper(**kwargs) == self.minidom_pretty(compact)
+
+    def test_values_are_escaped(self):
+        xml = VastGenerator(pretty=False).generate_inline(**self.SPECIAL)
+        root = ET.fromstring(xml)
+        assert root.find("v:Ad", NS).get("id") == self.SPECIAL["ad_id"]
+        assert root.find(".//v:AdTitle", NS).text == self.SPECIAL["title"]
+        assert root.find(".//v:MediaFile", NS).text == self.SPECIAL["video_url"]
+        assert root.find(".//v:ClickThrough", NS).text == self.SPECIAL["click_through"]
+        assert [v.get("vendor") for v in root.iterfind(".//v:Verification", NS)] == [VENDORS[k].vendor_key for k in ("moat", "ias")]
+
+    def test_blank_text_is_self_closing(self):
+        xml = VastGenerator(pretty=False).generate_inline(video_url="", title="", ad_id="dt-1")
+        assert "<AdTitle/>" in xml and "<Advertiser>DreamTraffic Demo</Advertiser>" in xml
+        assert ET.fromstring(xml).find(".//v:MediaFile", NS).get("bitrate") == "5000"